@@ -70,23 +70,88 @@ from . import config    # noqa: E402
 from .config import (set_option, get_option, reset_option, describe_option,
                      options, option_context)    # noqa: E402
 
-# CAS utilities
-from .cas import (CAS, vl, nil, getone, getnext, datamsghandlers, blob)    # noqa: E402
-from .cas.table import CASTable    # noqa: E402
-
-# Conflicts with .cas.table, so we import it excplicitly here
-from .cas.utils import table    # noqa: E402
-
-# DataFrame with SAS metadata
-from .dataframe import SASDataFrame, reshape_bygroups    # noqa: E402
-
-# Functions
-from .functions import concat, merge    # noqa: E402
-
 # Exceptions
 from .exceptions import SWATError, SWATOptionError, SWATCASActionError    # noqa: E402
 
-# SAS Formatter
-from .formatter import SASFormatter    # noqa: E402
-
 __version__ = '1.3.1-dev'
+
+# Everything else is imported when it is first used, so that importing
+# swat does not load pandas and the CAS connection classes.
+# Maps attribute names to (module, attribute) pairs.  An attribute of None
+# returns the module itself.
+_LAZY_ATTRS = {
+    # Subpackages
+    'cas': ('.cas', None),
+    'dataframe': ('.dataframe', None),
+    'formatter': ('.formatter', None),
+    'functions': ('.functions', None),
+    'notebook': ('.notebook', None),
+
+    # CAS utilities
+    'CAS': ('.cas', 'CAS'),
+    'CASPool': ('.cas', 'CASPool'),
+    'vl': ('.cas', 'vl'),
+    'nil': ('.cas', 'nil'),
+    'getone': ('.cas', 'getone'),
+    'getnext': ('.cas', 'getnext'),
+    'datamsghandlers': ('.cas.datamsghandlers', None),
+    'blob': ('.cas', 'blob'),
+    'as_completed': ('.cas', 'as_completed'),
+    'CASTable': ('.cas.table', 'CASTable'),
+    'CASDiskTable': ('.cas.storage', 'CASDiskTable'),
+
+    # Conflicts with .cas.table, so we map it explicitly here
+    'table': ('.cas.utils', 'table'),
+
+    # DataFrame with SAS metadata
+    'SASDataFrame': ('.dataframe', 'SASDataFrame'),
+    'reshape_bygroups': ('.dataframe', 'reshape_bygroups'),
+
+    # Functions
+    'concat': ('.functions', 'concat'),
+    'merge': ('.functions', 'merge'),
+
+    # Client-side profiling
+    'profile': ('.cas.profiling', 'profile'),
+
+    # Client metrics
+    'get_metrics': ('.cas.metrics', 'get_metrics'),
+
+    # SAS Formatter
+    'SASFormatter': ('.formatter', 'SASFormatter'),
+}
+
+
+# Star imports load the lazily imported attributes too.  The names must
+# be native strings in Python 2.
+__all__ = [str(x) for x in sorted(_LAZY_ATTRS) + [
+    'config', 'set_option', 'get_option', 'reset_option', 'describe_option',
+    'options', 'option_context', 'SWATError', 'SWATOptionError', 'SWATCASActionError',
+]]
+
+
+def _load_attr(name):
+    ''' Import a lazily loaded attribute and store it in the module '''
+    import importlib
+    modname, attr = _LAZY_ATTRS[name]
+    out = importlib.import_module(modname, __name__)
+    if attr is not None:
+        out = getattr(out, attr)
+    globals()[name] = out
+    return out
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _LAZY_ATTRS:
+            return _load_attr(name)
+        raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+else:
+    # Module __getattr__ is not supported, so import everything now
+    for _name in list(_LAZY_ATTRS):
+        _load_attr(_name)
+    del _name
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+End-to-end client benchmarks
+
+The benchmarks run against an in-process :class:`StandInServer`, so
+they measure the client-side cost of connecting, calling actions,
+fetching, and uploading data without requiring a CAS server.
+They can be run from the command line using ``python -m swat.benchmarks``.
+With ``--replay``, the stand-in responses are recorded once and served
+from the recording, so only the client-side cost is measured.
+With ``--startup``, the time to import SWAT in a new interpreter is
+measured instead.
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from .server import StandInServer
+from ..utils.compat import OrderedDict
+from ..utils.config import option_context
+
+BENCHMARKS = ['connect', 'action', 'summary', 'fetch', 'upload']
+
+# Code timed in a new interpreter by the startup benchmarks
+STARTUP_BENCHMARKS = OrderedDict([
+    ('import', 'import swat'),
+    ('import-cas', 'import swat; swat.CAS'),
+])
+
+_STARTUP_SCRIPT = '''
+import sys, timeit
+start = timeit.default_timer()
+%s
+elapsed = timeit.default_timer() - start
+sys.stdout.write('%%r %%d' %% (elapsed, len(sys.modules)))
+'''
+
+
+def _stats(name, times, nrows=None, nbytes=None):
+    ''' Summarize the timings of a benchmark '''
+    times = sorted(times)
+    total = sum(times)
+    mean = total / len(times)
+    out = OrderedDict()
+    out['name'] = name
+    out['repeat'] = len(times)
+    out['min_ms'] = times[0] * 1000
+    out['median_ms'] = times[len(times) // 2] * 1000
+    out['mean_ms'] = mean * 1000
+    out['max_ms'] = times[-1] * 1000
+    out['rows_per_sec'] = nrows and mean and nrows / mean or None
+    out['mb_per_sec'] = nbytes and mean and nbytes / mean / 1024 ** 2 or None
+    return out
+
+
+def _time(func, repeat):
+    ''' Time `repeat` calls of `func` after a warm-up call '''
+    func()
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        func()
+        times.append(timeit.default_timer() - start)
+    return times
+
+
+def _phases(conn, connect, nrows, frame):
+    ''' Return the benchmark functions and the stand-in byte counter for each '''
+    tbl = conn.CASTable('DATA')
+    return {
+        'connect': (connect, None),
+        'action': (lambda: conn.retrieve('builtins.echo', _messagelevel='error'),
+                   None),
+        'summary': (lambda: conn.retrieve('simple.summary', table=tbl,
+                                          _messagelevel='error'), None),
+        'fetch': (lambda: conn.retrieve('table.fetch', table=tbl, to=nrows,
+                                        maxrows=nrows, _messagelevel='error'),
+                  'bytes_sent'),
+        'upload': (lambda: conn.upload_frame(frame,
+                                             casout=dict(name='UPLOAD',
+                                                         replace=True)),
+                   'bytes_received'),
+    }
+
+
+def run_benchmarks(benchmarks=None, nrows=10000, ncolumns=10, latency=0.0,
+                   repeat=5, replay=False):
+    '''
+    Run the client benchmarks against a stand-in server
+
+    Parameters
+    ----------
+    benchmarks : list of strings, optional
+        The benchmarks to run: 'connect', 'action', 'summary', 'fetch',
+        and 'upload'.  By default, all benchmarks are run.
+    nrows : int, optional
+        The number of rows fetched and uploaded
+    ncolumns : int, optional
+        The number of columns in the fetched and uploaded tables
+    latency : float, optional
+        The number of seconds the server delays each action call
+    repeat : int, optional
+        The number of timed runs of each benchmark
+    replay : boolean, optional
+        If True, the responses of the stand-in server are recorded once
+        and the timed runs are served from the recording.  This measures
+        only the client-side cost of each benchmark.
+
+    Returns
+    -------
+    list of dicts
+        The name, number of runs, min / median / mean / max latency in
+        milliseconds, and throughput in rows per second and megabytes
+        per second of each benchmark
+
+    '''
+    import pandas as pd
+    from ..cas.connection import CAS
+
+    if benchmarks is None:
+        benchmarks = BENCHMARKS
+    for name in benchmarks:
+        if name not in BENCHMARKS:
+            raise ValueError('Unknown benchmark: %s' % name)
+
+    frame = pd.DataFrame(dict(('c%d' % i, [float(x) for x in range(nrows)])
+                              for i in range(ncolumns)))
+
+    results = []
+    record = None
+
+    with StandInServer(nrows=nrows, ncolumns=ncolumns, latency=latency) as server:
+
+        def new_connection():
+            ''' Connect to the stand-in server '''
+            return CAS(server.url, username='user', password='password')
+
+        if replay:
+            fdesc, record = tempfile.mkstemp(suffix='.jsonl')
+            os.close(fdesc)
+
+        # Measure the data transferred by each benchmark
+        nbytes = {}
+        with option_context('cas.rest.record_file', record or ''):
+            conn = new_connection()
+            try:
+                phases = _phases(conn, lambda: new_connection().close(), nrows, frame)
+                for name in benchmarks:
+                    func, counter = phases[name]
+                    server.reset_stats()
+                    func()
+                    nbytes[name] = counter and server.stats[counter] or None
+            finally:
+                conn.close()
+
+        if replay:
+            def new_connection():
+                ''' Connect to the recording '''
+                return CAS(record, protocol='replay')
+
+        conn = new_connection()
+        try:
+            phases = _phases(conn, lambda: new_connection().close(), nrows, frame)
+            for name in benchmarks:
+                func, counter = phases[name]
+                results.append(_stats(name, _time(func, repeat),
+                                      nrows=counter and nrows or None,
+                                      nbytes=nbytes[name]))
+        finally:
+            conn.close()
+            if record:
+                os.remove(record)
+
+    return results
+
+
+def _time_startup(code):
+    ''' Run `code` in a new interpreter and return the time and module count '''
+    env = dict(os.environ)
+    path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env['PYTHONPATH'] = os.pathsep.join([path] + [x for x in
+                                                  [env.get('PYTHONPATH')] if x])
+    out = subprocess.check_output([sys.executable, '-c', _STARTUP_SCRIPT % code],
+                                  env=env)
+    elapsed, nmodules = out.decode('utf-8').split()
+    return float(elapsed), int(nmodules)
+
+
+def run_startup_benchmarks(benchmarks=None, repeat=5):
+    '''
+    Time importing SWAT in new interpreters
+
+    Each run starts a new Python process, so the timings include loading
+    all of the modules SWAT depends on, as a command-line tool or
+    serverless function would on a cold start.
+
+    Parameters
+    ----------
+    benchmarks : list of strings, optional
+        The benchmarks to run: 'import' (``import swat``) and 'import-cas'
+        (``import swat`` followed by accessing :class:`swat.CAS`).  By
+        default, all benchmarks are run.
+    repeat : int, optional
+        The number of timed runs of each benchmark
+
+    Returns
+    -------
+    list of dicts
+        The same statistics as :func:`run_benchmarks`, plus the number of
+        modules loaded in 'modules'
+
+    '''
+    if benchmarks is None:
+        benchmarks = list(STARTUP_BENCHMARKS)
+    for name in benchmarks:
+        if name not in STARTUP_BENCHMARKS:
+            raise ValueError('Unknown benchmark: %s' % name)
+
+    results = []
+    for name in benchmarks:
+        # The first run fills the bytecode and file system caches
+        _time_startup(STARTUP_BENCHMARKS[name])
+        runs = [_time_startup(STARTUP_BENCHMARKS[name]) for _ in range(repeat)]
+        out = _stats(name, [x[0] for x in runs])
+        out['modules'] = runs[-1][1]
+        results.append(out)
+    return results
+
+
+def format_results(results):
+    '''
+    Format benchmark results as a text table
+
+    Parameters
+    ----------
+    results : list of dicts
+        The output of :func:`run_benchmarks`
+
+    Returns
+    -------
+    string
+
+    '''
+    header = '%-10s %6s %10s %10s %10s %10s %12s %8s' % (
+        'benchmark', 'repeat', 'min ms', 'median ms', 'mean ms', 'max ms',
+        'rows/s', 'MB/s')
+    lines = [header, '-' * len(header)]
+    for item in results:
+        lines.append('%-10s %6d %10.2f %10.2f %10.2f %10.2f %12s %8s' % (
+            item['name'], item['repeat'], item['min_ms'], item['median_ms'],
+            item['mean_ms'], item['max_ms'],
+            item['rows_per_sec'] and '%.0f' % item['rows_per_sec'] or '-',
+            item['mb_per_sec'] and '%.2f' % item['mb_per_sec'] or '-'))
+    return '\n'.join(lines)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Command-line interface for the client benchmarks
+
+Usage::
+
+    python -m swat.benchmarks [--rows N] [--columns N] [--latency SECONDS]
+                              [--repeat N] [--replay] [--json] [benchmark ...]
+    python -m swat.benchmarks --startup [--repeat N] [--json] [benchmark ...]
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import argparse
+import json
+import sys
+from . import (BENCHMARKS, STARTUP_BENCHMARKS, run_benchmarks,
+               run_startup_benchmarks, format_results)
+
+
+def main(args=None):
+    ''' Run the benchmarks and print the results '''
+    parser = argparse.ArgumentParser(prog='python -m swat.benchmarks',
+                                     description='Run the SWAT client benchmarks '
+                                                 'against a local stand-in server.')
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+                        help='benchmarks to run: %s, or with --startup: %s '
+                             '(default: all)' % (', '.join(BENCHMARKS),
+                                                 ', '.join(STARTUP_BENCHMARKS)))
+    parser.add_argument('--rows', type=int, default=10000,
+                        help='number of rows fetched and uploaded')
+    parser.add_argument('--columns', type=int, default=10,
+                        help='number of columns in the data')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='server delay in seconds for each action call')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of timed runs of each benchmark')
+    parser.add_argument('--replay', action='store_true',
+                        help='time recorded responses rather than the server')
+    parser.add_argument('--startup', action='store_true',
+                        help='time importing swat in a new interpreter')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    opts = parser.parse_args(args)
+
+    names = opts.startup and STARTUP_BENCHMARKS or BENCHMARKS
+    for name in opts.benchmarks:
+        if name not in names:
+            parser.error('unknown benchmark: %s' % name)
+
+    if opts.startup:
+        results = run_startup_benchmarks(benchmarks=opts.benchmarks or None,
+                                         repeat=opts.repeat)
+    else:
+        results = run_benchmarks(benchmarks=opts.benchmarks or None, nrows=opts.rows,
+                                 ncolumns=opts.columns, latency=opts.latency,
+                                 repeat=opts.repeat, replay=opts.replay)
+
+    if opts.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
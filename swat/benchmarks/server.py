@@ -0,0 +1,578 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+In-process stand-in for the CAS REST interface
+
+The :class:`StandInServer` implements the subset of the CAS REST
+interface used by :class:`swat.cas.rest.REST_CASConnection` (sessions,
+action calls, and ``table.upload``).  Action results are synthetic
+tables of a configurable size, and each request can be delayed to
+simulate network latency.  It is intended for benchmarks and tests
+that must run without a CAS server.
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+import six
+from six.moves import BaseHTTPServer, socketserver
+from ..utils.compat import a2u
+
+# Action sets and actions known to the server
+ACTIONS = {
+    'builtins': ['cascommon', 'echo', 'help', 'queryactionset', 'queryname',
+                 'reflect', 'serverstatus'],
+    'session': ['sessionname', 'endsession'],
+    'sessionprop': ['setsessopt', 'getsessopt'],
+    'table': ['columninfo', 'droptable', 'fetch', 'partition', 'promote',
+              'recordcount', 'tableinfo', 'upload'],
+    'simple': ['numrows', 'summary'],
+    'sampling': ['srs', 'stratified'],
+    'datastep': ['runcode'],
+}
+
+# Table parameters used to populate CASTable
+_TABLE_PARAMS = ['name', 'caslib', 'where', 'groupby', 'groupbyfmts',
+                 'groupbymode', 'orderby', 'computedvars', 'computedvarsprogram',
+                 'computedondemand', 'vars', 'singlepass', 'importoptions',
+                 'ondemand', 'replace']
+_OUTTABLE_PARAMS = ['name', 'caslib', 'label', 'replace', 'promote', 'copies',
+                    'compress', 'indexvars', 'replication', 'threadblocksize',
+                    'maxmemsize', 'lifetime', 'memoryformat', 'tabletype',
+                    'where', 'timestamp']
+
+_SUMMARY_STATS = ['Min', 'Max', 'N', 'NMiss', 'Mean', 'Sum', 'Std', 'StdErr',
+                  'Var', 'USS', 'CSS', 'CV', 'TValue', 'ProbT', 'Skewness',
+                  'Kurtosis']
+
+
+def _table(name, columns, rows, label=None, title=None):
+    '''
+    Create a table in the CAS REST result format
+
+    Parameters
+    ----------
+    name : string
+        The table name
+    columns : list of (name, type) tuples
+        The column names and types
+    rows : list of lists
+        The table data
+    label : string, optional
+        The table label
+    title : string, optional
+        The table title
+
+    Returns
+    -------
+    dict
+
+    '''
+    return {
+        '_ctb': True,
+        'name': name,
+        'label': label or '',
+        'title': title or '',
+        'attributes': {},
+        'schema': [{'name': cname, 'label': '', 'type': ctype,
+                    'width': ctype == 'double' and 8 or 32,
+                    'format': '', 'attributes': {}}
+                   for cname, ctype in columns],
+        'rows': rows,
+    }
+
+
+def _param(name, ptype='string', **kwargs):
+    ''' Create reflection information for a parameter '''
+    out = dict(name=name, parmType=ptype, desc='specifies the %s.' % name)
+    out.update(kwargs)
+    return out
+
+
+def _reflect_actionset(asname):
+    ''' Create reflection information for an action set '''
+    table = _param('table', 'value_list', isTableDef=True,
+                   parmList=[_param(x) for x in _TABLE_PARAMS])
+    actions = []
+    for actname in ACTIONS[asname]:
+        params = [table]
+        if actname == 'fetch':
+            params = params + [_param('from', 'int64'), _param('to', 'int64'),
+                               _param('maxrows', 'int32'),
+                               _param('index', 'boolean'),
+                               _param('sortby', 'value_list')]
+        elif actname == 'summary':
+            params = params + [_param('inputs', 'value_list', isVar=True),
+                               _param('subset', 'value_list')]
+        elif asname == 'sampling':
+            params = params + [_param('samppct', 'double'), _param('seed', 'int64'),
+                               _param('output', 'value_list',
+                                      parmList=[_param('casout', 'value_list'),
+                                                _param('copyvars', 'value_list')])]
+        elif actname == 'cascommon':
+            params = [_param('castable', 'value_list',
+                             parmList=[_param(x) for x in _TABLE_PARAMS]),
+                      _param('casouttable', 'value_list',
+                             parmList=[_param(x) for x in _OUTTABLE_PARAMS])]
+        elif asname == 'builtins':
+            params = [_param('name'), _param('actionset')]
+        actions.append(dict(name=actname, desc='%s action.' % actname.title(),
+                            params=params))
+    return dict(name=asname, label='%s action set' % asname.title(),
+                actions=actions)
+
+
+class _StandInHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    ''' Threaded HTTP server that carries a reference to the stand-in '''
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _StandInRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    ''' Dispatch CAS REST requests to the stand-in '''
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        ''' Disable Nagle's algorithm so small responses are not delayed '''
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        ''' Suppress request logging '''
+        return
+
+    def _read_body(self):
+        ''' Read the request body '''
+        length = int(self.headers.get('Content-Length') or 0)
+        return length and self.rfile.read(length) or b''
+
+    def _dispatch(self, method):
+        ''' Handle any request method '''
+        body = self._read_body()
+        standin = self.server.standin
+        code, out = standin.handle(method, self.path, body,
+                                   dict(self.headers.items()))
+        data = json.dumps(out).encode('utf-8')
+        standin._count(len(body), len(data))
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        ''' Handle GET requests '''
+        self._dispatch('GET')
+
+    def do_PUT(self):
+        ''' Handle PUT requests '''
+        self._dispatch('PUT')
+
+    def do_POST(self):
+        ''' Handle POST requests '''
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        ''' Handle DELETE requests '''
+        self._dispatch('DELETE')
+
+
+class StandInServer(object):
+    '''
+    Create an in-process stand-in for a CAS REST server
+
+    Parameters
+    ----------
+    nrows : int, optional
+        The number of rows in the synthetic table returned by ``table.fetch``
+    ncolumns : int, optional
+        The number of columns in the synthetic table.  Columns alternate
+        between numeric and character.
+    latency : float, optional
+        The number of seconds to delay each action call
+    hostname : string, optional
+        The interface to listen on
+    port : int, optional
+        The port to listen on.  By default, a free port is chosen.
+
+    Examples
+    --------
+    >>> with StandInServer(nrows=10000) as server:
+    ...     conn = swat.CAS(server.url)
+    ...     conn.CASTable('data').fetch(to=10000)
+
+    Returns
+    -------
+    :class:`StandInServer` object
+
+    '''
+
+    def __init__(self, nrows=1000, ncolumns=10, latency=0.0,
+                 hostname='127.0.0.1', port=0):
+        self.nrows = int(nrows)
+        self.ncolumns = int(ncolumns)
+        self.latency = float(latency)
+        self.hostname = hostname
+        self.port = port
+        self.sessions = {}
+        self.stats = dict(requests=0, actions=0, bytes_received=0, bytes_sent=0)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._summary = None
+        self._columns = [('c%d' % i, i % 2 and 'string' or 'double')
+                         for i in range(self.ncolumns)]
+        self._rows = [[float(r * self.ncolumns + c) if ctype == 'double'
+                       else 'value %d.%d' % (r, c)
+                       for c, (_, ctype) in enumerate(self._columns)]
+                      for r in range(self.nrows)]
+
+    @property
+    def url(self):
+        ''' The base URL of the running server '''
+        return 'http://%s:%d/' % (self.hostname, self.port)
+
+    def start(self):
+        '''
+        Start the server in a background thread
+
+        Returns
+        -------
+        `self`
+
+        '''
+        if self._server is None:
+            self._server = _StandInHTTPServer((self.hostname, self.port),
+                                              _StandInRequestHandler)
+            self._server.standin = self
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        ''' Stop the server '''
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def reset_stats(self):
+        ''' Reset the request counters '''
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def _count(self, nreceived, nsent):
+        ''' Update the request counters '''
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_received'] += nreceived
+            self.stats['bytes_sent'] += nsent
+
+    def handle(self, method, path, body, headers):
+        '''
+        Handle a request
+
+        Parameters
+        ----------
+        method : string
+            The HTTP method
+        path : string
+            The request path
+        body : bytes
+            The request body
+        headers : dict
+            The request headers
+
+        Returns
+        -------
+        (int, dict)
+            The HTTP status code and the JSON response
+
+        '''
+        path = path.split('?', 1)[0].strip('/')
+
+        if path == 'cas/sessions' and method == 'PUT':
+            session = '%s' % uuid.uuid4()
+            self.sessions[session] = {'tables': {}}
+            return 200, {'session': session}
+
+        match = re.match(r'^cas/sessions/([^/]+)(?:/actions/([\w.]+))?$', path)
+        if not match:
+            return 404, {'error': 'Not found: %s' % path}
+
+        session, action = match.groups()
+        if session not in self.sessions:
+            return 404, {'error': 'Session %s was not found.' % session}
+
+        if action is None:
+            if method == 'DELETE':
+                del self.sessions[session]
+                return 200, {}
+            return 200, {'uuid': session}
+
+        with self._lock:
+            self.stats['actions'] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if action.lower() == 'table.upload':
+            params = json.loads(a2u(headers.get('JSON-Parameters', '{}')))
+            return 200, self._upload(session, params, body)
+
+        params = body and json.loads(a2u(body, 'utf-8')) or {}
+        return 200, self._invoke(session, action, params)
+
+    def _response(self, results, severity='Normal', status=None, reason='ok',
+                  status_code=0, messages=None, changed=None):
+        ''' Create an action response '''
+        return {
+            'disposition': {'severity': severity, 'reason': reason,
+                            'statusCode': status_code,
+                            'formattedStatus': status},
+            'logEntries': [{'message': x} for x in (messages or [])],
+            'changedResources': changed or [],
+            'metrics': {'elapsedTime': self.latency},
+            'results': results,
+        }
+
+    def _error(self, status):
+        ''' Create an error response '''
+        return self._response({}, severity='Error', status=status,
+                              reason='abort', status_code=2720400,
+                              messages=['ERROR: %s' % status])
+
+    def _upload(self, session, params, data):
+        ''' Handle the table.upload endpoint '''
+        casout = params.get('casout') or {}
+        name = casout.get('name', 'upload').upper()
+        caslib = casout.get('caslib', 'CASUSER')
+        nrows = max(data.count(b'\n') - 1, 0)
+        self.sessions[session]['tables'][name] = nrows
+        return self._response({'caslib': caslib, 'tableName': name},
+                              changed=['tables'])
+
+    def _invoke(self, session, action, params):
+        ''' Run a synthetic action '''
+        action = action.lower()
+        if '.' in action:
+            asname, actname = action.split('.', 1)
+        else:
+            asname = [k for k, v in six.iteritems(ACTIONS) if action in v]
+            asname, actname = asname and asname[0] or None, action
+        if asname not in ACTIONS or actname not in ACTIONS[asname]:
+            return self._error("Action '%s' was not found." % action)
+
+        func = getattr(self, '_action_%s_%s' % (asname, actname), None)
+        if func is None:
+            return self._response({})
+        return func(session, params)
+
+    def _action_builtins_help(self, session, params):
+        ''' List the actions '''
+        return self._response({asname: _table(asname, [('name', 'string'),
+                                                       ('description', 'string')],
+                                              [[x, '%s action.' % x.title()]
+                                               for x in actions])
+                               for asname, actions in six.iteritems(ACTIONS)})
+
+    def _action_builtins_echo(self, session, params):
+        ''' Return the parameters '''
+        return self._response(params)
+
+    def _action_builtins_serverstatus(self, session, params):
+        ''' Return the server status '''
+        return self._response({
+            'About': {'Version': 'stand-in', 'System': {'Hostname': self.hostname}},
+            'server': _table('server', [('nodes', 'int'), ('actions', 'int')],
+                             [[1, self.stats['actions']]]),
+        })
+
+    def _action_builtins_queryactionset(self, session, params):
+        ''' Is the name an action set? '''
+        name = params.get('actionset', '').lower()
+        return self._response({name: name in ACTIONS})
+
+    def _action_builtins_queryname(self, session, params):
+        ''' Return the action set and action for a name '''
+        name = params.get('name', '').lower()
+        if '.' in name:
+            asname, actname = name.split('.', 1)
+            if asname in ACTIONS and actname in ACTIONS[asname]:
+                return self._response({'actionSet': asname, 'action': actname})
+        for asname, actions in six.iteritems(ACTIONS):
+            if name == asname:
+                return self._response({'actionSet': asname})
+            if name in actions:
+                return self._response({'actionSet': asname, 'action': name})
+        return self._response({})
+
+    def _action_builtins_reflect(self, session, params):
+        ''' Return reflection information '''
+        name = (params.get('actionset') or params.get('action') or '').lower()
+        name = name.split('.')[0]
+        if name not in ACTIONS:
+            return self._error("Action set '%s' was not found." % name)
+        return self._response([_reflect_actionset(name)])
+
+    def _table_rows(self, session, params):
+        ''' Return the number of rows in the requested table '''
+        table = params.get('table') or {}
+        if not isinstance(table, dict):
+            table = {'name': table}
+        name = (table.get('name') or '').upper()
+        if name in ('', 'DATA'):
+            return self.nrows
+        return self.sessions[session]['tables'].get(name)
+
+    def _action_table_fetch(self, session, params):
+        ''' Return rows of the synthetic table '''
+        nrows = self._table_rows(session, params)
+        if nrows is None:
+            return self._error('Table was not found.')
+        start = max(int(params.get('from', 1)), 1)
+        end = min(int(params.get('to', 20)), nrows,
+                  start - 1 + int(params.get('maxRows', params.get('maxrows', 10000))))
+        columns = list(self._columns)
+        rows = [self._rows[i % max(self.nrows, 1)] for i in range(start - 1, end)]
+        if params.get('index', True):
+            columns.insert(0, ('_Index_', 'int'))
+            rows = [[start + i] + row for i, row in enumerate(rows)]
+        return self._response({'Fetch': _table('Fetch', columns, rows,
+                                               label='Selected Rows from Table')})
+
+    def _action_table_columninfo(self, session, params):
+        ''' Return the column information of the synthetic table '''
+        rows = [[name, i + 1, ctype == 'string' and 'varchar' or ctype,
+                 ctype == 'string' and 32 or 8, '', 0, 0]
+                for i, (name, ctype) in enumerate(self._columns)]
+        return self._response({'ColumnInfo': _table(
+            'ColumnInfo', [('Column', 'string'), ('ID', 'int'), ('Type', 'string'),
+                           ('RawLength', 'int'), ('Format', 'string'),
+                           ('FormattedLength', 'int'), ('NFL', 'int')], rows)})
+
+    def _action_table_recordcount(self, session, params):
+        ''' Return the number of rows '''
+        return self._response({'RecordCount': _table(
+            'RecordCount', [('N', 'int')], [[self._table_rows(session, params) or 0]])})
+
+    def _action_table_tableinfo(self, session, params):
+        ''' Return table information '''
+        return self._response({'TableInfo': _table(
+            'TableInfo', [('Name', 'string'), ('Rows', 'int'), ('Columns', 'int')],
+            [['DATA', self._table_rows(session, params) or 0, self.ncolumns]])})
+
+    def _action_table_droptable(self, session, params):
+        ''' Drop an uploaded table '''
+        name = (params.get('name') or params.get('table') or '')
+        if isinstance(name, dict):
+            name = name.get('name') or ''
+        self.sessions[session]['tables'].pop(name.upper(), None)
+        return self._response({}, changed=['tables'])
+
+    def _action_table_partition(self, session, params):
+        ''' Copy a table (the synthetic rows are already in order) '''
+        nrows = self._table_rows(session, params)
+        if nrows is None:
+            return self._error('Table was not found.')
+        casout = params.get('casout') or {}
+        name = (casout.get('name') or 'PARTITION').upper()
+        caslib = casout.get('caslib', 'CASUSER')
+        self.sessions[session]['tables'][name] = nrows
+        return self._response({'caslib': caslib, 'tableName': name},
+                              changed=['tables'])
+
+    def _action_datastep_runcode(self, session, params):
+        ''' Append one table to another (the only supported program) '''
+        match = re.match(r'^\s*data\s+"([^"]+)"\([^)]*append=yes\)\s*;\s*'
+                         r'set\s+"([^"]+)"', params.get('code', ''), re.I)
+        if not match:
+            return self._error('Only table appends are supported.')
+        tables = self.sessions[session]['tables']
+        out, data = match.group(1).upper(), match.group(2).upper()
+        if data not in tables:
+            return self._error('Table %s was not found.' % data)
+        tables[out] = tables.get(out, 0) + tables[data]
+        return self._response({}, changed=['tables'])
+
+    def _action_simple_numrows(self, session, params):
+        ''' Return the number of rows '''
+        return self._response({'numrows': self._table_rows(session, params) or 0})
+
+    def _action_sampling_srs(self, session, params):
+        ''' Create a sample of the synthetic table '''
+        nrows = self._table_rows(session, params)
+        if nrows is None:
+            return self._error('Table was not found.')
+        casout = (params.get('output') or {}).get('casout') or {}
+        name = (casout.get('name') or 'SAMPLE').upper()
+        nsamp = int(round(nrows * float(params.get('samppct', 10)) / 100))
+        self.sessions[session]['tables'][name] = nsamp
+        return self._response({'OutputCasTables': _table(
+            'OutputCasTables', [('casLib', 'string'), ('Name', 'string'),
+                                ('Rows', 'int'), ('Columns', 'int')],
+            [['CASUSER(user)', name, nsamp, self.ncolumns]])}, changed=['tables'])
+
+    _action_sampling_stratified = _action_sampling_srs
+
+    def _action_simple_summary(self, session, params):
+        ''' Return summary statistics of the numeric columns '''
+        if self._summary is None:
+            self._summary = self._compute_summary()
+        return self._response({'Summary': _table(
+            'Summary', [('Column', 'string')] + [(x, 'double') for x in _SUMMARY_STATS],
+            self._summary, label='Descriptive Statistics for DATA')})
+
+    def _compute_summary(self):
+        ''' Compute the statistics of the synthetic table '''
+        rows = []
+        nrows = float(self.nrows)
+        for c, (name, ctype) in enumerate(self._columns):
+            if ctype != 'double':
+                continue
+            values = [r[c] for r in self._rows]
+            total = sum(values)
+            mean = nrows and total / nrows or 0.0
+            css = sum((x - mean) ** 2 for x in values)
+            var = nrows > 1 and css / (nrows - 1) or 0.0
+            std = var ** 0.5
+            rows.append([name, min(values or [0.0]), max(values or [0.0]), nrows, 0.0,
+                         mean, total, std, nrows and std / nrows ** 0.5 or 0.0, var,
+                         sum(x * x for x in values), css,
+                         mean and 100 * std / mean or 0.0, 0.0, 0.0, 0.0, 0.0])
+        return rows
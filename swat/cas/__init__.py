@@ -23,12 +23,66 @@ Classes and functions for interfacing with CAS
 
 from __future__ import print_function, division, absolute_import, unicode_literals
 
-from .utils import InitializeTK, vl, table, initialize_tk
-from .actions import CASAction, CASActionSet
-from .connection import CAS, getone, getnext
-from .table import CASTable
-from .transformers import py2cas
-from .types import nil, blob
-from .request import CASRequest
-from .response import CASResponse
-from .results import CASResults
+import sys
+
+# The classes are imported when they are first used, so that importing
+# swat.cas does not load pandas and the connection classes.
+# Maps attribute names to (module, attribute) pairs.  An attribute of None
+# returns the module itself.
+_LAZY_ATTRS = {
+    'InitializeTK': ('.utils', 'InitializeTK'),
+    'vl': ('.utils', 'vl'),
+    'initialize_tk': ('.utils', 'initialize_tk'),
+    'CASAction': ('.actions', 'CASAction'),
+    'CASActionSet': ('.actions', 'CASActionSet'),
+    'CAS': ('.connection', 'CAS'),
+    'getone': ('.connection', 'getone'),
+    'getnext': ('.connection', 'getnext'),
+    'CASPool': ('.pool', 'CASPool'),
+    'CASFuture': ('.futures', 'CASFuture'),
+    'CASPreparedAction': ('.prepared', 'CASPreparedAction'),
+    'as_completed': ('.futures', 'as_completed'),
+    'CASTable': ('.table', 'CASTable'),
+    'CASDiskTable': ('.storage', 'CASDiskTable'),
+    'py2cas': ('.transformers', 'py2cas'),
+    'nil': ('.types', 'nil'),
+    'blob': ('.types', 'blob'),
+    'CASRequest': ('.request', 'CASRequest'),
+    'CASResponse': ('.response', 'CASResponse'),
+    'CASResults': ('.results', 'CASResults'),
+
+    # The table module, not swat.cas.utils.table
+    'table': ('.table', None),
+}
+
+
+# Star imports load the lazily imported attributes too.  The names must
+# be native strings in Python 2.
+__all__ = [str(x) for x in sorted(_LAZY_ATTRS)]
+
+
+def _load_attr(name):
+    ''' Import a lazily loaded attribute and store it in the module '''
+    import importlib
+    modname, attr = _LAZY_ATTRS[name]
+    out = importlib.import_module(modname, __name__)
+    if attr is not None:
+        out = getattr(out, attr)
+    globals()[name] = out
+    return out
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _LAZY_ATTRS:
+            return _load_attr(name)
+        raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+else:
+    # Module __getattr__ is not supported, so import everything now
+    for _name in list(_LAZY_ATTRS):
+        _load_attr(_name)
+    del _name
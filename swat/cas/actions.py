@@ -35,6 +35,7 @@ from ..exceptions import SWATError
 from ..utils import mergedefined
 from ..utils.compat import a2n
 from ..utils.keyword import dekeywordify
+from ..utils.lazy import LazyDict
 from ..utils.xdict import xadict
 from .utils.params import ParamManager
 
@@ -248,7 +249,7 @@ def _format_param(param, connection, indent=0, selector=None, path='', output=No
 
     width = 72
     wraptext = None
-    if hasattr(connection._sw_connection, 'wraptext'):
+    if connection is not None and hasattr(connection._sw_connection, 'wraptext'):
         wraptext = connection._sw_connection.wraptext
 
     # Print description and other meta-data
@@ -414,6 +415,79 @@ def format_params(params, connection, suppress_subparams=None, param_names=None,
     return '\n'.join(output)
 
 
+class _LazyDoc(object):
+    '''
+    Docstring that is generated the first time it is requested
+
+    Formatting the documentation of large action sets is expensive,
+    so it is deferred until it is needed (e.g., by :func:`help`).
+
+    Parameters
+    ----------
+    func : callable
+        Function that returns the docstring
+
+    '''
+
+    def __init__(self, func):
+        self._func = func
+        self._doc = None
+
+    def __get__(self, obj, cls=None):
+        if self._doc is None:
+            self._doc = self._func()
+        return self._doc
+
+
+def _peek_doc(cls):
+    ''' Return the docstring of `cls` without generating a lazy docstring '''
+    for base in cls.__mro__:
+        if '__doc__' in base.__dict__:
+            doc = base.__dict__['__doc__']
+            if isinstance(doc, _LazyDoc):
+                return doc._doc
+            return doc
+
+
+class _LazyParamNames(object):
+    '''
+    Collection of parameter names that is computed when it is first used
+
+    Parameters
+    ----------
+    func : callable
+        Function that returns the parameter names
+
+    '''
+
+    def __init__(self, func):
+        self._func = func
+        self._names = None
+
+    def _get(self):
+        ''' Return the set of names '''
+        if self._names is None:
+            self._names = set(self._func())
+        return self._names
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __contains__(self, name):
+        return name in self._get()
+
+
+def _get_connection(ref):
+    ''' Return the connection from a weak reference '''
+    conn = ref()
+    if conn is None:
+        raise SWATError('Connection object is no longer valid')
+    return conn
+
+
 class CASActionSet(object):
     '''
     CASActionSet container
@@ -444,25 +518,27 @@ class CASActionSet(object):
 
         '''
         asname = asinfo['name'].lower()
+        connref = weakref.ref(connection)
 
-        actions = {}
-
-        members = {
-            '_connection': weakref.ref(connection),
-            '__doc__': cls._format_actionset_doc(asinfo),
-            'actions': actions,
-        }
-
-        # Create a class for each action
+        # Action classes are created when they are first used
+        actinfo = {}
         for act in asinfo.get('actions', []):
-            actcls = CASAction.from_reflection(asname, act, connection)
-            clsname = actcls.__name__.split('.', 1)[-1].lower()
+            clsname = act['name'].split('.', 1)[-1].lower()
 
             # Don't include table.upload, it can't be called directly.
-            if asname == 'table' and clsname.lower() == 'upload':
+            if asname == 'table' and clsname == 'upload':
                 continue
 
-            actions[clsname] = actcls
+            actinfo[clsname] = act
+
+        actions = LazyDict(actinfo, lambda act: CASAction.from_reflection(
+            asname, act, _get_connection(connref)))
+
+        members = {
+            '_connection': connref,
+            '__doc__': _LazyDoc(lambda: cls._format_actionset_doc(asinfo)),
+            'actions': actions,
+        }
 
         # Generate action set class
         return type(str(asname).title(), (CASActionSet,), members)
@@ -586,13 +662,13 @@ class CASAction(ParamManager):
         super(CASAction, self).__init__(*args, **kwargs)
         self.params.set_dir_values(type(self).all_params)
 
-        # Add doc to params
-        if type(self).__doc__:
+        # Add doc to params if it has been generated
+        doc = _peek_doc(type(self))
+        if doc:
             idx = 0
-            if 'Parameters' in type(self).__doc__:
+            if 'Parameters' in doc:
                 idx = 1
-            self.params.set_doc(re.split(r'\w+\s+----+',
-                                         type(self).__doc__)[idx].strip())
+            self.params.set_doc(re.split(r'\w+\s+----+', doc)[idx].strip())
         elif self.__init__.__doc__:
             idx = 0
             if 'Parameters' in self.__init__.__doc__:
@@ -650,18 +726,6 @@ class CASAction(ParamManager):
                    '''    return CASAction.__call__(_self_, %s)''')
                   % (sig, funcargs), _globals, _locals)
 
-        # Generate documentation
-        all_params = []
-        setget_doc = format_params(params, connection,
-                                   suppress_subparams=['table.importoptions'],
-                                   param_names=all_params).rstrip()
-        action_doc = cls._format_action_doc(actinfo, setget_doc).rstrip()
-        if results:
-            results_doc = '\n\nResults Keys\n------------\n' + \
-                          format_params(results, connection, results_format=True).rstrip()
-        else:
-            results_doc = ''
-
         # Generate set/del methods for scalar parameters
         def set_params(_self_, *args, **kwargs):
             ''' Set parameters '''
@@ -679,32 +743,59 @@ class CASAction(ParamManager):
             ''' Get parameter '''
             return CASAction.get_param(_self_, key)
 
-        # Set docstrings
-        set_params.__doc__ = SET_PARAMS_DOCSTRING % setget_doc
-        set_param.__doc__ = SET_PARAM_DOCSTRING % setget_doc
-        get_params.__doc__ = GET_PARAMS_DOCSTRING % setget_doc
-        get_param.__doc__ = GET_PARAM_DOCSTRING % setget_doc
-        _locals['__call__'].__doc__ = re.sub(r'\w+ object$',
-                                             r'CASResults object%s' % results_doc,
-                                             action_doc.rstrip())
-        _locals['__init__'].__doc__ = action_doc.rstrip()
-
         for name in list(param_names):
             if keyword.iskeyword(name):
                 param_names.append(dekeywordify(name))
 
-        # CASAction members and methods
+        connref = weakref.ref(connection)
+        all_params = []
+
+        def generate_doc():
+            ''' Generate the documentation and set the method docstrings '''
+            conn = connref()
+            del all_params[:]
+            setget_doc = format_params(params, conn,
+                                       suppress_subparams=['table.importoptions'],
+                                       param_names=all_params).rstrip()
+            action_doc = cls._format_action_doc(actinfo, setget_doc).rstrip()
+            if results:
+                results_doc = '\n\nResults Keys\n------------\n' + \
+                              format_params(results, conn, results_format=True).rstrip()
+            else:
+                results_doc = ''
+
+            # Set docstrings
+            set_params.__doc__ = SET_PARAMS_DOCSTRING % setget_doc
+            set_param.__doc__ = SET_PARAM_DOCSTRING % setget_doc
+            get_params.__doc__ = GET_PARAMS_DOCSTRING % setget_doc
+            get_param.__doc__ = GET_PARAM_DOCSTRING % setget_doc
+            _locals['__call__'].__doc__ = re.sub(r'\w+ object$',
+                                                 r'CASResults object%s' % results_doc,
+                                                 action_doc.rstrip())
+            _locals['__init__'].__doc__ = action_doc.rstrip()
+
+            return action_doc
+
+        doc = _LazyDoc(generate_doc)
+
+        def get_all_params():
+            ''' Generate the documentation to collect the parameter names '''
+            doc.__get__(None)
+            return all_params
+
+        # CASAction members and methods.  The documentation is generated
+        # when it is first requested.
         actmembers = {
-            '_connection': weakref.ref(connection),
+            '_connection': connref,
             '__init__': _locals['__init__'],
             '__call__': _locals['__call__'],
-            '__doc__': action_doc,
+            '__doc__': doc,
             'set_params': set_params,
             'set_param': set_param,
             'get_params': get_params,
             'get_param': get_param,
             'param_names': param_names,
-            'all_params': set(all_params)
+            'all_params': _LazyParamNames(get_all_params)
         }
 
         # Generate action class
@@ -0,0 +1,532 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Action parameter binders compiled from reflection information
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import copy
+import six
+from .table import CASTable
+from .utils.params import ParamManager
+from ..utils.compat import text_types, binary_types
+
+# Actions whose table= parameter is not defined as a table definition
+_COLUMNINFO_ACTIONS = set(['columninfo', 'table.columninfo', 'update', 'table.update'])
+
+_FETCH_ACTIONS = set(['fetch', 'table.fetch'])
+
+_PARTITION_ACTIONS = set(['partition', 'table.partition', 'save', 'table.save'])
+
+_AGGREGATE_ACTIONS = set(['aggregate', 'aggregation.aggregate'])
+
+_TABLEINFO_ACTIONS = set(['tableinfo', 'table.tableinfo'])
+
+
+class _Param(object):
+    '''
+    Compiled form of a reflected action parameter
+
+    Parameters
+    ----------
+    index : int
+        The position of the parameter in the parameter list
+    info : dict
+        The reflection information of the parameter
+
+    '''
+
+    __slots__ = ['index', 'name', 'lower', 'kind', 'binder']
+
+    def __init__(self, index, info):
+        self.index = index
+        self.name = info['name']
+        self.lower = self.name.lower()
+        if info.get('isTableDef'):
+            self.kind = 'tabledef'
+        elif info.get('isTableName'):
+            self.kind = 'tablename'
+        elif info.get('isOutTableDef'):
+            self.kind = 'outtabledef'
+        elif info.get('isCasLib'):
+            self.kind = 'caslib'
+        else:
+            self.kind = None
+        self.binder = None
+        if 'parmList' in info:
+            self.binder = ParamBinder(info['parmList'])
+
+
+class ParamBinder(object):
+    '''
+    Bind keyword arguments to a reflected parameter list
+
+    The reflection information is walked once when the binder is
+    created.  Parameter names and aliases are mapped to the compiled
+    parameters (case-insensitively), and the parameters that take
+    table definitions, table names, output tables, and caslibs are
+    resolved in advance, so binding only visits the given arguments.
+
+    Parameters
+    ----------
+    parmlist : list of dicts
+        The reflected parameter list
+
+    Returns
+    -------
+    :class:`ParamBinder` object
+
+    '''
+
+    def __init__(self, parmlist):
+        self.params = [_Param(i, x) for i, x in enumerate(parmlist)]
+
+        self._lookup = {}
+        for param in self.params:
+            self._lookup.setdefault(param.lower, param)
+        for param, info in zip(self.params, parmlist):
+            for alias in info.get('aliases') or []:
+                self._lookup.setdefault(alias.lower(), param)
+
+        self.has_caslib = 'caslib' in [x.name for x in self.params]
+
+        lists = [(x, i) for i, x in enumerate(parmlist)
+                 if x.get('parmType') == 'value_list']
+        inputs = [i for x, i in lists if x['name'].lower() == 'inputs']
+        self.uses_inputs = bool(inputs)
+        self.uses_fetchvars = bool([i for x, i in lists
+                                    if x['name'].lower() == 'fetchvars'])
+
+        # Parameters filled in from a __table__ argument
+        self._table_defs = [x for x in self.params
+                            if x.kind == 'tabledef' and x.lower == 'table']
+        self._table_names = [x for x in self.params
+                             if x.kind == 'tablename' and x.lower == 'name']
+
+        # The columninfo / update workaround only sees inputs= parameters
+        # that come before table= in the parameter list
+        self._table_params = [(x, bool([i for i in inputs if i < x.index]))
+                              for x in self.params if x.lower == 'table']
+
+    def _match(self, kwargs, tbl, action):
+        '''
+        Match the keyword arguments to the compiled parameters
+
+        Parameters
+        ----------
+        kwargs : dict
+            The keyword arguments
+        tbl : :class:`CASTable` or None
+            The table given in the __table__ argument
+        action : string
+            The lower-cased name of the action
+
+        Returns
+        -------
+        list of (:class:`_Param`, string or None) tuples
+            The matched parameters in parameter list order.  The key is
+            None for parameters that are filled in from `tbl`.
+
+        '''
+        # kwargs preserving case
+        casekeys = {}
+        matches = {}
+        for key in kwargs:
+            if not isinstance(key, (text_types, binary_types)):
+                continue
+            casekeys[key.lower()] = key
+            param = self._lookup.get(key.lower())
+            if param is not None:
+                matches[param.index] = (param, key)
+
+        if tbl is not None:
+            defaults = []
+            if 'table' not in casekeys:
+                defaults.extend(self._table_defs)
+                if action in _COLUMNINFO_ACTIONS:
+                    defaults.extend(x for x, _ in self._table_params)
+            if 'name' not in casekeys:
+                defaults.extend(self._table_names)
+            for param in defaults:
+                matches.setdefault(param.index, (param, None))
+
+        return [matches[x] for x in sorted(matches)]
+
+    def _bind_value(self, kwargs, key, param, inputs, fetch):
+        '''
+        Convert the value of a given argument, returning the table options
+
+        Parameters
+        ----------
+        kwargs : dict
+            The keyword arguments, which are updated in place
+        key : string
+            The argument name
+        param : :class:`_Param`
+            The matched parameter
+        inputs : list or None
+            The current input variables
+        fetch : dict
+            The current fetch parameters
+
+        Returns
+        -------
+        (inputs, fetch) tuple
+
+        '''
+        value = kwargs[key]
+
+        # If a string is given for a table object, convert it to a table object
+        if isinstance(value, text_types):
+            if param.kind == 'tabledef':
+                kwargs[key] = {'name': value}
+            return inputs, fetch
+
+        if not isinstance(value, CASTable):
+            return inputs, fetch
+
+        if param.kind == 'tabledef':
+            kwargs[key] = value.to_table_params(references=kwargs)
+            return value.get_inputs_param(), value.get_fetch_params()
+
+        if param.kind == 'tablename':
+            # Fill in caslib= first
+            if self.has_caslib and 'caslib' not in kwargs and value.has_param('caslib'):
+                kwargs['caslib'] = value.get_param('caslib')
+            kwargs[key] = value.to_table_name()
+            return value.get_inputs_param(), value.get_fetch_params()
+
+        if param.kind == 'outtabledef':
+            kwargs[key] = value.to_outtable_params()
+        elif param.kind == 'caslib' and value.has_param('caslib'):
+            kwargs[key] = value.get_param('caslib')
+
+        return inputs, fetch
+
+    def _bind_table(self, kwargs, tbl, param, action, inputs, fetch):
+        '''
+        Fill in a parameter from the __table__ argument
+
+        Parameters
+        ----------
+        kwargs : dict
+            The keyword arguments, which are updated in place
+        tbl : :class:`CASTable`
+            The table given in the __table__ argument
+        param : :class:`_Param`
+            The matched parameter
+        action : string
+            The lower-cased name of the action
+        inputs : list or None
+            The current input variables
+        fetch : dict
+            The current fetch parameters
+
+        Returns
+        -------
+        (inputs, fetch) tuple
+
+        '''
+        if param.kind == 'tabledef' and param in self._table_defs:
+            kwargs[param.name] = tbl.to_table_params(references=kwargs)
+            return tbl.get_inputs_param(), tbl.get_fetch_params()
+
+        if param.kind == 'tablename' and param in self._table_names:
+            if self.has_caslib and 'caslib' not in kwargs and tbl.has_param('caslib'):
+                kwargs['caslib'] = tbl.get_param('caslib')
+            kwargs[param.name] = tbl.to_table_name()
+            return tbl.get_inputs_param(), tbl.get_fetch_params()
+
+        if action in _COLUMNINFO_ACTIONS:
+            return self._bind_columninfo(kwargs, tbl, param), fetch
+
+        return inputs, fetch
+
+    def _bind_columninfo(self, kwargs, tbl, param):
+        '''
+        Workaround for columninfo / update which doesn't define table= as
+        a table definition
+
+        Parameters
+        ----------
+        kwargs : dict
+            The keyword arguments, which are updated in place
+        tbl : :class:`CASTable`
+            The table given in the __table__ argument
+        param : :class:`_Param`
+            The table= parameter
+
+        Returns
+        -------
+        list or None
+            The input variables to apply to the action
+
+        '''
+        inputs = tbl.get_inputs_param()
+        kwargs[param.name] = tbl.to_table_params(references=kwargs)
+        if dict(self._table_params)[param]:
+            return inputs
+        if inputs and 'vars' not in kwargs:
+            kwargs[param.name]['vars'] = inputs
+        return None
+
+    def _apply_table_options(self, kwargs, action, inputs, fetch):
+        '''
+        Apply the input variables and fetch parameters of the bound table
+
+        Parameters
+        ----------
+        kwargs : dict
+            The keyword arguments, which are updated in place
+        action : string
+            The lower-cased name of the action
+        inputs : list or None
+            The input variables
+        fetch : dict
+            The fetch parameters
+
+        '''
+        # Apply input variables
+        if self.uses_inputs and inputs and 'inputs' not in kwargs:
+            kwargs['inputs'] = inputs
+        elif self.uses_fetchvars and inputs and 'fetchvars' not in kwargs:
+            kwargs['fetchvars'] = inputs
+
+        # Apply fetch parameters
+        if fetch and action in _FETCH_ACTIONS:
+            for key, value in fetch.items():
+                if key in kwargs:
+                    continue
+                if key == 'sortby' and ('orderby' in kwargs or 'orderBy' in kwargs):
+                    continue
+                kwargs[key] = value
+
+        # Apply inputs= to specific actions that don't support it
+        if 'table' in kwargs and not self.uses_inputs and inputs \
+                and action in _PARTITION_ACTIONS \
+                and isinstance(kwargs['table'], dict):
+            kwargs['table'] = dict(kwargs['table'])
+            kwargs['table']['vars'] = inputs
+
+        # Fix aggregate action when both inputs= and varspecs= are supplied
+        if 'table' in kwargs and action in _AGGREGATE_ACTIONS:
+            if 'inputs' in kwargs and 'varspecs' in kwargs:
+                kwargs.pop('inputs', None)
+
+    def _bind_tableinfo(self, kwargs):
+        '''
+        Workaround for tableinfo which aliases table= to name=, but
+        the alias is hidden
+
+        Parameters
+        ----------
+        kwargs : dict
+            The keyword arguments, which are updated in place
+
+        '''
+        table = kwargs['table']
+        if isinstance(table, CASTable):
+            table = table.to_table_params(references=kwargs)
+        if not isinstance(table, dict):
+            kwargs['table'] = table
+            return
+        if self.has_caslib and 'caslib' not in kwargs and table.get('caslib'):
+            kwargs['caslib'] = table['caslib']
+        kwargs['table'] = table['name']
+
+    def bind(self, kwargs, action=''):
+        '''
+        Convert keyword arguments to action parameters
+
+        :class:`CASTable` objects are converted to the form required by
+        each parameter, and the table's input variables and fetch
+        parameters are applied.  Dictionaries that are modified are
+        copied, so `kwargs` is not changed.
+
+        Parameters
+        ----------
+        kwargs : dict
+            The keyword arguments
+        action : string, optional
+            The name of the action
+
+        Returns
+        -------
+        dict
+
+        '''
+        if isinstance(kwargs, ParamManager):
+            kwargs = kwargs.params
+        if not isinstance(kwargs, dict):
+            return kwargs
+
+        kwargs = dict(kwargs)
+        action = (action or '').lower()
+        tbl = kwargs.get('__table__', None)
+
+        inputs = None
+        fetch = {}
+        for param, key in self._match(kwargs, tbl, action):
+            if key is not None:
+                inputs, fetch = self._bind_value(kwargs, key, param, inputs, fetch)
+            else:
+                inputs, fetch = self._bind_table(kwargs, tbl, param, action,
+                                                 inputs, fetch)
+
+        self._apply_table_options(kwargs, action, inputs, fetch)
+
+        kwargs.pop('__table__', None)
+
+        if action in _TABLEINFO_ACTIONS and 'table' in kwargs:
+            self._bind_tableinfo(kwargs)
+
+        # Bind subparameters
+        for key, value in list(six.iteritems(kwargs)):
+            if isinstance(value, dict) and isinstance(key, (text_types, binary_types)):
+                param = self._lookup.get(key.lower())
+                if param is not None and param.binder is not None:
+                    kwargs[key] = param.binder.bind(value, action=action)
+
+        return kwargs
+
+    def fill(self, parmlist, kwargs):
+        '''
+        Set the values of a copy of the reflected parameter list
+
+        Parameters
+        ----------
+        parmlist : list of dicts
+            Copy of the parameter list used to create the binder
+        kwargs : dict
+            The bound parameters
+
+        '''
+        if isinstance(kwargs, ParamManager):
+            kwargs = kwargs.params
+        if not isinstance(kwargs, dict):
+            return
+        for param, info in zip(self.params, parmlist):
+            if param.name not in kwargs:
+                continue
+            value = kwargs[param.name]
+            if param.binder is not None:
+                param.binder.fill(info['parmList'], value)
+            elif isinstance(value, text_types):
+                info['value'] = value.replace('"', '\\u0022')
+            elif not isinstance(value, binary_types):
+                info['value'] = value
+
+
+class ActionBinder(ParamBinder):
+    '''
+    Parameter binder for an action
+
+    Parameters
+    ----------
+    info : dict
+        The reflection information of the action
+
+    Returns
+    -------
+    :class:`ActionBinder` object
+
+    '''
+
+    def __init__(self, info):
+        super(ActionBinder, self).__init__(info.get('params', {}))
+        self.info = info
+        self.name = info.get('name')
+
+    def signature(self, kwargs):
+        '''
+        Return the action signature with the values of the bound parameters
+
+        Parameters
+        ----------
+        kwargs : dict
+            The parameters returned by :meth:`bind`
+
+        Returns
+        -------
+        dict
+
+        '''
+        out = copy.deepcopy(self.info)
+        self.fill(out.get('params', {}), kwargs)
+        return out
+
+
+def _snapshot(value):
+    '''
+    Copy the dictionaries and lists of a parameter value
+
+    Scalar values are shared, so this is cheaper than a deep copy.
+
+    Parameters
+    ----------
+    value : any
+        The parameter value
+
+    Returns
+    -------
+    any
+
+    '''
+    if isinstance(value, dict):
+        return dict((k, _snapshot(v)) for k, v in six.iteritems(value))
+    if isinstance(value, list):
+        return [_snapshot(x) for x in value]
+    if isinstance(value, tuple):
+        return tuple(_snapshot(x) for x in value)
+    return value
+
+
+class BoundSignature(object):
+    '''
+    Action signature whose parameter values are filled in on first use
+
+    The dictionaries and lists of the bound parameters are copied when
+    the signature is created, so changes made to them after the action
+    is called do not appear in the signature.
+
+    Parameters
+    ----------
+    binder : :class:`ActionBinder`
+        The binder of the action
+    kwargs : dict
+        The bound parameters
+
+    '''
+
+    __slots__ = ['binder', 'kwargs']
+
+    def __init__(self, binder, kwargs):
+        self.binder = binder
+        self.kwargs = _snapshot(kwargs)
+
+    @property
+    def name(self):
+        ''' Return the action name '''
+        return self.binder.name
+
+    def resolve(self):
+        ''' Return the signature dictionary '''
+        return self.binder.signature(self.kwargs)
@@ -0,0 +1,874 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Client-side cache of CAS action results
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import getpass
+import glob
+import hashlib
+import os
+import stat
+import threading
+import time
+import six
+from six.moves import cPickle as pickle
+from .prepared import CASPreparedAction
+from .results import CASResults
+from .table import CASTable
+from ..config import get_option
+from ..utils.compat import (num_types, bool_types, text_types, binary_types,
+                            OrderedDict)
+
+
+class _Uncacheable(Exception):
+    ''' Raised when action parameters can not be used in a cache key '''
+
+
+def _normalize(value):
+    '''
+    Convert an action parameter value into a hashable, order-independent form
+
+    Parameters
+    ----------
+    value : any
+        The parameter value
+
+    Raises
+    ------
+    _Uncacheable
+        If the value can not be represented in a cache key
+
+    Returns
+    -------
+    tuple or scalar
+
+    '''
+    if value is None or isinstance(value, bool_types + num_types +
+                                   text_types + binary_types):
+        return value
+
+    if isinstance(value, CASTable):
+        if value._datastep_pipeline is not None:
+            raise _Uncacheable()
+        return ('CASTable', _normalize(value.to_params()),
+                _normalize(value.get_inputs_param()),
+                _normalize(value.get_fetch_params()))
+
+    if isinstance(value, CASPreparedAction):
+        try:
+            return value.get_cache_key()
+        except ValueError:
+            raise _Uncacheable()
+
+    if isinstance(value, dict):
+        items = [(k.lower() if isinstance(k, text_types) else k, _normalize(v))
+                 for k, v in six.iteritems(value)]
+        return ('dict', tuple(sorted(items, key=repr)))
+
+    if isinstance(value, (list, tuple)):
+        return ('list', tuple(_normalize(x) for x in value))
+
+    if isinstance(value, (set, frozenset)):
+        return ('set', tuple(sorted((_normalize(x) for x in value), key=repr)))
+
+    # Numpy scalars
+    if hasattr(value, 'item') and getattr(value, 'ndim', None) == 0:
+        return _normalize(value.item())
+
+    raise _Uncacheable()
+
+
+def _is_private(path):
+    '''
+    Is the path owned by the current user and not writable by anyone else?
+
+    Ownership and permissions are only checked on platforms with POSIX
+    user IDs.
+
+    '''
+    if not hasattr(os, 'getuid'):
+        return True
+    info = os.lstat(path)
+    return not stat.S_ISLNK(info.st_mode) and info.st_uid == os.getuid() and \
+        not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _get_private_dir(directory):
+    '''
+    Return the current user's subdirectory of the cache directory
+
+    The subdirectory is created with permissions 0700.  Entries are
+    deserialized with :mod:`pickle`, so the subdirectory is not used if
+    anyone else can write to it.
+
+    Parameters
+    ----------
+    directory : string
+        The ``cas.cache.directory`` option value
+
+    Returns
+    -------
+    string
+        If the subdirectory is private to the current user
+    None
+        If it can not be created or is not private
+
+    '''
+    if hasattr(os, 'getuid'):
+        user = '%s' % os.getuid()
+    else:
+        user = getpass.getuser()
+    path = os.path.join(directory, 'swat-%s' % user)
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path, 0o700)
+        if not _is_private(path) or (hasattr(os, 'getuid') and
+                                     os.lstat(path).st_mode & 0o077):
+            return None
+    except (IOError, OSError):
+        return None
+    return path
+
+
+class CASResultCache(object):
+    '''
+    LRU cache of :class:`CASResults` objects
+
+    Only actions listed in the ``cas.cache.actions`` option are cached.
+    Entries are stored in serialized form, so every cache hit returns a new
+    copy of the results.  The total size of the serialized entries is
+    limited by ``cas.cache.max_bytes``; the least recently used entries are
+    evicted first.  Entries older than ``cas.cache.ttl`` seconds are
+    discarded.  If ``cas.cache.directory`` is set, entries are also
+    written to a subdirectory of it that only the current user can access,
+    and read back when they are not in memory.  Files that are not owned
+    by the current user, or that others can write to, are ignored.
+
+    Returns
+    -------
+    :class:`CASResultCache` object
+
+    '''
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+        self._stats = dict(hits=0, misses=0, disk_hits=0, stores=0,
+                           evictions=0, expirations=0, invalidations=0)
+
+    def get_key(self, session, action, params):
+        '''
+        Return the cache key for an action call
+
+        Parameters
+        ----------
+        session : string
+            The session ID
+        action : string
+            The action name
+        params : dict
+            The action parameters
+
+        Returns
+        -------
+        string
+            If the action call can be cached
+        None
+            If the action is not in the list of cacheable actions or the
+            parameters can not be used as a key
+
+        '''
+        action = action.lower()
+        actions = get_option('cas.cache.actions')
+        if isinstance(actions, text_types):
+            actions = [actions]
+        actions = [x.lower() for x in actions]
+        if action not in actions:
+            # Resolve action names given without the action set name
+            matches = [x for x in actions if x.endswith('.' + action)]
+            if '.' in action or len(matches) != 1:
+                return None
+            action = matches[0]
+
+        try:
+            params = _normalize(params)
+        except _Uncacheable:
+            return None
+
+        key = repr((session, action, params))
+        return '%s-%s' % (session, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _get_dir(self):
+        ''' Return the directory for on-disk entries '''
+        directory = get_option('cas.cache.directory')
+        if not directory:
+            return None
+        return _get_private_dir(directory)
+
+    def _get_path(self, key):
+        ''' Return the on-disk location of an entry '''
+        directory = self._get_dir()
+        if not directory:
+            return None
+        return os.path.join(directory, '%s.pickle' % key)
+
+    def _is_expired(self, created):
+        ''' Has the entry outlived the TTL? '''
+        ttl = get_option('cas.cache.ttl')
+        return ttl > 0 and (time.time() - created) > ttl
+
+    def get(self, key):
+        '''
+        Return the cached results for `key`
+
+        Parameters
+        ----------
+        key : string
+            The cache key returned by :meth:`get_key`
+
+        Returns
+        -------
+        :class:`CASResults`
+            If the key is in the cache
+        None
+            If the key is not in the cache or has expired
+
+        '''
+        with self._lock:
+            data = None
+
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                if self._is_expired(entry[0]):
+                    self._nbytes -= len(entry[1])
+                    self._stats['expirations'] += 1
+                else:
+                    self._entries[key] = entry
+                    data = entry[1]
+
+            if data is None:
+                path = self._get_path(key)
+                if path and os.path.isfile(path):
+                    try:
+                        if self._is_expired(os.path.getmtime(path)):
+                            os.remove(path)
+                            self._stats['expirations'] += 1
+                        elif _is_private(path):
+                            with open(path, 'rb') as infile:
+                                data = infile.read()
+                            self._store(key, data, os.path.getmtime(path))
+                            self._stats['disk_hits'] += 1
+                    except (IOError, OSError):
+                        data = None
+
+            if data is None:
+                self._stats['misses'] += 1
+                return None
+
+            self._stats['hits'] += 1
+
+        items, state = pickle.loads(data)
+        out = CASResults(items)
+        out.__dict__.update(state)
+        return out
+
+    def put(self, key, results):
+        '''
+        Add results to the cache
+
+        Parameters
+        ----------
+        key : string
+            The cache key returned by :meth:`get_key`
+        results : :class:`CASResults`
+            The results to store
+
+        '''
+        state = dict(results.__dict__)
+        state['performance'] = None
+        state['client_performance'] = None
+        state['_bygroup_index'] = None
+        state['_signature'] = results.signature
+
+        try:
+            data = pickle.dumps((list(results.items()), state),
+                                pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+
+        if len(data) > get_option('cas.cache.max_bytes'):
+            return
+
+        with self._lock:
+            self._store(key, data, time.time())
+            self._stats['stores'] += 1
+
+            path = self._get_path(key)
+            if path:
+                try:
+                    if os.path.lexists(path):
+                        os.remove(path)
+                    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL |
+                                 getattr(os, 'O_BINARY', 0), 0o600)
+                    with os.fdopen(fd, 'wb') as outfile:
+                        outfile.write(data)
+                except (IOError, OSError):
+                    pass
+
+    def _store(self, key, data, created):
+        ''' Add serialized data to the memory tier and evict as needed '''
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._nbytes -= len(old[1])
+
+        self._entries[key] = (created, data)
+        self._nbytes += len(data)
+
+        max_bytes = get_option('cas.cache.max_bytes')
+        while self._nbytes > max_bytes and self._entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._nbytes -= len(evicted)
+            self._stats['evictions'] += 1
+
+    def invalidate(self, session=None):
+        '''
+        Remove entries from the cache
+
+        Parameters
+        ----------
+        session : string, optional
+            Only remove entries for the given session ID.  By default,
+            all entries are removed.
+
+        '''
+        with self._lock:
+            prefix = session and ('%s-' % session) or ''
+            for key in [x for x in self._entries if x.startswith(prefix)]:
+                self._nbytes -= len(self._entries.pop(key)[1])
+
+            directory = self._get_dir()
+            if directory:
+                for path in glob.glob(os.path.join(directory, '%s*.pickle' % prefix)):
+                    try:
+                        os.remove(path)
+                    except (IOError, OSError):
+                        pass
+
+            self._stats['invalidations'] += 1
+
+    clear = invalidate
+
+    def get_stats(self):
+        '''
+        Return cache statistics
+
+        Returns
+        -------
+        dict
+            Counts of hits, misses, disk_hits, stores, evictions,
+            expirations, and invalidations as well as the current number
+            of entries and bytes in memory.
+
+        '''
+        with self._lock:
+            out = dict(self._stats)
+            out['entries'] = len(self._entries)
+            out['bytes'] = self._nbytes
+        return out
+
+
+class _Busy(object):
+    '''
+    Flag that is set while a cache creates, checks, or drops its own tables
+
+    The flag is kept for each thread, so threads that share a connection
+    do not see or clear each other's flag.  It is set for the duration
+    of a ``with`` block and tested using :func:`bool`.
+
+    '''
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __bool__(self):
+        return getattr(self._local, 'depth', 0) > 0
+
+    __nonzero__ = __bool__
+
+    def __enter__(self):
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self._local.depth -= 1
+
+
+class CASSampleCache(object):
+    '''
+    LRU cache of server-side sample tables
+
+    Sampled fetches (e.g., plotting and ``to_frame(sample_pct=...)``)
+    create a sample table on the server.  When the ``cas.table.cache_samples``
+    option is enabled, the sample tables are kept and reused by later
+    fetches of the same table with the same sampling parameters, including
+    the same random number seed.  Samples without a seed are different
+    each time, so they are not cached.  At most
+    ``cas.table.max_cached_samples`` tables are kept.
+
+    The cache only keeps track of the tables.  Tables that are evicted
+    or invalidated are returned to the caller, which is responsible for
+    dropping them on the server.
+
+    Returns
+    -------
+    :class:`CASSampleCache` object
+
+    '''
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = dict(hits=0, misses=0, evictions=0, invalidations=0)
+
+        # Set while the cache is creating or dropping its own tables
+        self.busy = _Busy()
+
+    def get_key(self, table, sample_pct, sample_seed=None, stratify_by=None,
+                columns=None):
+        '''
+        Return the cache key for a sample of a table
+
+        Parameters
+        ----------
+        table : :class:`CASTable` object
+            The table being sampled
+        sample_pct : float
+            The fraction of rows in the sample
+        sample_seed : int, optional
+            The random number seed
+        stratify_by : string, optional
+            The column to stratify by
+        columns : list of strings, optional
+            The columns in the sample.  By default, all columns.
+
+        Returns
+        -------
+        string
+            If the sample can be cached
+        None
+            If the sample has no seed or the table parameters can not be
+            used as a key
+
+        '''
+        if sample_seed is None:
+            return None
+
+        # The parameters of a table with pending Data step transformations
+        # do not describe its rows until they are computed
+        if table._datastep_pipeline is not None:
+            return None
+        try:
+            params = _normalize(table.to_params())
+            columns = _normalize(columns and list(columns) or None)
+        except _Uncacheable:
+            return None
+        key = repr((params, float(sample_pct), sample_seed, stratify_by, columns))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        '''
+        Return the sample table for a key
+
+        Parameters
+        ----------
+        key : string
+            The key returned by :meth:`get_key`
+
+        Returns
+        -------
+        :class:`CASTable` object
+            A copy of the cached table
+        None
+            If the sample is not in the cache
+
+        '''
+        with self._lock:
+            table = self._entries.pop(key, None)
+            if table is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries[key] = table
+            self._stats['hits'] += 1
+            return table.copy()
+
+    def put(self, key, table):
+        '''
+        Add a sample table to the cache
+
+        Parameters
+        ----------
+        key : string
+            The key returned by :meth:`get_key`
+        table : :class:`CASTable` object
+            The sample table
+
+        Returns
+        -------
+        list of :class:`CASTable` objects
+            The tables evicted from the cache
+
+        '''
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                evicted.append(old)
+            self._entries[key] = table.copy()
+            max_entries = get_option('cas.table.max_cached_samples')
+            while len(self._entries) > max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+                self._stats['evictions'] += 1
+        return evicted
+
+    def invalidate(self):
+        '''
+        Remove all tables from the cache
+
+        Returns
+        -------
+        list of :class:`CASTable` objects
+            The tables removed from the cache
+
+        '''
+        with self._lock:
+            tables = list(self._entries.values())
+            self._entries.clear()
+            if tables:
+                self._stats['invalidations'] += 1
+        return tables
+
+    def get_stats(self):
+        '''
+        Return cache statistics
+
+        Returns
+        -------
+        dict
+            Counts of hits, misses, evictions, and invalidations as well
+            as the current number of entries
+
+        '''
+        with self._lock:
+            out = dict(self._stats)
+            out['entries'] = len(self._entries)
+        return out
+
+
+class CASReplicaCache(object):
+    '''
+    LRU cache of local table replicas
+
+    Replicas are created by :meth:`CASTable.cache_local` and, for tables
+    with at most ``cas.table.replica_max_rows`` rows, automatically once
+    the time spent fetching from a table exceeds the estimated cost of
+    copying it.  The total size of the replicas is limited by
+    ``cas.table.replica_max_bytes``; the least recently used replicas are
+    evicted first.
+
+    The cache also keeps the measurements used to decide whether a
+    request is cheaper to answer locally or on the server: the round trip
+    latency and the transfer time per cell of recent fetches.
+
+    Returns
+    -------
+    :class:`CASReplicaCache` object
+
+    '''
+
+    # Estimates used before any fetches have been timed
+    DEFAULT_LATENCY = 0.01
+    DEFAULT_CELL_COST = 1e-6
+
+    # Estimated time to filter and copy one cell of a local replica
+    LOCAL_CELL_COST = 5e-8
+
+    # Weight of new measurements in the moving averages
+    SMOOTHING = 0.2
+
+    # Fetches with fewer cells than this are used to measure latency
+    LATENCY_CELLS = 1000
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._sizes = {}
+        self._spent = {}
+        self._lock = threading.RLock()
+        self._stats = dict(hits=0, misses=0, stores=0, evictions=0,
+                           invalidations=0)
+        self.latency = None
+        self.cell_cost = None
+
+        # Set while the cache is copying or checking a table
+        self.busy = _Busy()
+
+    def get_key(self, table):
+        '''
+        Return the cache key for a table
+
+        Parameters
+        ----------
+        table : :class:`CASTable` object
+            The table
+
+        Returns
+        -------
+        tuple
+            The lower-cased caslib (or None) and table name
+        None
+            If the table is not specified by name
+
+        '''
+        name = table.params.get('name')
+        if not isinstance(name, text_types + binary_types) or not name:
+            return None
+        caslib = table.params.get('caslib')
+        if caslib is not None and not isinstance(caslib, text_types + binary_types):
+            return None
+        return (caslib and caslib.lower() or None, name.lower())
+
+    def get(self, key):
+        '''
+        Return the replica for `key`
+
+        Parameters
+        ----------
+        key : tuple
+            The key returned by :meth:`get_key`
+
+        Returns
+        -------
+        :class:`Replica`
+            If the table has a replica
+        None
+            If the table has no replica
+
+        '''
+        with self._lock:
+            replica = self._entries.pop(key, None)
+            if replica is not None:
+                self._entries[key] = replica
+            return replica
+
+    def put(self, key, replica):
+        '''
+        Add a replica to the cache
+
+        Parameters
+        ----------
+        key : tuple
+            The key returned by :meth:`get_key`
+        replica : :class:`Replica`
+            The replica
+
+        '''
+        with self._lock:
+            self.pop(key)
+            if replica.nbytes > get_option('cas.table.replica_max_bytes'):
+                return
+            self._entries[key] = replica
+            self._nbytes += replica.nbytes
+            self._stats['stores'] += 1
+            max_bytes = get_option('cas.table.replica_max_bytes')
+            while self._nbytes > max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self._stats['evictions'] += 1
+
+    def pop(self, key):
+        '''
+        Remove the replica for `key`
+
+        Parameters
+        ----------
+        key : tuple
+            The key returned by :meth:`get_key`
+
+        Returns
+        -------
+        :class:`Replica` or None
+
+        '''
+        with self._lock:
+            self._sizes.pop(key, None)
+            self._spent.pop(key, None)
+            replica = self._entries.pop(key, None)
+            if replica is not None:
+                self._nbytes -= replica.nbytes
+            return replica
+
+    def invalidate(self):
+        '''
+        Mark all replicas as unverified
+
+        The version of each table is checked before its replica is
+        used again.
+
+        '''
+        with self._lock:
+            self._sizes.clear()
+            for replica in self._entries.values():
+                replica.verified = None
+            if self._entries:
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        ''' Remove all replicas and measurements '''
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._spent.clear()
+            self._nbytes = 0
+
+    def count(self, name):
+        ''' Increment a statistic '''
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_size(self, key):
+        ''' Return the (rows, columns) of a table without a replica '''
+        return self._sizes.get(key)
+
+    def set_size(self, key, nrows, ncolumns):
+        ''' Store the size of a table without a replica '''
+        self._sizes[key] = (nrows, ncolumns)
+
+    def spent(self, key):
+        ''' Return the time spent fetching from a table '''
+        return self._spent.get(key, 0)
+
+    def record_fetch(self, key, elapsed, ncells):
+        '''
+        Record the time taken by a fetch from the server
+
+        Parameters
+        ----------
+        key : tuple or None
+            The key returned by :meth:`get_key`
+        elapsed : float
+            The time of the fetch in seconds
+        ncells : int
+            The number of cells fetched
+
+        '''
+        with self._lock:
+            if key is not None:
+                self._spent[key] = self._spent.get(key, 0) + elapsed
+            if ncells < self.LATENCY_CELLS:
+                if self.latency is None:
+                    self.latency = elapsed
+                else:
+                    self.latency += self.SMOOTHING * (elapsed - self.latency)
+            else:
+                cost = max(elapsed - self.get_latency(), 0) / ncells
+                if self.cell_cost is None:
+                    self.cell_cost = cost
+                else:
+                    self.cell_cost += self.SMOOTHING * (cost - self.cell_cost)
+
+    def get_latency(self):
+        ''' Return the estimated round trip time of a request '''
+        if self.latency is None:
+            return self.DEFAULT_LATENCY
+        return self.latency
+
+    def remote_cost(self, ncells):
+        ''' Return the estimated time of transferring cells from the server '''
+        cell_cost = self.cell_cost
+        if cell_cost is None:
+            cell_cost = self.DEFAULT_CELL_COST
+        return self.get_latency() + ncells * cell_cost
+
+    def use_local(self, replica, ncells=0):
+        '''
+        Is a request cheaper to answer from a replica?
+
+        Parameters
+        ----------
+        replica : :class:`Replica`
+            The replica of the table
+        ncells : int, optional
+            The number of cells the server would return
+
+        Returns
+        -------
+        bool
+
+        '''
+        return replica.ncells * self.LOCAL_CELL_COST < self.remote_cost(ncells)
+
+    def should_replicate(self, key, nrows, ncolumns):
+        '''
+        Should a table be replicated automatically?
+
+        A table is copied once the time spent fetching from it is
+        at least the estimated time of copying it.
+
+        Parameters
+        ----------
+        key : tuple
+            The key returned by :meth:`get_key`
+        nrows : int
+            The number of rows in the table
+        ncolumns : int
+            The number of columns in the table
+
+        Returns
+        -------
+        bool
+
+        '''
+        if nrows > get_option('cas.table.replica_max_rows'):
+            return False
+        return self.spent(key) >= self.remote_cost(nrows * max(ncolumns, 1))
+
+    def get_stats(self):
+        '''
+        Return cache statistics
+
+        Returns
+        -------
+        dict
+            Counts of hits, misses, stores, evictions, and invalidations
+            as well as the current number of replicas and bytes, and the
+            measured latency and transfer time per cell
+
+        '''
+        with self._lock:
+            out = dict(self._stats)
+            out['entries'] = len(self._entries)
+            out['bytes'] = self._nbytes
+            out['latency'] = self.latency
+            out['cell_cost'] = self.cell_cost
+        return out
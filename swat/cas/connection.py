@@ -42,11 +42,16 @@ from ..utils import getsoptions
 from ..utils.args import iteroptions
 from ..formatter import SASFormatter
 from .actions import CASAction, CASActionSet
-from .table import CASTable
-from .transformers import py2cas
+from .table import CASTable, _gen_table_name, _quote
+from .transformers import py2cas, py2cas_items
 from .request import CASRequest
 from .response import CASResponse
+from . import metrics
+from . import profiling
 from .results import CASResults
+from .binder import ActionBinder, BoundSignature
+from .prepared import CASPreparedAction
+from .cache import CASResultCache, CASSampleCache, CASReplicaCache
 from .utils.params import ParamManager, ActionParamManager
 
 # pylint: disable=W0212
@@ -125,6 +130,11 @@ def _lower_parmlist_keys(parmlist):
     return parmlist
 
 
+# pandas readers that can return the data in chunks
+_CHUNKED_READERS = ['read_csv', 'read_table', 'read_fwf', 'read_json', 'read_sas',
+                    'read_sql_table', 'read_sql_query', 'read_sql', 'read_stata']
+
+
 @six.python_2_unicode_compatible
 class CAS(object):
     '''
@@ -158,6 +168,8 @@ class CAS(object):
         This protocol must match the protocol spoken by the specified
         server port.  If not specified, the value will come from the
         ``cas.protocol`` option or ``CASPROTOCOL`` environment variable.
+        The value 'replay' serves responses recorded by the
+        ``cas.rest.record_file`` option from the file given as `hostname`.
     **kwargs : any, optional
         Arbitrary keyword arguments used for internal purposes only.
 
@@ -248,7 +260,7 @@ class CAS(object):
 
         # Create error handler
         try:
-            if protocol in ['http', 'https']:
+            if protocol in ['http', 'https', 'replay']:
                 self._sw_error = rest.REST_CASError(a2n(soptions))
             else:
                 self._sw_error = clib.SW_CASError(a2n(soptions))
@@ -286,6 +298,10 @@ class CAS(object):
                           a2n(soptions), self._sw_error)
                 if protocol in ['http', 'https']:
                     self._sw_connection = rest.REST_CASConnection(*params)
+                elif protocol == 'replay':
+                    self._sw_connection = rest.REST_CASReplayConnection(*params)
+                    # Recorded responses come from the REST interface
+                    protocol = 'http'
                 else:
                     self._sw_connection = clib.SW_CASConnection(*params)
 
@@ -319,12 +335,28 @@ class CAS(object):
         # Caches for action classes and reflection information
         self._action_classes = {}
         self._action_info = {}
+        self._action_binders = {}
         self._actionset_classes = {}
         self._actionset_info = {}
 
         # Dictionary of result hook functions
         self._results_hooks = {}
 
+        # Client-side cache of action results
+        self._result_cache = CASResultCache()
+
+        # Server-side sample tables reused by sampled fetches
+        self._sample_cache = CASSampleCache()
+
+        # Local copies of small tables
+        self._replica_cache = CASReplicaCache()
+
+        # Parameters of the action call in progress, for the slow action log
+        self._action_params = None
+
+        # Executor for actions run using submit
+        self._executor = None
+
         # Preload __dir__ information.  It will be extended later with action names
         self._dir = set([x for x in self.__dict__.keys() if not x.startswith('_')])
 
@@ -377,6 +409,9 @@ class CAS(object):
                 num = num + 1
         self._id_generator = _id_generator()
 
+        # Names of the intermediate computed columns of CASColumn expressions
+        self._generated_columns = set()
+
     def _gen_id(self):
         ''' Generate an ID unique to the session '''
         import numpy
@@ -754,8 +789,76 @@ class CAS(object):
         if name in self._results_hooks:
             del self._results_hooks[name]
 
+    def get_cache_stats(self):
+        '''
+        Return statistics for the client-side result cache
+
+        See Also
+        --------
+        :meth:`clear_cache`
+
+        Examples
+        --------
+        >>> swat.set_option('cas.cache.enabled', True)
+        >>> s.table.columninfo(table='cars')
+        >>> s.table.columninfo(table='cars')
+        >>> print(s.get_cache_stats()['hits'])
+        1
+
+        Returns
+        -------
+        dict
+            The statistics of the result cache.  The statistics of the
+            sample table cache (see ``cas.table.cache_samples``) are
+            in the 'samples' key, and those of the local table copies
+            (see :meth:`CASTable.cache_local`) are in the 'replicas' key.
+
+        '''
+        out = self._result_cache.get_stats()
+        out['samples'] = self._sample_cache.get_stats()
+        out['replicas'] = self._replica_cache.get_stats()
+        return out
+
+    def clear_cache(self):
+        '''
+        Remove all entries for this session from the client-side result cache
+
+        Cached sample tables are also dropped from the server, and local
+        copies of tables are removed.
+
+        See Also
+        --------
+        :meth:`get_cache_stats`
+
+        '''
+        self._result_cache.invalidate(self._session)
+        self._drop_sample_tables(self._sample_cache.invalidate())
+        self._replica_cache.clear()
+
+    def _invalidate_caches(self):
+        ''' Clear the caches after an action updated server state '''
+        self._result_cache.invalidate(self._session)
+        self._replica_cache.invalidate()
+        if not self._sample_cache.busy:
+            self._drop_sample_tables(self._sample_cache.invalidate())
+
+    def _drop_sample_tables(self, tables):
+        ''' Drop sample tables evicted from the sample cache '''
+        if not tables:
+            return
+        with self._sample_cache.busy:
+            for table in tables:
+                try:
+                    table._retrieve('table.droptable')
+                except Exception:
+                    pass
+
     def close(self):
         ''' Close the CAS connection '''
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._drop_sample_tables(self._sample_cache.invalidate())
         errorcheck(self._sw_connection.close(), self._sw_connection)
 
     def terminate(self):
@@ -899,182 +1002,30 @@ class CAS(object):
         :obj:`self`
 
         '''
+        prepared = kwargs.pop('__prepared__', None)
         if isinstance(self._sw_connection, rest.REST_CASConnection):
-            errorcheck(self._sw_connection.invoke(a2n(_name_), kwargs),
-                       self._sw_connection)
+            if prepared is not None:
+                errorcheck(self._sw_connection.invoke(a2n(_name_), kwargs,
+                                                      prepared=prepared),
+                           self._sw_connection)
+            else:
+                errorcheck(self._sw_connection.invoke(a2n(_name_), kwargs),
+                           self._sw_connection)
         else:
-            errorcheck(self._sw_connection.invoke(a2n(_name_),
-                                                  py2cas(self._soptions,
-                                                         self._sw_error, **kwargs)),
+            perf = profiling.current()
+            if perf is not None:
+                start = profiling.clock()
+            if prepared is not None:
+                params = py2cas_items(self._soptions, self._sw_error,
+                                      prepared.get_items(kwargs))
+            else:
+                params = py2cas(self._soptions, self._sw_error, **kwargs)
+            if perf is not None:
+                perf.add('serialize', start)
+            errorcheck(self._sw_connection.invoke(a2n(_name_), params),
                        self._sw_connection)
         return self
 
-    def _merge_param_args(self, parmlist, kwargs, action=None):
-        '''
-        Merge keyword arguments into a parmlist
-
-        This method modifies the parmlist *in place*.
-
-        Parameters
-        ----------
-        parmlist : list
-            Parameter list.
-        kwargs : dict
-            Dictionary of keyword arguments.
-        action : string
-            Name of the action.
-
-        '''
-        if action is None:
-            action = ''
-
-        if isinstance(kwargs, ParamManager):
-            kwargs = copy.deepcopy(kwargs.params)
-
-        # Short circuit if we can
-        if not isinstance(kwargs, dict):
-            return
-
-        # See if we have a caslib= parameter
-        caslib = False
-        for param in parmlist:
-            if param['name'] == 'caslib':
-                caslib = True
-                break
-
-        # kwargs preserving case
-        casekeys = {k.lower(): k for k in kwargs.keys()}
-
-        # Add support for CASTable objects
-        inputs = None
-        fetch = {}
-        uses_inputs = False
-        uses_fetchvars = False
-        for param in parmlist:
-            ptype = param['parmType']
-            key = param['name']
-            key = casekeys.get(key, key)
-            key_lower = key.lower()
-
-            # Check for inputs= / fetchvars= parameters
-            if ptype == 'value_list':
-                if key_lower == 'inputs':
-                    uses_inputs = True
-                elif key_lower == 'fetchvars':
-                    uses_fetchvars = True
-
-            # Get table object if it exists
-            tbl = kwargs.get('__table__', None)
-
-            # Convert table objects to the proper form based on the argument type
-            if key in kwargs and isinstance(kwargs[key], CASTable):
-                if param.get('isTableDef'):
-                    inputs = kwargs[key].get_inputs_param()
-                    fetch = kwargs[key].get_fetch_params()
-                    kwargs[key] = kwargs[key].to_table_params()
-                elif param.get('isTableName'):
-                    inputs = kwargs[key].get_inputs_param()
-                    fetch = kwargs[key].get_fetch_params()
-                    # Fill in caslib= first
-                    if caslib and 'caslib' not in kwargs and \
-                            kwargs[key].has_param('caslib'):
-                        kwargs['caslib'] = kwargs[key].get_param('caslib')
-                    kwargs[key] = kwargs[key].to_table_name()
-                elif param.get('isOutTableDef'):
-                    kwargs[key] = kwargs[key].to_outtable_params()
-                elif param.get('isCasLib') and kwargs[key].has_param('caslib'):
-                    kwargs[key] = kwargs[key].get_param('caslib')
-
-            # If a string is given for a table object, convert it to a table object
-            elif key in kwargs and isinstance(kwargs[key], text_types) and \
-                    param.get('isTableDef'):
-                kwargs[key] = {'name': kwargs[key]}
-
-            elif tbl is not None and param.get('isTableDef') and \
-                    key_lower == 'table' and 'table' not in casekeys:
-                inputs = tbl.get_inputs_param()
-                fetch = tbl.get_fetch_params()
-                kwargs[key] = tbl.to_table_params()
-
-            elif tbl is not None and param.get('isTableName') and \
-                    key_lower == 'name' and 'name' not in casekeys:
-                inputs = tbl.get_inputs_param()
-                fetch = tbl.get_fetch_params()
-                if caslib and 'caslib' not in kwargs and tbl.has_param('caslib'):
-                    kwargs['caslib'] = tbl.get_param('caslib')
-                kwargs[key] = tbl.to_table_name()
-
-            # Workaround for columninfo / update which doesn't define table= as
-            # a table definition.
-            elif tbl is not None and key_lower == 'table' and \
-                    action.lower() in ['columninfo', 'table.columninfo',
-                                       'update', 'table.update'] and \
-                    'table' not in casekeys:
-                inputs = tbl.get_inputs_param()
-                kwargs[key] = tbl.to_table_params()
-                if not uses_inputs:
-                    if inputs and 'vars' not in kwargs:
-                        kwargs[key]['vars'] = inputs
-                    inputs = None
-
-        # Apply input variables
-        if uses_inputs and inputs and 'inputs' not in kwargs:
-            kwargs['inputs'] = inputs
-        elif uses_fetchvars and inputs and 'fetchvars' not in kwargs:
-            kwargs['fetchvars'] = inputs
-
-        # Apply fetch parameters
-        if fetch and action.lower() in ['fetch', 'table.fetch']:
-            for key, value in fetch.items():
-                if key in kwargs:
-                    continue
-                if key == 'sortby' and ('orderby' in kwargs or 'orderBy' in kwargs):
-                    continue
-                kwargs[key] = value
-
-        # Apply inputs= to specific actions that don't support it
-        if 'table' in kwargs and not uses_inputs and inputs \
-                and action.lower() in ['partition', 'table.partition',
-                                       'save', 'table.save']:
-            tbl = kwargs['table']
-            if not isinstance(tbl, dict):
-                tbl = dict(name=tbl)
-            tbl['vars'] = inputs
-
-        # Fix aggregate action when both inputs= and varspecs= are supplied
-        if 'table' in kwargs and action.lower() in ['aggregate', 'aggregation.aggregate']:
-            if 'inputs' in kwargs and 'varspecs' in kwargs:
-                kwargs.pop('inputs', None)
-
-        kwargs.pop('__table__', None)
-
-        # Workaround for tableinfo which aliases table= to name=, but
-        # the alias is hidden.
-        if action.lower() in ['tableinfo', 'table.tableinfo'] and 'table' in kwargs:
-            if isinstance(kwargs['table'], CASTable):
-                kwargs['table'] = kwargs['table'].to_table_params()
-            if isinstance(kwargs['table'], dict):
-                if caslib and 'caslib' not in kwargs and \
-                       kwargs['table'].get('caslib'):
-                    kwargs['caslib'] = kwargs['table']['caslib']
-                kwargs['table'] = kwargs['table']['name']
-
-        # Add current value fields in the signature
-        for param in parmlist:
-            if param['name'] in kwargs:
-                if 'parmList' in param:
-                    self._merge_param_args(param['parmList'], kwargs[param['name']],
-                                           action=action)
-                else:
-                    if isinstance(kwargs[param['name']], text_types):
-                        param['value'] = kwargs[param['name']].replace('"', '\\u0022')
-                    # TODO: This should only happen for binary inputs (i.e., never)
-                    elif isinstance(kwargs[param['name']], binary_types):
-                        # param['value'] = kwargs[param['name']].replace('"', '\\u0022')
-                        pass
-                    else:
-                        param['value'] = kwargs[param['name']]
-
     def _get_action_params(self, name, kwargs):
         '''
         Get additional parameters associated with the given action
@@ -1098,6 +1049,29 @@ class CAS(object):
                 newkwargs.update(value.get_action_params(name, {}))
         return newkwargs
 
+    def _get_action_binder(self, signature):
+        '''
+        Return the parameter binder for an action
+
+        Binders are compiled from the reflection information on first
+        use and reused until the action set is reloaded.
+
+        Parameters
+        ----------
+        signature : dict
+            The reflection information of the action
+
+        Returns
+        -------
+        :class:`ActionBinder`
+
+        '''
+        name = (signature.get('name') or '').lower()
+        binder = self._action_binders.get(name)
+        if binder is None or binder.info is not signature:
+            binder = self._action_binders[name] = ActionBinder(signature)
+        return binder
+
     def _invoke_with_signature(self, _name_, **kwargs):
         '''
         Call an action on the server
@@ -1111,10 +1085,17 @@ class CAS(object):
 
         Returns
         -------
-        dict
+        :class:`BoundSignature` or dict
             Signature of the action
 
         '''
+        perf = profiling.current()
+        if perf is not None:
+            start = profiling.clock()
+
+        # Static parameters of a prepared action are already bound
+        prepared = kwargs.pop('__prepared__', None)
+
         # Get the signature of the action
         signature = self._get_action_info(_name_)[-1]
 
@@ -1122,11 +1103,27 @@ class CAS(object):
         kwargs = self._get_action_params(_name_, kwargs)
 
         if signature:
-            signature = copy.deepcopy(signature)
-            kwargs = copy.deepcopy(kwargs)
-            self._merge_param_args(signature.get('params', {}), kwargs, action=_name_)
+            binder = self._get_action_binder(signature)
+            kwargs = binder.bind(kwargs, action=_name_)
+            if prepared is not None:
+                signature = BoundSignature(binder, prepared.merge(kwargs))
+            else:
+                signature = BoundSignature(binder, kwargs)
+
+        if perf is not None:
+            perf.add('prepare', start)
+
+        # Keep the merged parameters for the slow action log
+        if metrics.enabled:
+            if prepared is not None:
+                self._action_params = prepared.merge(kwargs)
+            else:
+                self._action_params = kwargs
 
-        self._invoke_without_signature(_name_, **kwargs)
+        if prepared is not None:
+            self._invoke_without_signature(_name_, __prepared__=prepared, **kwargs)
+        else:
+            self._invoke_without_signature(_name_, **kwargs)
 
         return signature
 
@@ -1190,6 +1187,7 @@ class CAS(object):
         '''
         delete = False
         name = None
+        nrows = None
 
         for key, value in list(kwargs.items()):
             if importoptions is None and key.lower() == 'importoptions':
@@ -1202,6 +1200,7 @@ class CAS(object):
         import pandas as pd
         if isinstance(data, pd.DataFrame):
             import tempfile
+            nrows = len(data)
             with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
                 delete = True
                 filename = tmp.name
@@ -1272,7 +1271,14 @@ class CAS(object):
             except:
                 pass
 
-        return self._get_results([(CASResponse(resp, connection=self), self)])
+        if metrics.enabled and nrows:
+            metrics.registry.inc('swat_rows_uploaded_total', nrows)
+
+        results = self._get_results([(CASResponse(resp, connection=self), self)])
+        if results.updateflags:
+            self._invalidate_caches()
+
+        return results
 
     def upload_file(self, data, importoptions=None, casout=None, **kwargs):
         '''
@@ -1535,29 +1541,237 @@ class CAS(object):
             resultfunc = kwargs['resultfunc']
             kwargs.pop('resultfunc')
 
+        # Check the client-side result cache
+        cache_key = None
+        if get_option('cas.cache.enabled') and datamsghandler is None \
+                and responsefunc is None and resultfunc is None:
+            cache_key = self._result_cache.get_key(self._session, a2n(_name_), kwargs)
+            if cache_key is not None:
+                results = self._result_cache.get(cache_key)
+                if results is not None:
+                    return self._run_results_hooks(results)
+
+        perf = None
+        if profiling.enabled:
+            perf = profiling.begin(_name_)
+
+        start = None
+        if metrics.enabled:
+            start = metrics.clock()
+        retried = False
+        failed = True
+
         try:
             # Call the action and compile the results
-            signature = self._invoke_with_signature(a2n(_name_), **kwargs)
-            results = self._get_results(getnext(self, datamsghandler=datamsghandler),
-                                        responsefunc=responsefunc, resultfunc=resultfunc)
-        except SWATCASActionRetry:
-            signature = self._invoke_with_signature(a2n(_name_), **kwargs)
-            results = self._get_results(getnext(self, datamsghandler=datamsghandler),
-                                        responsefunc=responsefunc, resultfunc=resultfunc)
+            try:
+                signature = self._invoke_with_signature(a2n(_name_), **kwargs)
+                results = self._get_results(getnext(self, datamsghandler=datamsghandler),
+                                            responsefunc=responsefunc,
+                                            resultfunc=resultfunc)
+            except SWATCASActionRetry:
+                retried = True
+                signature = self._invoke_with_signature(a2n(_name_), **kwargs)
+                results = self._get_results(getnext(self, datamsghandler=datamsghandler),
+                                            responsefunc=responsefunc,
+                                            resultfunc=resultfunc)
+            if start is not None:
+                failed = isinstance(results, CASResults) and \
+                    (results.severity or 0) > 1
+        finally:
+            if perf is not None:
+                profiling.end(perf)
+            if start is not None:
+                self._record_action(_name_, start, kwargs, error=failed,
+                                    retried=retried)
 
         # Return raw data if a function was supplied
         if responsefunc is not None or resultfunc is not None:
             return results
 
-        results.signature = signature
+        return self._finish_results(results, signature, perf=perf,
+                                    cache_key=cache_key)
 
-        # run post-processing hooks
-        if signature and signature.get('name') in self._results_hooks:
-            for func in self._results_hooks[signature['name']]:
-                func(self, results)
+    def _record_action(self, _name_, start, kwargs, error=False, retried=False):
+        ''' Add an action call that started at `start` to the metrics '''
+        metrics.registry.record_action(_name_, metrics.clock() - start,
+                                       params=self._action_params or kwargs,
+                                       error=error, retried=retried)
+        self._action_params = None
+
+    def _finish_results(self, results, signature, perf=None, cache_key=None):
+        '''
+        Post-process the results of an action call
+
+        The signature and client timings are attached to the results,
+        the caches are updated, and the results hooks are run.
+
+        Parameters
+        ----------
+        results : :class:`CASResults` object
+            The results of the action call
+        signature : dict or :class:`BoundSignature` object
+            The signature returned by :meth:`_invoke_with_signature`
+        perf : :class:`CASClientPerformance` object, optional
+            The client timings of the call
+        cache_key : string, optional
+            The result cache key of the call
 
+        Returns
+        -------
+        :class:`CASResults` object
+
+        '''
+        results.signature = signature
+        results.client_performance = perf
+
+        # Actions that update server state make cached results stale.
+        # Results are cached before the hooks run, since the hooks are
+        # also run on each cached copy.
+        if results.updateflags:
+            self._invalidate_caches()
+        elif cache_key is not None and not results.severity:
+            self._result_cache.put(cache_key, results)
+
+        return self._run_results_hooks(results)
+
+    def _run_results_hooks(self, results):
+        ''' Run the post-processing hooks for the action that created `results` '''
+        # Use the unresolved signature; only the action name is needed
+        signature = results.__dict__.get('_signature')
+        name = getattr(signature, 'name', None) or (signature or {}).get('name')
+        if name in self._results_hooks:
+            for func in self._results_hooks[name]:
+                func(self, results)
         return results
 
+    def prepare(self, _name_, **kwargs):
+        '''
+        Prepare an action call that is repeated with different parameters
+
+        The given parameters are bound to the action, and converted to
+        the transport format, once.  Each call of the returned object
+        only converts the parameters given in that call, which are
+        combined with the static parameters.  A parameter given in a
+        call replaces a static parameter with the same name.
+
+        Parameters
+        ----------
+        _name_ : string
+            Name of the action
+        **kwargs : any, optional
+            Static action parameters
+
+        Examples
+        --------
+        >>> fetch = conn.prepare('table.fetch', table='cars', fetchvars=['msrp'])
+        >>> for start in range(1, 429, 100):
+        ...     out = fetch(**{'from': start, 'to': start + 99})
+
+        See Also
+        --------
+        :meth:`retrieve`
+
+        Returns
+        -------
+        :class:`CASPreparedAction` object
+
+        '''
+        return CASPreparedAction(self, _name_, kwargs)
+
+    def submit(self, _name_, **kwargs):
+        '''
+        Call an action in the background and return a future
+
+        The action runs on one of up to ``cas.fanout_sessions`` sessions
+        copied from this connection, so it does not block this connection.
+        The sessions are created as they are needed and ended when this
+        connection is closed.
+
+        Parameters
+        ----------
+        _name_ : string
+            Name of the action
+        **kwargs : any, optional
+            Action parameters
+
+        Examples
+        --------
+        >>> futures = [conn.submit('simple.summary', table=name)
+        ...            for name in ['cars', 'class', 'iris']]
+        >>> for future in swat.as_completed(futures):
+        ...     print(future.result().Summary)
+
+        See Also
+        --------
+        :meth:`map`
+
+        Returns
+        -------
+        :class:`CASFuture` object
+
+        '''
+        if self._executor is None:
+            from .futures import CASExecutor
+            from .pool import CASPool
+            self._executor = CASExecutor(
+                CASPool(self, min_size=0,
+                        max_size=get_option('cas.fanout_sessions')),
+                close_pool=True)
+        return self._executor.submit(_name_, **kwargs)
+
+    def map(self, _name_, params, sessions=None, ordered=True):
+        '''
+        Call an action once for each set of parameters, concurrently
+
+        The calls are spread over multiple sessions.  On the REST
+        interface, the calls are overlapped using threads.  On the
+        binary interface, the calls are overlapped using the connection
+        event watcher, as in :func:`getnext`.
+
+        Errors do not stop the other calls.  The exception raised by a
+        failed call is returned in place of its results.  A binary
+        session whose responses can no longer be read is closed and
+        not used for the rest of the calls.
+
+        Parameters
+        ----------
+        _name_ : string
+            Name of the action
+        params : iterable of dicts
+            The action parameters of each call
+        sessions : int or :class:`CASPool` or list of :class:`CAS` objects, optional
+            The number of sessions to copy from this connection for the
+            duration of the call, or the sessions to use.  The default is
+            the value of the ``cas.fanout_sessions`` option.
+        ordered : boolean, optional
+            If True, a list of results in the order of `params` is
+            returned.  If False, a generator of (index, results) tuples
+            is returned in the order that the calls finish.
+
+        Examples
+        --------
+        >>> out = conn.map('simple.summary',
+        ...                [dict(table=name) for name in ['cars', 'class']],
+        ...                sessions=2)
+        >>> print(out[1].Summary)
+
+        See Also
+        --------
+        :meth:`submit`
+
+        Returns
+        -------
+        list of :class:`CASResults` objects (or exceptions)
+            If `ordered` is True
+        generator of (int, :class:`CASResults` object) tuples
+            If `ordered` is False
+
+        '''
+        from .futures import fanout
+        if sessions is None:
+            sessions = get_option('cas.fanout_sessions')
+        return fanout(self, _name_, params, sessions=sessions, ordered=ordered)
+
     def _get_results(self, riter, responsefunc=None, resultfunc=None):
         '''
         Walk through responses in ``riter`` and compile results
@@ -1624,6 +1838,9 @@ class CAS(object):
                                                 conn, resultdata)
                         continue
 
+                    if metrics.enabled:
+                        metrics.registry.count_rows(value)
+
                     if key is None or isinstance(key, int_types):
                         results[idx] = value
                         idx += 1
@@ -1720,8 +1937,8 @@ class CAS(object):
         if (atype in [None, 'action'] and name in self._action_classes and
                 self._action_classes[name] is not None):
             if class_requested:
-                return self._action_classes[name]
-            return self._action_classes[name]()
+                return self._get_action_class(name)
+            return self._get_action_class(name)()
 
         # See if the action/action set exists
         asname, actname, asinfo = self._get_actionset_info(name.lower(), atype=atype)
@@ -1729,11 +1946,12 @@ class CAS(object):
         # Generate a new actionset class
         ascls = CASActionSet.from_reflection(asinfo, self)
 
-        # Add actionset and actions to the cache
+        # Add actionset and actions to the cache.  The action classes
+        # are created by the actionset class when they are first used.
         self._actionset_classes[asname.lower()] = ascls
-        for key, value in six.iteritems(ascls.actions):
-            self._action_classes[key] = value
-            self._action_classes[asname.lower() + '.' + key] = value
+        for key in ascls.actions:
+            self._action_classes[key] = (ascls.actions, key)
+            self._action_classes[asname.lower() + '.' + key] = (ascls.actions, key)
 
         # Check cache for actionset and action classes
         if atype in [None, 'actionset'] and name in self._actionset_classes:
@@ -1741,11 +1959,30 @@ class CAS(object):
 
         if atype in [None, 'action'] and name in self._action_classes:
             if class_requested:
-                return self._action_classes[name]
-            return self._action_classes[name]()
+                return self._get_action_class(name)
+            return self._get_action_class(name)()
 
         raise AttributeError(origname)
 
+    def _get_action_class(self, name):
+        '''
+        Return the cached action class for the given action name
+
+        Parameters
+        ----------
+        name : string
+            Lower-cased action name
+
+        Returns
+        -------
+        :class:`CASAction` subclass
+
+        '''
+        actcls = self._action_classes[name]
+        if isinstance(actcls, tuple):
+            actcls = self._action_classes[name] = actcls[0][actcls[1]]
+        return actcls
+
     def _get_action_info(self, name, showhidden=True):
         '''
         Get the reflection information for the given action name
@@ -2040,6 +2277,178 @@ class CAS(object):
         if use_options:
             return importoptions
 
+    def _chunked_importoptions(self, dframe):
+        '''
+        Derive importoptions= values that fix the column types of all chunks
+
+        The types are taken from the first chunk so that the server
+        does not guess them again for each chunk.
+
+        '''
+        ivars = []
+        for name, dtype in zip(dframe.columns, dframe.dtypes):
+            # Integers become doubles so that missing values in later
+            # chunks do not conflict with the first chunk
+            if dtype.kind in 'iuf':
+                ivars.append(dict(name=name, type='double'))
+            # Booleans are written as True / False
+            elif dtype.kind in 'bO':
+                ivars.append(dict(name=name, type='varchar'))
+            else:
+                ivars.append(dict(name=name))
+        return dict(filetype='csv', vars=ivars)
+
+    def _check_chunk_types(self, importoptions, dframe):
+        '''
+        Verify that a chunk fits the column types of the first chunk
+
+        Raises
+        ------
+        SWATError
+            If a numeric column contains values that are not numbers
+
+        '''
+        for var, dtype in zip(importoptions['vars'], dframe.dtypes):
+            if var.get('type') == 'double' and dtype.kind not in 'iuf':
+                raise SWATError(("Column '%s' is numeric in the first chunk of "
+                                 'the file, but contains values that are not numbers '
+                                 'in a later chunk; specify the column dtype or set '
+                                 'cas.dataset.read_chunksize to 0 to read the file '
+                                 'all at once') % var['name'])
+
+    def _upload_chunks(self, chunks, casout=None):
+        '''
+        Upload a series of DataFrames into one CAS table
+
+        The first DataFrame creates the table.  Each subsequent DataFrame
+        is uploaded to a temporary table and appended to it using the
+        Data step, so only one chunk is held in memory at a time.
+        A single DataFrame is uploaded as is.
+
+        Parameters
+        ----------
+        chunks : iterator of :class:`pandas.DataFrame` objects
+            The data to upload
+        casout : dict, optional
+            The output table definition
+
+        Raises
+        ------
+        SWATError
+            If a chunk does not fit the column types of the first chunk
+
+        Returns
+        -------
+        :class:`CASTable`
+            or None if `chunks` is empty
+
+        '''
+        chunks = iter(chunks)
+        try:
+            first = next(chunks)
+        except StopIteration:
+            return None
+
+        casout = dict(casout or {})
+        promote = casout.pop('promote', None)
+
+        # Data that fits in one chunk doesn't need fixed column types
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            if promote is not None:
+                casout['promote'] = promote
+            return self.upload_frame(first, casout=casout or None)
+
+        importoptions = self._chunked_importoptions(first)
+        out = self.upload_frame(first, casout=casout or None,
+                                importoptions=copy.deepcopy(importoptions))
+        first = None
+
+        caslib = out.params.get('caslib')
+        try:
+            while chunk is not None:
+                self._check_chunk_types(importoptions, chunk)
+                self._append_chunk(out, chunk, importoptions, caslib)
+                chunk = next(chunks, None)
+        except Exception:
+            self.retrieve('table.droptable', name=out.params['name'],
+                          caslib=caslib, _messagelevel='error', _apptag='UI')
+            raise
+
+        if promote:
+            res = self.retrieve('table.promote', name=out.params['name'],
+                                caslib=caslib, _messagelevel='error')
+            if res.severity > 1:
+                raise SWATError(res.status)
+
+        return out
+
+    def _append_chunk(self, out, chunk, importoptions, caslib):
+        ''' Upload a DataFrame and append it to the table `out` '''
+        tmp = self.upload_frame(chunk, importoptions=copy.deepcopy(importoptions),
+                                casout=dict(name=_gen_table_name(), caslib=caslib))
+        try:
+            opts = caslib and ('caslib=%s ' % _quote(caslib)) or ''
+            code = 'data %s(%sappend=yes); set %s(%s); run;' % \
+                (_quote(out.params['name']), opts,
+                 _quote(tmp.params['name']), opts.strip())
+            res = self.retrieve('datastep.runcode', code=code,
+                                _messagelevel='error', _apptag='UI')
+            if res.severity > 1:
+                raise SWATError(res.status)
+        finally:
+            self.retrieve('table.droptable', name=tmp.params['name'],
+                          caslib=caslib, _messagelevel='error', _apptag='UI')
+
+    def _read_chunksize(self, _method_, kwargs):
+        '''
+        Return the number of rows per chunk for a pandas reader
+
+        Returns
+        -------
+        int
+            or None if the file should be read all at once
+
+        '''
+        chunksize = kwargs.get('chunksize')
+        if chunksize is not None:
+            return chunksize
+        if _method_ not in _CHUNKED_READERS:
+            return
+        if _method_ == 'read_json' and not kwargs.get('lines'):
+            return
+        return get_option('cas.dataset.read_chunksize') or None
+
+    def _read_chunks(self, _method_, args, kwargs, table):
+        '''
+        Read a file with a pandas reader in chunks and upload them
+
+        Returns
+        -------
+        :class:`CASTable`
+            or None if the file should be read all at once or there
+            is no data
+
+        '''
+        import pandas as pd
+
+        chunksize = self._read_chunksize(_method_, kwargs)
+        if chunksize is None:
+            return
+
+        kwargs = dict(kwargs, chunksize=chunksize)
+        if 'table' in table:
+            table['name'] = table.pop('table')
+
+        chunks = getattr(pd, _method_)(*args, **kwargs)
+        try:
+            return self._upload_chunks(chunks, casout=table)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
     def _read_any(self, _method_, *args, **kwargs):
         '''
         Generic data file reader
@@ -2064,15 +2473,28 @@ class CAS(object):
         import pandas as pd
         use_addtable = kwargs.pop('use_addtable', False)
         table, kwargs = self._get_table_args(**kwargs)
-        dframe = getattr(pd, _method_)(*args, **kwargs)
         # REST doesn't support table.addtable
         if not use_addtable or self._protocol.startswith('http'):
+            out = self._read_chunks(_method_, args, kwargs, dict(table))
+            if out is not None:
+                return out
+            kwargs.pop('chunksize', None)
+            dframe = getattr(pd, _method_)(*args, **kwargs)
             if 'table' in table:
                 table['name'] = table.pop('table')
             return self.upload_frame(dframe, casout=table and table or None)
 #                                    importoptions=self._importoptions_from_dframe(dframe)
+        # The data message handler accepts an iterator of chunks
+        chunksize = self._read_chunksize(_method_, kwargs)
+        if chunksize is not None:
+            kwargs['chunksize'] = chunksize
         from swat import datamsghandlers as dmh
-        table.update(dmh.PandasDataFrame(dframe).args.addtable)
+        try:
+            dmh_obj = dmh.PandasDataFrame(getattr(pd, _method_)(*args, **kwargs))
+        except StopIteration:
+            kwargs.pop('chunksize', None)
+            dmh_obj = dmh.PandasDataFrame(getattr(pd, _method_)(*args, **kwargs))
+        table.update(dmh_obj.args.addtable)
         return self.retrieve('table.addtable', **table).casTable
 
     def read_pickle(self, path, casout=None, **kwargs):
@@ -2156,6 +2578,12 @@ class CAS(object):
         -----
         Paths to specified files point to files on the client machine.
 
+        The file is read and uploaded `chunksize` rows at a time (the
+        ``cas.dataset.read_chunksize`` option by default), so the whole
+        file is never held in memory.  The column types of the first
+        chunk are used for the entire table, and an error is raised if
+        a later chunk contains text in a numeric column.
+
         Examples
         --------
         >>> conn = swat.CAS()
@@ -2177,6 +2605,11 @@ class CAS(object):
         # REST doesn't support table.addtable
         if not use_addtable or self._protocol.startswith('http'):
             import pandas as pd
+            out = self._read_chunks('read_table', (filepath_or_buffer,), kwargs,
+                                    dict(table))
+            if out is not None:
+                return out
+            kwargs.pop('chunksize', None)
             dframe = pd.read_table(filepath_or_buffer, **kwargs)
             if 'table' in table:
                 table['name'] = table.pop('table')
@@ -2218,6 +2651,12 @@ class CAS(object):
         -----
         Paths to specified files point to files on the client machine.
 
+        The file is read and uploaded `chunksize` rows at a time (the
+        ``cas.dataset.read_chunksize`` option by default), so the whole
+        file is never held in memory.  The column types of the first
+        chunk are used for the entire table, and an error is raised if
+        a later chunk contains text in a numeric column.
+
         Examples
         --------
         >>> conn = swat.CAS()
@@ -2239,6 +2678,11 @@ class CAS(object):
         # REST doesn't support table.addtable
         if not use_addtable or self._protocol.startswith('http'):
             import pandas as pd
+            out = self._read_chunks('read_csv', (filepath_or_buffer,), kwargs,
+                                    dict(table))
+            if out is not None:
+                return out
+            kwargs.pop('chunksize', None)
             dframe = pd.read_csv(filepath_or_buffer, **kwargs)
             if 'table' in table:
                 table['name'] = table.pop('table')
@@ -2338,6 +2782,12 @@ class CAS(object):
         -----
         Paths to specified files point to files on the client machine.
 
+        The file is read and uploaded `chunksize` rows at a time (the
+        ``cas.dataset.read_chunksize`` option by default), so the whole
+        file is never held in memory.  The column types of the first
+        chunk are used for the entire table, and an error is raised if
+        a later chunk contains text in a numeric column.
+
         Examples
         --------
         >>> conn = swat.CAS()
@@ -2359,6 +2809,11 @@ class CAS(object):
         # REST doesn't support table.addtable
         if not use_addtable or self._protocol.startswith('http'):
             import pandas as pd
+            out = self._read_chunks('read_fwf', (filepath_or_buffer,), kwargs,
+                                    dict(table))
+            if out is not None:
+                return out
+            kwargs.pop('chunksize', None)
             dframe = pd.read_fwf(filepath_or_buffer, **kwargs)
             if 'table' in table:
                 table['name'] = table.pop('table')
@@ -2969,8 +3424,17 @@ def getone(connection, datamsghandler=None):
         errorcheck(connection._sw_connection.enableDataMessages(),
                    connection._sw_connection)
 
+    perf = profiling.current()
+    if perf is not None:
+        start = profiling.clock()
+
     _sw_message = errorcheck(connection._sw_connection.receive(),
                              connection._sw_connection)
+
+    if perf is not None and \
+            not isinstance(connection._sw_connection, rest.REST_CASConnection):
+        perf.add('network', start)
+
     if _sw_message:
         mtype = _sw_message.getType()
         if mtype == 'response':
@@ -25,6 +25,7 @@ from __future__ import print_function, division, absolute_import, unicode_litera
 
 import base64
 import copy
+import itertools
 import re
 import datetime
 import warnings
@@ -42,6 +43,7 @@ from .utils.datetime import (str2cas_timestamp, str2cas_datetime, str2cas_date,
                              python2sas_date, python2sas_time, python2cas_timestamp,
                              python2cas_datetime, python2cas_date, python2cas_time)
 from .. import clib
+from . import metrics
 from ..config import get_option
 from ..clib import errorcheck
 from ..exceptions import SWATError
@@ -427,6 +429,8 @@ class CASDataMsgHandler(object):
         '''
         errorcheck(self._sw_databuffer.send(
             connection._sw_connection, nrecs), self._sw_databuffer)
+        if metrics.enabled and nrecs:
+            metrics.registry.inc('swat_rows_uploaded_total', nrecs)
 
     def finish(self, connection):
         '''
@@ -626,9 +630,27 @@ class PandasDataFrame(CASDataMsgHandler):
 
         self.chunksize = len(self.data)
 
+        # Later chunks are converted to the types of the first chunk
+        self._dtypes = data.dtypes
+
         super(PandasDataFrame, self).__init__(
             variables, nrecs=nrecs, reclen=reclen, transformers=transformers)
 
+    def _astypes(self, data):
+        '''
+        Convert the columns of a chunk to the types of the first chunk
+
+        Columns that can not be converted are left as they are.
+
+        '''
+        for name, dtype in self._dtypes.items():
+            if name in data.columns and data[name].dtype != dtype:
+                try:
+                    data[name] = data[name].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return data
+
     def getrow(self, row):
         '''
         Get a row of values from the data source
@@ -656,7 +678,7 @@ class PandasDataFrame(CASDataMsgHandler):
         if row > 0 and batchrow == 0:
             self.data = None
             try:
-                self.data = next(self.reader)
+                self.data = self._astypes(next(self.reader))
                 if self.data.index.name is None:
                     self.data = self.data.reset_index(drop=True)
                 else:
@@ -698,9 +720,24 @@ class SAS7BDAT(PandasDataFrame):
 
     def __init__(self, path, nrecs=1000, transformers=None, **kwargs):
         import sas7bdat
-        super(SAS7BDAT, self).__init__(
-            sas7bdat.SAS7BDAT(path, **kwargs).to_data_frame(), nrecs=nrecs,
-            transformers=transformers)
+        reader = sas7bdat.SAS7BDAT(path, **kwargs)
+        try:
+            super(SAS7BDAT, self).__init__(_sas7bdat_chunks(reader, nrecs),
+                                           nrecs=nrecs, transformers=transformers)
+        except StopIteration:
+            super(SAS7BDAT, self).__init__(reader.to_data_frame(), nrecs=nrecs,
+                                           transformers=transformers)
+
+
+def _sas7bdat_chunks(reader, nrecs):
+    ''' Yield the rows of a :class:`sas7bdat.SAS7BDAT` file as DataFrames '''
+    lines = reader.readlines()
+    columns = next(lines, None)
+    while columns is not None:
+        rows = list(itertools.islice(lines, nrecs))
+        if not rows:
+            break
+        yield pd.DataFrame(rows, columns=columns)
 
 
 class CSV(PandasDataFrame):
@@ -833,8 +870,15 @@ class JSON(PandasDataFrame):
     '''
 
     def __init__(self, path, nrecs=1000, transformers=None, **kwargs):
-        super(JSON, self).__init__(pd.read_json(path, **kwargs),
-                                   nrecs=nrecs, transformers=transformers)
+        if kwargs.get('lines'):
+            kwargs.setdefault('chunksize', nrecs)
+        try:
+            super(JSON, self).__init__(pd.read_json(path, **kwargs),
+                                       nrecs=nrecs, transformers=transformers)
+        except StopIteration:
+            kwargs.pop('chunksize', None)
+            super(JSON, self).__init__(pd.read_json(path, **kwargs),
+                                       nrecs=nrecs, transformers=transformers)
 
 
 class HTML(PandasDataFrame):
@@ -891,9 +935,16 @@ class SQLTable(PandasDataFrame):
     '''
 
     def __init__(self, table, engine, nrecs=1000, transformers=None, **kwargs):
-        super(SQLTable, self).__init__(
-            pd.io.sql.read_sql_table(table, engine, **kwargs),
-            nrecs=nrecs, transformers=transformers)
+        kwargs.setdefault('chunksize', nrecs)
+        try:
+            super(SQLTable, self).__init__(
+                pd.io.sql.read_sql_table(table, engine, **kwargs),
+                nrecs=nrecs, transformers=transformers)
+        except StopIteration:
+            del kwargs['chunksize']
+            super(SQLTable, self).__init__(
+                pd.io.sql.read_sql_table(table, engine, **kwargs),
+                nrecs=nrecs, transformers=transformers)
 
     @classmethod
     def create_engine(cls, *args, **kwargs):
@@ -947,9 +998,16 @@ class SQLQuery(PandasDataFrame):
     '''
 
     def __init__(self, query, engine, nrecs=1000, transformers=None, **kwargs):
-        super(SQLQuery, self).__init__(
-            pd.io.sql.read_sql_query(query, engine, **kwargs),
-            nrecs=nrecs, transformers=transformers)
+        kwargs.setdefault('chunksize', nrecs)
+        try:
+            super(SQLQuery, self).__init__(
+                pd.io.sql.read_sql_query(query, engine, **kwargs),
+                nrecs=nrecs, transformers=transformers)
+        except StopIteration:
+            del kwargs['chunksize']
+            super(SQLQuery, self).__init__(
+                pd.io.sql.read_sql_query(query, engine, **kwargs),
+                nrecs=nrecs, transformers=transformers)
 
     @classmethod
     def create_engine(cls, *args, **kwargs):
@@ -0,0 +1,623 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Run CAS actions concurrently on multiple sessions
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import collections
+import sys
+import threading
+from six.moves import queue
+from .. import clib
+from ..clib import errorcheck
+from ..utils.compat import a2n
+from . import metrics
+from .connection import CAS, getone
+from .pool import CASPool
+from .response import CASResponse
+from .rest.connection import REST_CASConnection
+from ..exceptions import SWATError, SWATCASActionError
+
+
+class CASFuture(object):
+    '''
+    The result of an action call that runs in the background
+
+    Parameters
+    ----------
+    action : string
+        The name of the action
+    params : dict
+        The action parameters
+
+    Returns
+    -------
+    :class:`CASFuture` object
+
+    '''
+
+    def __init__(self, action, params):
+        self.action = action
+        self.params = params
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def done(self):
+        ''' Has the action call finished? '''
+        return self._event.is_set()
+
+    def _wait(self, timeout):
+        ''' Wait for the action call to finish '''
+        if not self._event.wait(timeout):
+            raise SWATError('Timed out waiting for %s' % self.action)
+
+    def result(self, timeout=None):
+        '''
+        Return the results of the action call
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The number of seconds to wait.  If None, wait indefinitely.
+
+        Raises
+        ------
+        SWATError
+            If the call does not finish in time
+        Exception
+            If the action call raised an exception, it is raised again
+
+        Returns
+        -------
+        :class:`CASResults` object
+
+        '''
+        self._wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        '''
+        Return the exception raised by the action call
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The number of seconds to wait.  If None, wait indefinitely.
+
+        Returns
+        -------
+        Exception or None
+
+        '''
+        self._wait(timeout)
+        return self._exception
+
+    def add_done_callback(self, func):
+        '''
+        Call a function with the future when the action call finishes
+
+        If the call has already finished, `func` is called immediately.
+
+        Parameters
+        ----------
+        func : callable
+            Function that takes the future as its only argument
+
+        '''
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(func)
+                return
+        func(self)
+
+    def _set(self, result=None, exception=None):
+        ''' Store the outcome and run the callbacks '''
+        with self._lock:
+            self._result = result
+            self._exception = exception
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for func in callbacks:
+            func(self)
+
+    def __repr__(self):
+        if not self.done():
+            state = 'running'
+        elif self._exception is not None:
+            state = 'raised %s' % type(self._exception).__name__
+        else:
+            state = 'finished'
+        return 'CASFuture(%s, %s)' % (self.action, state)
+
+
+def _call(conn, action, params):
+    ''' Call an action, returning exceptions rather than raising them '''
+    try:
+        return conn.retrieve(action, **params)
+    except Exception:
+        return sys.exc_info()[1]
+
+
+class CASExecutor(object):
+    '''
+    Run action calls on sessions from a :class:`CASPool` using threads
+
+    Each worker thread checks out a session for each call, so there are
+    never more concurrent calls than sessions in the pool.
+
+    Parameters
+    ----------
+    pool : :class:`CASPool` object
+        The pool that supplies the sessions
+    close_pool : boolean, optional
+        If True, the pool is closed by :meth:`shutdown`
+
+    Returns
+    -------
+    :class:`CASExecutor` object
+
+    '''
+
+    def __init__(self, pool, close_pool=False):
+        self.pool = pool
+        self._close_pool = close_pool
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def _worker(self):
+        ''' Run queued action calls until shutdown '''
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future = item
+            try:
+                with self.pool.session() as conn:
+                    out = _call(conn, future.action, future.params)
+            except Exception:
+                out = sys.exc_info()[1]
+            if isinstance(out, Exception):
+                future._set(exception=out)
+            else:
+                future._set(result=out)
+
+    def submit(self, _name_, **kwargs):
+        '''
+        Call an action in the background
+
+        Parameters
+        ----------
+        _name_ : string
+            The name of the action
+        **kwargs : any, optional
+            The action parameters
+
+        Returns
+        -------
+        :class:`CASFuture` object
+
+        '''
+        future = CASFuture(_name_, kwargs)
+        with self._lock:
+            if self._shutdown:
+                raise SWATError('The executor has been shut down')
+            if len(self._threads) < self.pool.max_size:
+                thread = threading.Thread(target=self._worker)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+            self._queue.put(future)
+        return future
+
+    def shutdown(self, wait=True):
+        '''
+        Stop the worker threads after the queued calls finish
+
+        Parameters
+        ----------
+        wait : boolean, optional
+            If True, wait for the queued calls to finish
+
+        '''
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+        if self._close_pool:
+            self.pool.close()
+
+
+def as_completed(futures, timeout=None):
+    '''
+    Yield futures as their action calls finish
+
+    Parameters
+    ----------
+    futures : list of :class:`CASFuture` objects
+        The futures to wait for
+    timeout : float, optional
+        The number of seconds to wait for each future
+
+    Returns
+    -------
+    generator of :class:`CASFuture` objects
+
+    '''
+    finished = queue.Queue()
+    futures = list(futures)
+    for future in futures:
+        future.add_done_callback(finished.put)
+    for _ in futures:
+        try:
+            yield finished.get(timeout=timeout)
+        except queue.Empty:
+            raise SWATError('Timed out waiting for action calls')
+
+
+class _Call(object):
+    ''' An action call in progress on a binary connection '''
+
+    def __init__(self, idx, conn, action=None, params=None, signature=None,
+                 start=None):
+        self.idx = idx
+        self.conn = conn
+        self.action = action
+        self.params = params
+        self.signature = signature
+        self.start = start
+        self.responses = []
+        self.error = None
+        self.broken = False
+
+    def result(self):
+        '''
+        Return the results of the call, or the exception it raised
+
+        The results are post-processed as they are by :meth:`CAS.retrieve`.
+
+        '''
+        results = self.error
+        if results is None:
+            try:
+                results = self.conn._get_results([(x, self.conn)
+                                                  for x in self.responses])
+            except Exception:
+                results = sys.exc_info()[1]
+
+        if self.start is not None:
+            failed = isinstance(results, Exception) or \
+                (results.severity or 0) > 1
+            self.conn._record_action(self.action, self.start, self.params,
+                                     error=failed)
+
+        if isinstance(results, Exception):
+            return results
+
+        try:
+            return self.conn._finish_results(results, self.signature)
+        except Exception:
+            return sys.exc_info()[1]
+
+
+def _watch(conns):
+    '''
+    Read responses from whichever connection has one ready
+
+    Unlike :func:`getnext`, an error reading from one connection does
+    not stop the responses of the others from being read.
+
+    Yields
+    ------
+    (connection, response, exception) tuples
+        `exception` is set if the response could not be read
+
+    '''
+    _sw_watcher = errorcheck(clib.SW_CASConnectionEventWatcher(
+        len(conns), 0, a2n(conns[0]._soptions), conns[0]._sw_error),
+        conns[0]._sw_error)
+    for conn in conns:
+        errorcheck(_sw_watcher.addConnection(conn._sw_connection), _sw_watcher)
+
+    while True:
+        i = errorcheck(_sw_watcher.wait(), _sw_watcher)
+        if i == -2:
+            break
+        if i < 0:
+            continue
+        try:
+            yield conns[i], getone(conns[i])[0], None
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            yield conns[i], None, sys.exc_info()[1]
+
+
+def _is_idle(conn):
+    ''' Has every response on the connection been read? '''
+    try:
+        return not conn._sw_connection.hasPendingResponses()
+    except Exception:
+        return False
+
+
+def _wait_any(calls):
+    '''
+    Read responses until one of the calls finishes
+
+    Returns
+    -------
+    list of :class:`_Call` objects
+        The finished calls
+
+    '''
+    conns = dict((id(x.conn), x) for x in calls)
+    try:
+        for conn, response, error in _watch([x.conn for x in calls]):
+            call = conns[id(conn)]
+            if error is not None:
+                if call.error is None:
+                    call.error = error
+                # The rest of the responses of an action error are still
+                # read, but other errors leave the connection unreadable
+                if not isinstance(error, SWATCASActionError):
+                    call.broken = True
+            elif isinstance(response, CASResponse):
+                call.responses.append(response)
+            if call.broken or _is_idle(conn):
+                return [call]
+    except (KeyboardInterrupt, SystemExit):
+        for call in calls:
+            errorcheck(call.conn._sw_connection.stopAction(), call.conn._sw_connection)
+        raise
+    return list(calls)
+
+
+def _drain(conn):
+    '''
+    Read and discard the remaining responses on a connection
+
+    Returns
+    -------
+    boolean
+        False if the responses could not be read
+
+    '''
+    if _is_idle(conn):
+        return True
+    call = _Call(None, conn)
+    try:
+        _wait_any([call])
+    except Exception:
+        return False
+    return not call.broken and _is_idle(conn)
+
+
+def _close(conn):
+    ''' Close a connection that can not be used again '''
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _map_watcher(conns, action, params, discard=None):
+    '''
+    Call actions on binary connections using the connection event watcher
+
+    A call is started on every idle connection.  Responses are read
+    from whichever connection has one ready, and as soon as the call on
+    a connection finishes, the next call is started on it.
+
+    Parameters
+    ----------
+    conns : list of :class:`CAS` objects
+        The connections to call the actions on
+    action : string
+        The name of the action
+    params : list of dicts
+        The parameters of each call
+    discard : callable, optional
+        Called with each connection whose responses could not be read,
+        so that it is not used again.  By default, it is closed.
+
+    Yields
+    ------
+    (index, result) tuples in the order the calls finish
+
+    '''
+    if discard is None:
+        discard = _close
+
+    pending = collections.deque(enumerate(params))
+    idle = collections.deque(conns)
+    active = collections.OrderedDict()
+
+    try:
+        while pending or active:
+            while idle and pending:
+                conn = idle.popleft()
+                idx, kwargs = pending.popleft()
+                start = None
+                if metrics.enabled:
+                    start = metrics.clock()
+                try:
+                    signature = conn._invoke_with_signature(a2n(action), **kwargs)
+                except Exception:
+                    out = sys.exc_info()[1]
+                    if start is not None:
+                        conn._record_action(action, start, kwargs, error=True)
+                    if _is_idle(conn):
+                        idle.append(conn)
+                    else:
+                        discard(conn)
+                    yield idx, out
+                    continue
+                active[id(conn)] = _Call(idx, conn, action=action, params=kwargs,
+                                         signature=signature, start=start)
+
+            if not active:
+                # Every connection has been discarded
+                while pending:
+                    yield pending.popleft()[0], \
+                        SWATError('No sessions are available for the action call')
+                break
+
+            for call in _wait_any(list(active.values())):
+                del active[id(call.conn)]
+                if call.broken or not _drain(call.conn):
+                    discard(call.conn)
+                else:
+                    idle.append(call.conn)
+                yield call.idx, call.result()
+
+    finally:
+        # Calls that were not read to the end leave their responses behind
+        for call in list(active.values()):
+            if not _drain(call.conn):
+                discard(call.conn)
+
+
+def fanout(conn, action, params, sessions=4, ordered=True):
+    '''
+    Call an action once for each set of parameters, concurrently
+
+    See :meth:`CAS.map` for the parameter descriptions.
+
+    '''
+    params = [dict(x) for x in params]
+
+    pool = None
+    conns = None
+    close_pool = False
+    if isinstance(sessions, CASPool):
+        pool = sessions
+    elif isinstance(sessions, CAS):
+        conns = [sessions]
+    elif isinstance(sessions, (list, tuple)):
+        conns = list(sessions)
+    else:
+        nsessions = max(1, min(int(sessions), len(params) or 1))
+        pool = CASPool(conn, min_size=0, max_size=nsessions)
+        close_pool = True
+
+    is_rest = isinstance(conn._sw_connection, REST_CASConnection)
+
+    if not is_rest:
+        # Binary connections are overlapped by the event watcher
+        checked_out = []
+        if conns is None:
+            try:
+                for _ in range(min(pool.max_size, len(params))):
+                    checked_out.append(pool.checkout())
+            except Exception:
+                for item in checked_out:
+                    pool.checkin(item)
+                if close_pool:
+                    pool.close()
+                raise
+            conns = checked_out
+
+        def discard(conn):
+            ''' Close a session whose responses could not be read '''
+            if [x for x in checked_out if x is conn]:
+                checked_out[:] = [x for x in checked_out if x is not conn]
+                pool.checkin(conn, discard=True)
+            else:
+                _close(conn)
+
+        def run():
+            ''' Run the calls and return the sessions '''
+            try:
+                for item in _map_watcher(conns, action, params, discard=discard):
+                    yield item
+            finally:
+                for item in checked_out:
+                    pool.checkin(item)
+                if close_pool:
+                    pool.close()
+
+    else:
+        # REST connections are overlapped using threads
+        if conns is not None:
+            pool = _FixedPool(conns)
+
+        def run():
+            ''' Run the calls and shut down the executor '''
+            executor = CASExecutor(pool, close_pool=close_pool)
+            try:
+                futures = [executor.submit(action, **x) for x in params]
+                index = dict((id(x), i) for i, x in enumerate(futures))
+                for future in as_completed(futures):
+                    yield index[id(future)], (future._exception or future._result)
+            finally:
+                executor.shutdown()
+
+    if not ordered:
+        return run()
+
+    out = [None] * len(params)
+    for idx, result in run():
+        out[idx] = result
+    return out
+
+
+class _FixedPool(object):
+    ''' Minimal pool interface over a list of connections '''
+
+    def __init__(self, conns):
+        self.max_size = len(conns)
+        self._conns = queue.Queue()
+        for conn in conns:
+            self._conns.put(conn)
+
+    def session(self):
+        ''' Check out a connection for the duration of a context '''
+        pool = self
+
+        class Context(object):
+            ''' Return the connection on exit '''
+
+            def __enter__(self):
+                self.conn = pool._conns.get()
+                return self.conn
+
+            def __exit__(self, type, value, traceback):
+                pool._conns.put(self.conn)
+
+        return Context()
+
+    def close(self):
+        ''' The connections belong to the caller '''
+        pass
@@ -0,0 +1,468 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Client metrics for CAS connections
+
+Metrics are only collected while the ``cas.metrics.enabled`` option is
+set.  They are shared by all connections in the process and can be
+exported in the Prometheus text format or pushed to a StatsD server.
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import collections
+import io
+import json
+import socket
+import threading
+import time
+import timeit
+from ..config import get_option
+from ..utils.compat import a2b, a2u
+from ..utils.config import subscribe
+
+clock = timeit.default_timer
+
+# True if metrics should be collected
+enabled = False
+
+#: Upper bounds, in seconds, of the action latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0, float('inf'))
+
+# Longer parameter values are truncated in the slow action log
+_MAX_PARAM_LENGTH = 1000
+
+_DESCRIPTIONS = {
+    'swat_actions_total': ('counter', 'Number of action calls'),
+    'swat_action_errors_total': ('counter', 'Number of action calls that failed'),
+    'swat_action_retries_total': ('counter', 'Number of action calls retried '
+                                             'at the request of the server'),
+    'swat_action_seconds': ('histogram', 'Client-side latency of action calls'),
+    'swat_bytes_sent_total': ('counter', 'Number of bytes sent to the server'),
+    'swat_bytes_received_total': ('counter', 'Number of bytes received '
+                                             'from the server'),
+    'swat_rows_fetched_total': ('counter', 'Number of rows in result tables'),
+    'swat_rows_uploaded_total': ('counter', 'Number of rows sent to the server'),
+    'swat_failovers_total': ('counter', 'Number of switches to another controller'),
+    'swat_slow_actions_total': ('counter', 'Number of action calls above the '
+                                           'slow action threshold'),
+}
+
+
+def _set_enabled():
+    ''' Update the `enabled` flag '''
+    global enabled
+    enabled = bool(get_option('cas.metrics.enabled'))
+
+
+def _option_handler(key, value):
+    ''' Handle option changes '''
+    key = key.lower()
+    if key == 'cas.metrics.enabled':
+        _set_enabled()
+    elif key.startswith('cas.metrics.statsd'):
+        registry._statsd = None
+
+
+subscribe(_option_handler)
+_set_enabled()
+
+
+def _format_labels(labels):
+    ''' Return labels in Prometheus format '''
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, value.replace('\\', '\\\\')
+                                          .replace('"', '\\"')
+                                          .replace('\n', '\\n'))
+                             for key, value in labels)
+
+
+def _format_value(value):
+    ''' Return a number in Prometheus format '''
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return '%d' % value
+    return '%s' % value
+
+
+class _Histogram(object):
+    ''' Cumulative histogram of observations '''
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        ''' Add an observation '''
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+
+    def to_dict(self):
+        ''' Return the cumulative bucket counts, count, and sum '''
+        buckets = []
+        running = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            running += count
+            buckets.append((bound, running))
+        return dict(buckets=buckets, count=self.count, sum=self.total)
+
+
+class _StatsD(object):
+    ''' Send metrics to a StatsD server over UDP '''
+
+    def __init__(self, host, port, prefix):
+        self.address = (host, port)
+        self.prefix = prefix and (prefix + '.') or ''
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, name, value, mtype, labels):
+        ''' Send a single metric; errors are ignored '''
+        name = self.prefix + name
+        if labels:
+            name = '%s.%s' % (name, '.'.join(value.replace('.', '_')
+                                             for _, value in labels))
+        if mtype == 'ms':
+            value = value * 1000
+        try:
+            self.socket.sendto(a2b('%s:%s|%s' % (name, _format_value(value), mtype)),
+                               self.address)
+        except (IOError, OSError):
+            pass
+
+
+class CASMetrics(object):
+    '''
+    Registry of client metrics
+
+    The following metrics are collected.  Metrics with an ``action``
+    label are collected separately for each action name.
+
+    swat_actions_total{action}
+        Number of action calls
+    swat_action_errors_total{action}
+        Number of action calls that failed
+    swat_action_retries_total{action}
+        Number of action calls retried at the request of the server
+    swat_action_seconds{action}
+        Histogram of the client-side latency of action calls
+    swat_bytes_sent_total, swat_bytes_received_total
+        Number of bytes sent and received (REST interface only)
+    swat_rows_fetched_total, swat_rows_uploaded_total
+        Number of rows in result tables and sent to the server
+    swat_failovers_total
+        Number of switches to another controller
+    swat_slow_actions_total{action}
+        Number of action calls above ``cas.metrics.slow_action_threshold``
+
+    Attributes
+    ----------
+    slow_actions : deque of dicts
+        The most recent action calls above the slow action threshold
+
+    Returns
+    -------
+    :class:`CASMetrics` object
+
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._statsd = None
+        self.slow_actions = collections.deque(maxlen=100)
+
+    def _get_statsd(self):
+        ''' Return the StatsD client, if one is configured '''
+        if self._statsd is None:
+            host = get_option('cas.metrics.statsd_host')
+            if not host:
+                return None
+            self._statsd = _StatsD(host, get_option('cas.metrics.statsd_port'),
+                                   get_option('cas.metrics.statsd_prefix'))
+        return self._statsd
+
+    def inc(self, name, value=1, **labels):
+        '''
+        Increment a counter
+
+        Parameters
+        ----------
+        name : string
+            The name of the metric
+        value : int or float, optional
+            The amount to add
+        **labels : strings, optional
+            The labels of the metric
+
+        '''
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+        statsd = self._get_statsd()
+        if statsd is not None:
+            statsd.send(name, value, 'c', labels)
+
+    def observe(self, name, value, **labels):
+        '''
+        Add an observation to a histogram
+
+        Parameters
+        ----------
+        name : string
+            The name of the metric
+        value : float
+            The observed value
+        **labels : strings, optional
+            The labels of the metric
+
+        '''
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            key = (name, labels)
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram()
+            hist.observe(value)
+        statsd = self._get_statsd()
+        if statsd is not None:
+            statsd.send(name, value, 'ms', labels)
+
+    def count_rows(self, value):
+        '''
+        Add the rows of a result table to the rows fetched
+
+        Parameters
+        ----------
+        value : any
+            A result value.  Values other than DataFrames are ignored.
+
+        '''
+        import pandas as pd
+        if isinstance(value, pd.DataFrame) and len(value):
+            self.inc('swat_rows_fetched_total', len(value))
+
+    def record_action(self, action, elapsed, params=None, error=False, retried=False):
+        '''
+        Record a completed action call
+
+        Parameters
+        ----------
+        action : string
+            The name of the action
+        elapsed : float
+            The number of seconds the call took
+        params : dict, optional
+            The action parameters, used in the slow action log
+        error : boolean, optional
+            Did the action fail?
+        retried : boolean, optional
+            Was the action retried at the request of the server?
+
+        '''
+        action = a2u(action).lower()
+        self.inc('swat_actions_total', action=action)
+        self.observe('swat_action_seconds', elapsed, action=action)
+        if error:
+            self.inc('swat_action_errors_total', action=action)
+        if retried:
+            self.inc('swat_action_retries_total', action=action)
+
+        threshold = get_option('cas.metrics.slow_action_threshold')
+        if threshold and elapsed >= threshold:
+            self.inc('swat_slow_actions_total', action=action)
+            self._log_slow_action(action, elapsed, params)
+
+    def _log_slow_action(self, action, elapsed, params):
+        ''' Add an action call to the slow action log '''
+        from .rest.connection import _normalize_params
+        from .utils.params import redact_params
+        try:
+            params = json.loads(json.dumps(_normalize_params(params or {}),
+                                           default=repr))
+        except (TypeError, ValueError):
+            params = {}
+        params = redact_params(params, max_length=_MAX_PARAM_LENGTH)
+        item = dict(time=time.time(), action=action, elapsed=elapsed, params=params)
+        self.slow_actions.append(item)
+        path = get_option('cas.metrics.slow_action_log')
+        if path:
+            line = json.dumps(item, sort_keys=True) + '\n'
+            with self._lock:
+                with io.open(path, 'a', encoding='utf-8') as outfile:
+                    outfile.write(a2u(line))
+
+    def reset(self):
+        ''' Clear all metrics and the slow action log '''
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.slow_actions.clear()
+
+    def to_dict(self):
+        '''
+        Return the current values of all metrics
+
+        Returns
+        -------
+        dict
+            Keys are metric names.  Values are dictionaries whose keys are
+            tuples of (label, value) pairs.  Counter values are numbers;
+            histogram values are dictionaries with the keys 'buckets',
+            'count', and 'sum'.
+
+        '''
+        out = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                out.setdefault(name, {})[labels] = value
+            for (name, labels), value in self._histograms.items():
+                out.setdefault(name, {})[labels] = value.to_dict()
+        return out
+
+    def to_prometheus(self):
+        '''
+        Return all metrics in the Prometheus text exposition format
+
+        Returns
+        -------
+        string
+
+        '''
+        lines = []
+        for name, values in sorted(self.to_dict().items()):
+            mtype, desc = _DESCRIPTIONS.get(name, ('untyped', name))
+            lines.append('# HELP %s %s' % (name, desc))
+            lines.append('# TYPE %s %s' % (name, mtype))
+            for labels, value in sorted(values.items()):
+                if mtype != 'histogram':
+                    lines.append('%s%s %s' % (name, _format_labels(labels),
+                                              _format_value(value)))
+                    continue
+                for bound, count in value['buckets']:
+                    blabels = labels + (('le', _format_value(float(bound))),)
+                    lines.append('%s_bucket%s %d' % (name, _format_labels(blabels),
+                                                     count))
+                lines.append('%s_sum%s %s' % (name, _format_labels(labels),
+                                              _format_value(value['sum'])))
+                lines.append('%s_count%s %d' % (name, _format_labels(labels),
+                                                value['count']))
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        '''
+        Write all metrics to a file in the Prometheus text format
+
+        The file is written to a temporary name first and then renamed,
+        so it can be read by the node exporter textfile collector at
+        any time.
+
+        Parameters
+        ----------
+        path : string
+            The name of the output file
+
+        '''
+        import os
+        tmp = '%s.%s.tmp' % (path, os.getpid())
+        with io.open(tmp, 'w', encoding='utf-8') as outfile:
+            outfile.write(a2u(self.to_prometheus()))
+        os.rename(tmp, path)
+
+    def start_http_server(self, port, addr=''):
+        '''
+        Serve the metrics in the Prometheus text format over HTTP
+
+        The server runs in a daemon thread and answers every GET request
+        with the current metrics.
+
+        Parameters
+        ----------
+        port : int
+            The port to listen on.  Zero picks a free port.
+        addr : string, optional
+            The address to listen on
+
+        Returns
+        -------
+        HTTPServer object
+            Call ``shutdown()`` on the server to stop it.  The port is
+            available as ``server.server_port``.
+
+        '''
+        from six.moves import BaseHTTPServer, socketserver
+
+        registry = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            ''' Return the metrics for any GET request '''
+
+            def do_GET(self):
+                body = a2b(registry.to_prometheus())
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            ''' Threaded HTTP server '''
+            daemon_threads = True
+
+        server = Server((addr, port), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
+
+
+#: The metrics registry shared by all connections
+registry = CASMetrics()
+
+
+def get_metrics():
+    '''
+    Return the metrics registry shared by all connections
+
+    Examples
+    --------
+    >>> swat.set_option('cas.metrics.enabled', True)
+    >>> conn = swat.CAS()
+    >>> conn.table.tableinfo()
+    >>> print(swat.get_metrics().to_prometheus())
+
+    Returns
+    -------
+    :class:`CASMetrics`
+
+    '''
+    return registry
@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Pool of CAS sessions that can be shared by threads
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import collections
+import contextlib
+import threading
+import timeit
+from .connection import CAS
+from ..exceptions import SWATError, SWATCASActionError
+
+clock = timeit.default_timer
+
+# Marks a waiter that may create a new session rather than reuse one
+_CREATE = object()
+
+# Marks a waiter that was woken up because the pool was closed
+_CLOSED = object()
+
+
+class _Session(object):
+    ''' A pooled connection and its timestamps '''
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = self.last_used = clock()
+
+
+class _Waiter(object):
+    ''' A thread waiting for a session '''
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.session = None
+
+
+class CASPool(object):
+    '''
+    Pool of CAS sessions that can be shared by threads
+
+    A :class:`CAS` object must only be used by one thread at a time.
+    A pool keeps a set of connections created with :meth:`CAS.copy` so
+    that each thread can check out a session of its own without paying
+    the cost of creating a new session and loading the action
+    reflection information for each request.
+
+    Sessions are handed out in the order they were requested.  When all
+    `max_size` sessions are in use, :meth:`checkout` waits until one is
+    returned, so `max_size` also limits the number of concurrent action
+    calls made through the pool.
+
+    Parameters
+    ----------
+    conn : :class:`CAS` object
+        The connection whose parameters are used for the pooled sessions.
+        This connection is not handed out by the pool.
+    min_size : int, optional
+        The number of sessions created up front and kept open
+    max_size : int, optional
+        The maximum number of open sessions
+    timeout : float, optional
+        The default number of seconds to wait for a session in
+        :meth:`checkout`.  If None, wait indefinitely.
+    max_idle : float, optional
+        Sessions above `min_size` that have not been used for this
+        number of seconds are closed.  If None, idle sessions are kept.
+    max_lifetime : float, optional
+        Sessions older than this number of seconds are replaced when
+        they are checked out or returned.  If None, sessions are kept
+        for the life of the pool.
+    health_check : float, optional
+        Sessions that have been idle for this number of seconds are
+        checked with the ``builtins.echo`` action before being handed
+        out.  Sessions that fail the check are replaced.  If None,
+        no checks are done.
+
+    Examples
+    --------
+    >>> conn = swat.CAS('cloud.example.com', 5570)
+    >>> pool = swat.CASPool(conn, min_size=2, max_size=8)
+    >>> with pool.session() as s:
+    ...     out = s.table.tableinfo()
+    >>> pool.close()
+
+    Returns
+    -------
+    :class:`CASPool` object
+
+    '''
+
+    def __init__(self, conn, min_size=1, max_size=10, timeout=None,
+                 max_idle=600.0, max_lifetime=None, health_check=30.0):
+        if not isinstance(conn, CAS):
+            raise TypeError('conn must be a CAS object')
+        if max_size < 1:
+            raise SWATError('max_size must be at least one')
+        if min_size < 0 or min_size > max_size:
+            raise SWATError('min_size must be between zero and max_size')
+
+        self._prototype = conn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+
+        self._lock = threading.Lock()
+        self._idle = collections.deque()
+        self._waiters = collections.deque()
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+
+        sessions = []
+        try:
+            for _ in range(min_size):
+                sessions.append(self._create())
+        except Exception:
+            for item in sessions:
+                self._destroy(item)
+            raise
+        self._idle.extend(sessions)
+        self._size = len(sessions)
+
+    def _create(self):
+        ''' Create a new pooled session '''
+        return _Session(self._prototype.copy())
+
+    def _destroy(self, item):
+        ''' End a pooled session, ignoring errors '''
+        try:
+            item.conn.terminate()
+        except Exception:
+            try:
+                item.conn.close()
+            except Exception:
+                pass
+
+    def _is_expired(self, item, now):
+        ''' Has the session exceeded its maximum lifetime? '''
+        return self.max_lifetime is not None and \
+            now - item.created > self.max_lifetime
+
+    def _is_healthy(self, item, now):
+        ''' Check a session that has been idle for a while '''
+        if self.health_check is None or now - item.last_used < self.health_check:
+            return True
+        try:
+            return item.conn.retrieve('builtins.echo', _apptag='UI',
+                                      _messagelevel='error').severity < 2
+        except Exception:
+            return False
+
+    def _release(self, item):
+        '''
+        Hand a session (or a free slot if `item` is None) to the next waiter
+
+        Must be called with the lock held.  Returns the sessions that
+        should be closed.
+
+        '''
+        if self._waiters:
+            waiter = self._waiters.popleft()
+            waiter.session = item if item is not None else _CREATE
+            waiter.event.set()
+            return []
+
+        if item is None:
+            self._size -= 1
+            return []
+
+        self._idle.append(item)
+
+        # Close sessions above min_size that have been idle too long
+        stale = []
+        if self.max_idle is not None:
+            now = clock()
+            while self._idle and self._size > self.min_size and \
+                    now - self._idle[0].last_used > self.max_idle:
+                stale.append(self._idle.popleft())
+                self._size -= 1
+        return stale
+
+    def checkout(self, timeout=None):
+        '''
+        Check out a session from the pool
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The number of seconds to wait for a session.  The default
+            is the `timeout` given to the pool.
+
+        Raises
+        ------
+        SWATError
+            If the pool is closed or no session is available in time
+
+        Returns
+        -------
+        :class:`CAS` object
+            The session must be returned using :meth:`checkin`
+
+        '''
+        if timeout is None:
+            timeout = self.timeout
+
+        waiter = None
+        item = None
+        with self._lock:
+            if self._closed:
+                raise SWATError('The session pool is closed')
+            if self._idle and not self._waiters:
+                item = self._idle.pop()
+            elif self._size < self.max_size:
+                self._size += 1
+                item = _CREATE
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+
+        if waiter is not None:
+            if not waiter.event.wait(timeout):
+                with self._lock:
+                    if waiter.session is None:
+                        if waiter in self._waiters:
+                            self._waiters.remove(waiter)
+                        raise SWATError('Timed out waiting for a session')
+            item = waiter.session
+            if item is _CLOSED:
+                raise SWATError('The session pool is closed')
+
+        try:
+            now = clock()
+            if item is not _CREATE and (self._is_expired(item, now) or
+                                        not self._is_healthy(item, now)):
+                self._destroy(item)
+                item = _CREATE
+            if item is _CREATE:
+                item = self._create()
+        except Exception:
+            self._checkin_item(None)
+            raise
+
+        with self._lock:
+            self._in_use[id(item.conn)] = item
+        return item.conn
+
+    def _checkin_item(self, item):
+        ''' Return a session, or a free slot if `item` is None '''
+        with self._lock:
+            if self._closed and item is not None:
+                self._size -= 1
+                stale = [item]
+            else:
+                stale = self._release(item)
+        for item in stale:
+            self._destroy(item)
+
+    def checkin(self, conn, discard=False):
+        '''
+        Return a session to the pool
+
+        Parameters
+        ----------
+        conn : :class:`CAS` object
+            A session returned by :meth:`checkout`
+        discard : boolean, optional
+            If True, the session is closed rather than reused
+
+        '''
+        with self._lock:
+            item = self._in_use.pop(id(conn), None)
+        if item is None:
+            raise SWATError('The connection was not checked out from this pool')
+
+        now = clock()
+        item.last_used = now
+        if discard or self._is_expired(item, now):
+            self._destroy(item)
+            item = None
+        self._checkin_item(item)
+
+    @contextlib.contextmanager
+    def session(self, timeout=None):
+        '''
+        Check out a session for the duration of a context
+
+        The session is closed rather than returned to the pool if the
+        context exits with a :class:`SWATError` other than an action
+        error, since the connection may be broken.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The number of seconds to wait for a session
+
+        Examples
+        --------
+        >>> with pool.session() as conn:
+        ...     out = conn.simple.summary(table='cars')
+
+        Returns
+        -------
+        :class:`CAS` object
+
+        '''
+        conn = self.checkout(timeout=timeout)
+        discard = False
+        try:
+            yield conn
+        except SWATCASActionError:
+            raise
+        except SWATError:
+            discard = True
+            raise
+        finally:
+            self.checkin(conn, discard=discard)
+
+    @property
+    def stats(self):
+        '''
+        Return the number of sessions in each state
+
+        Returns
+        -------
+        dict
+            The keys are 'size', 'idle', 'in_use', and 'waiting'
+
+        '''
+        with self._lock:
+            return dict(size=self._size, idle=len(self._idle),
+                        in_use=len(self._in_use), waiting=len(self._waiters))
+
+    def close(self):
+        '''
+        End all idle sessions and close the pool
+
+        Sessions that are checked out are ended when they are returned.
+        Threads waiting for a session get an error.
+
+        '''
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            waiters = list(self._waiters)
+            self._waiters.clear()
+            for waiter in waiters:
+                waiter.session = _CLOSED
+        for waiter in waiters:
+            waiter.event.set()
+        for item in idle:
+            self._destroy(item)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __repr__(self):
+        stats = self.stats
+        return 'CASPool(%r, min_size=%d, max_size=%d, size=%d, in_use=%d)' % (
+            self._prototype, self.min_size, self.max_size,
+            stats['size'], stats['in_use'])
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Action calls with pre-serialized static parameters
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import json
+import threading
+import six
+from ..utils.keyword import keywordify
+
+
+def _param_key(key):
+    ''' Return the name used to match static and call parameters '''
+    return keywordify(key).lower()
+
+
+class CASPreparedAction(object):
+    '''
+    Action call with static parameters that are bound and serialized once
+
+    Prepared actions are created by :meth:`CAS.prepare`.  Calling the
+    object calls the action with the static parameters and the given
+    parameters.  The static parameters are converted to the REST
+    payload (or, for the binary protocol, checked for supported types)
+    the first time they are used, and only the parameters given in each
+    call are converted at call time.
+
+    A parameter given in a call replaces a static parameter with
+    the same name.  Static and call parameters are bound to the action
+    separately, so a :class:`CASTable` given in a call only contributes
+    its input variables and fetch parameters to the call parameters.
+
+    Parameters
+    ----------
+    connection : :class:`CAS`
+        The connection used to bind the static parameters
+    name : string
+        The action name
+    params : dict
+        The static parameters
+
+    Returns
+    -------
+    :class:`CASPreparedAction` object
+
+    '''
+
+    def __init__(self, connection, name, params):
+        self.connection = connection
+        self.name = name
+
+        params = connection._get_action_params(name, params)
+        signature = connection._get_action_info(name)[-1]
+        if signature:
+            params = connection._get_action_binder(signature).bind(params, action=name)
+        self.params = params
+
+        self._lock = threading.Lock()
+        self._fragments = None
+        self._items = None
+        self._cache_key = None
+
+    def __repr__(self):
+        return 'CASPreparedAction(%r, %s)' % (
+            self.name, ', '.join('%s=%r' % (k, v) for k, v in six.iteritems(self.params)))
+
+    def __call__(self, **kwargs):
+        '''
+        Call the action and return the results
+
+        Parameters
+        ----------
+        **kwargs : any, optional
+            Parameters in addition to the static parameters
+
+        Returns
+        -------
+        :class:`CASResults` object
+
+        '''
+        return self.connection.retrieve(self.name, __prepared__=self, **kwargs)
+
+    def invoke(self, **kwargs):
+        '''
+        Call the action without retrieving the responses
+
+        Parameters
+        ----------
+        **kwargs : any, optional
+            Parameters in addition to the static parameters
+
+        Returns
+        -------
+        :class:`CAS` object
+
+        '''
+        return self.connection.invoke(self.name, __prepared__=self, **kwargs)
+
+    def submit(self, **kwargs):
+        '''
+        Call the action in the background and return a future
+
+        Parameters
+        ----------
+        **kwargs : any, optional
+            Parameters in addition to the static parameters
+
+        See Also
+        --------
+        :meth:`CAS.submit`
+
+        Returns
+        -------
+        :class:`CASFuture` object
+
+        '''
+        return self.connection.submit(self.name, __prepared__=self, **kwargs)
+
+    def merge(self, kwargs):
+        '''
+        Return the static parameters combined with the call parameters
+
+        Parameters
+        ----------
+        kwargs : dict
+            The call parameters
+
+        Returns
+        -------
+        dict
+
+        '''
+        keys = set(_param_key(x) for x in kwargs)
+        out = dict((k, v) for k, v in six.iteritems(self.params)
+                   if _param_key(k) not in keys)
+        out.update(kwargs)
+        return out
+
+    def get_cache_key(self):
+        '''
+        Return a hashable form of the static parameters for result caching
+
+        Raises
+        ------
+        ValueError
+            If the static parameters can not be used in a cache key
+
+        Returns
+        -------
+        tuple
+
+        '''
+        from .cache import _normalize, _Uncacheable
+        if self._cache_key is None:
+            try:
+                self._cache_key = ('prepared', _normalize(self.params))
+            except _Uncacheable:
+                self._cache_key = False
+        if self._cache_key is False:
+            raise ValueError('Parameters can not be used in a cache key')
+        return self._cache_key
+
+    def to_json(self, kwargs):
+        '''
+        Return the REST payload of a call
+
+        Parameters
+        ----------
+        kwargs : dict
+            The normalized call parameters
+
+        Returns
+        -------
+        string
+
+        '''
+        with self._lock:
+            if self._fragments is None:
+                from .rest.connection import _normalize_params
+                self._fragments = [
+                    (k.lower(), '%s: %s' % (json.dumps(k), json.dumps(v)))
+                    for k, v in six.iteritems(_normalize_params(self.params))]
+
+        keys = set(x.lower() for x in kwargs)
+        parts = [x for k, x in self._fragments if k not in keys]
+        parts.extend('%s: %s' % (json.dumps(k), json.dumps(v))
+                     for k, v in six.iteritems(kwargs))
+        return '{%s}' % ', '.join(parts)
+
+    def get_items(self, kwargs):
+        '''
+        Return the binary protocol parameters of a call
+
+        Parameters
+        ----------
+        kwargs : dict
+            The call parameters
+
+        Returns
+        -------
+        list of (key, value) tuples
+            Parameters for :func:`py2cas_items`
+
+        '''
+        from .transformers import supported_items
+        with self._lock:
+            if self._items is None:
+                self._items = [(_param_key(k), k, v)
+                               for k, v in supported_items(self.params)]
+
+        keys = set(_param_key(x) for x in kwargs)
+        out = [(k, v) for key, k, v in self._items if key not in keys]
+        out.extend(supported_items(kwargs))
+        return out
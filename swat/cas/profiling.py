@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Client-side timing of CAS action calls
+
+Timings are only collected while the ``cas.client_performance`` option
+is enabled or a :func:`profile` context is active.  Otherwise, the
+instrumented code only pays for a call to :func:`current`.
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import contextlib
+import io
+import json
+import os
+import threading
+import timeit
+from ..config import get_option
+from ..utils.compat import OrderedDict
+from ..utils.config import subscribe
+
+clock = timeit.default_timer
+
+# True if timings should be collected
+enabled = False
+
+_local = threading.local()
+_lock = threading.Lock()
+_profiles = []
+
+
+def _set_enabled():
+    ''' Update the `enabled` flag '''
+    global enabled
+    enabled = bool(_profiles) or get_option('cas.client_performance')
+
+
+def _option_handler(key, value):
+    ''' Handle option changes '''
+    if key.lower() == 'cas.client_performance':
+        _set_enabled()
+
+
+subscribe(_option_handler)
+_set_enabled()
+
+
+class CASClientPerformance(object):
+    '''
+    Client-side timings of a CAS action call
+
+    Each phase of the call is recorded as it happens.  The phases are:
+
+    prepare
+        Reflection and merging of the action parameters
+    serialize
+        Conversion of the parameters to the wire format
+    network
+        Waiting for and receiving the response
+    parse
+        Decoding of the response body (REST interface only)
+    convert
+        Conversion of the results to Python objects
+    ctb2tabular
+        Construction of DataFrames from result tables (part of convert)
+    reshape_bygroups
+        Reshaping of By group columns (part of ctb2tabular)
+
+    Attributes
+    ----------
+    action : string
+        The name of the action
+    events : list of tuples
+        The phase name, start time, duration in seconds, and number of
+        bytes (or None) of each recorded phase
+
+    Returns
+    -------
+    :class:`CASClientPerformance` object
+
+    '''
+
+    def __init__(self, action=None):
+        self.action = action
+        self.events = []
+        self.start = clock()
+        self.end = None
+        self.thread = threading.current_thread().ident
+
+    def add(self, phase, start, nbytes=None):
+        '''
+        Record a phase that started at `start` and ends now
+
+        Parameters
+        ----------
+        phase : string
+            The name of the phase
+        start : float
+            The value of :func:`clock` when the phase started
+        nbytes : int, optional
+            The number of bytes processed in the phase
+
+        '''
+        self.events.append((phase, start, clock() - start, nbytes))
+
+    @property
+    def elapsed_time(self):
+        ''' Total client-side time of the action call '''
+        return ((self.end or clock()) - self.start)
+
+    def to_dict(self):
+        '''
+        Return the total time, bytes, and count of each phase
+
+        Returns
+        -------
+        dict
+            Keys are phase names; values are dictionaries with the keys
+            'time', 'bytes', and 'count'.  Nested phases are also
+            included in the time of their enclosing phase.
+
+        '''
+        out = OrderedDict()
+        for phase, _, duration, nbytes in self.events:
+            item = out.setdefault(phase, dict(time=0.0, bytes=0, count=0))
+            item['time'] += duration
+            item['bytes'] += nbytes or 0
+            item['count'] += 1
+        return out
+
+    def to_trace_events(self, origin=0.0, pid=None):
+        '''
+        Return the action call as Chrome trace events
+
+        Parameters
+        ----------
+        origin : float, optional
+            The :func:`clock` value to use as time zero
+        pid : int, optional
+            The process ID to use in the events
+
+        Returns
+        -------
+        list of dicts
+
+        '''
+        if pid is None:
+            pid = os.getpid()
+        usec = 1e6
+        out = [dict(name=self.action or 'action', cat='action', ph='X', pid=pid,
+                    tid=self.thread, ts=(self.start - origin) * usec,
+                    dur=self.elapsed_time * usec)]
+        for phase, start, duration, nbytes in self.events:
+            event = dict(name=phase, cat='phase', ph='X', pid=pid, tid=self.thread,
+                         ts=(start - origin) * usec, dur=duration * usec)
+            if nbytes is not None:
+                event['args'] = dict(bytes=nbytes)
+            out.append(event)
+        return out
+
+    def __str__(self):
+        return 'CASClientPerformance(%s)' % ', '.join(
+            '%s=%.6f' % (key, value['time']) for key, value in self.to_dict().items())
+
+    def __repr__(self):
+        return str(self)
+
+
+class CASProfile(object):
+    '''
+    Client-side timings of all action calls made in a :func:`profile` context
+
+    Attributes
+    ----------
+    calls : list of :class:`CASClientPerformance` objects
+        The timings of each action call
+
+    Returns
+    -------
+    :class:`CASProfile` object
+
+    '''
+
+    def __init__(self):
+        self.calls = []
+        self.start = clock()
+
+    def to_dict(self):
+        '''
+        Return the total time, bytes, and count of each phase of all calls
+
+        Returns
+        -------
+        dict
+
+        '''
+        out = OrderedDict()
+        for call in self.calls:
+            for phase, value in call.to_dict().items():
+                item = out.setdefault(phase, dict(time=0.0, bytes=0, count=0))
+                for key in item:
+                    item[key] += value[key]
+        return out
+
+    def to_trace(self):
+        '''
+        Return the timings in Chrome trace-event format
+
+        The output can be loaded into chrome://tracing or Perfetto.
+
+        Returns
+        -------
+        dict
+
+        '''
+        pid = os.getpid()
+        events = []
+        for call in self.calls:
+            events.extend(call.to_trace_events(origin=self.start, pid=pid))
+        return dict(traceEvents=events, displayTimeUnit='ms')
+
+    def save(self, path):
+        '''
+        Write the timings to a file in Chrome trace-event format
+
+        Parameters
+        ----------
+        path : string
+            The name of the output file
+
+        '''
+        with io.open(path, 'w', encoding='utf-8') as outfile:
+            outfile.write(json.dumps(self.to_trace()))
+
+
+def current():
+    '''
+    Return the timings of the action call in progress on this thread
+
+    Returns
+    -------
+    :class:`CASClientPerformance`
+        If timings are being collected
+    None
+        If timings are not being collected
+
+    '''
+    return getattr(_local, 'perf', None)
+
+
+def begin(action):
+    '''
+    Start collecting timings for an action call on this thread
+
+    Parameters
+    ----------
+    action : string
+        The name of the action
+
+    Returns
+    -------
+    :class:`CASClientPerformance`
+
+    '''
+    perf = CASClientPerformance(action)
+    perf.parent = current()
+    _local.perf = perf
+    return perf
+
+
+def end(perf):
+    '''
+    Stop collecting timings for an action call
+
+    Parameters
+    ----------
+    perf : :class:`CASClientPerformance`
+        The object returned by :func:`begin`
+
+    '''
+    perf.end = clock()
+    _local.perf = perf.parent
+    del perf.parent
+    with _lock:
+        for prof in _profiles:
+            prof.calls.append(perf)
+
+
+@contextlib.contextmanager
+def profile(path=None):
+    '''
+    Collect client-side timings of all action calls in a context
+
+    Parameters
+    ----------
+    path : string, optional
+        File to write the timings to, in Chrome trace-event format,
+        when the context exits
+
+    Examples
+    --------
+    >>> with swat.profile('trace.json') as prof:
+    ...     tbl.fetch(to=10000)
+    >>> print(prof.to_dict())
+
+    Returns
+    -------
+    :class:`CASProfile`
+
+    '''
+    prof = CASProfile()
+    with _lock:
+        _profiles.append(prof)
+        _set_enabled()
+    try:
+        yield prof
+    finally:
+        with _lock:
+            _profiles.remove(prof)
+            _set_enabled()
+        if path:
+            prof.save(path)
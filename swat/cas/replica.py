@@ -0,0 +1,962 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Local replicas of small CAS tables
+
+A replica is a local copy of a CAS table that is used to answer
+read-only requests (fetches, row counts, and frequencies) without a
+round trip to the server.  Each replica is tagged with a fingerprint
+of the ``table.tableinfo`` output, and the fingerprint is checked
+again before the replica is used if the session has updated any
+tables or if it has not been checked recently.
+
+Only requests whose results are the same as the server's are answered
+locally.  Where clauses and computed columns are evaluated by a small
+interpreter for the arithmetic, comparison, and logical operators of
+the SAS language, using SAS missing value rules.  Requests that use
+anything else (functions, formats, By groups, sampling, etc.) are sent
+to the server.
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import re
+import time
+import numpy as np
+import pandas as pd
+import six
+from ..config import get_option
+from ..utils.compat import text_types, binary_types
+
+# Table parameters that can be applied to a replica
+_TABLE_PARAMS = set(['name', 'caslib', 'where', 'computedvars',
+                     'computedvarsprogram', 'computedondemand'])
+
+# Fetch parameters that can be applied to a replica
+_FETCH_PARAMS = set(['from', 'from_', 'to', 'sortby', 'sastypes', 'index',
+                     'fetchvars', 'maxrows'])
+
+# Columns of table.tableinfo that identify a version of a table
+_FINGERPRINT_COLUMNS = ['Rows', 'Columns', 'CreateTime', 'ModTime']
+
+_TOKEN_RE = re.compile(r'''
+    (?P<space>\s+) |
+    (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")(?P<suffix>[A-Za-z]*) |
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?) |
+    (?P<missing>\.(?![\w.])) |
+    (?P<name>[A-Za-z_]\w*) |
+    (?P<op><=|>=|\^=|~=|=|<|>|\+|-|\*\*|\*|/|\(|\)|,|\^|~|&|\||;)
+''', re.X)
+
+_KEYWORDS = {
+    'and': 'and', 'or': 'or', 'not': 'not', 'in': 'in',
+    'eq': '=', 'ne': '^=', 'lt': '<', 'gt': '>', 'le': '<=', 'ge': '>=',
+}
+
+_OPERATORS = {'~=': '^=', '&': 'and', '|': 'or', '^': 'not', '~': 'not'}
+
+_COMPARISONS = ['=', '^=', '<', '>', '<=', '>=']
+
+# Compiled expressions and programs
+_COMPILED = {}
+
+
+class _NotLocal(Exception):
+    ''' Raised when a request can not be answered from a replica '''
+
+
+def _tokenize(code):
+    ''' Split SAS code into (type, value) tokens '''
+    tokens = []
+    pos = 0
+    while pos < len(code):
+        match = _TOKEN_RE.match(code, pos)
+        if match is None:
+            raise _NotLocal()
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'space':
+            continue
+        if kind == 'suffix' or match.group('string') is not None:
+            text = match.group('string')
+            value = text[1:-1].replace(text[0] * 2, text[0])
+            suffix = match.group('suffix').lower()
+            if suffix == 'n':
+                tokens.append(('name', value))
+            elif suffix:
+                raise _NotLocal()
+            else:
+                tokens.append(('const', value))
+        elif kind == 'number':
+            tokens.append(('const', float(match.group('number'))))
+        elif kind == 'missing':
+            tokens.append(('const', np.nan))
+        elif kind == 'name':
+            word = match.group('name')
+            if word.lower() in _KEYWORDS:
+                tokens.append(('op', _KEYWORDS[word.lower()]))
+            else:
+                tokens.append(('name', word))
+        else:
+            op = match.group('op')
+            tokens.append(('op', _OPERATORS.get(op, op)))
+    return tokens
+
+
+class _Parser(object):
+    '''
+    Recursive descent parser for SAS expressions
+
+    Parameters
+    ----------
+    tokens : list of (type, value) tuples
+        The tokens from :func:`_tokenize`
+
+    '''
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        ''' Return the next token '''
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def take(self, *ops):
+        ''' Consume the next token if it is one of the given operators '''
+        kind, value = self.peek()
+        if kind == 'op' and value in ops:
+            self.pos += 1
+            return value
+        return None
+
+    def expect(self, op):
+        ''' Consume the given operator '''
+        if self.take(op) is None:
+            raise _NotLocal()
+
+    def parse_or(self):
+        ''' expr or expr '''
+        node = self.parse_and()
+        while self.take('or'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        ''' expr and expr '''
+        node = self.parse_compare()
+        while self.take('and'):
+            node = ('and', node, self.parse_compare())
+        return node
+
+    def parse_compare(self):
+        ''' expr op expr, expr [not] in (values) '''
+        node = self.parse_add()
+        negate = False
+        if self.peek() == ('op', 'not') and \
+                self.tokens[self.pos + 1:self.pos + 2] == [('op', 'in')]:
+            self.pos += 1
+            negate = True
+        if self.take('in'):
+            self.expect('(')
+            values = []
+            while True:
+                sign = self.take('-', '+')
+                kind, value = self.peek()
+                if kind != 'const' or (sign and not isinstance(value, float)):
+                    raise _NotLocal()
+                self.pos += 1
+                values.append(sign == '-' and -value or value)
+                if not self.take(','):
+                    break
+            self.expect(')')
+            node = ('in', node, values)
+            if negate:
+                node = ('not', node)
+        else:
+            op = self.take(*_COMPARISONS)
+            if op:
+                node = ('cmp', op, node, self.parse_add())
+        # Chained comparisons are not supported
+        if self.take(*(_COMPARISONS + ['in'])):
+            raise _NotLocal()
+        return node
+
+    def parse_add(self):
+        ''' expr + expr, expr - expr '''
+        node = self.parse_mul()
+        while True:
+            op = self.take('+', '-')
+            if not op:
+                return node
+            node = ('arith', op, node, self.parse_mul())
+
+    def parse_mul(self):
+        ''' expr * expr, expr / expr '''
+        node = self.parse_unary()
+        while True:
+            op = self.take('*', '/')
+            if not op:
+                return node
+            node = ('arith', op, node, self.parse_unary())
+
+    def parse_unary(self):
+        ''' -expr, +expr, not expr '''
+        op = self.take('-', '+', 'not')
+        if op == '-':
+            return ('neg', self.parse_unary())
+        if op == '+':
+            return ('pos', self.parse_unary())
+        if op == 'not':
+            return ('not', self.parse_unary())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        ''' (expr), column, constant '''
+        if self.take('('):
+            node = self.parse_or()
+            self.expect(')')
+            return node
+        kind, value = self.peek()
+        self.pos += 1
+        if kind == 'const':
+            return ('const', value)
+        # Function calls are not supported
+        if kind == 'name' and self.peek() != ('op', '('):
+            return ('col', value)
+        raise _NotLocal()
+
+
+def compile_expression(code):
+    '''
+    Compile a SAS expression
+
+    Parameters
+    ----------
+    code : string
+        The expression
+
+    Raises
+    ------
+    _NotLocal
+        If the expression uses unsupported syntax
+
+    Returns
+    -------
+    tuple
+        The expression tree
+
+    '''
+    key = ('expr', code)
+    if key not in _COMPILED:
+        parser = _Parser(_tokenize(code))
+        try:
+            node = parser.parse_or()
+            if parser.peek() != (None, None):
+                raise _NotLocal()
+        except _NotLocal:
+            node = None
+        _COMPILED[key] = node
+    if _COMPILED[key] is None:
+        raise _NotLocal()
+    return _COMPILED[key]
+
+
+# Length specifications that do not change the computed values
+_EXACT_LENGTHS = set([
+    (('const', 8.0),),
+    (('name', 'double'),),
+    (('name', 'DOUBLE'),),
+    (('name', 'varchar'), ('op', '('), ('op', '*'), ('op', ')')),
+    (('name', 'VARCHAR'), ('op', '('), ('op', '*'), ('op', ')')),
+])
+
+
+def compile_program(code):
+    '''
+    Compile a computed columns program
+
+    Only assignment statements and ``length`` statements that do not
+    change the values (``8``, ``double``, and ``varchar(*)``) are supported.
+
+    Parameters
+    ----------
+    code : string
+        The program
+
+    Raises
+    ------
+    _NotLocal
+        If the program uses unsupported statements or syntax
+
+    Returns
+    -------
+    list of (name, expression tree) tuples
+
+    '''
+    key = ('program', code)
+    if key not in _COMPILED:
+        try:
+            statements = [[]]
+            for token in _tokenize(code):
+                if token == ('op', ';'):
+                    statements.append([])
+                else:
+                    statements[-1].append(token)
+
+            out = []
+            for tokens in statements:
+                if not tokens:
+                    continue
+                if tokens[0][0] == 'name' and tokens[0][1].lower() == 'length':
+                    if len(tokens) < 3 or tokens[1][0] != 'name' or \
+                            tuple(tokens[2:]) not in _EXACT_LENGTHS:
+                        raise _NotLocal()
+                    continue
+                if len(tokens) < 3 or tokens[0][0] != 'name' or \
+                        tokens[1] != ('op', '='):
+                    raise _NotLocal()
+                parser = _Parser(tokens[2:])
+                node = parser.parse_or()
+                if parser.peek() != (None, None):
+                    raise _NotLocal()
+                out.append((tokens[0][1], node))
+        except _NotLocal:
+            out = None
+        _COMPILED[key] = out
+    if _COMPILED[key] is None:
+        raise _NotLocal()
+    return _COMPILED[key]
+
+
+def _is_char(value):
+    ''' Is the value a character value? '''
+    if isinstance(value, pd.Series):
+        return value.dtype == object
+    return isinstance(value, (text_types, binary_types))
+
+
+def _numeric(value):
+    ''' Check that the value is numeric '''
+    if _is_char(value):
+        raise _NotLocal()
+    return value
+
+
+def _sort_key(value):
+    ''' Convert a value so that it compares the way SAS does '''
+    if _is_char(value):
+        if isinstance(value, pd.Series):
+            return value.fillna('').astype(six.text_type).str.rstrip()
+        return value.rstrip()
+    if isinstance(value, pd.Series):
+        return value.fillna(-np.inf)
+    if value != value:
+        return -np.inf
+    return value
+
+
+def _truth(value):
+    ''' Return the SAS truth value of a numeric value '''
+    value = _numeric(value)
+    if isinstance(value, pd.Series):
+        return value.notnull() & (value != 0)
+    return value == value and value != 0
+
+
+def _as_float(value):
+    ''' Convert a boolean result to 1 / 0 '''
+    if isinstance(value, pd.Series):
+        return value.astype('float64')
+    return float(value)
+
+
+def evaluate(node, columns):
+    '''
+    Evaluate an expression tree
+
+    Parameters
+    ----------
+    node : tuple
+        The expression tree
+    columns : dict
+        The columns of the table keyed by lower-cased name
+
+    Raises
+    ------
+    _NotLocal
+        If the expression can not be evaluated locally
+
+    Returns
+    -------
+    :class:`pandas.Series` or scalar
+
+    '''
+    kind = node[0]
+
+    if kind == 'const':
+        return node[1]
+
+    if kind == 'col':
+        try:
+            return columns[node[1].lower()]
+        except KeyError:
+            raise _NotLocal()
+
+    if kind == 'neg':
+        return -_numeric(evaluate(node[1], columns))
+
+    if kind == 'pos':
+        return _numeric(evaluate(node[1], columns))
+
+    if kind == 'not':
+        value = _truth(evaluate(node[1], columns))
+        if isinstance(value, pd.Series):
+            return _as_float(~value)
+        return _as_float(not value)
+
+    if kind in ('and', 'or'):
+        left = _truth(evaluate(node[1], columns))
+        right = _truth(evaluate(node[2], columns))
+        if kind == 'and':
+            return _as_float(left & right)
+        return _as_float(left | right)
+
+    if kind == 'arith':
+        op = node[1]
+        left = _numeric(evaluate(node[2], columns))
+        right = _numeric(evaluate(node[3], columns))
+        if op == '+':
+            return left + right
+        if op == '-':
+            return left - right
+        if op == '*':
+            return left * right
+        # Division by zero is missing
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = left / right
+        if isinstance(out, pd.Series):
+            return out.replace([np.inf, -np.inf], np.nan)
+        if right == 0 or out in (np.inf, -np.inf):
+            return np.nan
+        return out
+
+    if kind == 'cmp':
+        op = node[1]
+        left = evaluate(node[2], columns)
+        right = evaluate(node[3], columns)
+        if _is_char(left) != _is_char(right):
+            raise _NotLocal()
+        left = _sort_key(left)
+        right = _sort_key(right)
+        if op == '=':
+            out = left == right
+        elif op == '^=':
+            out = left != right
+        elif op == '<':
+            out = left < right
+        elif op == '>':
+            out = left > right
+        elif op == '<=':
+            out = left <= right
+        else:
+            out = left >= right
+        return _as_float(out)
+
+    if kind == 'in':
+        value = evaluate(node[1], columns)
+        if [x for x in node[2] if _is_char(x) != _is_char(value)]:
+            raise _NotLocal()
+        values = [_sort_key(x) for x in node[2]]
+        value = _sort_key(value)
+        if isinstance(value, pd.Series):
+            return _as_float(value.isin(values))
+        return _as_float(value in values)
+
+    raise _NotLocal()
+
+
+def _flatten(items):
+    ''' Yield the names in a computedvars parameter '''
+    if isinstance(items, (text_types, binary_types, dict)):
+        items = [items]
+    for item in items or []:
+        if isinstance(item, (list, tuple)):
+            for subitem in _flatten(item):
+                yield subitem
+        elif isinstance(item, dict):
+            yield item['name']
+        else:
+            yield item
+
+
+def _join(code, sep):
+    ''' Join a list of code strings '''
+    if isinstance(code, (list, tuple)):
+        return sep.join('%s' % x for x in code if x and x.strip())
+    return code or ''
+
+
+class Replica(object):
+    '''
+    Local copy of a CAS table
+
+    Parameters
+    ----------
+    frame : :class:`SASDataFrame`
+        All of the rows of the table
+    fingerprint : tuple
+        The version of the table that was copied
+
+    Returns
+    -------
+    :class:`Replica` object
+
+    '''
+
+    def __init__(self, frame, fingerprint):
+        self.frame = frame.reset_index(drop=True)
+        self.fingerprint = fingerprint
+        self.verified = time.time()
+        self.ncells = frame.shape[0] * max(frame.shape[1], 1)
+        self.nbytes = int(frame.memory_usage(index=False, deep=True).sum())
+
+    def select(self, table, fetchvars=None):
+        '''
+        Apply the table parameters of `table` to the replica
+
+        Parameters
+        ----------
+        table : :class:`CASTable`
+            The table whose parameters (where clause, computed columns,
+            and selected columns) are applied
+        fetchvars : list of strings, optional
+            The columns to return
+
+        Raises
+        ------
+        _NotLocal
+            If the parameters can not be applied locally
+
+        Returns
+        -------
+        :class:`SASDataFrame`
+
+        '''
+        from ..dataframe import SASDataFrame, SASColumnSpec
+
+        if table._datastep_pipeline is not None:
+            raise _NotLocal()
+
+        params = table.to_table_params()
+        if [x for x in params if x.lower() not in _TABLE_PARAMS]:
+            raise _NotLocal()
+        params = dict((k.lower(), v) for k, v in six.iteritems(params))
+
+        frame = self.frame
+        columns = dict((x.lower(), frame[x]) for x in frame.columns)
+        names = dict((x.lower(), x) for x in frame.columns)
+        colinfo = dict((x.lower(), frame.colinfo[x]) for x in frame.columns
+                       if x in frame.colinfo)
+
+        # Computed columns that are not assigned are missing
+        computed = list(_flatten(params.get('computedvars')))
+        for name in computed:
+            names[name.lower()] = name
+            columns[name.lower()] = pd.Series(np.nan, index=frame.index)
+
+        program = _join(params.get('computedvarsprogram'), ' ')
+        if program.strip():
+            for name, node in compile_program(program):
+                # Variables that are not declared are temporary
+                if name.lower() in colinfo:
+                    raise _NotLocal()
+                names.setdefault(name.lower(), name)
+                value = evaluate(node, columns)
+                if not isinstance(value, pd.Series):
+                    value = pd.Series([value] * len(frame), index=frame.index,
+                                      dtype=_is_char(value) and object or 'float64')
+                columns[name.lower()] = value
+
+        where = _join(params.get('where'), ') and (')
+        if where.strip():
+            mask = _truth(evaluate(compile_expression('(%s)' % where), columns))
+            if not isinstance(mask, pd.Series):
+                mask = pd.Series(bool(mask), index=frame.index)
+        else:
+            mask = None
+
+        if not fetchvars:
+            fetchvars = table.get_inputs_param() or \
+                (list(frame.columns) + [x for x in computed
+                                        if x.lower() not in colinfo])
+
+        data = pd.DataFrame(index=frame.index)
+        outinfo = {}
+        for name in fetchvars:
+            key = name.lower()
+            if key not in columns:
+                raise _NotLocal()
+            data[names[key]] = columns[key]
+            if key in colinfo:
+                outinfo[names[key]] = colinfo[key]
+            else:
+                outinfo[names[key]] = SASColumnSpec(
+                    names[key], dtype=_is_char(columns[key]) and 'varchar' or 'double')
+
+        if mask is not None:
+            data = data[mask.values]
+
+        return SASDataFrame(data, name=frame.name, label=frame.label,
+                            title=frame.title, formatter=frame.formatter,
+                            attrs=dict(frame.attrs), colinfo=outinfo)
+
+    def fetch(self, table, **kwargs):
+        '''
+        Return the rows that ``table.fetch`` would return
+
+        Parameters
+        ----------
+        table : :class:`CASTable`
+            The table being fetched
+        **kwargs : keyword arguments
+            The ``table.fetch`` parameters
+
+        Raises
+        ------
+        _NotLocal
+            If the fetch can not be done locally
+
+        Returns
+        -------
+        :class:`SASDataFrame`
+
+        '''
+        if [x for x in kwargs if x not in _FETCH_PARAMS]:
+            raise _NotLocal()
+
+        out = self.select(table, fetchvars=kwargs.get('fetchvars'))
+
+        sortby = kwargs.get('sortby')
+        if sortby:
+            if isinstance(sortby, dict):
+                sortby = [sortby]
+            keys = []
+            ascending = []
+            for i, item in enumerate(sortby):
+                if not isinstance(item, dict):
+                    item = dict(name=item)
+                if item.get('formatted', 'RAW').upper() != 'RAW':
+                    raise _NotLocal()
+                name = [x for x in out.columns if x.lower() == item['name'].lower()]
+                if not name:
+                    raise _NotLocal()
+                keys.append(_sort_key(out[name[0]]).rename('_key%d_' % i))
+                ascending.append(item.get('order', 'ASCENDING').upper() == 'ASCENDING')
+            order = pd.concat(keys, axis=1).sort_values(list(x.name for x in keys),
+                                                        ascending=ascending,
+                                                        kind='mergesort').index
+            out = out.loc[order]
+
+        start = max(int(kwargs.get('from', kwargs.get('from_', 1)) or 1), 1)
+        stop = kwargs.get('to')
+        if stop is None:
+            stop = start - 1 + get_option('cas.dataset.max_rows_fetched')
+        if kwargs.get('maxrows') is not None:
+            stop = min(stop, start - 1 + int(kwargs['maxrows']))
+
+        out = out.iloc[start - 1:max(int(stop), start - 1)]
+        if kwargs.get('index', True):
+            out.index = pd.RangeIndex(start - 1, start - 1 + len(out))
+        else:
+            out.index = pd.RangeIndex(0, len(out))
+        return out
+
+
+def _fingerprint(conn, key):
+    ''' Return the version of a table, or None if it doesn't exist '''
+    caslib, name = key
+    params = dict(name=name)
+    if caslib:
+        params['caslib'] = caslib
+    try:
+        out = conn.retrieve('table.tableinfo', _apptag='UI', _messagelevel='error',
+                            **params)
+        info = out['TableInfo']
+    except Exception:
+        return None
+    if out.severity > 1 or not len(info):
+        return None
+    row = info.iloc[0]
+    return tuple(('%s' % row[x]) for x in _FINGERPRINT_COLUMNS if x in info.columns), \
+        int(row.get('Rows', 0)), int(row.get('Columns', 0))
+
+
+def replicate(table):
+    '''
+    Copy a table into a local replica
+
+    Parameters
+    ----------
+    table : :class:`CASTable`
+        The table to copy.  All rows and columns of the underlying
+        table are copied, regardless of the parameters of `table`.
+
+    Raises
+    ------
+    SWATError
+        If the table does not exist
+
+    Returns
+    -------
+    :class:`Replica` object
+
+    '''
+    from ..exceptions import SWATError
+
+    conn = table.get_connection()
+    cache = conn._replica_cache
+    key = cache.get_key(table)
+    if key is None:
+        raise SWATError('Only tables specified by name can be cached locally')
+
+    info = _fingerprint(conn, key)
+    if info is None:
+        raise SWATError('Table %s was not found' % key[1])
+    fingerprint, nrows = info[0], info[1]
+
+    base = conn.CASTable(table.params['name'])
+    if table.params.get('caslib'):
+        base.params['caslib'] = table.params['caslib']
+
+    with cache.busy:
+        frame = base._fetch(from_=1, to=max(nrows, 1), maxrows=max(nrows, 1))
+
+    replica = Replica(frame, fingerprint)
+    cache.put(key, replica)
+    return replica
+
+
+def _get_replica(table, ncells=0):
+    ''' Return a valid replica of `table` if it is cheaper to use, or None '''
+    try:
+        conn = table.get_connection()
+    except Exception:
+        return None
+
+    cache = conn._replica_cache
+    if cache.busy:
+        return None
+
+    key = cache.get_key(table)
+    if key is None:
+        return None
+
+    replica = cache.get(key)
+
+    if replica is None:
+        # Replicate automatically when it is expected to pay off
+        if not get_option('cas.table.replica_max_rows') or \
+                not cache.spent(key) or table._datastep_pipeline is not None:
+            return None
+        size = cache.get_size(key)
+        if size is None:
+            with cache.busy:
+                size = _fingerprint(conn, key)
+            if size is None:
+                return None
+            cache.set_size(key, size[1], size[2])
+            size = (size[1], size[2])
+        if not cache.should_replicate(key, *size):
+            return None
+        try:
+            return replicate(table)
+        except Exception:
+            return None
+
+    # Check that the table hasn't changed
+    interval = get_option('cas.table.replica_check_interval')
+    if not replica.verified or (time.time() - replica.verified) > interval:
+        with cache.busy:
+            info = _fingerprint(conn, key)
+        if info is None or info[0] != replica.fingerprint:
+            cache.pop(key)
+            return None
+        replica.verified = time.time()
+
+    if not cache.use_local(replica, ncells):
+        return None
+
+    return replica
+
+
+def fetch(table, **kwargs):
+    '''
+    Fetch rows of `table` from a local replica
+
+    Parameters
+    ----------
+    table : :class:`CASTable`
+        The table to fetch
+    **kwargs : keyword arguments
+        The ``table.fetch`` parameters
+
+    Returns
+    -------
+    :class:`SASDataFrame`
+        If the fetch was done locally
+    None
+        If the fetch must be sent to the server
+
+    '''
+    ncells = kwargs.get('to', 0) - kwargs.get('from', kwargs.get('from_', 1)) + 1
+    ncells *= len(kwargs.get('fetchvars') or table.get_inputs_param() or [None])
+    replica = _get_replica(table, max(ncells, 0))
+    if replica is None:
+        return None
+    try:
+        out = replica.fetch(table, **kwargs)
+    except _NotLocal:
+        table.get_connection()._replica_cache.count('misses')
+        return None
+    table.get_connection()._replica_cache.count('hits')
+    return out
+
+
+def record_fetch(table, elapsed, ncells):
+    '''
+    Record the time taken by a fetch from the server
+
+    Parameters
+    ----------
+    table : :class:`CASTable`
+        The table that was fetched
+    elapsed : float
+        The time of the fetch in seconds
+    ncells : int
+        The number of cells fetched
+
+    '''
+    try:
+        cache = table.get_connection()._replica_cache
+    except Exception:
+        return
+    cache.record_fetch(cache.get_key(table), elapsed, ncells)
+
+
+def numrows(table):
+    '''
+    Return the number of rows in `table` using a local replica
+
+    Returns
+    -------
+    int
+        If the row count was computed locally
+    None
+        If the request must be sent to the server
+
+    '''
+    replica = _get_replica(table)
+    if replica is None:
+        return None
+    try:
+        out = len(replica.select(table, fetchvars=[replica.frame.columns[0]]))
+    except (_NotLocal, IndexError):
+        table.get_connection()._replica_cache.count('misses')
+        return None
+    table.get_connection()._replica_cache.count('hits')
+    return out
+
+
+def _distinct_values(frame):
+    '''
+    Return the only column of `frame` if its values are distinct when formatted
+
+    The server counts formatted values, so a column is only counted
+    locally if it has no format (or a default one) and formatting does
+    not merge any values.
+
+    Raises
+    ------
+    _NotLocal
+        If formatting could merge values
+
+    '''
+    values = frame.iloc[:, 0]
+    spec = frame.colinfo.get(frame.columns[0])
+    fmt = (getattr(spec, 'format', None) or '').upper()
+    if _is_char(values):
+        if fmt and not re.match(r'^\$(CHAR)?\d*\.?$', fmt):
+            raise _NotLocal()
+    else:
+        if fmt and not re.match(r'^BEST\d*\.?$', fmt):
+            raise _NotLocal()
+        # Values that print differently in BEST12. are distinct
+        notnull = values.dropna()
+        if ((notnull % 1) != 0).any() or (notnull.abs() >= 1e11).any():
+            raise _NotLocal()
+    return values
+
+
+def frequencies(column, includemissing=False):
+    '''
+    Compute the frequencies of the values of a column using a local replica
+
+    Parameters
+    ----------
+    column : :class:`CASColumn`
+        The column
+    includemissing : bool, optional
+        Should missing values be counted?
+
+    Returns
+    -------
+    :class:`pandas.Series`
+        If the frequencies were computed locally
+    None
+        If the request must be sent to the server
+
+    '''
+    if column.has_groupby_vars():
+        return None
+    replica = _get_replica(column)
+    if replica is None:
+        return None
+    try:
+        values = _distinct_values(replica.select(column, fetchvars=[column.name]))
+    except _NotLocal:
+        column.get_connection()._replica_cache.count('misses')
+        return None
+    column.get_connection()._replica_cache.count('hits')
+
+    if _is_char(values):
+        values = values.fillna('').astype(six.text_type).str.rstrip()
+        if not includemissing:
+            values = values[values != '']
+    elif not includemissing:
+        values = values.dropna()
+
+    out = values.value_counts(dropna=False).sort_index(na_position='first')
+    out = out.astype(np.int64)
+    out.index.name = column.name
+    out.name = column.name
+    return out
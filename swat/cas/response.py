@@ -28,6 +28,7 @@ import six
 from ..utils.compat import a2u, binary_types
 from ..utils import cachedproperty
 from ..clib import errorcheck
+from . import profiling
 from .transformers import cas2py
 
 
@@ -330,7 +331,14 @@ class CASResponse(object):
                 key = 0
             elif isinstance(key, binary_types):
                 key = a2u(key, 'utf-8')
-            yield key, cas2py(_sw_result, self.soptions, connection=self._connection)
+            perf = profiling.current()
+            if perf is not None:
+                start = profiling.clock()
+                value = cas2py(_sw_result, self.soptions, connection=self._connection)
+                perf.add('convert', start)
+                yield key, value
+            else:
+                yield key, cas2py(_sw_result, self.soptions, connection=self._connection)
             _sw_result = errorcheck(self._sw_response.getNextResult(), self._sw_response)
 
     def __str__(self):
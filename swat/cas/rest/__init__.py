@@ -26,6 +26,8 @@ from __future__ import print_function, division, absolute_import, unicode_litera
 from .connection import REST_CASConnection
 from .error import REST_CASError
 from .message import REST_CASMessage
+from .recorder import REST_CASRecorder
+from .replay import REST_CASReplayConnection
 from .response import REST_CASResponse
 from .table import REST_CASTable
 from .value import REST_CASValue
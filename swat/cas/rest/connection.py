@@ -31,6 +31,9 @@ import requests
 import six
 from six.moves import urllib
 from .message import REST_CASMessage
+from .. import metrics
+from .. import profiling
+from .recorder import REST_CASRecorder
 from .response import REST_CASResponse
 from ..types import blob
 from ..table import CASTable
@@ -41,6 +44,7 @@ from ...utils.keyword import keywordify
 from ...utils.compat import (a2u, int_types, int32_types, int64_types,
                              float64_types, items_types, int32, int64, float64)
 from ...utils.authinfo import query_authinfo
+from ...utils.lazy import LazyDict, LazyList, to_python
 
 # pylint: disable=C0330
 
@@ -93,6 +97,8 @@ def _normalize_params(params):
     out = {}
     for key, value in params.items():
         key = keywordify(key)
+        if isinstance(value, (LazyDict, LazyList)):
+            value = to_python(value)
         if value is True:
             pass
         elif value is False:
@@ -126,6 +132,8 @@ def _normalize_list(items):
     ''' Normalize objects using standard python types '''
     newitems = []
     for item in items:
+        if isinstance(item, (LazyDict, LazyList)):
+            item = to_python(item)
         if isinstance(item, dict):
             item = _normalize_params(item)
         elif isinstance(item, items_types):
@@ -220,6 +228,12 @@ class REST_CASConnection(object):
         self._soptions = soptions
         self._error = error
         self._results = None
+        self._session = None
+
+        # Record raw responses for replay
+        self._recorder = None
+        if options.cas.rest.record_file:
+            self._recorder = REST_CASRecorder(options.cas.rest.record_file)
 
         self._auth = b'Basic ' + base64.b64encode(
             ('%s:%s' % (username, password)).encode('utf-8')).strip()
@@ -277,6 +291,8 @@ class REST_CASConnection(object):
     def _set_next_connection(self):
         ''' Iterate to the next available controller '''
         self._host_index += 1
+        if metrics.enabled:
+            metrics.registry.inc('swat_failovers_total')
         try:
             self._current_hostname = self._hostname[self._host_index]
             self._current_baseurl = self._baseurl[self._host_index]
@@ -288,7 +304,7 @@ class REST_CASConnection(object):
             raise SWATError('Unable to connect to any URL: %s' %
                             ', '.join(self._baseurl))
 
-    def invoke(self, action_name, kwargs):
+    def invoke(self, action_name, kwargs, prepared=None):
         '''
         Invoke an action
 
@@ -298,14 +314,25 @@ class REST_CASConnection(object):
             The name of the action
         kwargs : dict
             The dictionary of action parameters
+        prepared : :class:`CASPreparedAction`, optional
+            Prepared action whose serialized static parameters are
+            combined with `kwargs`
 
         Returns
         -------
         `self`
 
         '''
-        is_ui = kwargs.get('_apptag', '') == 'UI'
-        kwargs = json.dumps(_normalize_params(kwargs))
+        perf = profiling.current()
+        if perf is not None:
+            start = profiling.clock()
+
+        if prepared is not None:
+            is_ui = kwargs.get('_apptag', prepared.params.get('_apptag', '')) == 'UI'
+            kwargs = prepared.to_json(_normalize_params(kwargs))
+        else:
+            is_ui = kwargs.get('_apptag', '') == 'UI'
+            kwargs = json.dumps(_normalize_params(kwargs))
 
         if options.cas.trace_actions and \
                 (not(is_ui) or (is_ui and options.cas.trace_ui_actions)):
@@ -314,6 +341,55 @@ class REST_CASConnection(object):
             print('')
 
         post_data = a2u(kwargs).encode('utf-8')
+
+        if perf is not None:
+            perf.add('serialize', start, len(post_data))
+            start = profiling.clock()
+
+        res = self._post_action(action_name, post_data)
+
+        if perf is not None:
+            perf.add('network', start, len(res))
+            start = profiling.clock()
+
+        if metrics.enabled:
+            metrics.registry.inc('swat_bytes_sent_total', len(post_data))
+            metrics.registry.inc('swat_bytes_received_total', len(res))
+
+        if self._recorder is not None:
+            self._recorder.record(self._session, action_name, kwargs, res)
+
+        try:
+            self._results = json.loads(a2u(res, 'utf-8'), strict=False)
+            if perf is not None:
+                perf.add('parse', start)
+            if self._results.get('disposition', None) is None:
+                if self._results.get('error'):
+                    raise SWATError(self._results['error'])
+                else:
+                    raise SWATError('Unknown error')
+        except ValueError as exc:
+            raise SWATError(str(exc))
+
+        return self
+
+    def _post_action(self, action_name, post_data):
+        '''
+        Send an action request to the server
+
+        Parameters
+        ----------
+        action_name : string
+            The name of the action
+        post_data : bytes
+            The JSON encoded action parameters
+
+        Returns
+        -------
+        string
+            The body of the response
+
+        '''
         self._req_sess.headers.update({
             'Content-Type': 'application/json',
             'Content-Length': str(len(post_data)),
@@ -362,17 +438,7 @@ class REST_CASConnection(object):
             except Exception as exc:
                 raise SWATError(str(exc))
 
-        try:
-            self._results = json.loads(a2u(res, 'utf-8'), strict=False)
-            if self._results.get('disposition', None) is None:
-                if self._results.get('error'):
-                    raise SWATError(self._results['error'])
-                else:
-                    raise SWATError('Unknown error')
-        except ValueError as exc:
-            raise SWATError(str(exc))
-
-        return self
+        return res
 
     def receive(self):
         ''' Retrieve the next message from the server '''
@@ -435,6 +501,9 @@ class REST_CASConnection(object):
 
     def close(self):
         ''' Close the connection '''
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
         if self._session and self._req_sess is not None:
             self._req_sess.headers.update({
                 'Content-Type': 'application/json',
@@ -450,10 +519,56 @@ class REST_CASConnection(object):
         with open(file_name, 'rb') as datafile:
             data = datafile.read()
 
+        params = json.dumps(_normalize_params(params))
+
+        perf = profiling.current()
+        if perf is not None:
+            start = profiling.clock()
+
+        res = self._put_upload(data, params)
+
+        if perf is not None:
+            perf.add('network', start, len(data) + len(res))
+
+        if metrics.enabled:
+            metrics.registry.inc('swat_bytes_sent_total', len(data))
+            metrics.registry.inc('swat_bytes_received_total', len(res))
+
+        if self._recorder is not None:
+            self._recorder.record(self._session, 'table.upload', params, res)
+
+        try:
+            out = json.loads(a2u(res, 'utf-8'), strict=False)
+            if out.get('disposition', None) is None:
+                if out.get('error'):
+                    raise SWATError(out['error'])
+                else:
+                    raise SWATError('Unknown error')
+            return REST_CASResponse(out)
+        except ValueError as exc:
+            raise SWATError(str(exc))
+
+    def _put_upload(self, data, params):
+        '''
+        Send data to the table.upload endpoint
+
+        Parameters
+        ----------
+        data : bytes
+            The contents of the data file
+        params : string
+            The JSON encoded action parameters
+
+        Returns
+        -------
+        string
+            The body of the response
+
+        '''
         self._req_sess.headers.update({
             'Content-Type': 'application/octet-stream',
             'Content-Length': str(len(data)),
-            'JSON-Parameters': json.dumps(_normalize_params(params))
+            'JSON-Parameters': params,
         })
 
         while True:
@@ -474,16 +589,7 @@ class REST_CASConnection(object):
             finally:
                 del self._req_sess.headers['JSON-Parameters']
 
-        try:
-            out = json.loads(a2u(res, 'utf-8'), strict=False)
-            if out.get('disposition', None) is None:
-                if out.get('error'):
-                    raise SWATError(self._results['error'])
-                else:
-                    raise SWATError('Unknown error')
-            return REST_CASResponse(out)
-        except ValueError as exc:
-            raise SWATError(str(exc))
+        return res
 
     def stopAption(self):
         ''' Stop the current action '''
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Class for recording REST CAS responses
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import io
+import json
+import threading
+from ..utils.params import redact_params
+from ...utils.compat import a2u
+
+
+class REST_CASRecorder(object):
+    '''
+    Record raw REST responses to a file
+
+    Each action call is written as one line of JSON containing the
+    session ID, the action name, the action parameters, and the
+    unparsed body of the response.  Files written by this class can
+    be served back by :class:`REST_CASReplayConnection`.
+
+    The values of parameters that look like credentials (see
+    :func:`redact_params`) are masked.  Other parameter values, such as
+    code, and the data in the responses are written as they are, so
+    the files should be protected like the data itself.
+
+    Parameters
+    ----------
+    path : string
+        The file to append records to
+
+    Returns
+    -------
+    REST_CASRecorder object
+
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._file = io.open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def record(self, session, action_name, params, response):
+        '''
+        Write an action call and its response
+
+        Parameters
+        ----------
+        session : string
+            The session ID
+        action_name : string
+            The name of the action
+        params : string
+            The JSON encoded action parameters
+        response : string or bytes
+            The body of the response
+
+        '''
+        params = redact_params(json.loads(a2u(params, 'utf-8') or '{}'))
+        line = '{"session": %s, "action": %s, "params": %s, "response": %s}\n' % (
+            json.dumps(session), json.dumps(a2u(action_name)),
+            json.dumps(params, sort_keys=True), json.dumps(a2u(response, 'utf-8')))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(a2u(line))
+                self._file.flush()
+
+    def close(self):
+        ''' Close the file '''
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Class for replaying recorded REST CAS sessions
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import io
+import json
+import uuid
+import six
+from .connection import REST_CASConnection
+from ..utils.params import redact_params
+from ...exceptions import SWATError
+from ...utils.compat import a2u
+
+
+def _params_key(action_name, params):
+    ''' Return the lookup key for an action call '''
+    if not isinstance(params, dict):
+        params = json.loads(a2u(params, 'utf-8') or '{}')
+    # Credentials are masked in recordings, so they are masked here too
+    params = redact_params(params)
+    return action_name.lower(), json.dumps(params, sort_keys=True)
+
+
+class _Responses(object):
+    ''' Cycle through the responses recorded for a key '''
+
+    def __init__(self):
+        self.items = []
+        self.index = 0
+
+    def next(self):
+        ''' Return the next response, starting over after the last one '''
+        out = self.items[self.index % len(self.items)]
+        self.index += 1
+        return out
+
+
+class REST_CASReplayConnection(REST_CASConnection):
+    '''
+    Replay a session recorded by :class:`REST_CASRecorder`
+
+    This class implements the :class:`REST_CASConnection` interface, but
+    action calls are answered from a recording rather than a server.
+    Each call is matched to a recorded call of the same action with
+    the same parameters.  If there is no exact match, the responses
+    recorded for the action are used in the order they were recorded.
+    Once all of the matching responses are used, they are served again
+    from the beginning.
+
+    Parameters
+    ----------
+    hostname : string
+        The recording file written by :class:`REST_CASRecorder`
+    port : int
+        Ignored
+    username : string
+        The CAS username
+    password : string
+        Ignored
+    soptions : string
+        The string containing connection options
+    error : REST_CASError
+        The object to use for error messages
+
+    Examples
+    --------
+    Record a session while connected to a server:
+
+    >>> swat.set_option('cas.rest.record_file', 'session.jsonl')
+    >>> conn = swat.CAS('https://mycashost.com/cas-shared-default-http/')
+    >>> conn.table.fetch(table='cars', to=1000)
+    >>> conn.close()
+
+    Replay it without a server:
+
+    >>> swat.reset_option('cas.rest.record_file')
+    >>> conn = swat.CAS('session.jsonl', protocol='replay')
+    >>> conn.table.fetch(table='cars', to=1000)
+
+    Returns
+    -------
+    REST_CASReplayConnection object
+
+    '''
+
+    def __init__(self, hostname, port, username, password, soptions, error):
+        if not isinstance(hostname, six.string_types):
+            hostname = list(hostname)[0]
+
+        self._orig_hostname = hostname
+        self._orig_port = port
+        self._hostname = [hostname]
+        self._port = [port]
+        self._baseurl = [hostname]
+        self._host_index = 0
+        self._current_hostname = hostname
+        self._current_baseurl = hostname
+        self._current_port = port
+        self._username = username
+        self._soptions = soptions
+        self._error = error
+        self._results = None
+        self._recorder = None
+        self._req_sess = None
+        self._session = None
+
+        self._calls = {}
+        self._actions = {}
+
+        try:
+            with io.open(hostname, 'r', encoding='utf-8') as infile:
+                for line in infile:
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    if self._session is None:
+                        self._session = item.get('session')
+                    key = _params_key(item['action'], item.get('params') or {})
+                    self._calls.setdefault(key, _Responses()).items.append(
+                        item['response'])
+                    self._actions.setdefault(key[0], _Responses()).items.append(
+                        item['response'])
+        except (IOError, OSError, ValueError, KeyError) as exc:
+            raise SWATError('Could not read recording %s: %s' % (hostname, exc))
+
+        if self._session is None:
+            self._session = '%s' % uuid.uuid4()
+
+    def _lookup(self, action_name, params):
+        ''' Return the recorded response for an action call '''
+        key = _params_key(action_name, params)
+        responses = self._calls.get(key) or self._actions.get(key[0])
+        if responses is None:
+            return json.dumps({
+                'disposition': {
+                    'severity': 'Error', 'reason': 'abort', 'statusCode': 2720400,
+                    'formattedStatus': "Action '%s' was not recorded." % action_name,
+                },
+                'logEntries': [{'message': "ERROR: Action '%s' was not recorded." %
+                                           action_name}],
+                'results': {},
+            })
+        return responses.next()
+
+    def _post_action(self, action_name, post_data):
+        ''' Return the recorded response for an action '''
+        return self._lookup(action_name, post_data)
+
+    def _put_upload(self, data, params):
+        ''' Return the recorded response for an upload '''
+        return self._lookup('table.upload', params)
+
+    def copy(self):
+        ''' Copy the connection object '''
+        return type(self)(self._orig_hostname, self._orig_port, self._username,
+                          None, self._soptions, self._error)
+
+    def close(self):
+        ''' Close the connection '''
+        self._session = None
+        return 200
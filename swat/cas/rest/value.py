@@ -24,8 +24,11 @@ Class for receiving values from a CAS response
 from __future__ import print_function, division, absolute_import, unicode_literals
 
 import base64
+import functools
 from .table import REST_CASTable
 from ..types import blob
+from ...config import get_option
+from ...utils.lazy import LazyDict, LazyList
 from ...utils.compat import (a2u, int32, int64, float64, text_types,
                              binary_types, int32_types, int64_types,
                              float64_types, items_types)
@@ -33,8 +36,15 @@ from ...utils.compat import (a2u, int32, int64, float64, text_types,
 
 def _value2python(_value, soptions, errors, connection,
                   ctb2tabular, b64decode, cas2python_datetime,
-                  cas2python_date, cas2python_time):
-    ''' Convert JSON generated values to Python objects '''
+                  cas2python_date, cas2python_time, lazy=False):
+    '''
+    Convert JSON generated values to Python objects
+
+    If `lazy` is True, lists and dictionaries are returned as
+    :class:`LazyList` and :class:`LazyDict` objects that convert
+    their items when they are first accessed.
+
+    '''
     if isinstance(_value, dict):
         if _value.get('_ctb'):
             return ctb2tabular(REST_CASTable(_value), soptions, connection)
@@ -45,6 +55,11 @@ def _value2python(_value, soptions, errors, connection,
         if 'actions' in _value and _value.get('actions', [{}])[0].get('params', False):
             return _value
 
+        if lazy:
+            return LazyDict(_value, _lazy_converter(
+                soptions, errors, connection, ctb2tabular, b64decode,
+                cas2python_datetime, cas2python_date, cas2python_time))
+
         out = {}
         for key, value in _value.items():
             out[key] = _value2python(value, soptions, errors, connection,
@@ -53,6 +68,11 @@ def _value2python(_value, soptions, errors, connection,
         return out
 
     if isinstance(_value, items_types):
+        if lazy and isinstance(_value, list):
+            return LazyList(_value, _lazy_converter(
+                soptions, errors, connection, ctb2tabular, b64decode,
+                cas2python_datetime, cas2python_date, cas2python_time))
+
         out = []
         for i, value in enumerate(_value):
             out.append(_value2python(value, soptions, errors, connection,
@@ -75,6 +95,17 @@ def _value2python(_value, soptions, errors, connection,
 #       return cas2python_datetime(_value)
 
 
+def _lazy_converter(soptions, errors, connection, ctb2tabular, b64decode,
+                    cas2python_datetime, cas2python_date, cas2python_time):
+    ''' Return a function that converts the items of lazy containers '''
+    return functools.partial(_value2python, soptions=soptions, errors=errors,
+                             connection=connection, ctb2tabular=ctb2tabular,
+                             b64decode=b64decode,
+                             cas2python_datetime=cas2python_datetime,
+                             cas2python_date=cas2python_date,
+                             cas2python_time=cas2python_time, lazy=True)
+
+
 class REST_CASValue(object):
     ''' CASValue wrapper '''
 
@@ -102,7 +133,7 @@ class REST_CASValue(object):
         ''' Convert a CAS value to Python '''
         return _value2python(self._value, soptions, errors, connection, ctb2tabular,
                              b64decode, cas2python_datetime, cas2python_date,
-                             cas2python_time)
+                             cas2python_time, lazy=get_option('cas.rest.lazy_results'))
 
     def getTypeName(self):
         ''' Get the object type '''
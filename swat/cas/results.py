@@ -29,11 +29,15 @@ import re
 import six
 import pandas as pd
 import pandas.core.common as pdcom
-from ..dataframe import SASDataFrame, concat
+from ..config import get_option
+from ..dataframe import SASDataFrame, concat, concat_bygroups
+from ..notebook.paging import RenderBudget, collapse, summarize
 from ..notebook.zeppelin import show as z_show
 from ..utils.compat import OrderedDict
 from ..utils.xdict import xadict
 
+_BYGROUP_KEY_RE = re.compile(r'^(?:ByGroupSet(\d+)\.)?ByGroup\d+\.(.+)$')
+
 
 @six.python_2_unicode_compatible
 class RendererMixin(object):
@@ -41,24 +45,47 @@ class RendererMixin(object):
 
     def _z_show_(self, **kwargs):
         ''' Display Zeppelin notebook rendering '''
+        budget = RenderBudget(max_bytes=0)
+        max_bygroups = get_option('cas.display.max_bygroups')
+        entries = self._html_entries()
+        nbygroups = 0
         i = 0
-        for key, value in six.iteritems(self):
-            if i == 0:
-                print('%%html <div class="cas-results-key">'
-                      '<b>&#167; %s</b></div>' % key)
-            else:
-                print('%%html <div class="cas-results-key">'
-                      '<b><hr/>&#167; %s</b></div>' % key)
+        for num, (byline, keys) in enumerate(entries):
+            if byline:
+                if max_bygroups and nbygroups >= max_bygroups:
+                    self._z_show_collapsed_(entries[num:])
+                    break
+                nbygroups += 1
+            if num and budget.exhausted:
+                self._z_show_collapsed_(entries[num:])
+                break
 
-            print('')
+            for key in keys:
+                value = self[key]
 
-            if hasattr(value, '_z_show_'):
-                value._z_show_(**kwargs)
-            else:
-                z_show(value, **kwargs)
+                if i == 0:
+                    print('%%html <div class="cas-results-key">'
+                          '<b>&#167; %s</b></div>' % key)
+                else:
+                    print('%%html <div class="cas-results-key">'
+                          '<b><hr/>&#167; %s</b></div>' % key)
+
+                print('')
+
+                if hasattr(value, '_z_show_'):
+                    value._z_show_(**kwargs)
+                elif isinstance(value, pd.DataFrame):
+                    nrows = min(len(value), kwargs.get('max_result') or
+                                pd.get_option('display.max_rows') or len(value))
+                    if budget.rows_left is not None:
+                        nrows = max(min(nrows, budget.rows_left), 1)
+                    z_show(value, **dict(kwargs, max_result=nrows))
+                    budget.add('', nrows)
+                else:
+                    z_show(value, **kwargs)
 
-            print('')
-            i = i + 1
+                print('')
+                i = i + 1
 
         if getattr(self, 'performance'):
             stats = []
@@ -78,42 +105,176 @@ class RendererMixin(object):
                 print('%%html <p class="cas-results-performance"><small>%s</small></p>' %
                       ' &#183; '.join(stats))
 
-    def _repr_html_(self):
+    def _z_show_collapsed_(self, entries):
+        ''' Display a summary of the entries that were not displayed in Zeppelin '''
+        title, rows = summarize(self, entries)
+        print('%%html <div class="cas-results-more"><hr/><b>%s</b></div>' % title)
+        print('')
+        print('%table By Group\tKeys\tRows')
+        for row in rows:
+            print('%s\t%s\t%s' % row)
+        print('')
+
+    def _html_entries(self, ods=False):
         '''
-        Create an HTML representation for IPython
+        Group the result keys for rendering
+
+        Consecutive items in the same By group are grouped together.
+        All other items are in an entry by themselves.
+
+        Parameters
+        ----------
+        ods : bool, optional
+            Skip the keys that are not included in ODS-like output?
 
         Returns
         -------
-        string
-           HTML representation of CASResults object
+        list of (byline, keys) tuples
 
         '''
-        if pdcom.in_qtconsole():
-            return None
+        entries = []
+        byline = ''
+        for key, value in six.iteritems(self):
+            if ods and (key.startswith('$') or key.endswith('ByGroupInfo')):
+                continue
+            if isinstance(value, SASDataFrame):
+                byline = self._make_byline(value.attrs)
+            if byline and entries and entries[-1][0] == byline:
+                entries[-1][1].append(key)
+            else:
+                entries.append((byline, [key]))
+        return entries
 
-        if not pd.get_option('display.notebook.repr_html'):
-            return None
+    def _render_entries_html_(self, entries, ods=False):
+        '''
+        Render entries until the By group limit or the budget is reached
+
+        The remaining entries are rendered as a collapsed summary.
+
+        Parameters
+        ----------
+        entries : list of (byline, keys) tuples
+            The entries to render
+        ods : bool, optional
+            Create ODS-like output?
+
+        Returns
+        -------
+        list of strings
+
+        '''
+        budget = RenderBudget()
+        max_bygroups = get_option('cas.display.max_bygroups')
+        output = []
+        nbygroups = 0
+        for i, (byline, keys) in enumerate(entries):
+            if byline:
+                if max_bygroups and nbygroups >= max_bygroups:
+                    output.append(collapse(self, entries[i:], ods=ods))
+                    break
+                nbygroups += 1
+            if i and budget.exhausted:
+                output.append(collapse(self, entries[i:], ods=ods))
+                break
+            output.append(self._render_entry_html_(byline, keys, budget,
+                                                   ods=ods, first=(i == 0)))
+        return output
+
+    def _render_entry_html_(self, byline, keys, budget, ods=False, first=False):
+        '''
+        Render the items of one entry
 
+        Parameters
+        ----------
+        byline : string
+            The By group line of the entry
+        keys : list of strings
+            The keys of the items in the entry
+        budget : RenderBudget object
+            The budget that the output is charged to
+        ods : bool, optional
+            Create ODS-like output?
+        first : bool, optional
+            Is this the first entry of the output?
+
+        Returns
+        -------
+        string
+
+        '''
         output = []
 
-        i = 0
-        for key, item in six.iteritems(self):
-            if i:
-                sfmt = '<div class="cas-results-key"><hr/><b>&#167; %s</b></div>'
-            else:
+        if ods:
+            if byline:
+                output.append(budget.add('<h3 class="byline">%s</h3>' % byline))
+            for key in keys:
+                output.append(self._render_item_html_(self[key], budget))
+            return ''.join(output)
+
+        for i, key in enumerate(keys):
+            if first and i == 0:
                 sfmt = '<div class="cas-results-key"><b>&#167; %s</b></div>'
-            output.append(sfmt % key)
-            output.append('<div class="cas-results-body">')
+            else:
+                sfmt = '<div class="cas-results-key"><hr/><b>&#167; %s</b></div>'
+            item = self[key]
+            nrows = 0
+            if isinstance(item, SASDataFrame):
+                nrows = min(len(item), pd.get_option('display.max_rows') or len(item))
+                if budget.rows_left is not None and nrows > budget.rows_left:
+                    nrows = budget.rows_left
+                    item = item.iloc[:nrows]
+            out = [sfmt % key]
+            out.append('<div class="cas-results-body">')
             if hasattr(item, '_repr_html_'):
                 res = item._repr_html_()
                 if res is None:
-                    output.append('<div>%s</div>' % res)
+                    out.append('<div>%s</div>' % res)
                 else:
-                    output.append(res)
+                    out.append(res)
             else:
-                output.append('<div>%s</div>' % item)
-            output.append('</div>')
-            i += 1
+                out.append('<div>%s</div>' % item)
+            out.append('</div>')
+            output.append(budget.add('\n'.join(out), nrows))
+
+        return '\n'.join(output)
+
+    def _render_item_html_(self, value, budget):
+        ''' Create an ODS-like rendering of one item '''
+        if isinstance(value, SASDataFrame):
+            nrows = len(value)
+            if budget.rows_left is not None:
+                nrows = min(nrows, budget.rows_left)
+            return budget.add(value._render_html_(max_rows=nrows), nrows)
+
+        if hasattr(value, '_render_html_'):
+            result = value._render_html_()
+            if result is not None:
+                return budget.add(result)
+
+        if hasattr(value, '_repr_html_'):
+            result = value._repr_html_()
+            if result is not None:
+                return budget.add(result)
+
+        return budget.add('<pre>%s</pre>' % pprint.pformat(value))
+
+    def _repr_html_(self):
+        '''
+        Create an HTML representation for IPython
+
+        Returns
+        -------
+        string
+           HTML representation of CASResults object
+
+        '''
+        if getattr(pdcom, 'in_qtconsole', lambda: False)():
+            return None
+
+        if not pd.get_option('display.notebook.repr_html'):
+            return None
+
+        output = self._render_entries_html_(self._html_entries())
 
         output.append('<div class="cas-output-area"></div>')
 
@@ -198,42 +359,18 @@ class RendererMixin(object):
         return ''
 
     def _render_html_(self):
-        ''' Create an ODS-like report of the results '''
-        byline = ''
-        output = []
-
-        output.append('<div class="cas-results">')
-
-        for key, value in self.items():
-            if key.startswith('$'):
-                continue
-            if key.endswith('ByGroupInfo'):
-                continue
-
-            if isinstance(value, SASDataFrame):
-                newbyline = self._make_byline(value.attrs)
-                if newbyline != byline:
-                    byline = newbyline
-                    output.append('<h3 class="byline">%s</h3>' % byline)
-                output.append(value._render_html_())
-                continue
-
-            if hasattr(value, '_render_html_'):
-                result = value._render_html_()
-                if result is None:
-                    output.append(result)
-                    continue
-
-            if hasattr(value, '_repr_html_'):
-                result = value._repr_html_()
-                if result is None:
-                    output.append(result)
-                    continue
+        '''
+        Create an ODS-like report of the results
 
-            output.append('<pre>%s</pre>' % pprint.pformat(value))
+        The output is limited by the ``cas.display.max_html_bytes``,
+        ``cas.display.max_html_rows``, and ``cas.display.max_bygroups``
+        options.  Items after the limits are reached are listed in a
+        collapsed summary.
 
+        '''
+        output = ['<div class="cas-results">']
+        output.extend(self._render_entries_html_(self._html_entries(ods=True), ods=True))
         output.append('</div>')
-
         return ''.join(output)
 
 
@@ -336,6 +473,7 @@ class CASResults(RendererMixin, OrderedDict):
     def __init__(self, *args, **kwargs):
         super(CASResults, self).__init__(*args, **kwargs)
         self.performance = None
+        self.client_performance = None
         self.messages = None
         self.events = collections.OrderedDict()
         self.signature = None
@@ -348,12 +486,113 @@ class CASResults(RendererMixin, OrderedDict):
         self.status = None
         self.status_code = None
         self.debug = None
+        self._bygroup_index = None
+
+    @property
+    def signature(self):
+        ''' The action call's signature, including the parameter values '''
+        signature = self.__dict__.get('_signature')
+        if hasattr(signature, 'resolve'):
+            signature = self._signature = signature.resolve()
+        return signature
+
+    @signature.setter
+    def signature(self, value):
+        self._signature = value
 
     def __getattr__(self, name):
         if name in self:
             return self[name]
         return super(CASResults, self).__getattribute__(name)
 
+    def __setitem__(self, key, value):
+        self._bygroup_index = None
+        super(CASResults, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._bygroup_index = None
+        super(CASResults, self).__delitem__(key)
+
+    def pop(self, *args):
+        self._bygroup_index = None
+        return super(CASResults, self).pop(*args)
+
+    def popitem(self, *args, **kwargs):
+        self._bygroup_index = None
+        return super(CASResults, self).popitem(*args, **kwargs)
+
+    def clear(self):
+        self._bygroup_index = None
+        super(CASResults, self).clear()
+
+    def _get_bygroup_index(self):
+        '''
+        Return the index of By group tables
+
+        The index is built in a single pass over the keys and is
+        discarded whenever the results are modified.
+
+        Returns
+        -------
+        dict
+            'tables' maps (set, name) tuples to lists of (position, key)
+            tuples.  'values' contains a dict for each By variable that
+            maps both its raw and formatted values to sets of keys, or
+            is None if some values can not be indexed.  'positions' maps
+            keys to their positions.  'byvars' contains the By variable
+            names.
+
+        '''
+        index = getattr(self, '_bygroup_index', None)
+        if index is not None:
+            return index
+
+        index = dict(tables={}, values=None, positions={}, byvars=None)
+        complete = True
+
+        for pos, (key, value) in enumerate(six.iteritems(self)):
+            if not isinstance(key, six.string_types):
+                continue
+
+            match = _BYGROUP_KEY_RE.match(key)
+            if not match:
+                continue
+
+            byset, name = match.group(1), match.group(2)
+            index['tables'].setdefault((byset, name), []).append((pos, key))
+
+            if byset is not None or not isinstance(value, SASDataFrame):
+                continue
+
+            attrs = value.attrs
+            if index['byvars'] is None:
+                byvars = []
+                while 'ByVar%d' % (len(byvars) + 1) in attrs:
+                    byvars.append(attrs['ByVar%d' % (len(byvars) + 1)])
+                index['byvars'] = byvars
+                index['values'] = [{} for x in byvars]
+
+            try:
+                values = [(attrs['ByVar%dValue' % (i + 1)],
+                           attrs['ByVar%dValueFormatted' % (i + 1)])
+                          for i in range(len(index['byvars']))]
+                for lookup, (raw, fmt) in zip(index['values'], values):
+                    lookup.setdefault(raw, set()).add(key)
+                    lookup.setdefault(fmt, set()).add(key)
+            except (KeyError, TypeError):
+                complete = False
+                continue
+
+            index['positions'][key] = pos
+
+        # Leave By groups with values that can't be indexed to the full search
+        if not complete:
+            index['values'] = None
+
+        self._bygroup_index = index
+
+        return index
+
     def get_set(self, num):
         '''
         Return a :class:`CASResults` object of the By group set
@@ -401,6 +640,51 @@ class CASResults(RendererMixin, OrderedDict):
 
         raise IndexError('No By group set matched the given index.')
 
+    def _find_bygroup_keys(self, name, kwargs):
+        '''
+        Return the keys of the By group tables matching the given values
+
+        Each value is matched against the raw and formatted values of
+        its By variable using the By group index.
+
+        Parameters
+        ----------
+        name : tuple
+            The values of the By variables, in order
+        kwargs : dict
+            The values of the By variables, by name
+
+        Returns
+        -------
+        list of strings
+            The keys of the matching tables in result order.  The list is
+            empty if the values can not be looked up in the index.
+
+        '''
+        index = self._get_bygroup_index()
+        if not index['byvars'] or index['values'] is None:
+            return []
+
+        if kwargs:
+            try:
+                values = tuple(kwargs[x] for x in index['byvars'])
+            except KeyError:
+                return []
+        elif len(name) == len(index['byvars']):
+            values = name
+        else:
+            return []
+
+        keys = None
+        try:
+            for lookup, value in zip(index['values'], values):
+                found = lookup.get(value, ())
+                keys = set(found) if keys is None else keys.intersection(found)
+        except TypeError:
+            return []
+
+        return sorted(keys or [], key=index['positions'].get)
+
     def get_group(_self_, *name, **kwargs):
         '''
         Return a :class:`CASResults` object of the specified By group tables
@@ -449,6 +733,14 @@ class CASResults(RendererMixin, OrderedDict):
 
         out = CASResults()
 
+        # Look up the tables that match the raw or formatted value of
+        # each By variable first
+        keys = self._find_bygroup_keys(name, kwargs)
+        if keys:
+            for key in keys:
+                out[re.sub(r'^ByGroup\d+\.', '', key)] = self[key]
+            return out
+
         bykey = []
 
         def set_bykey(attrs):
@@ -541,11 +833,11 @@ class CASResults(RendererMixin, OrderedDict):
             raise ValueError('Multiple By group sets exist, but no set '
                              'index was specified.')
 
-        out = []
-        by_re = re.compile(r'^(ByGroupSet%s\.)?ByGroup\d+\.%s$' % (set, re.escape(name)))
-        for key, value in six.iteritems(self):
-            if by_re.match(key):
-                out.append(value)
+        tables = self._get_bygroup_index()['tables']
+        keys = list(tables.get((None, name), []))
+        if set is not None:
+            keys = sorted(keys + tables.get(('%s' % set, name), []))
+        out = [self[key] for pos, key in keys]
 
         if concat and out:
             if isinstance(out[0], SASDataFrame):
@@ -557,7 +849,12 @@ class CASResults(RendererMixin, OrderedDict):
                     attrs.pop('ByVar%dValue' % i, None)
                     attrs.pop('ByVar%dValueFormatted' % i, None)
                     i = i + 1
-                return SASDataFrame(pd.concat(out, **kwargs), name=out[0].name,
+                data = None
+                if not kwargs:
+                    data = concat_bygroups(out)
+                if data is None:
+                    data = pd.concat(out, **kwargs)
+                return SASDataFrame(data, name=out[0].name,
                                     label=out[0].label, title=out[0].title,
                                     formatter=out[0].formatter,
                                     attrs=attrs, colinfo=out[0].colinfo.copy())
@@ -0,0 +1,609 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Client-side storage and export of CAS tables that are larger than memory
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import datetime
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import six
+from six.moves import queue
+from ..config import get_option
+from ..exceptions import SWATError
+from ..utils.compat import OrderedDict
+
+FORMATS = ['parquet', 'npy-memmap', 'arrow-ipc']
+
+# Export methods that can be written a chunk at a time
+STREAMING_METHODS = ['csv', 'hdf', 'sql', 'json', 'parquet']
+
+
+def _import_pyarrow(fmt):
+    ''' Import pyarrow or raise an error that names the format '''
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise SWATError('The pyarrow package is required for the %s format' % fmt)
+    return pyarrow
+
+
+class _ArrowWriter(object):
+    ''' Write DataFrame chunks to a Parquet or Arrow IPC file '''
+
+    def __init__(self, path, fmt, preserve_index=False, **kwargs):
+        self.path = path
+        self.format = fmt
+        self.preserve_index = preserve_index
+        self.options = kwargs
+        self._pa = _import_pyarrow(fmt)
+        self._schema = None
+        self._writer = None
+
+    def write(self, chunk):
+        ''' Append a DataFrame to the file '''
+        pa = self._pa
+        table = pa.Table.from_pandas(chunk, schema=self._schema,
+                                     preserve_index=self.preserve_index)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.format == 'parquet':
+                self._writer = pa.parquet.ParquetWriter(self.path, self._schema,
+                                                        **self.options)
+            else:
+                self._writer = pa.ipc.new_file(self.path, self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        ''' Finish the file '''
+        if self._writer is not None:
+            self._writer.close()
+
+    def abort(self):
+        ''' Remove a partially written file '''
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _to_storage(values, dtype):
+    ''' Convert a Series to an array of the given storage dtype '''
+    missing = values.isnull().values
+    if dtype.kind in 'US':
+        out = values.astype(object).values.copy()
+        out[missing] = dtype.kind == 'U' and '' or b''
+        return out
+    if dtype.kind == 'm':
+        if values.dtype.kind == 'm':
+            return values.values
+        return pd.to_timedelta([np.nan if isnull else
+                                ((x.hour * 60 + x.minute) * 60 + x.second) * 1000000 +
+                                x.microsecond
+                                for x, isnull in zip(values, missing)],
+                               unit='us').values
+    if dtype.kind == 'M':
+        return pd.to_datetime(values).values
+    return values.values
+
+
+class _NumpyWriter(object):
+    '''
+    Write DataFrame chunks to a directory of ``.npy`` files, one per column
+
+    Character columns are stored as fixed-width strings, date, time, and
+    datetime columns as ``datetime64[ns]`` (times as ``timedelta64[ns]``
+    since midnight), and missing values as empty strings or NaT.
+
+    Parameters
+    ----------
+    path : string
+        The output directory
+    nrows : int
+        The total number of rows
+    widths : dict
+        The maximum length of each character column
+    types : dict, optional
+        The CAS data type of each column
+
+    '''
+
+    def __init__(self, path, nrows, widths, types=None):
+        self.path = path
+        self.nrows = nrows
+        self.widths = widths
+        self.types = types or {}
+        self._arrays = None
+        self._columns = None
+        self._start = 0
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _get_dtype(self, col, values):
+        ''' Return the dtype used to store a column '''
+        ctype = (self.types.get(col) or '').lower()
+        width = max(self.widths.get(col, 1), 1)
+        if ctype in ('char', 'varchar'):
+            return np.dtype('U%d' % width)
+        if ctype in ('binary', 'varbinary'):
+            return np.dtype('S%d' % width)
+        if ctype == 'time':
+            return np.dtype('m8[ns]')
+        if ctype in ('date', 'datetime'):
+            return np.dtype('M8[ns]')
+        if values.dtype.kind in 'mM':
+            return values.dtype
+        if values.dtype.kind not in 'OSU':
+            return values.dtype
+
+        # Object columns of unknown type are typed by their first value
+        first = values.dropna()
+        first = first.iloc[0] if len(first) else None
+        if isinstance(first, six.string_types):
+            return np.dtype('U%d' % width)
+        if isinstance(first, bytes):
+            return np.dtype('S%d' % width)
+        if isinstance(first, datetime.time):
+            return np.dtype('m8[ns]')
+        return np.dtype('M8[ns]')
+
+    def _create(self, chunk):
+        ''' Allocate the column files using the dtypes of the first chunk '''
+        self._columns = list(chunk.columns)
+        self._arrays = []
+        dtypes = []
+        for i, col in enumerate(self._columns):
+            dtype = self._get_dtype(col, chunk[col])
+            self._arrays.append(np.lib.format.open_memmap(
+                os.path.join(self.path, '%d.npy' % i), mode='w+',
+                dtype=dtype, shape=(self.nrows,)))
+            dtypes.append(dtype.str)
+        with io.open(os.path.join(self.path, 'metadata.json'), 'w',
+                     encoding='utf-8') as outfile:
+            outfile.write(json.dumps(dict(format='npy-memmap', nrows=self.nrows,
+                                          columns=self._columns, dtypes=dtypes)))
+
+    def write(self, chunk):
+        ''' Copy a DataFrame into the next rows of the column files '''
+        if self._arrays is None:
+            self._create(chunk)
+        stop = self._start + len(chunk)
+        if stop > self.nrows:
+            raise SWATError('The table has more rows than expected; '
+                            'it may have been modified while it was written')
+        for col, arr in zip(self._columns, self._arrays):
+            arr[self._start:stop] = _to_storage(chunk[col], arr.dtype)
+        self._start = stop
+
+    def close(self):
+        ''' Flush the column files '''
+        if self._arrays is None:
+            self._create(pd.DataFrame())
+        if self._start != self.nrows:
+            raise SWATError('The table has fewer rows than expected; '
+                            'it may have been modified while it was written')
+        for arr in self._arrays:
+            arr.flush()
+        self._arrays = None
+
+    def abort(self):
+        ''' Remove the partially written directory '''
+        self._arrays = None
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _fetch_chunks(table, chunksize, start, stop, kwargs):
+    ''' Fetch rows `start` to `stop` in chunks of `chunksize` rows '''
+    # Sort a sorted table once rather than on every fetch
+    ordered = None
+    if table._sortby and 'sortby' not in kwargs and \
+            (stop is None or stop - start >= chunksize):
+        ordered = table._sorted_copy()
+    if ordered is not None:
+        table = ordered
+
+    try:
+        first = True
+        while stop is None or start <= stop:
+            end = start + chunksize - 1
+            if stop is not None:
+                end = min(end, stop)
+            chunk = table._fetch(from_=start, to=end, **kwargs)
+            if not len(chunk):
+                # An empty first chunk still carries the column names
+                if first:
+                    yield chunk
+                break
+            first = False
+            yield chunk
+            start += len(chunk)
+
+    finally:
+        if ordered is not None:
+            ordered._retrieve('table.droptable')
+
+
+def iter_chunks(table, chunksize=None, start=1, stop=None, prefetch=True, **kwargs):
+    '''
+    Yield the rows of a table as a series of DataFrames
+
+    Parameters
+    ----------
+    table : :class:`CASTable`
+        The table to fetch
+    chunksize : int, optional
+        The number of rows in each DataFrame.  The default is the value
+        of ``cas.dataset.max_rows_fetched``.
+    start : int, optional
+        The one-based index of the first row
+    stop : int, optional
+        The one-based index of the last row.  The default is the last
+        row of the table.
+    prefetch : boolean, optional
+        If True, the next chunk is fetched in a background thread while
+        the current chunk is being used.  The connection of `table`
+        must not be used by the caller until the iteration finishes.
+    **kwargs : keyword arguments, optional
+        Additional keyword parameters to the ``table.fetch`` CAS action
+
+    Notes
+    -----
+    If `table` is sorted (see :meth:`CASTable.sort_values`), it is sorted
+    once into a temporary table which is fetched in order and dropped
+    when the iteration ends.
+
+    Returns
+    -------
+    generator of :class:`SASDataFrame` objects
+
+    '''
+    if chunksize is None:
+        chunksize = get_option('cas.dataset.max_rows_fetched')
+    if chunksize < 1:
+        raise ValueError('chunksize must be at least one')
+
+    chunks = _fetch_chunks(table, chunksize, start, stop, kwargs)
+
+    if not prefetch:
+        try:
+            for chunk in chunks:
+                yield chunk
+        finally:
+            chunks.close()
+        return
+
+    # Holds at most one fetched chunk that is waiting to be used
+    pending = queue.Queue(maxsize=1)
+    done = threading.Event()
+
+    def put(item):
+        ''' Queue an item unless the consumer has stopped '''
+        while not done.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        ''' Fetch chunks in the background '''
+        try:
+            for chunk in chunks:
+                if not put((chunk, None)):
+                    return
+            put((None, None))
+        except Exception:
+            put((None, sys.exc_info()[1]))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            chunk, error = pending.get()
+            if error is not None:
+                raise error
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        done.set()
+        thread.join()
+        chunks.close()
+
+
+def can_stream(method, args, kwargs):
+    '''
+    Can the given export method be written a chunk at a time?
+
+    Only exports to files or databases can be streamed.  JSON output
+    must use ``orient='records'`` and ``lines=True``.
+
+    '''
+    if method not in STREAMING_METHODS:
+        return False
+    if method == 'json':
+        return bool(kwargs.get('lines')) and kwargs.get('orient') == 'records' and \
+            bool(args or kwargs.get('path_or_buf'))
+    if method == 'sql':
+        return len(args) + len([x for x in ['name', 'con'] if x in kwargs]) >= 2
+    if method == 'parquet':
+        return bool(args or kwargs.get('path') or kwargs.get('fname'))
+    return bool(args or kwargs.get('path_or_buf'))
+
+
+def export_table(table, method, args, kwargs, chunksize=None, start=1, stop=None):
+    '''
+    Export a table a chunk at a time using a :class:`pandas.DataFrame` writer
+
+    Each chunk is written while the next one is fetched.  The first
+    chunk creates the output, and the rest are appended to it.
+
+    Parameters
+    ----------
+    table : :class:`CASTable`
+        The table to export
+    method : string
+        The export method: 'csv', 'hdf', 'sql', 'json', or 'parquet'
+    args : tuple
+        Positional arguments to the DataFrame method
+    kwargs : dict
+        Keyword arguments to the DataFrame method
+    chunksize : int, optional
+        The number of rows to fetch and write at a time
+    start, stop : int, optional
+        The one-based indexes of the first and last rows to export
+
+    '''
+    args = list(args)
+    kwargs = dict(kwargs)
+
+    if method == 'hdf':
+        # Strings longer than those of the first chunk must fit in later ones
+        info = table._columninfo
+        widths = dict((col, width) for col, width, ctype in
+                      zip(info['Column'], info['RawLength'], info['Type'])
+                      if 'char' in ctype.lower())
+        kwargs['format'] = 'table'
+        kwargs.setdefault('min_itemsize', widths)
+
+    chunks = iter_chunks(table, chunksize=chunksize, start=start, stop=stop)
+
+    if method == 'parquet':
+        path = args and args.pop(0) or kwargs.pop('path', kwargs.pop('fname', None))
+        kwargs.pop('engine', None)
+        writer = _ArrowWriter(path, 'parquet',
+                              preserve_index=kwargs.pop('index', None), **kwargs)
+        try:
+            for chunk in chunks:
+                writer.write(pd.DataFrame(chunk))
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+        return
+
+    if method == 'json':
+        path = args and args.pop(0) or kwargs.pop('path_or_buf')
+        if isinstance(path, six.string_types):
+            with io.open(path, 'w', encoding='utf-8') as outfile:
+                _write_json_lines(outfile, chunks, args, kwargs)
+        else:
+            _write_json_lines(path, chunks, args, kwargs)
+        return
+
+    for i, chunk in enumerate(chunks):
+        chunk = pd.DataFrame(chunk)
+        if i == 1:
+            # Append the remaining chunks to the output of the first
+            if method == 'csv':
+                kwargs['header'] = False
+                kwargs['mode'] = 'a'
+            elif method == 'hdf':
+                kwargs['append'] = True
+            elif method == 'sql':
+                kwargs['if_exists'] = 'append'
+        getattr(chunk, 'to_' + method)(*args, **kwargs)
+
+
+def _write_json_lines(outfile, chunks, args, kwargs):
+    ''' Write chunks to a file as JSON records, one per line '''
+    for chunk in chunks:
+        if len(chunk):
+            text = pd.DataFrame(chunk).to_json(*args, **kwargs)
+            outfile.write(six.text_type(text.rstrip('\n') + '\n'))
+
+
+def write_table(table, path, format='parquet', chunksize=None, **kwargs):
+    '''
+    Fetch a CAS table in chunks and write it to a client-side file
+
+    See :meth:`CASTable.to_disk` for the parameter descriptions.
+
+    Returns
+    -------
+    :class:`CASDiskTable`
+
+    '''
+    if format not in FORMATS:
+        raise ValueError('Unrecognized format: %s; valid formats are %s' %
+                         (format, ', '.join(FORMATS)))
+
+    if chunksize is not None and chunksize < 1:
+        raise ValueError('chunksize must be at least one')
+
+    if format == 'npy-memmap':
+        info = table._columninfo
+        widths = dict(zip(info['Column'], info['RawLength']))
+        types = dict(zip(info['Column'], info['Type']))
+        writer = _NumpyWriter(path, table._numrows, widths, types=types)
+    else:
+        writer = _ArrowWriter(path, format)
+
+    kwargs['index'] = False
+    try:
+        for chunk in iter_chunks(table, chunksize=chunksize, **kwargs):
+            writer.write(pd.DataFrame(chunk))
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+
+    return CASDiskTable(path)
+
+
+class CASDiskTable(object):
+    '''
+    Handle to a CAS table written to disk by :meth:`CASTable.to_disk`
+
+    The data is not loaded until it is requested.  Columns of
+    ``npy-memmap`` and ``arrow-ipc`` files are memory-mapped, so only
+    the parts that are used are read from disk.
+
+    Parameters
+    ----------
+    path : string
+        The Parquet or Arrow IPC file, or the ``npy-memmap`` directory
+
+    Attributes
+    ----------
+    format : string
+        'parquet', 'npy-memmap', or 'arrow-ipc'
+    columns : list of strings
+        The column names
+    nrows : int
+        The number of rows
+
+    Examples
+    --------
+    >>> data = tbl.to_disk('cars.parquet')
+    >>> data['MSRP'].mean()
+    >>> for chunk in data.iter_frames():
+    ...     print(len(chunk))
+
+    Returns
+    -------
+    :class:`CASDiskTable` object
+
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._arrow = None
+        if os.path.isdir(path):
+            with io.open(os.path.join(path, 'metadata.json'),
+                         encoding='utf-8') as infile:
+                meta = json.loads(infile.read())
+            self.format = meta['format']
+            self.columns = meta['columns']
+            self.nrows = meta['nrows']
+        else:
+            pa = _import_pyarrow('parquet or arrow-ipc')
+            try:
+                self._arrow = pa.ipc.open_file(pa.memory_map(path, 'r'))
+                self.format = 'arrow-ipc'
+                schema = self._arrow.schema
+                self.nrows = sum(self._arrow.get_batch(i).num_rows
+                                 for i in range(self._arrow.num_record_batches))
+            except pa.ArrowInvalid:
+                self._arrow = pa.parquet.ParquetFile(path, memory_map=True)
+                self.format = 'parquet'
+                schema = self._arrow.schema_arrow
+                self.nrows = self._arrow.metadata.num_rows
+            self.columns = list(schema.names)
+
+    def __getitem__(self, column):
+        '''
+        Return the values of a column as a 1-D array
+
+        For ``npy-memmap`` files, the array is a :class:`numpy.memmap`.
+
+        '''
+        if column not in self.columns:
+            raise KeyError(column)
+        if self.format == 'npy-memmap':
+            return np.load(os.path.join(self.path,
+                                        '%d.npy' % self.columns.index(column)),
+                           mmap_mode='r')
+        return self.to_frame(columns=[column])[column].values
+
+    def to_frame(self, columns=None):
+        '''
+        Load the data into a DataFrame
+
+        Parameters
+        ----------
+        columns : list of strings, optional
+            The columns to load.  The default is all columns.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+
+        '''
+        if columns is None:
+            columns = list(self.columns)
+        if self.format == 'npy-memmap':
+            return pd.DataFrame(OrderedDict((x, self[x]) for x in columns),
+                                columns=columns)
+        if self.format == 'parquet':
+            return self._arrow.read(columns=columns).to_pandas()
+        return self._arrow.read_all().select(columns).to_pandas()
+
+    def iter_frames(self):
+        '''
+        Yield the data as a series of DataFrames
+
+        The DataFrames correspond to the chunks written by
+        :meth:`CASTable.to_disk`, so only one chunk is in memory at a time.
+
+        Returns
+        -------
+        generator of :class:`pandas.DataFrame` objects
+
+        '''
+        if self.format == 'parquet':
+            for i in range(self._arrow.num_row_groups):
+                yield self._arrow.read_row_group(i).to_pandas()
+        elif self.format == 'arrow-ipc':
+            for i in range(self._arrow.num_record_batches):
+                yield self._arrow.get_batch(i).to_pandas()
+        else:
+            arrays = [self[x] for x in self.columns]
+            step = 65536
+            for start in range(0, self.nrows, step):
+                yield pd.DataFrame(OrderedDict(
+                    (x, np.array(y[start:start + step]))
+                    for x, y in zip(self.columns, arrays)), columns=self.columns)
+
+    def __repr__(self):
+        return 'CASDiskTable(%r, format=%r, nrows=%d, columns=%d)' % (
+            self.path, self.format, self.nrows, len(self.columns))
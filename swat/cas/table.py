@@ -27,17 +27,20 @@ import copy
 import keyword
 import re
 import sys
+import time
 import uuid
 import weakref
 import numpy as np
 import pandas as pd
 import six
+from . import replica
+from .utils.compute import compile_computed_columns
 from .utils.params import ParamManager, ActionParamManager
 from ..config import get_option
 from ..exceptions import SWATError
 from ..utils import dict2kwargs, getattr_safe_property
 from ..utils.compat import (int_types, binary_types, text_types, items_types,
-                            patch_pandas_sort, char_types, num_types)
+                            patch_pandas_sort, char_types, num_types, OrderedDict)
 from ..utils.keyword import dekeywordify
 
 # pylint: disable=W0212, W0221, W0613, R0904, C0330
@@ -648,10 +651,62 @@ class CASTableLabelLocationAccessor(CASTableAnyLocationAccessor):
     accessor = 'loc'
 
 
+def _bin_expr(column, edges):
+    '''
+    Return Data step expressions that compute the bin index of a value
+
+    Parameters
+    ----------
+    column : string
+        The name of the column to bin
+    edges : 1-D array
+        The bin edges.  The last bin includes its upper edge.
+
+    Returns
+    -------
+    (condition, index)
+        The condition that is true when the value falls in a bin, and
+        the expression that computes the zero-based bin index
+
+    '''
+    name = _nlit(column)
+    nbins = len(edges) - 1
+    cond = '%s >= %r and %s <= %r' % (name, float(edges[0]), name, float(edges[-1]))
+    width = np.diff(edges)
+    if np.allclose(width, width[0]):
+        index = 'min(floor((%s - %r) / %r), %d)' % (name, float(edges[0]),
+                                                    float(width[0]), nbins - 1)
+    else:
+        index = ' + '.join(['(%s >= %r)' % (name, float(x)) for x in edges[1:-1]])
+        index = index or '0'
+    return cond, index
+
+
+def _bin_edges(lower, upper, bins):
+    '''
+    Return `bins` equal-width bin edges spanning `lower` to `upper`
+
+    As in :func:`numpy.histogram`, an empty range is widened by 0.5
+    on each side.
+
+    '''
+    if lower == upper:
+        lower, upper = lower - 0.5, upper + 0.5
+    return np.linspace(lower, upper, bins + 1)
+
+
 class CASTablePlotter(object):
     '''
     Plotting class for CASTable
 
+    By default, the plotting methods fetch the rows of the table (or a
+    sample of them) and plot them using :meth:`pandas.DataFrame.plot`.
+    If the ``cas.table.aggregate_plots`` option is enabled, or the
+    ``aggregate=True`` argument is used, the :meth:`box`, :meth:`density`,
+    :meth:`hexbin`, :meth:`hist`, and :meth:`kde` methods compute
+    their statistics from all of the rows on the server instead, and only
+    the aggregated values are transferred to the client.
+
     Parameters
     ----------
     table : CASTable object
@@ -666,6 +721,283 @@ class CASTablePlotter(object):
     def __init__(self, table):
         self._table = table
 
+    def _use_aggregates(self, kwargs, by=None):
+        '''
+        Remove the `aggregate` argument and return whether it applies
+
+        Aggregated plots are not used for By groups.
+
+        '''
+        aggregate = kwargs.pop('aggregate', None)
+        if aggregate is None:
+            aggregate = get_option('cas.table.aggregate_plots')
+        if not aggregate:
+            return False
+        return by is None and not self._table.has_groupby_vars()
+
+    def _get_summary(self, columns=None):
+        '''
+        Return the summary statistics of the numeric columns
+
+        '''
+        tbl = self._table
+        if columns is not None:
+            tbl = tbl.copy()
+            tbl.params['vars'] = list(columns)
+        out = tbl._summary(subset=['N', 'MIN', 'MAX', 'STD'])
+        if not len(out.columns):
+            raise SWATError('The table does not contain any numeric columns')
+        return out
+
+    def _get_bin_counts(self, bins):
+        '''
+        Count the rows in each bin on the server
+
+        Parameters
+        ----------
+        bins : list of (condition, index, nbins) tuples
+            The Data step expressions from :func:`_bin_expr` and the
+            number of bins of each binned variable
+
+        Returns
+        -------
+        list of 1-D arrays
+            The number of rows in each bin
+
+        '''
+        tbl = self._table.copy()
+        tbl.params.pop('vars', None)
+
+        names = []
+        code = []
+        for i, (cond, index, _) in enumerate(bins):
+            names.append('_PY_BIN%d_' % i)
+            code.append('if %s then %s = %s; else %s = .; ' %
+                        (cond, names[-1], index, names[-1]))
+        tbl.append_computed_columns(names, code)
+
+        freq = tbl._retrieve('simple.freq', inputs=names,
+                             includemissing=False).get_tables('Frequency')
+
+        counts = [np.zeros(x[-1]) for x in bins]
+        lookup = dict((x.upper(), i) for i, x in enumerate(names))
+        for table in freq:
+            for column, level, count in zip(table['Column'], table['NumVar'],
+                                            table['Frequency']):
+                counts[lookup[column.upper()]][int(level)] += count
+        return counts
+
+    def _get_axes(self, kwargs):
+        '''
+        Remove the figure arguments and return the axes to plot on
+
+        '''
+        import matplotlib.pyplot as plt
+        ax = kwargs.pop('ax', None)
+        figsize = kwargs.pop('figsize', None)
+        title = kwargs.pop('title', None)
+        if ax is None:
+            ax = plt.figure(figsize=figsize).add_subplot(111)
+        if title is not None:
+            ax.set_title(title)
+        return ax
+
+    def _get_hist_data(self, bins=10, range=None):
+        '''
+        Return histogram bin edges and counts computed on the server
+
+        Parameters
+        ----------
+        bins : int or sequence, optional
+            The number of equal-width bins, or the bin edges
+        range : tuple, optional
+            The lower and upper range of the bins.  The default is the
+            range of all of the numeric columns.
+
+        Returns
+        -------
+        (edges, :class:`pandas.DataFrame`)
+            The bin edges, and the count of each bin by column
+
+        '''
+        summ = self._get_summary()
+        if isinstance(bins, int_types):
+            if range is None:
+                range = (summ.loc['min'].min(), summ.loc['max'].max())
+            edges = _bin_edges(range[0], range[1], bins)
+        else:
+            edges = np.asarray(bins, dtype='float64')
+        nbins = len(edges) - 1
+        counts = self._get_bin_counts([_bin_expr(x, edges) + (nbins,)
+                                       for x in summ.columns])
+        return edges, pd.DataFrame(dict(zip(summ.columns, counts)),
+                                   columns=summ.columns)
+
+    def _get_box_data(self, whis=1.5):
+        '''
+        Return box plot statistics computed on the server
+
+        The quartiles and whisker ends are computed from all rows.  The
+        outliers are fetched, up to ``cas.dataset.max_rows_fetched`` rows.
+
+        Parameters
+        ----------
+        whis : float, optional
+            The reach of the whiskers as a multiple of the interquartile range
+
+        Returns
+        -------
+        list of dicts
+            Statistics in the form used by :meth:`matplotlib.axes.Axes.bxp`
+
+        '''
+        columns = list(self._get_summary().columns)
+
+        tbl = self._table.copy()
+        tbl.params['vars'] = columns
+        pctl = tbl._percentiles([25, 50, 75], format_labels=False)
+
+        # Whisker ends are the most extreme values within the fences
+        tbl = self._table.copy()
+        tbl.params.pop('vars', None)
+        names = []
+        code = []
+        fences = {}
+        for i, col in enumerate(columns):
+            q1, q3 = float(pctl.loc[0.25, col]), float(pctl.loc[0.75, col])
+            fences[col] = (q1 - whis * (q3 - q1), q3 + whis * (q3 - q1))
+            names.append('_PY_WHIS%d_' % i)
+            code.append('if %r <= %s <= %r then %s = %s; else %s = .; ' %
+                        (fences[col][0], _nlit(col), fences[col][1],
+                         names[-1], _nlit(col), names[-1]))
+        tbl.append_computed_columns(names, code)
+        whiskers = tbl._summary(inputs=names, subset=['MIN', 'MAX'])
+        whiskers.columns = columns
+
+        # Fetch the outliers
+        tbl = self._table.copy()
+        tbl.params.pop('vars', None)
+        tbl.append_where(' or '.join(['(%s < %r and %s ^= .) or %s > %r' %
+                                      (_nlit(x), float(whiskers.loc['min', x]),
+                                       _nlit(x), _nlit(x),
+                                       float(whiskers.loc['max', x]))
+                                      for x in columns]))
+        outliers = tbl._fetch(fetchvars=columns)
+
+        out = []
+        for col in columns:
+            low, high = whiskers.loc['min', col], whiskers.loc['max', col]
+            values = outliers[col].dropna()
+            out.append(dict(label=col, q1=pctl.loc[0.25, col],
+                            med=pctl.loc[0.5, col], q3=pctl.loc[0.75, col],
+                            whislo=low, whishi=high,
+                            fliers=values[(values < low) | (values > high)].values))
+        return out
+
+    def _get_kde_data(self, bw_method=None, ind=None, nbins=512):
+        '''
+        Return kernel density estimates computed from server-side bin counts
+
+        The rows are counted in `nbins` equal-width bins on the server,
+        then Gaussian kernels centered on the bins are evaluated on the
+        client.  The bandwidth rules match :class:`scipy.stats.gaussian_kde`.
+
+        Parameters
+        ----------
+        bw_method : string or float, optional
+            'scott' (the default), 'silverman', or a bandwidth factor
+        ind : int or 1-D array, optional
+            The number of evaluation points (1000 by default) spanning
+            the range of each column plus half of the range on either
+            side, or the evaluation points
+        nbins : int, optional
+            The number of bins used to summarize each column
+
+        Returns
+        -------
+        dict
+            The keys are the column names; the values are (points, density)
+            tuples
+
+        '''
+        summ = self._get_summary()
+        edges = [_bin_edges(summ.loc['min', x], summ.loc['max', x], nbins)
+                 for x in summ.columns]
+        counts = self._get_bin_counts([_bin_expr(x, y) + (nbins,)
+                                       for x, y in zip(summ.columns, edges)])
+
+        out = OrderedDict()
+        for col, edge, count in zip(summ.columns, edges, counts):
+            nobs = count.sum()
+            if bw_method is None or bw_method == 'scott':
+                factor = nobs ** (-1. / 5)
+            elif bw_method == 'silverman':
+                factor = (nobs * 3. / 4) ** (-1. / 5)
+            elif isinstance(bw_method, (int_types, float)):
+                factor = float(bw_method)
+            else:
+                raise SWATError('Unsupported bw_method: %s' % bw_method)
+            bandwidth = (factor * summ.loc['std', col]) or factor
+
+            if ind is None or isinstance(ind, int_types):
+                lower, upper = edge[0], edge[-1]
+                points = np.linspace(lower - 0.5 * (upper - lower),
+                                     upper + 0.5 * (upper - lower),
+                                     1000 if ind is None else ind)
+            else:
+                points = np.asarray(ind, dtype='float64')
+
+            centers = (edge[:-1] + edge[1:]) / 2
+            zscore = (points[:, np.newaxis] - centers[np.newaxis, :]) / bandwidth
+            density = np.exp(-0.5 * zscore ** 2).dot(count)
+            if nobs:
+                density = density / (nobs * bandwidth * np.sqrt(2 * np.pi))
+            out[col] = (points, density)
+        return out
+
+    def _get_hexbin_data(self, x, y, gridsize=100):
+        '''
+        Return two-dimensional bin counts computed on the server
+
+        The rows are counted in a rectangular grid twice as fine as the
+        hexagonal grid, and the bin centers are used as the plot points.
+
+        Parameters
+        ----------
+        x, y : string
+            The column names
+        gridsize : int or (int, int), optional
+            The number of hexagons in the x direction, or in the x and y
+            directions
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            The bin centers in columns `x` and `y`, and the number of rows
+            in column 'count'
+
+        '''
+        if isinstance(gridsize, items_types):
+            nx, ny = gridsize
+        else:
+            nx, ny = gridsize, int(gridsize / np.sqrt(3))
+        nx, ny = 2 * nx, 2 * max(ny, 1)
+
+        summ = self._get_summary(columns=[x, y])
+        xedges = _bin_edges(summ.loc['min', x], summ.loc['max', x], nx)
+        yedges = _bin_edges(summ.loc['min', y], summ.loc['max', y], ny)
+        xcond, xindex = _bin_expr(x, xedges)
+        ycond, yindex = _bin_expr(y, yedges)
+        counts = self._get_bin_counts([('%s and %s' % (xcond, ycond),
+                                        '(%s) * %d + (%s)' % (xindex, ny, yindex),
+                                        nx * ny)])[0]
+
+        bins = np.nonzero(counts)[0]
+        xcenters = (xedges[:-1] + xedges[1:]) / 2
+        ycenters = (yedges[:-1] + yedges[1:]) / 2
+        return pd.DataFrame([xcenters[bins // ny], ycenters[bins % ny], counts[bins]],
+                            index=[x, y, 'count']).T
+
     def _get_fetchvars(self, x=None, y=None, by=None):
         '''
         Return a list of variables needed for the plot
@@ -804,6 +1136,11 @@ class CASTablePlotter(object):
         arguments used in the call to this method are passed to
         the DataFrame's :meth:`plot.box` method.
 
+        If `aggregate` is True, the quartiles and whiskers are computed
+        from all rows on the server, only the outliers are fetched, and
+        the remaining arguments are passed to
+        :meth:`matplotlib.axes.Axes.bxp`.
+
         See Also
         --------
         :meth:`pandas.DataFrame.plot.box`
@@ -813,6 +1150,11 @@ class CASTablePlotter(object):
         :class:`matplotlib.AxesSubplot` or :func:`numpy.array` of them.
 
         '''
+        if self._use_aggregates(kwargs, by=by):
+            stats = self._get_box_data(whis=kwargs.pop('whis', 1.5))
+            ax = self._get_axes(kwargs)
+            ax.bxp(stats, **kwargs)
+            return ax
         params, kwargs = self._get_plot_params(by=by, **kwargs)
         return self._table._fetch(**params).plot(by=by, kind='box', **kwargs)
 
@@ -825,6 +1167,9 @@ class CASTablePlotter(object):
         arguments used in the call to this method are passed to
         the DataFrame's :meth:`plot.density` method.
 
+        If `aggregate` is True, the density is computed from bin counts
+        of all rows computed on the server.  See :meth:`kde`.
+
         See Also
         --------
         :meth:`pandas.DataFrame.plot.density`
@@ -834,6 +1179,8 @@ class CASTablePlotter(object):
         :class:`matplotlib.AxesSubplot` or :func:`numpy.array` of them.
 
         '''
+        if self._use_aggregates(kwargs):
+            return self.kde(aggregate=True, **kwargs)
         params, kwargs = self._get_plot_params(**kwargs)
         return self._table._fetch(**params).plot(kind='density', **kwargs)
 
@@ -847,6 +1194,10 @@ class CASTablePlotter(object):
         arguments used in the call to this method are passed to
         the DataFrame's :meth:`plot.density` method.
 
+        If `aggregate` is True and `C` is not specified, the rows are
+        counted on a fine rectangular grid on the server, and the
+        counts are plotted at the grid centers.
+
         See Also
         --------
         :meth:`pandas.DataFrame.plot.hexbin`
@@ -856,6 +1207,11 @@ class CASTablePlotter(object):
         :class:`matplotlib.AxesSubplot` or :func:`numpy.array` of them.
 
         '''
+        if self._use_aggregates(kwargs) and C is None:
+            gridsize = 100 if gridsize is None else gridsize
+            return self._get_hexbin_data(x, y, gridsize=gridsize)\
+                       .plot(x=x, y=y, C='count', reduce_C_function=np.sum,
+                             gridsize=gridsize, kind='hexbin', **kwargs)
         params, kwargs = self._get_plot_params(x=x, y=y, **kwargs)
         if reduce_C_function is not None:
             kwargs['reduce_C_function'] = reduce_C_function
@@ -873,6 +1229,10 @@ class CASTablePlotter(object):
         arguments used in the call to this method are passed to
         the DataFrame's :meth:`plot.hist` method.
 
+        If `aggregate` is True, the bins of all rows are counted on the
+        server and the remaining arguments are passed to
+        :meth:`matplotlib.axes.Axes.hist`.
+
         See Also
         --------
         :meth:`pandas.DataFrame.plot.hist`
@@ -882,6 +1242,19 @@ class CASTablePlotter(object):
         :class:`matplotlib.AxesSubplot` or :func:`numpy.array` of them.
 
         '''
+        if self._use_aggregates(kwargs, by=by):
+            edges, counts = self._get_hist_data(bins=bins,
+                                                range=kwargs.pop('range', None))
+            legend = kwargs.pop('legend', True)
+            ax = self._get_axes(kwargs)
+            centers = (edges[:-1] + edges[1:]) / 2
+            for col in counts.columns:
+                ax.hist(centers, bins=edges, weights=counts[col].values,
+                        label=col, **kwargs)
+            ax.set_ylabel('Frequency')
+            if legend:
+                ax.legend()
+            return ax
         params, kwargs = self._get_plot_params(by=by, **kwargs)
         return self._table._fetch(**params).plot(by=by, bins=bins,
                                                  kind='hist', **kwargs)
@@ -895,6 +1268,11 @@ class CASTablePlotter(object):
         arguments used in the call to this method are passed to
         the DataFrame's :meth:`plot.kde` method.
 
+        If `aggregate` is True, the rows are counted in fine bins on
+        the server, the density is evaluated from the bin counts, and
+        the remaining arguments are passed to
+        :meth:`matplotlib.axes.Axes.plot`.
+
         See Also
         --------
         :meth:`pandas.DataFrame.plot.kde`
@@ -904,6 +1282,17 @@ class CASTablePlotter(object):
         :class:`matplotlib.AxesSubplot` or :func:`numpy.array` of them.
 
         '''
+        if self._use_aggregates(kwargs):
+            data = self._get_kde_data(bw_method=kwargs.pop('bw_method', None),
+                                      ind=kwargs.pop('ind', None))
+            legend = kwargs.pop('legend', True)
+            ax = self._get_axes(kwargs)
+            for col, (points, density) in data.items():
+                ax.plot(points, density, label=col, **kwargs)
+            ax.set_ylabel('Density')
+            if legend:
+                ax.legend()
+            return ax
         params, kwargs = self._get_plot_params(**kwargs)
         return self._table._fetch(**params).plot(kind='kde', **kwargs)
 
@@ -974,6 +1363,28 @@ class CASTablePlotter(object):
                                                  kind='scatter', **kwargs)
 
 
+class _DataStepPipeline(object):
+    '''
+    Data step code waiting to be applied to a table
+
+    Pipelines are shared by copies of a :class:`CASTable` so that the
+    code is only run once no matter which copy is used first.
+
+    Parameters
+    ----------
+    code : list-of-strings
+        Data step statements
+    parent : :class:`_DataStepPipeline`, optional
+        Pipeline whose statements precede `code`
+
+    '''
+
+    def __init__(self, code, parent=None):
+        self.code = list(parent.code) if parent is not None else []
+        self.code.extend(code)
+        self.output = None
+
+
 @six.python_2_unicode_compatible
 class CASTable(ParamManager, ActionParamManager):
     '''
@@ -1138,6 +1549,7 @@ class CASTable(ParamManager, ActionParamManager):
 
         self._columns = []
         self._sortby = []
+        self._datastep_pipeline = None
 
 #       self._iat = CASTableRowScalarAccessor(self)
 #       self._at = CASTableLabelScalarAccessor(self)
@@ -1633,6 +2045,7 @@ class CASTable(ParamManager, ActionParamManager):
         tbl = type(self)(**self.params)
         tbl._columns = self._columns
         tbl._sortby = self._sortby
+        tbl._datastep_pipeline = self._datastep_pipeline
         try:
             tbl.set_connection(self.get_connection())
         except SWATError:
@@ -1662,9 +2075,11 @@ class CASTable(ParamManager, ActionParamManager):
            Deep copy of `self`
 
         '''
-        tbl = type(self)(**copy.deepcopy(self.params))
+        tbl = type(self)(self.params.get('name'))
+        tbl.params = self.params._share()
         tbl._columns = list(self._columns)
         tbl._sortby = list(self._sortby)
+        tbl._datastep_pipeline = self._datastep_pipeline
         try:
             tbl.set_connection(self.get_connection())
         except SWATError:
@@ -2012,10 +2427,21 @@ class CASTable(ParamManager, ActionParamManager):
             return dict(sortby=self._sortby, sastypes=False)
         return dict(sastypes=False)
 
-    def to_table_params(self):
+    def to_table_params(self, references=None):
         '''
         Create a copy of the table parameters containing only input table parameters
 
+        Computed columns generated by :class:`CASColumn` expressions
+        are compiled at this point.  Common subexpressions are merged,
+        single-use intermediate columns are inlined, and intermediate
+        columns that are not needed by the selected columns are dropped.
+
+        Parameters
+        ----------
+        references : dict, optional
+            The parameters of the action that the table is used in.
+            Intermediate columns referenced by them are kept.
+
         Examples
         --------
         >>> tbl = CASTable('my-table', where='a < 2', replace=True)
@@ -2028,18 +2454,30 @@ class CASTable(ParamManager, ActionParamManager):
            Dictionary with only input table parameters
 
         '''
+        self.compute()
+
         if type(self).table_params:
             out = {}
             for key in self.params.keys():
                 if key.lower() in type(self).table_params:
                     out[key] = copy.deepcopy(self.params[key])
+        else:
+            # This can only happen if the table_params class variable
+            # wasn't populated when the server connection was made,
+            # which should *never* happen.
+            out = copy.deepcopy(self.params)
+
+        try:
+            generated = self.get_connection()._generated_columns
+        except SWATError:
             return out
 
-        # This can only happen if the table_params class variable
-        # wasn't populated when the server connection was made,
-        # which should *never* happen.
-        out = copy.deepcopy(self.params)
-        return out
+        # Intermediate columns used by other parameters must be kept
+        others = [self.params[x] for x in self.params.keys()
+                  if x.lower() not in ['computedvars', 'computedvarsprogram']]
+        return compile_computed_columns(
+            out, self.get_inputs_param(), generated=generated,
+            references=[others, self._sortby, self._action_params, references])
 
     def to_table(self):
         '''
@@ -2134,6 +2572,7 @@ class CASTable(ParamManager, ActionParamManager):
            CASTable name
 
         '''
+        self.compute()
         return self.params['name']
 
     def to_datastep_params(self):
@@ -2145,6 +2584,7 @@ class CASTable(ParamManager, ActionParamManager):
         :class:`CASTable`
 
         '''
+        self.compute()
         return _to_datastep_params(self)
 
     #
@@ -2161,12 +2601,21 @@ class CASTable(ParamManager, ActionParamManager):
     @getattr_safe_property
     def _columninfo(self):
         ''' Return columninfo dataframe '''
+        if self._datastep_pipeline is not None:
+            # Pending Data step code does not change the table columns
+            tbl = self.copy()
+            tbl._datastep_pipeline = None
+            return tbl._columninfo
         return self._retrieve('table.columninfo')['ColumnInfo']
 
     @getattr_safe_property
     def _numrows(self):
         ''' Return number of rows in the table '''
-        return self.copy(exclude='groupby')._retrieve('simple.numrows')['numrows']
+        tbl = self.copy(exclude='groupby')
+        out = replica.numrows(tbl)
+        if out is not None:
+            return out
+        return tbl._retrieve('simple.numrows')['numrows']
 
     def __len__(self):
         return self._numrows
@@ -2775,6 +3224,41 @@ class CASTable(ParamManager, ActionParamManager):
         for col in self.columns:
             yield (col, self._to_column(col))
 
+    def _sorted_copy(self):
+        '''
+        Sort the table once into a temporary table for sequential fetches
+
+        Each ``table.fetch`` with ``sortby=`` sorts the entire table on
+        the server.  When a sorted table is fetched in many chunks, it is
+        much cheaper to create an ordered copy of it with the
+        ``table.partition`` action and fetch the chunks from that.
+
+        Returns
+        -------
+        :class:`CASTable`
+            The ordered table.  The caller must drop it when finished.
+        None
+            If the table isn't sorted, or the sort order can't be expressed
+            as a table ``orderby`` (i.e., descending or formatted keys)
+
+        '''
+        if not self._sortby or self.has_param('groupby'):
+            return None
+
+        for item in self._sortby:
+            if item.get('order', 'ASCENDING').upper() != 'ASCENDING':
+                return None
+            if item.get('formatted', 'RAW').upper() != 'RAW':
+                return None
+
+        tbl = self.copy()
+        tbl._sortby = []
+        tbl.set_param('orderby', [dict(name=x['name']) for x in self._sortby])
+
+        return tbl._retrieve('table.partition',
+                             casout=dict(name=_gen_table_name(),
+                                         replace=True))['casTable']
+
     def _generic_iter(self, name, *args, **kwargs):
         '''
         Generic iterator for various iteration implementations
@@ -2808,35 +3292,48 @@ class CASTable(ParamManager, ActionParamManager):
 
         iterrows = name == 'iterrows' and True or False
 
+        # Sort once instead of on every fetch
+        ordered = None
+        if self._sortby and self._numrows > chunksize:
+            ordered = self._sorted_copy()
+        tbl = self
+        if ordered is not None:
+            tbl = ordered
+
         start = 1
         stop = chunksize
 
         i = 0
-        while True:
-            out = self._fetch(from_=start, to=stop)
+        try:
+            while True:
+                out = tbl._fetch(from_=start, to=stop)
 
-            if not len(out):
-                break
+                if not len(out):
+                    break
 
-            for item in getattr(out, name)(*args, **kwargs):
-                # iterrows
-                if iterrows:
-                    yield (i, item[1])
+                for item in getattr(out, name)(*args, **kwargs):
+                    # iterrows
+                    if iterrows:
+                        yield (i, item[1])
 
-                # itertuples with index
-                elif index:
-                    item = list(item)
-                    item.insert(0, i)
-                    yield tuple(item)
+                    # itertuples with index
+                    elif index:
+                        item = list(item)
+                        item.insert(0, i)
+                        yield tuple(item)
 
-                # everything else
-                else:
-                    yield item
+                    # everything else
+                    else:
+                        yield item
+
+                    i += 1
 
-                i += 1
+                start = stop + 1
+                stop = start + chunksize
 
-            start = stop + 1
-            stop = start + chunksize
+        finally:
+            if ordered is not None:
+                ordered._retrieve('table.droptable')
 
     def iterrows(self, chunksize=None):
         '''
@@ -3205,14 +3702,43 @@ class CASTable(ParamManager, ActionParamManager):
         :class:`CASTable`
 
         '''
-        tbl = self._materialize(prefix='_ABS')
+        lazy = get_option('cas.table.lazy_datastep')
+        tbl = self
+        if lazy:
+            tbl = self._lazy_source(prefix='_ABS')
+
         code = []
         for name, dtype in tbl.dtypes.iteritems():
             if dtype not in ['char', 'varchar', 'binary', 'varbinary',
                              'date', 'time', 'datetime']:
                 code.append('    %s = ABS(%s);' % (_nlit(name), _nlit(name)))
+        if lazy:
+            return tbl._apply_datastep(code)
+        tbl = self._materialize(prefix='_ABS')
         return tbl._apply_datastep(code, inplace=True)
 
+    def _lazy_source(self, prefix=None):
+        '''
+        Return the table that lazy Data step code can be applied to
+
+        Pending Data step code reads the table by name only, so table
+        options such as ``where=``, ``vars=``, and ``computedvars=`` are
+        applied by materializing the table first, as the non-lazy code does.
+
+        Parameters
+        ----------
+        prefix : string, optional
+            A string to use as the materialized table name prefix
+
+        Returns
+        -------
+        :class:`CASTable`
+
+        '''
+        if set(k.lower() for k in self.params.keys()) - set(['name', 'caslib']):
+            return self._materialize(prefix=prefix)
+        return self
+
     def _bool(self):
         '''
         Create boolean mask of table data
@@ -3364,14 +3890,20 @@ class CASTable(ParamManager, ActionParamManager):
         elif upper is not None:
             fmt = '    %%s = CHOOSEN(MISSING(%%s)+1, MIN(%s, %%s), .);' % upper
 
-        tbl = self._materialize(prefix='_CLIP')
+        lazy = get_option('cas.table.lazy_datastep')
+        tbl = self
+        if lazy:
+            tbl = self._lazy_source(prefix='_CLIP')
+
         code = []
         for name, dtype in tbl.dtypes.iteritems():
             if dtype not in ['char', 'varchar', 'binary', 'varbinary',
                              'date', 'time', 'datetime']:
                 code.append(fmt % (_nlit(name), _nlit(name), _nlit(name)))
 
-        print('\n'.join(code))
+        if lazy:
+            return tbl._apply_datastep(code)
+        tbl = self._materialize(prefix='_CLIP')
         return tbl._apply_datastep(code, inplace=True)
 
     def clip_lower(self, threshold, axis=None):
@@ -5200,6 +5732,11 @@ class CASTable(ParamManager, ActionParamManager):
 
         In all cases, the `casout=` parameter takes highest priority.
 
+        If the ``cas.table.lazy_datastep`` option is enabled and no output
+        table is specified, the code is not run immediately.  It is added
+        to the pending code of the returned table and run along with any
+        subsequent code when the table is used.  See :meth:`compute`.
+
         Parameters
         ----------
         code : string or list-of-strings
@@ -5217,6 +5754,41 @@ class CASTable(ParamManager, ActionParamManager):
         -------
         :class:`CASTable` object
 
+        '''
+        if not isinstance(code, items_types):
+            code = [code]
+
+        if get_option('cas.table.lazy_datastep') and not inplace and \
+                casout is None and prefix is None and suffix is None:
+            out = self.copy()
+            out._datastep_pipeline = _DataStepPipeline(code,
+                                                       parent=self._datastep_pipeline)
+            return out
+
+        # Combine pending code with this code rather than running it separately
+        pipeline = self._datastep_pipeline
+        if pipeline is not None and pipeline.output is None and not inplace:
+            tbl = self.copy()
+            tbl._datastep_pipeline = None
+            return tbl._run_datastep(pipeline.code + list(code), casout=casout,
+                                     prefix=prefix, suffix=suffix)
+
+        self.compute()
+
+        return self._run_datastep(code, inplace=inplace, casout=casout,
+                                  prefix=prefix, suffix=suffix)
+
+    def _run_datastep(self, code, inplace=False, casout=None,
+                      prefix=None, suffix=None):
+        '''
+        Run the given data step code against the table
+
+        See :meth:`_apply_datastep` for a description of the parameters.
+
+        Returns
+        -------
+        :class:`CASTable` object
+
         '''
         if casout is None:
             casout = {}
@@ -5228,6 +5800,9 @@ class CASTable(ParamManager, ActionParamManager):
         else:
             caslib = self.getsessopt('caslib').caslib
 
+        # The source table is read from its own caslib
+        source_caslib = self.params.get('caslib', caslib)
+
         if casout.get('name'):
             newname = casout['name']
         elif inplace:
@@ -5240,7 +5815,7 @@ class CASTable(ParamManager, ActionParamManager):
         dscode = []
         dscode.append('data %s(caslib=%s);' % (_quote(newname), _quote(caslib)))
         dscode.append('    set %s(caslib=%s);' % (_quote(self.params.name),
-                                                  _quote(caslib)))
+                                                  _quote(source_caslib)))
         if isinstance(code, items_types):
             dscode.extend(code)
         else:
@@ -5265,6 +5840,110 @@ class CASTable(ParamManager, ActionParamManager):
 
         return out
 
+    def compute(self):
+        '''
+        Run any pending Data step code
+
+        When the ``cas.table.lazy_datastep`` option is enabled, methods
+        such as :meth:`fillna`, :meth:`replace` and :meth:`dropna` record
+        their Data step code rather than running it.  This method runs
+        all of the pending code as a single Data step and points the
+        table at the output.  It is called automatically when the table
+        is used as an action parameter (including fetches).
+
+        Examples
+        --------
+        >>> swat.options.cas.table.lazy_datastep = True
+        >>> tbl = conn.CASTable('my-table')
+        >>> tbl2 = tbl.fillna(0).replace({'a': {1: 100}}).dropna()
+        >>> tbl2.compute()
+        CASTable('_PY_T_...', caslib='CASUSER(username)')
+
+        Returns
+        -------
+        :class:`CASTable` object
+            `self`
+
+        '''
+        pipeline = self._datastep_pipeline
+        if pipeline is None:
+            return self
+
+        if pipeline.output is None:
+            tbl = self.copy()
+            tbl._datastep_pipeline = None
+            tbl = tbl._run_datastep(pipeline.code)
+            pipeline.output = (tbl.params['name'], tbl.params['caslib'])
+
+        self._datastep_pipeline = None
+        self.params['name'], self.params['caslib'] = pipeline.output
+
+        return self
+
+    def cache_local(self, refresh=False):
+        '''
+        Copy the table to the client to answer requests locally
+
+        All rows of the table are fetched once.  Later fetches (including
+        :meth:`head`, :meth:`query`, :meth:`nlargest`, and computed
+        columns), row counts, and value counts of any :class:`CASTable`
+        referring to the same table are computed from the copy when that
+        is expected to be faster than a round trip to the server.
+
+        The copy is only used for requests that give the same results
+        as the server: where clauses and computed columns that use only
+        arithmetic, comparison, and logical operators.  Requests that use
+        functions, formats, By groups, or sampling go to the server.
+        Whether the table has changed is checked after any action that
+        updates server state, and every ``cas.table.replica_check_interval``
+        seconds.  If it has changed, the copy is discarded.
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            Copy the table again even if it is already cached
+
+        Examples
+        --------
+        >>> tbl = conn.CASTable('cars').cache_local()
+        >>> tbl.query('MSRP > 50000').head()
+
+        See Also
+        --------
+        :meth:`uncache_local`
+
+        Returns
+        -------
+        :class:`CASTable` object
+            `self`
+
+        '''
+        cache = self.get_connection()._replica_cache
+        key = cache.get_key(self)
+        if refresh or key is None or cache.get(key) is None:
+            replica.replicate(self)
+        return self
+
+    def uncache_local(self):
+        '''
+        Remove the local copy of the table
+
+        See Also
+        --------
+        :meth:`cache_local`
+
+        Returns
+        -------
+        :class:`CASTable` object
+            `self`
+
+        '''
+        cache = self.get_connection()._replica_cache
+        key = cache.get_key(self)
+        if key is not None:
+            cache.pop(key)
+        return self
+
     # Reshaping, sorting, transposing
 
 #   def pivot(self, *args, **kwargs):
@@ -5571,22 +6250,33 @@ class CASTable(ParamManager, ActionParamManager):
         elif 'fetchvars' in kwargs:
             columns = kwargs['fetchvars']
 
-        tbl = self._sample(sample_pct=sample_pct, sample_seed=sample_seed,
-                           stratify_by=stratify_by, columns=columns)
-
-        # Sort based on 'Fetch#' key.  This will be out of order in REST.
-        values = [x[1] for x in sorted(tbl._retrieve('table.fetch', **kwargs).items(),
-                                       key=lambda x: int(x[0].replace('Fetch', '') or
-                                                         '0'))]
-        out = df.concat(values)
-
-        if tbl is not self:
-            tbl._retrieve('table.droptable')
+        out = None
+        if sample_pct is None:
+            out = replica.fetch(self, **kwargs)
 
-        if len(out.columns) and out.columns[0] == '_Index_':
-            out['_Index_'] = out['_Index_'] - 1
-            out = out.set_index('_Index_')
-            out.index.name = None
+        if out is None:
+            tbl, cached = self._cached_sample(sample_pct=sample_pct,
+                                              sample_seed=sample_seed,
+                                              stratify_by=stratify_by,
+                                              columns=columns)
+
+            # Sort based on 'Fetch#' key.  This will be out of order in REST.
+            start = time.time()
+            values = [x[1] for x in
+                      sorted(tbl._retrieve('table.fetch', **kwargs).items(),
+                             key=lambda x: int(x[0].replace('Fetch', '') or '0'))]
+            out = df.concat(values)
+
+            if tbl is self:
+                replica.record_fetch(self, time.time() - start,
+                                     out.shape[0] * out.shape[1])
+            elif not cached:
+                tbl._retrieve('table.droptable')
+
+            if len(out.columns) and out.columns[0] == '_Index_':
+                out['_Index_'] = out['_Index_'] - 1
+                out = out.set_index('_Index_')
+                out.index.name = None
 
         if grouped and groups:
             return out.groupby(groups)
@@ -5638,6 +6328,42 @@ class CASTable(ParamManager, ActionParamManager):
 
         return out
 
+    def _cached_sample(self, sample_pct=None, sample_seed=None, stratify_by=None,
+                       columns=None):
+        '''
+        Return a sample of the rows, reusing a cached sample table if possible
+
+        Returns
+        -------
+        (:class:`CASTable`, bool)
+            The sample table and a flag indicating whether the table
+            belongs to the sample cache (and must not be dropped)
+
+        '''
+        if sample_pct is None or not get_option('cas.table.cache_samples'):
+            return self._sample(sample_pct=sample_pct, sample_seed=sample_seed,
+                                stratify_by=stratify_by, columns=columns), False
+
+        conn = self.get_connection()
+        cache = conn._sample_cache
+
+        key = cache.get_key(self, sample_pct, sample_seed=sample_seed,
+                            stratify_by=stratify_by, columns=columns)
+        if key is None:
+            return self._sample(sample_pct=sample_pct, sample_seed=sample_seed,
+                                stratify_by=stratify_by, columns=columns), False
+
+        out = cache.get(key)
+        if out is not None:
+            return out, True
+
+        with cache.busy:
+            out = self._sample(sample_pct=sample_pct, sample_seed=sample_seed,
+                               stratify_by=stratify_by, columns=columns)
+
+        conn._drop_sample_tables(cache.put(key, out))
+        return out, True
+
     def _fetchall(self, grouped=False, sample_pct=None, sample_seed=None,
                   sample=False, stratify_by=None, **kwargs):
         ''' Fetch all rows '''
@@ -6006,6 +6732,45 @@ class CASTable(ParamManager, ActionParamManager):
         return self._fetchall(sample_pct=sample_pct, sample_seed=sample_seed,
                               sample=sample, stratify_by=stratify_by, **kwargs)
 
+    def to_disk(self, path, format='parquet', chunksize=None, **kwargs):
+        '''
+        Fetch the table in chunks and write it to a client-side columnar file
+
+        Unlike :meth:`to_frame`, only one chunk of rows is held in memory
+        at a time, so this can be used for tables that are larger than
+        the memory of the client.
+
+        Parameters
+        ----------
+        path : string
+            The output file name, or directory name for 'npy-memmap'
+        format : string, optional
+            The output format:
+                parquet : Parquet file (requires pyarrow)
+                npy-memmap : Directory of ``.npy`` files, one per column,
+                             that can be opened as memory-mapped arrays.
+                             Character columns are stored as fixed-width
+                             strings of the column's length.
+                arrow-ipc : Arrow IPC file (requires pyarrow)
+        chunksize : int, optional
+            The number of rows to fetch at a time.  The default is the
+            value of ``cas.dataset.max_rows_fetched``.
+        **kwargs : keyword arguments, optional
+            Additional keyword parameters to the ``table.fetch`` CAS action.
+
+        Examples
+        --------
+        >>> data = tbl.to_disk('extract', format='npy-memmap', chunksize=500000)
+        >>> data['MSRP'].mean()
+
+        Returns
+        -------
+        :class:`CASDiskTable`
+
+        '''
+        from .storage import write_table
+        return write_table(self, path, format=format, chunksize=chunksize, **kwargs)
+
     def _to_any(self, method, *args, **kwargs):
         '''
         Generic converter to various output types
@@ -6030,6 +6795,17 @@ class CASTable(ParamManager, ActionParamManager):
         params['from'] = kwargs.pop('from', kwargs.pop('from_', None))
         params = {k: v for k, v in params.items() if v is not None}
         standard_dataframe = kwargs.pop('standard_dataframe', False)
+
+        chunksize = kwargs.pop('chunksize', None)
+        if chunksize is not None:
+            from .storage import can_stream, export_table
+            if not set(params).difference(['from', 'to']) and \
+                    can_stream(method, args, kwargs):
+                return export_table(self, method, args, kwargs, chunksize=chunksize,
+                                    start=params.get('from', 1),
+                                    stop=params.get('to'))
+            kwargs['chunksize'] = chunksize
+
         dframe = self._fetch(**params)
         if standard_dataframe:
             dframe = pd.DataFrame(dframe)
@@ -6090,6 +6866,11 @@ class CASTable(ParamManager, ActionParamManager):
         If you want to save a file on the server side, use the
         ``table.save`` CAS action.
 
+        If `chunksize` is specified, all rows of the table (or the rows
+        selected by `from` and `to`) are fetched and written in chunks
+        of that many rows, so the table is never held in memory at once.
+        Each chunk is written while the next one is fetched.
+
         Parameters
         ----------
         *args : positional arguments
@@ -6113,6 +6894,13 @@ class CASTable(ParamManager, ActionParamManager):
         If you want to save a file on the server side, use the
         ``table.save`` CAS action.
 
+        If `chunksize` is specified, all rows of the table (or the rows
+        selected by `from` and `to`) are fetched and written in chunks
+        of that many rows, so the table is never held in memory at once.
+        Each chunk is written while the next one is fetched.  The output
+        is always written in HDF5 ``table`` format so that the chunks can
+        be appended.
+
         Parameters
         ----------
         *args : positional arguments
@@ -6136,6 +6924,11 @@ class CASTable(ParamManager, ActionParamManager):
         If you want to save a file on the server side, use the
         ``table.save`` CAS action.
 
+        If `chunksize` is specified, all rows of the table (or the rows
+        selected by `from` and `to`) are fetched and written in chunks
+        of that many rows, so the table is never held in memory at once.
+        Each chunk is written while the next one is fetched.
+
         Parameters
         ----------
         *args : positional arguments
@@ -6150,6 +6943,35 @@ class CASTable(ParamManager, ActionParamManager):
         '''
         return self._to_any('sql', *args, **kwargs)
 
+    def to_parquet(self, *args, **kwargs):
+        '''
+        Write CAS table data to a Parquet file
+
+        This method writes a file on the **client side**.  This means
+        that **all of the data in the table must all be fetched**.
+        If you want to save a file on the server side, use the
+        ``table.save`` CAS action.
+
+        If `chunksize` is specified, all rows of the table (or the rows
+        selected by `from` and `to`) are fetched and written in chunks
+        of that many rows, so the table is never held in memory at once.
+        Each chunk is written while the next one is fetched, as a row
+        group.  This requires pyarrow.
+
+        Parameters
+        ----------
+        *args : positional arguments
+            Positional arguments to :meth:`pandas.DataFrame.to_parquet`
+        **kwargs : keyword arguments
+            Keyword arguments to :meth:`pandas.DataFrame.to_parquet`
+
+        See Also
+        --------
+        :meth:`pandas.DataFrame.to_parquet`
+
+        '''
+        return self._to_any('parquet', standard_dataframe=True, *args, **kwargs)
+
     def to_dict(self, *args, **kwargs):
         '''
         Convert CAS table data to a Python dictionary
@@ -6209,6 +7031,12 @@ class CASTable(ParamManager, ActionParamManager):
         If you want to save a file on the server side, use the
         ``table.save`` CAS action.
 
+        If `chunksize` is specified, all rows of the table (or the rows
+        selected by `from` and `to`) are fetched and written in chunks
+        of that many rows, so the table is never held in memory at once.
+        Each chunk is written while the next one is fetched.  This
+        requires ``orient='records'``, ``lines=True``, and an output file.
+
         Parameters
         ----------
         *args : positional arguments
@@ -8389,6 +9217,7 @@ class CASColumn(CASTable):
         out = self.copy()
 
         outname = '_%s_%s_' % (funcname, self.get_connection()._gen_id())
+        self.get_connection()._generated_columns.add(outname)
 
         out._columns = [outname]
         if outname in self.get_param('computedvars', []):
@@ -8929,6 +9758,10 @@ class CASColumn(CASTable):
         Series
 
         '''
+        out = replica.frequencies(self, includemissing=includemissing)
+        if out is not None:
+            return out
+
         bygroup_columns = 'raw'
         out = self._retrieve('simple.freq', inputs=self._columns,
                              includemissing=includemissing).get_tables('Frequency')
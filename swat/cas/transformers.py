@@ -30,6 +30,7 @@ import numpy as np
 import pandas as pd
 import re
 import six
+from . import profiling
 from .utils import datetime as casdt
 from .. import clib
 from ..utils.compat import (a2u, a2n, int32, int64, float64, text_types,
@@ -135,6 +136,50 @@ def _caslist2py(_sw_value, soptions, echk, connection=None):
         return output
 
 
+def _apply_string_storage(cdf, columns, storage):
+    '''
+    Convert character columns to the requested storage
+
+    Character columns are initially stored as Python string objects.
+    Dictionary-encoded categoricals store each unique value once, which
+    is much more compact for low cardinality columns.
+
+    Parameters
+    ----------
+    cdf : SASDataFrame
+       The table containing the character columns
+    columns : list of strings
+       The names of the character columns
+    storage : string
+       The value of the cas.dataset.string_storage option
+
+    Returns
+    -------
+    SASDataFrame
+
+    '''
+    if storage == 'object' or not len(cdf):
+        return cdf
+
+    if storage == 'arrow':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            warnings.warn('The pyarrow package is required to use Arrow '
+                          'string storage', RuntimeWarning)
+            return cdf
+        for col in columns:
+            cdf[col] = cdf[col].astype('string[pyarrow]')
+        return cdf
+
+    for col in columns:
+        if storage == 'auto' and cdf[col].nunique(dropna=False) * 2 > len(cdf):
+            continue
+        cdf[col] = cdf[col].astype('category')
+
+    return cdf
+
+
 def ctb2tabular(_sw_table, soptions='', connection=None):
     '''
     Convert SWIG table to a tabular structure based on cas.dataset.format option
@@ -162,6 +207,17 @@ def ctb2tabular(_sw_table, soptions='', connection=None):
        A tuple of tuples of the data values only
 
     '''
+    perf = profiling.current()
+    if perf is not None:
+        start = profiling.clock()
+        out = _ctb2tabular(_sw_table, soptions=soptions, connection=connection)
+        perf.add('ctb2tabular', start)
+        return out
+    return _ctb2tabular(_sw_table, soptions=soptions, connection=connection)
+
+
+def _ctb2tabular(_sw_table, soptions='', connection=None):
+    ''' Convert SWIG table to a tabular structure '''
     tformat = get_option('cas.dataset.format')
     needattrs = (tformat == 'dataframe:sas')
 
@@ -255,6 +311,7 @@ def ctb2tabular(_sw_table, soptions='', connection=None):
     mimetypes = {}
     dates = []
     datetimes = []
+    strings = []
     intmiss = {}
     for i in range(ncolumns):
         col = SASColumnSpec.fromtable(_sw_table, i)
@@ -283,8 +340,9 @@ def ctb2tabular(_sw_table, soptions='', connection=None):
                 elif date_regex.match(col.format):
                     dates.append(col.name)
         elif dtype in set(['char', 'varchar']):
-            dtypes.append((col.name, '|U%d' % (col.width or 1)))
+            dtypes.append((col.name, 'O'))
             colinfo[col.name] = col
+            strings.append(col.name)
         elif dtype == 'int32':
             dtypes.append((col.name, 'i4'))
             colinfo[col.name] = col
@@ -365,6 +423,11 @@ def ctb2tabular(_sw_table, soptions='', connection=None):
                     continue
                 cdf[key] = cdf[key].map(lambda x: Image.open(BytesIO(x)))
 
+    # Apply character column storage
+    if strings:
+        cdf = _apply_string_storage(cdf, strings,
+                                    get_option('cas.dataset.string_storage'))
+
     # Apply date / datetime transformations
     for item in dates:
         cdf[item] = cdf[item].apply(casdt.sas2python_date)
@@ -376,10 +439,15 @@ def ctb2tabular(_sw_table, soptions='', connection=None):
     optbyidx = get_option('cas.dataset.bygroup_as_index')
     optbysfx = get_option('cas.dataset.bygroup_formatted_suffix')
     optbycolsfx = get_option('cas.dataset.bygroup_collision_suffix')
+    perf = profiling.current()
+    if perf is not None:
+        start = profiling.clock()
     cdf = cdf.reshape_bygroups(bygroup_columns=optbycol,
                                bygroup_as_index=optbyidx,
                                bygroup_formatted_suffix=optbysfx,
                                bygroup_collision_suffix=optbycolsfx)
+    if perf is not None:
+        perf.add('reshape_bygroups', start)
 
     # Add an index as needed
     index = get_option('cas.dataset.index_name')
@@ -480,6 +548,28 @@ def cas2py(_sw_value, soptions, connection=None):
 #                            _sw_value)](_sw_value, soptions, errorcheck, connection)
 
 
+_PY2CAS_TYPES = (dict_types, binary_types, text_types, bool, blob, int64_types,
+                 int32_types, float64_types, items_types, ParamManager,
+                 datetime.datetime, datetime.date, datetime.time, type(nil))
+
+
+def supported_items(params):
+    '''
+    Return the items of a dictionary whose values can be converted to CAS values
+
+    Parameters
+    ----------
+    params : dict
+       The parameters
+
+    Returns
+    -------
+    list of (key, value) tuples
+
+    '''
+    return [(k, v) for k, v in six.iteritems(params) if isinstance(v, _PY2CAS_TYPES)]
+
+
 def py2cas(soptions, _sw_error, **kwargs):
     '''
     Convert Python arguments to a CASValueList
@@ -499,23 +589,31 @@ def py2cas(soptions, _sw_error, **kwargs):
        CASValueList representation of Python object
 
     '''
+    # Unsupported values are skipped while the list is built, so the
+    # parameters are only walked once and are not modified
+    return py2cas_items(soptions, _sw_error, supported_items(kwargs))
+
+
+def py2cas_items(soptions, _sw_error, items):
+    '''
+    Convert a list of Python parameters to a CASValueList
+
+    Parameters
+    ---------
+    soptions : string
+       soptions of connection object
+    _sw_error : SWIG CASError object
+       Object to use for returned error messages
+    items : list of (key, value) tuples
+       The parameters returned by :func:`supported_items`
+
+    Returns
+    -------
+    CASValueList
+       CASValueList representation of Python object
 
-    def remove_unsupported(params):
-        ''' Remove any unsupported parameter types '''
-        for key in list(params.keys()):
-            if isinstance(params[key], dict_types):
-                remove_unsupported(params[key])
-            elif not isinstance(params[key], (binary_types, text_types, bool,
-                                              blob, int64_types, int32_types,
-                                              float64_types, items_types, ParamManager,
-                                              datetime.datetime, datetime.date,
-                                              datetime.time, type(nil))):
-                del params[key]
-
-    # In-place operation
-    remove_unsupported(kwargs)
-
-    _sw_values = errorcheck(clib.SW_CASValueList(len(kwargs), a2n(soptions),
+    '''
+    _sw_values = errorcheck(clib.SW_CASValueList(len(items), a2n(soptions),
                                                  _sw_error), _sw_error)
 
     def set_list_value(_sw_values, i, key, item):
@@ -581,11 +679,13 @@ def py2cas(soptions, _sw_error, **kwargs):
             i = i + 1
         elif isinstance(item, (dict_types, ParamManager)):
             if isinstance(item, ParamManager):
-                item = item.to_params()
+                subitems = list(six.iteritems(item.to_params()))
+            else:
+                subitems = supported_items(item)
             _sw_sublist = errorcheck(_sw_values.createListAt(
-                                     i, key, len(item)), _sw_values)
+                                     i, key, len(subitems)), _sw_values)
             j = 0
-            for k, v in six.iteritems(item):
+            for k, v in subitems:
                 if isinstance(k, (text_types, binary_types)):
                     j = set_list_value(_sw_sublist, j, k, v)
                 else:
@@ -607,7 +707,7 @@ def py2cas(soptions, _sw_error, **kwargs):
         return i
 
     i = 0
-    for skey, svalue in six.iteritems(kwargs):
+    for skey, svalue in items:
         i = set_list_value(_sw_values, i, skey, svalue)
 
     return _sw_values
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Compiler for computed column programs
+
+CASColumn expressions record each intermediate result as a generated
+computed variable (e.g., ``_add_1A_``) with its own statement in the
+computedvarsprogram= table parameter.  The functions in this module
+treat those statements as an expression graph and compile it down to
+a minimal program before the table is sent to the server.
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import re
+import six
+from ...utils.compat import text_types
+
+# Form of the names generated by CASColumn._compute: _<funcname>_<base36 id>_.
+# This is only used to find names in code; whether a name was actually
+# generated is checked against the names given to compile_computed_columns.
+TEMP_NAME = r'_[a-z0-9_]+_[0-9A-Z]+_'
+
+_TOKEN_RE = re.compile(r'("(?:[^"]|"")*"n?|\'(?:[^\']|\'\')*\'n?)|\b(%s)\b' % TEMP_NAME)
+_ASSIGN_RE = re.compile(r'^\s*(%s)\s*=(?!=)\s*(.*?)\s*$' % TEMP_NAME, re.S)
+_LENGTH_RE = re.compile(r'^\s*length\s+(%s)\s+(.*?)\s*$' % TEMP_NAME, re.S | re.I)
+_VOLATILE_RE = re.compile(r'\b(?:ran[a-z]*|uniform|normal|rand|datetime|time|today)\s*\(',
+                          re.I)
+
+
+def _split_statements(code):
+    ''' Split a program into statements on semi-colons outside of quotes '''
+    out = []
+    current = []
+    for part in re.split(r'("(?:[^"]|"")*"|\'(?:[^\']|\'\')*\')', code):
+        if part.startswith('"') or part.startswith("'"):
+            current.append(part)
+            continue
+        pieces = part.split(';')
+        current.append(pieces[0])
+        for piece in pieces[1:]:
+            out.append(''.join(current))
+            current = [piece]
+    out.append(''.join(current))
+    return [x.strip() for x in out if x.strip()]
+
+
+def _temp_names(code):
+    ''' Return generated variable names referenced in `code` '''
+    return [m.group(2) for m in _TOKEN_RE.finditer(code) if m.group(2)]
+
+
+def _substitute(code, mapping):
+    ''' Replace generated variable names in `code` using `mapping` '''
+    if not mapping:
+        return code
+
+    def replace(match):
+        name = match.group(2)
+        if name and name in mapping:
+            return mapping[name]
+        return match.group(0)
+
+    return _TOKEN_RE.sub(replace, code)
+
+
+def _collect_references(value, refs):
+    ''' Add generated variable names used in parameter `value` to `refs` '''
+    if isinstance(value, text_types):
+        refs.update(_temp_names(value))
+    elif isinstance(value, dict):
+        for item in six.itervalues(value):
+            _collect_references(item, refs)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            _collect_references(item, refs)
+
+
+def _parse_program(program, temps):
+    '''
+    Split a program into statements that define generated variables and others
+
+    Returns
+    -------
+    (statements, assigned, pinned)
+        `statements` is a list of (kind, name, text) tuples where kind is
+        'assign', 'length', or 'other'.  `assigned` maps each generated
+        variable to its expression.  `pinned` is the set of generated
+        variables that can not be merged or removed.
+
+    '''
+    statements = []
+    assigned = {}
+    pinned = set()
+    for stmt in _split_statements(program):
+        match = _ASSIGN_RE.match(stmt)
+        if match and match.group(1) in temps:
+            name = match.group(1)
+            if name in assigned:
+                pinned.add(name)
+            assigned[name] = match.group(2)
+            statements.append(('assign', name, match.group(2)))
+            continue
+        match = _LENGTH_RE.match(stmt)
+        if match and match.group(1) in temps:
+            statements.append(('length', match.group(1), stmt))
+            continue
+        pinned.update(_temp_names(stmt))
+        statements.append(('other', None, stmt))
+    return statements, assigned, pinned
+
+
+def _is_ordered(statements, assigned):
+    ''' Are all generated variables defined before they are used? '''
+    seen = set()
+    for kind, name, expr in statements:
+        if kind == 'assign':
+            if any(x in assigned and x not in seen for x in _temp_names(expr)):
+                return False
+            seen.add(name)
+    return True
+
+
+def _merge_expressions(statements, pinned, roots):
+    '''
+    Merge generated variables that have identical expressions
+
+    Returns
+    -------
+    (exprs, alias)
+        `exprs` maps each generated variable to its expression, with
+        merged variables substituted.  `alias` maps each merged variable
+        to the variable that replaces it.
+
+    '''
+    lengths = {}
+    for kind, name, stmt in statements:
+        if kind == 'length':
+            lengths[name] = re.sub(r'\s+', ' ', stmt.split(None, 2)[-1]).lower()
+
+    alias = {}
+    exprs = {}
+    canonical = {}
+    for kind, name, expr in statements:
+        if kind != 'assign' or name in exprs:
+            continue
+        expr = _substitute(expr, alias)
+        exprs[name] = expr
+        if name in pinned or _VOLATILE_RE.search(expr):
+            continue
+        key = (re.sub(r'\s+', ' ', expr), lengths.get(name))
+        if key in canonical and name not in roots:
+            alias[name] = canonical[key]
+        else:
+            canonical.setdefault(key, name)
+    return exprs, alias
+
+
+def _find_live(exprs, alias, roots):
+    '''
+    Find the generated variables needed by the roots
+
+    Returns
+    -------
+    (live, inlined)
+        The variables that are needed, and the subset of those that are
+        used by exactly one other variable and can be inlined into it
+
+    '''
+    deps = {name: [x for x in _temp_names(expr) if x in exprs]
+            for name, expr in six.iteritems(exprs) if name not in alias}
+    live = set()
+    stack = [x for x in roots if x in deps]
+    while stack:
+        name = stack.pop()
+        if name in live:
+            continue
+        live.add(name)
+        stack.extend(deps[name])
+
+    uses = {}
+    for name in live:
+        for dep in deps[name]:
+            uses[dep] = uses.get(dep, 0) + 1
+
+    inlined = set(x for x in live if x not in roots and uses.get(x, 0) == 1)
+    return live, inlined
+
+
+def _generate(statements, exprs, alias, live, inlined):
+    ''' Return the compiled program '''
+    code = []
+    replacements = {}
+    for kind, name, stmt in statements:
+        if kind == 'other':
+            code.append('%s; ' % stmt)
+        elif name not in live or name in inlined:
+            if kind == 'assign' and name in inlined and name not in replacements:
+                replacements[name] = '(%s)' % _substitute(exprs[name], replacements)
+        elif kind == 'length':
+            code.append('%s; ' % stmt)
+        elif kind == 'assign':
+            stmt = _substitute(_substitute(stmt, alias), replacements)
+            code.append('%s = %s; ' % (name, stmt))
+    return ''.join(code)
+
+
+def compile_computed_columns(params, outputs=None, generated=None, references=None):
+    '''
+    Compile the computed columns of a table parameter dictionary
+
+    The statements that define generated computed variables are
+    compiled as an expression graph.  Identical subexpressions are
+    merged, temporaries used by only one other expression are inlined
+    into it, and temporaries that are not needed for any output are
+    removed.  Statements that are not simple assignments to generated
+    variables are passed through as-is.
+
+    Parameters
+    ----------
+    params : dict
+        Table parameters containing computedvars= and computedvarsprogram=.
+        This dictionary is modified in place.
+    outputs : list-of-strings, optional
+        The columns requested from the table.  If not specified, all
+        computed variables are considered to be visible outputs.
+    generated : set-of-strings, optional
+        The names of the computed variables generated by
+        :class:`CASColumn` expressions.  Only these variables are
+        compiled; other computed variables are left as they are.
+    references : any, optional
+        Other parameters, such as action parameters, whose references
+        to generated variables must be kept
+
+    Returns
+    -------
+    dict
+        The `params` dictionary
+
+    '''
+    keys = {k.lower(): k for k in params.keys()}
+    varskey = keys.get('computedvars')
+    pgmkey = keys.get('computedvarsprogram')
+    if varskey is None or pgmkey is None:
+        return params
+
+    computedvars = params[varskey]
+    program = params[pgmkey]
+    if isinstance(computedvars, text_types):
+        computedvars = [computedvars]
+    if not isinstance(computedvars, (list, tuple)) or \
+            not isinstance(program, text_types):
+        return params
+
+    if not outputs or not generated:
+        return params
+
+    compvars = set(x for x in computedvars if isinstance(x, text_types))
+    temps = compvars.intersection(generated)
+    if not temps:
+        return params
+
+    statements, assigned, pinned = _parse_program(program, temps)
+
+    # Definitions must precede uses for the program to be compiled
+    if not _is_ordered(statements, assigned):
+        return params
+
+    # Variables that must remain in the output table
+    roots = set(pinned)
+    roots.update(x for x in outputs if x in compvars)
+    roots.update(compvars.difference(temps))
+    refs = set()
+    for key, value in six.iteritems(params):
+        if key not in (varskey, pgmkey):
+            _collect_references(value, refs)
+    _collect_references(references, refs)
+    roots.update(refs)
+
+    exprs, alias = _merge_expressions(statements, pinned, roots)
+    live, inlined = _find_live(exprs, alias, roots)
+
+    removed = temps.difference(live).union(inlined)
+    if not removed and not alias:
+        return params
+
+    params[varskey] = [x for x in computedvars if x not in removed]
+    params[pgmkey] = _generate(statements, exprs, alias, live, inlined)
+
+    return params
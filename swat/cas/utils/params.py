@@ -23,7 +23,6 @@ Parameter utilities for interfacing with CAS
 
 from __future__ import print_function, division, absolute_import, unicode_literals
 
-import copy
 import json
 import six
 from ...utils.compat import int_types
@@ -86,6 +85,50 @@ def table(name, **kwargs):
     return out
 
 
+# Substrings of parameter names whose values are never written to logs
+SENSITIVE_PARAMS = ['password', 'passwd', 'pwd', 'secret', 'token',
+                    'credential', 'authinfo']
+
+
+def redact_params(params, max_length=None):
+    '''
+    Hide sensitive values in action parameters before they are logged
+
+    Parameters
+    ----------
+    params : dict or list
+        Action parameters that have been normalized for serialization
+    max_length : int, optional
+        Strings longer than this are truncated
+
+    Returns
+    -------
+    dict or list
+        A copy of `params` in which the values of parameters whose names
+        contain any of the strings in :data:`SENSITIVE_PARAMS` are
+        replaced by asterisks
+
+    '''
+    if isinstance(params, dict):
+        out = {}
+        for key, value in six.iteritems(params):
+            name = ('%s' % key).lower()
+            if [x for x in SENSITIVE_PARAMS if x in name]:
+                out[key] = '********'
+            else:
+                out[key] = redact_params(value, max_length=max_length)
+        return out
+
+    if isinstance(params, (list, tuple)):
+        return [redact_params(x, max_length=max_length) for x in params]
+
+    if max_length is not None and isinstance(params, six.string_types) and \
+            len(params) > max_length:
+        return '%s... (%d characters)' % (params[:max_length], len(params))
+
+    return params
+
+
 #
 # Parameter Manager classes
 #
@@ -148,7 +191,7 @@ class ParamManager(object):
         self.set_params(*args, **kwargs)
 
     def __enter__(self):
-        self._contexts.append(copy.deepcopy(self.params))
+        self._contexts.append(self.params._share())
         return self
 
     def __exit__(self, type, value, traceback):
@@ -175,7 +218,9 @@ class ParamManager(object):
         if isinstance(val, dict):
             if len(val) and all(isinstance(key, int_types) for key in val.keys()):
                 return [self._cast_value(val[k]) for k in sorted(six.iterkeys(val))]
-            return {k: self._cast_value(v) for k, v in six.iteritems(val)}
+            # Read the values directly; they are copied here, so values
+            # shared with copies of the parameters don't need to be
+            return {k: self._cast_value(v) for k, v in dict.items(val)}
 
         if isinstance(val, list):
             return [self._cast_value(x) for x in val]
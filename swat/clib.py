@@ -33,6 +33,9 @@ from .exceptions import SWATError
 
 _pyswat = None
 
+# TK path to initialize when the C extension is imported
+_tkpath = None
+
 
 def _import_pyswat():
     ''' Import version-specific _pyswat package '''
@@ -86,6 +89,28 @@ def _import_pyswat():
                           'subsystem. You can try using the REST interface '
                           'as an alternative.') % libname)
 
+    if _tkpath is not None:
+        _pyswat.InitializeTK(_tkpath)
+
+
+def set_tkpath(path):
+    '''
+    Set the SAS TK path
+
+    TK is not initialized until the C extension is imported, so setting
+    the path does not load the binary protocol support.
+
+    Parameters
+    ----------
+    path : string
+        The SAS TK path
+
+    '''
+    global _tkpath
+    _tkpath = path
+    if _pyswat is not None:
+        _pyswat.InitializeTK(path)
+
 
 def SW_CASConnection(*args, **kwargs):
     ''' Return a CASConnection (importing _pyswat as needed) '''
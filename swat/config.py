@@ -24,7 +24,7 @@ Initialization of SWAT options
 from __future__ import print_function, division, absolute_import, unicode_literals
 
 import functools
-from .clib import InitializeTK
+from . import clib
 from .utils.config import (register_option, check_boolean, check_int, get_option,
                            set_option, reset_option, describe_option, check_url,
                            SWATOptionError, check_string, options, get_suboptions,
@@ -41,7 +41,7 @@ def set_tkpath(val):
     if val is None:
         return
     path = check_string(val)
-    InitializeTK(a2n(path, 'utf-8'))
+    clib.set_tkpath(a2n(path, 'utf-8'))
     return path
 
 
@@ -68,7 +68,8 @@ register_option('tkpath', 'string', set_tkpath, _initialize_tkpath(),
                 'Displays the path for SAS TK components.  This is determined\n' +
                 'when SWAT is imported.  By default, it points to the platform\n' +
                 'directory under the swat.lib module.  It can be overridden by\n' +
-                'setting a TKPATH environment variable.')
+                'setting a TKPATH environment variable.  TK is initialized\n' +
+                'when the binary protocol is first used.')
 
 #
 # General options
@@ -104,6 +105,34 @@ register_option('cas.trace_ui_actions', 'boolean', check_boolean, False,
                 'actions invoked by the interface itself. should be printed.\n' +
                 'This option is only honored if cas.trace_actions is also enabled.')
 
+register_option('cas.rest.record_file', 'string', check_string, '',
+                'File to append raw REST responses to, along with the action\n' +
+                'names and parameters.  The file can be replayed without a\n' +
+                'server using protocol="replay".  Passwords and other credentials\n' +
+                'are masked, but other parameter values and the data in the\n' +
+                'responses are recorded as they are.  Recording is disabled\n' +
+                'when this is empty.')
+
+register_option('cas.rest.lazy_results', 'boolean', check_boolean, False,
+                'If True, nested lists and dictionaries in action results\n' +
+                'are converted to Python objects when they are first accessed\n' +
+                'rather than when the response is received.  This is faster\n' +
+                'for large results where only a few items are used.  The\n' +
+                'to_dict and to_list methods of these objects return standard\n' +
+                'dictionaries and lists.  This option is only used by the\n' +
+                'REST interface.')
+
+register_option('cas.client_performance', 'boolean', check_boolean, False,
+                'If True, the client-side time spent in each phase of an action\n' +
+                'call (parameter preparation, serialization, network, parsing,\n' +
+                'and conversion) is recorded in the client_performance attribute\n' +
+                'of the CASResults object.')
+
+register_option('cas.fanout_sessions', 'int',
+                functools.partial(check_int, minimum=1), 4,
+                'Maximum number of sessions used to run actions concurrently\n' +
+                'by CAS.submit, and the default number used by CAS.map.')
+
 register_option('cas.hostname', 'string', check_string,
                 'localhost',
                 'Specifies the hostname for the CAS server.',
@@ -115,11 +144,14 @@ register_option('cas.port', 'int', check_int, 0,
 
 register_option('cas.protocol', 'string',
                 functools.partial(check_string,
-                                  valid_values=['auto', 'cas', 'http', 'https']),
+                                  valid_values=['auto', 'cas', 'http', 'https',
+                                                'replay']),
                 'auto',
                 'Communication protocol for talking to CAS server.\n' +
                 'The value of "auto" will try to auto-detect the type.\n' +
-                'Using "http" or "https" will use the REST interface.',
+                'Using "http" or "https" will use the REST interface.\n' +
+                'Using "replay" will serve responses from a file recorded\n' +
+                'using the cas.rest.record_file option.',
                 environ='CASPROTOCOL')
 
 
@@ -239,6 +271,135 @@ register_option('cas.dataset.max_rows_fetched', 'int', check_int, 10000,
                 'the table.fetch action in the background (i.e. the head, tail,\n' +
                 'values, etc. of CASTable).')
 
+register_option('cas.dataset.read_chunksize', 'int',
+                functools.partial(check_int, minimum=0), 100000,
+                'The number of rows read at a time by the CAS.read_* methods\n' +
+                'and the file-based data message handlers.  Each chunk is\n' +
+                'uploaded before the next is read, so the whole file is never\n' +
+                'held in memory.  Column types are taken from the first chunk\n' +
+                'when there is more than one.  A value of zero reads the entire\n' +
+                'file at once.')
+
+register_option('cas.dataset.string_storage', 'string',
+                functools.partial(check_string,
+                                  valid_values=['object', 'category', 'auto',
+                                                'arrow']),
+                'object',
+                'Storage used for character columns in fetched tables.\n' +
+                'The possible values of this option are:\n' +
+                '    object : Python string objects\n' +
+                '    category : Dictionary-encoded pandas categoricals\n' +
+                '    auto : Categoricals for columns where the number of unique\n' +
+                '           values is at most half the number of rows, Python\n' +
+                '           string objects otherwise\n' +
+                '    arrow : Arrow string arrays (requires pyarrow)')
+
+register_option('cas.table.lazy_datastep', 'boolean', check_boolean, False,
+                'If True, CASTable methods that are implemented using Data step\n' +
+                'code (e.g., fillna, replace, dropna, abs, clip) do not run\n' +
+                'immediately.  Consecutive calls are combined into a single Data\n' +
+                'step that is run when the table is used in an action, fetched,\n' +
+                'or when CASTable.compute() is called.')
+
+register_option('cas.table.cache_samples', 'boolean', check_boolean, False,
+                'If True, the sample tables created by sampled fetches (e.g.,\n' +
+                'plotting methods and to_frame(sample_pct=...)) are kept on the\n' +
+                'server and reused by later fetches of the same table with the\n' +
+                'same sampling parameters.  Only samples with a sample_seed= are\n' +
+                'reused.  The tables are dropped when an action\n' +
+                'reports that it updated server state and when the connection\n' +
+                'is closed.')
+
+register_option('cas.table.max_cached_samples', 'int',
+                functools.partial(check_int, minimum=1), 8,
+                'Maximum number of sample tables kept by cas.table.cache_samples.\n' +
+                'Least recently used tables are dropped first.')
+
+register_option('cas.table.replica_max_rows', 'int',
+                functools.partial(check_int, minimum=0), 0,
+                'Tables with at most this many rows are copied to the client\n' +
+                'automatically once the time spent fetching from them exceeds the\n' +
+                'estimated cost of the copy.  Fetches, row counts, and value\n' +
+                'counts of the table are then computed locally when that is\n' +
+                'faster than a round trip to the server.  Zero disables automatic\n' +
+                'copies; CASTable.cache_local() copies a table explicitly.')
+
+register_option('cas.table.replica_max_bytes', 'int',
+                functools.partial(check_int, minimum=0), 64 * 1024**2,
+                'Maximum total size in bytes of the local table copies.\n' +
+                'Least recently used copies are removed first.')
+
+register_option('cas.table.replica_check_interval', 'float',
+                functools.partial(check_float, minimum=0), 30.0,
+                'Number of seconds a local table copy is used before the\n' +
+                'server is asked whether the table has changed.  The table is\n' +
+                'also checked after any action that updates server state.')
+
+register_option('cas.table.aggregate_plots', 'boolean', check_boolean, False,
+                'If True, the box, density, hexbin, hist, and kde plotting methods\n' +
+                'of CASTable compute bin counts and quantiles from all rows on the\n' +
+                'server and only transfer the aggregated values, rather than\n' +
+                'fetching the rows (or a sample of them) to plot on the client.\n' +
+                'This can be overridden with the aggregate= argument of the methods.')
+
+register_option('cas.cache.enabled', 'boolean', check_boolean, False,
+                'If True, the results of the actions listed in cas.cache.actions\n' +
+                'are cached on the client.  Repeated calls with the same\n' +
+                'parameters return a copy of the cached results.  The cache for\n' +
+                'a session is cleared when an action reports that it updated\n' +
+                'server state.')
+
+register_option('cas.cache.actions', 'string or list of strings',
+                check_string_list,
+                ['table.columninfo', 'table.tableinfo', 'table.tabledetails',
+                 'table.fetch', 'table.recordcount', 'simple.summary',
+                 'simple.topk', 'simple.distinct', 'simple.numrows',
+                 'simple.freq', 'simple.correlation', 'simple.crosstab'],
+                'Names of read-only actions whose results can be cached.')
+
+register_option('cas.cache.max_bytes', 'int',
+                functools.partial(check_int, minimum=0), 64 * 1024 * 1024,
+                'Maximum size in bytes of the serialized results held in the\n' +
+                'result cache.  Least recently used results are evicted first.')
+
+register_option('cas.cache.ttl', 'float', check_float, 300.0,
+                'Number of seconds that cached results are valid.\n' +
+                'A value of zero means that results do not expire.')
+
+register_option('cas.cache.directory', 'string', check_string, '',
+                'Directory where cached results are also written.  Results are\n' +
+                'written to a subdirectory that only the current user can access,\n' +
+                'and are used when they are not in memory.  If empty, results\n' +
+                'are only cached in memory.')
+
+register_option('cas.metrics.enabled', 'boolean', check_boolean, False,
+                'If True, action counts, latencies, bytes and rows transferred,\n' +
+                'errors, retries, and controller failovers of all connections\n' +
+                'are collected in the registry returned by swat.get_metrics().')
+
+register_option('cas.metrics.slow_action_threshold', 'float',
+                functools.partial(check_float, minimum=0), 0.0,
+                'Number of seconds above which an action call is added to the\n' +
+                'slow action log along with its parameters.  Passwords and other\n' +
+                'credentials are masked, and long values are truncated.  A value\n' +
+                'of zero disables the slow action log.')
+
+register_option('cas.metrics.slow_action_log', 'string', check_string, '',
+                'File that slow action calls are appended to as lines of JSON.\n' +
+                'If empty, only the most recent slow action calls are kept in\n' +
+                'memory.')
+
+register_option('cas.metrics.statsd_host', 'string', check_string, '',
+                'Host name of a StatsD server that metrics are sent to over UDP\n' +
+                'as they are collected.  If empty, metrics are not sent.')
+
+register_option('cas.metrics.statsd_port', 'int',
+                functools.partial(check_int, minimum=1, maximum=65535), 8125,
+                'Port of the StatsD server.')
+
+register_option('cas.metrics.statsd_prefix', 'string', check_string, 'swat',
+                'Prefix of the metric names sent to the StatsD server.')
+
 register_option('cas.dataset.bygroup_columns', 'string',
                 functools.partial(check_string,
                                   valid_values=['none', 'raw', 'formatted', 'both']),
@@ -263,6 +424,26 @@ register_option('cas.dataset.bygroup_collision_suffix', 'string', check_string,
 register_option('cas.dataset.bygroup_as_index', 'boolean', check_boolean, True,
                 'If True, any by group columns are set as the DataFrame index.')
 
+register_option('cas.display.max_html_bytes', 'int',
+                functools.partial(check_int, minimum=0), 1048576,
+                'The approximate maximum number of bytes of HTML generated when\n' +
+                'rendering CASResults in a notebook.  Items after the limit is\n' +
+                'reached are listed in a collapsed summary.  A value of zero\n' +
+                'means no limit.')
+
+register_option('cas.display.max_html_rows', 'int',
+                functools.partial(check_int, minimum=0), 5000,
+                'The maximum number of table rows rendered when displaying\n' +
+                'CASResults in a notebook.  SAS formats are only applied to the\n' +
+                'rows that are displayed.  A value of zero means no limit.')
+
+register_option('cas.display.max_bygroups', 'int',
+                functools.partial(check_int, minimum=0), 20,
+                'The number of By groups rendered in full when displaying\n' +
+                'CASResults.  The remaining By groups are collapsed into a\n' +
+                'summary, and can be fetched a page at a time in IPython\n' +
+                'notebooks.  A value of zero renders all By groups.')
+
 #
 # IPython notebook options
 #
@@ -27,6 +27,7 @@ import collections
 import datetime
 import json
 import re
+import numpy as np
 import pandas as pd
 import six
 from .cas.table import CASTable
@@ -105,6 +106,11 @@ def concat(objs, **kwargs):
     if not isinstance(proto, SASDataFrame):
         return pd.concat(objs, **kwargs)
 
+    if not kwargs:
+        out = concat_bygroups(objs)
+        if out is not None:
+            return out
+
     title = proto.title
     label = proto.label
     name = proto.name
@@ -124,6 +130,131 @@ def concat(objs, **kwargs):
                         formatter=formatter)[list(columns.keys())]
 
 
+def _get_bylevel_values(attrs):
+    '''
+    Return the By group index level values described by table attributes
+
+    Parameters
+    ----------
+    attrs : dict
+        The table attributes of a By group table.
+
+    Returns
+    -------
+    list
+        The value of each By group index level, in index order
+
+    '''
+    mode = attrs.get('ByGroupColumns', 'none')
+    out = []
+    i = 1
+    while 'ByVar%d' % i in attrs:
+        if mode in ['both', 'raw']:
+            out.append(attrs['ByVar%dValue' % i])
+        if mode in ['both', 'formatted']:
+            out.append(attrs['ByVar%dValueFormatted' % i])
+        i = i + 1
+    return out
+
+
+def concat_bygroups(objs):
+    '''
+    Concatenate By group tables that use By group index levels
+
+    Concatenating thousands of :class:`SASDataFrames` with By group
+    index levels through :func:`pandas.concat` merges a MultiIndex
+    for every table.  Since the By group levels are constant within
+    each table, they can be built once from the table attributes
+    instead.  The data blocks are concatenated without their indexes,
+    and the final index is constructed in a single operation.
+
+    Parameters
+    ----------
+    objs : list of :class:`SASDataFrames`
+        The By group tables to concatenate.
+
+    Returns
+    -------
+    :class:`SASDataFrame`
+        If all of the tables have the same layout
+    None
+        If the tables can not be concatenated in bulk
+
+    '''
+    proto = objs[0]
+    pattrs = proto.attrs or {}
+
+    if len(objs) < 2 or pattrs.get('ByGroupMode') != 'index' \
+            or not pattrs.get('ByVar1'):
+        return
+
+    nbylevels = len(_get_bylevel_values(pattrs))
+    nlevels = proto.index.nlevels
+    names = list(proto.index.names)
+    if nlevels < nbylevels:
+        return
+
+    for item in objs:
+        if not isinstance(item, SASDataFrame):
+            return
+        attrs = item.attrs or {}
+        if attrs.get('ByGroupMode') != 'index' or \
+                attrs.get('ByGroupColumns') != pattrs.get('ByGroupColumns'):
+            return
+        if item.index.nlevels != nlevels or list(item.index.names) != names:
+            return
+        if not item.columns.equals(proto.columns):
+            return
+
+    if not proto.columns.is_unique:
+        return
+
+    attrs = {}
+    colinfo = {}
+    bylevels = []
+    for item in objs:
+        attrs.update(item.attrs)
+        colinfo.update(item.colinfo)
+        bylevels.append(_get_bylevel_values(item.attrs))
+
+    lengths = [len(item) for item in objs]
+    positions = np.repeat(np.arange(len(objs)), lengths)
+
+    # By group levels are constant within each table
+    arrays = []
+    for i in range(nbylevels):
+        arrays.append(pd.Index([x[i] for x in bylevels]).take(positions))
+
+    # Remaining index levels are taken from the tables themselves
+    for i in range(nbylevels, nlevels):
+        first = proto.index.get_level_values(i)
+        arrays.append(first.append([x.index.get_level_values(i) for x in objs[1:]]))
+
+    # Data columns are concatenated as NumPy arrays
+    data = collections.OrderedDict()
+    for col in proto.columns:
+        dtype = proto[col].dtype
+        if not isinstance(dtype, np.dtype):
+            return
+        values = []
+        for item in objs:
+            value = pd.DataFrame.__getitem__(item, col).values
+            if value.dtype != dtype:
+                return
+            values.append(value)
+        data[col] = np.concatenate(values)
+
+    if len(arrays) == 1:
+        index = arrays[0].rename(names[0])
+    else:
+        index = pd.MultiIndex.from_arrays(arrays, names=names)
+
+    return SASDataFrame(data, index=index, columns=proto.columns,
+                        title=proto.title, label=proto.label,
+                        name=proto.name, attrs=attrs, colinfo=colinfo,
+                        formatter=proto.formatter)
+
+
 def reshape_bygroups(items, bygroup_columns='formatted',
                      bygroup_as_index=True, bygroup_formatted_suffix='_f',
                      bygroup_collision_suffix='_by'):
@@ -1011,10 +1142,16 @@ class SASDataFrame(pd.DataFrame):
                 i = i + 1
         return out
 
-    def _render_html_(self):
+    def _render_html_(self, max_rows=None):
         '''
         Create an ODS-like HTML rendering of the DataFrame
 
+        Parameters
+        ----------
+        max_rows : int, optional
+            The maximum number of rows to render.  SAS formats are only
+            applied to the rendered rows.
+
         '''
         output = []
 
@@ -1030,7 +1167,10 @@ class SASDataFrame(pd.DataFrame):
         col_widths = [colinfo[x].width or 0 for x in tbl.columns]
         col_dtypes = [colinfo[x].dtype or '' for x in tbl.columns]
         col_heads = [colinfo[x].attrs.get('Index', False) for x in tbl.columns]
-        values = tbl.values
+        if max_rows is not None and max_rows < len(tbl):
+            values = tbl.iloc[:max_rows].values
+        else:
+            values = tbl.values
         format = tbl.formatter.format
 
         output.append('<table class="sas-dataframe">')
@@ -1071,6 +1211,10 @@ class SASDataFrame(pd.DataFrame):
                                   (dtype, format(cell, sasfmt=fmt, width=width)))
             output.append('<tr>%s</tr>' % ''.join(outrow))
 
+        if len(values) < len(tbl):
+            output.append('<tr class="more-rows"><td colspan="%d">&#8230; %d more rows'
+                          '</td></tr>' % (len(tbl.columns), len(tbl) - len(values)))
+
         output.append('</tbody>')
         output.append('</table>')
 
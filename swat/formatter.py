@@ -76,6 +76,13 @@ class SASFormatter(object):
         self._sw_formatter = None
         self._load_attempted = False
 
+    def __getstate__(self):
+        ''' Drop the extension formatter when pickling; it is reloaded on use '''
+        state = self.__dict__.copy()
+        state['_sw_formatter'] = None
+        state['_load_attempted'] = False
+        return state
+
     def _load_formatter(self):
         ''' Allow lazy loading of formatter '''
         if self._load_attempted:
@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Budgeted and paged rendering of large results
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import itertools
+import json
+import weakref
+from ..config import get_option
+
+# Name of the IPython comm target used to fetch pages
+COMM_TARGET = 'swat.results.page'
+
+# Maximum number of rows in the summary of collapsed items
+SUMMARY_ROWS = 100
+
+# Collapsed results: token => (results weakref, entries, ods)
+_PAGES = {}
+_TOKENS = itertools.count(1)
+_comm_registered = False
+
+
+class RenderBudget(object):
+    '''
+    Byte and row budget for rendering results
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        The maximum number of bytes to render.  The default is the
+        value of the ``cas.display.max_html_bytes`` option.
+    max_rows : int, optional
+        The maximum number of table rows to render.  The default is the
+        value of the ``cas.display.max_html_rows`` option.
+
+    Notes
+    -----
+    A value of zero means that there is no limit.
+
+    Returns
+    -------
+    :class:`RenderBudget` object
+
+    '''
+
+    def __init__(self, max_bytes=None, max_rows=None):
+        if max_bytes is None:
+            max_bytes = get_option('cas.display.max_html_bytes')
+        if max_rows is None:
+            max_rows = get_option('cas.display.max_html_rows')
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.bytes = 0
+        self.rows = 0
+
+    @property
+    def exhausted(self):
+        ''' Has the byte or row limit been reached? '''
+        if self.max_bytes and self.bytes >= self.max_bytes:
+            return True
+        if self.max_rows and self.rows >= self.max_rows:
+            return True
+        return False
+
+    @property
+    def rows_left(self):
+        ''' The number of rows that can still be rendered, or None for no limit '''
+        if not self.max_rows:
+            return None
+        return max(self.max_rows - self.rows, 0)
+
+    def add(self, text, nrows=0):
+        '''
+        Charge rendered output to the budget
+
+        Parameters
+        ----------
+        text : string
+            The rendered output
+        nrows : int, optional
+            The number of table rows in `text`
+
+        Returns
+        -------
+        string
+            The `text` argument
+
+        '''
+        self.bytes += len(text)
+        self.rows += nrows
+        return text
+
+
+def _escape(text):
+    ''' Escape text for HTML '''
+    return ('%s' % text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def register_comm():
+    '''
+    Register the comm target used to fetch pages in an IPython kernel
+
+    Returns
+    -------
+    bool
+        True if the target is registered, False if not running in a kernel
+
+    '''
+    global _comm_registered
+
+    if _comm_registered:
+        return True
+
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return False
+
+    kernel = getattr(get_ipython(), 'kernel', None)
+    if kernel is None:
+        return False
+
+    kernel.comm_manager.register_target(COMM_TARGET, _open_comm)
+    _comm_registered = True
+
+    return True
+
+
+def _open_comm(comm, msg):
+    ''' Send the requested page over the comm '''
+    data = msg['content']['data']
+    comm.send(render_page(data.get('token'), start=data.get('start', 0)))
+    comm.close()
+
+
+def _forget(token):
+    ''' Return a callback that removes the pages of `token` '''
+    return lambda ref: _PAGES.pop(token, None)
+
+
+def summarize(results, entries):
+    '''
+    Summarize result entries that were not displayed
+
+    Parameters
+    ----------
+    results : RendererMixin object
+        The results being rendered
+    entries : list of (byline, keys) tuples
+        The entries that were not rendered
+
+    Returns
+    -------
+    (string, list of (byline, keys, nrows) tuples)
+        The title of the summary and the first :data:`SUMMARY_ROWS` rows
+
+    '''
+    nbygroups = len([x for x in entries if x[0]])
+    nitems = sum(len(x[1]) for x in entries)
+
+    title = []
+    if nbygroups:
+        title.append('%d By groups' % nbygroups)
+    title.append('%d items' % nitems)
+
+    rows = []
+    for byline, keys in entries[:SUMMARY_ROWS]:
+        nrows = sum(len(results[x]) for x in keys if hasattr(results[x], 'columns'))
+        rows.append((byline, ', '.join(keys), nrows))
+
+    return '%s not displayed' % ' and '.join(title), rows
+
+
+def collapse(results, entries, ods=False):
+    '''
+    Render a summary of result entries that were not displayed
+
+    The entries are saved so that they can be rendered later
+    with :func:`render_page`.
+
+    Parameters
+    ----------
+    results : RendererMixin object
+        The results being rendered
+    entries : list of (byline, keys) tuples
+        The entries that were not rendered
+    ods : bool, optional
+        Render pages in the ODS style?
+
+    Returns
+    -------
+    string
+
+    '''
+    token = '%d' % next(_TOKENS)
+    _PAGES[token] = (weakref.ref(results, _forget(token)), entries, ods)
+
+    title, rows = summarize(results, entries)
+
+    output = []
+    output.append('<details class="cas-results-more" id="swat-results-%s">' % token)
+    output.append('<summary>%s</summary>' % title)
+    output.append('<table class="cas-results-summary">')
+    output.append('<thead><tr><th>By Group</th><th>Keys</th><th>Rows</th></tr></thead>')
+    output.append('<tbody>')
+
+    for byline, keys, nrows in rows:
+        output.append('<tr><td>%s</td><td>%s</td><td>%s</td></tr>' %
+                      (_escape(byline), _escape(keys), nrows))
+
+    if len(entries) > SUMMARY_ROWS:
+        output.append('<tr><td colspan="3">&#8230; %d more</td></tr>' %
+                      (len(entries) - SUMMARY_ROWS))
+
+    output.append('</tbody>')
+    output.append('</table>')
+    output.append('<div class="cas-results-page"></div>')
+
+    if register_comm():
+        output.append('<button>Show more</button>')
+        output.append('''<script type="text/javascript">
+(function () {
+  var root = document.getElementById('swat-results-%(token)s');
+  var button = root.querySelector('button');
+  var start = 0;
+  button.onclick = function () {
+    var nb = window.Jupyter && window.Jupyter.notebook;
+    if ( !nb || !nb.kernel ) { button.disabled = true; return; }
+    var comm = nb.kernel.comm_manager.new_comm(%(target)s,
+                                               {token: '%(token)s', start: start});
+    comm.on_msg(function (msg) {
+      var data = msg.content.data;
+      root.querySelector('.cas-results-page').insertAdjacentHTML('beforeend',
+                                                                 data.html);
+      start = data.next;
+      if ( start === null ) { button.parentNode.removeChild(button); }
+    });
+  };
+})();
+</script>''' % dict(token=token, target=json.dumps(COMM_TARGET)))
+
+    output.append('</details>')
+
+    return '\n'.join(output)
+
+
+def render_page(token, start=0, size=None):
+    '''
+    Render a page of collapsed result entries
+
+    Parameters
+    ----------
+    token : string
+        The token of the collapsed results
+    start : int, optional
+        The index of the first entry to render
+    size : int, optional
+        The number of entries to render.  The default is the value of
+        the ``cas.display.max_bygroups`` option, or 10 if that is zero.
+        Fewer entries are rendered if the byte or row budget is reached.
+
+    Returns
+    -------
+    dict
+        'html' contains the rendered entries and 'next' is the index
+        of the next entry to render (None if there are no more).
+
+    '''
+    try:
+        ref, entries, ods = _PAGES[token]
+    except KeyError:
+        return dict(html='<div>These results are no longer available.</div>',
+                    next=None)
+
+    results = ref()
+    if results is None:
+        return dict(html='<div>These results are no longer available.</div>',
+                    next=None)
+
+    if size is None:
+        size = get_option('cas.display.max_bygroups') or 10
+
+    budget = RenderBudget()
+    output = []
+    end = start
+    for byline, keys in entries[start:start + size]:
+        if end > start and budget.exhausted:
+            break
+        output.append(results._render_entry_html_(byline, keys, budget, ods=ods))
+        end += 1
+
+    return dict(html='\n'.join(output), next=end < len(entries) and end or None)
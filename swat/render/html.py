@@ -58,6 +58,14 @@ STYLESHEET = '''
     div.cas-results .sas-dataframe .decquad {
         text-align: right;
     }
+    div.cas-results .sas-dataframe .more-rows td,
+    div.cas-results .cas-results-more > summary {
+        font-style: italic;
+        color: #666666;
+    }
+    div.cas-results .cas-results-more {
+        margin: 1em 0;
+    }
     </style>
 '''
 
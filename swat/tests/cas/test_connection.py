@@ -670,6 +670,35 @@ class TestConnection(tm.TestCase):
         self.assertNotEqual(stbl.fetch(to=1, sortby='Make').Fetch.MSRP[0], 10280)
         self.assertEqual(stbl.fetch(to=1, sortby='Make').Fetch.Make[0], 'Acura')
 
+    def test_result_cache(self):
+        swat.set_option('cas.cache.enabled', True)
+
+        out = self.table.columninfo()
+        self.assertEqual(self.s.get_cache_stats()['stores'], 1)
+
+        out2 = self.table.columninfo()
+        self.assertEqual(self.s.get_cache_stats()['hits'], 1)
+        self.assertTablesEqual(out['ColumnInfo'], out2['ColumnInfo'])
+        self.assertTrue(out['ColumnInfo'] is not out2['ColumnInfo'])
+
+        # Different parameters are a different entry
+        self.table.columninfo(inputs=['Make'])
+        self.assertEqual(self.s.get_cache_stats()['stores'], 2)
+
+        # Non-cached actions are always sent to the server
+        self.table.tableinfo()
+        self.s.builtins.serverstatus()
+        self.assertEqual(self.s.get_cache_stats()['stores'], 3)
+
+        self.s.clear_cache()
+        self.assertEqual(self.s.get_cache_stats()['entries'], 0)
+        self.table.columninfo()
+        self.assertEqual(self.s.get_cache_stats()['hits'], 1)
+
+        swat.set_option('cas.cache.enabled', False)
+        self.table.columninfo()
+        self.assertEqual(self.s.get_cache_stats()['hits'], 1)
+
 
 if __name__ == '__main__':
    import xmlrunner
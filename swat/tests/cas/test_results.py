@@ -178,6 +178,32 @@ class TestCASResults(tm.TestCase):
         self.assertEqual(len(out['ByGroupSet1.MDSummary']), 30)
         self.assertEqual(len(out['ByGroupSet2.MDSummary']), 870)
 
+    def test_concat_bygroups_bulk(self):
+        out = self.table.groupby(['Make', 'Cylinders']).summary()
+
+        tables = out.get_tables('Summary')
+        self.assertTrue(len(tables) > 50)
+
+        bulk = swat.concat(tables)
+        expected = pd.concat(tables)
+
+        self.assertEqual(list(bulk.index.names), list(expected.index.names))
+        self.assertEqual(list(bulk.index.values), list(expected.index.values))
+        self.assertTablesEqual(bulk, expected)
+        self.assertEqual(bulk.attrs['ByVar1Value'], tables[-1].attrs['ByVar1Value'])
+
+        # Same values as the concatenated results
+        cout = out.concat_bygroups()
+        self.assertEqual(list(cout['Summary'].index.values), list(expected.index.values))
+
+        # By group lookups after modification
+        grp = out.get_group(('Acura', 6))
+        self.assertEqual(set(grp.keys()), set(['Summary']))
+        out['ByGroup1.Summary'] = out['ByGroup2.Summary']
+        grp = out.get_group((out['ByGroup2.Summary'].attrs['ByVar1Value'],
+                             out['ByGroup2.Summary'].attrs['ByVar2Value']))
+        self.assertEqual(set(grp.keys()), set(['Summary']))
+
     def test_get_tables(self):
         # No By Groups
         out = self.table.topk()
@@ -640,6 +640,24 @@ class TestCASTable(tm.TestCase):
 
         self.assertEqual(df.values.tolist(), tbl.values.tolist())
 
+    def test_string_storage(self):
+        df = self.table.head(50)
+        self.assertEqual(df['Origin'].dtype, object)
+        self.assertEqual(df['Model'].dtype, object)
+
+        with swat.option_context('cas.dataset.string_storage', 'category'):
+            catdf = self.table.head(50)
+            self.assertEqual(str(catdf['Origin'].dtype), 'category')
+            self.assertEqual(str(catdf['Model'].dtype), 'category')
+            self.assertEqual(catdf['Origin'].tolist(), df['Origin'].tolist())
+            self.assertEqual(catdf['MSRP'].tolist(), df['MSRP'].tolist())
+
+        with swat.option_context('cas.dataset.string_storage', 'auto'):
+            autodf = self.table.head(50)
+            self.assertEqual(str(autodf['Origin'].dtype), 'category')
+            self.assertEqual(autodf['Model'].dtype, object)
+            self.assertEqual(autodf['Model'].tolist(), df['Model'].tolist())
+
     def test_dtypes(self):
         dtypes = self.table.dtypes
         self.assertEqual(dtypes.Model, 'char')
@@ -2513,6 +2531,64 @@ class TestCASTable(tm.TestCase):
         self.assertTablesEqual(df[(df['MSRP'] > 90000) | (df['MSRP'] < 11000)][['Model', 'MSRP']],
                              tbl[(tbl['MSRP'] > 90000) | (tbl['MSRP'] < 11000)][['Model', 'MSRP']], sortby=None)
 
+    def test_compiled_computed_columns(self):
+        df = self.get_cars_df().sort_values(SORT_KEYS)
+        tbl = self.table.sort_values(SORT_KEYS)
+
+        dfexpr = (df['MSRP'] - df['Invoice']) * (df['MSRP'] - df['Invoice']) > 1e7
+        tblexpr = (tbl['MSRP'] - tbl['Invoice']) * (tbl['MSRP'] - tbl['Invoice']) > 1e7
+
+        self.assertEqual(len(tblexpr.params['computedvars']), 4)
+
+        # Duplicate subtraction is merged and the product is inlined
+        params = tblexpr.to_table_params()
+        self.assertEqual(params['computedvars'], [tblexpr.params['computedvars'][0],
+                                                  tblexpr.name])
+        self.assertEqual(len([x for x in params['computedvarsprogram'].split(';')
+                              if x.strip()]), 2)
+
+        # The uncompiled parameters are left as-is
+        self.assertEqual(len(tblexpr.params['computedvars']), 4)
+
+        self.assertTablesEqual(df[dfexpr][['Model', 'MSRP']],
+                               tbl[tblexpr][['Model', 'MSRP']], sortby=None)
+
+    def test_compiled_computed_columns_digits(self):
+        df = self.get_cars_df().sort_values(SORT_KEYS)
+        tbl = self.table.sort_values(SORT_KEYS)
+
+        dfexpr = (df['MSRP'].apply(np.log10) + 1) * (df['MSRP'].apply(np.log10) + 1) > 20
+        tblexpr = (tbl['MSRP'].sas.log10() + 1) * (tbl['MSRP'].sas.log10() + 1) > 20
+
+        # Generated names with digits (_log10_<id>_) are compiled too
+        params = tblexpr.to_table_params()
+        self.assertEqual(len(params['computedvars']), 2)
+        self.assertEqual(params['computedvarsprogram'].count('log10('), 1)
+
+        self.assertTablesEqual(df[dfexpr][['Model', 'MSRP']],
+                               tbl[tblexpr][['Model', 'MSRP']], sortby=None)
+
+    def test_compiled_computed_columns_tracked(self):
+        tbl = self.table
+
+        # User computed columns are not compiled, even if their names
+        # look like generated names
+        usr = tbl.copy()
+        usr.append_computed_columns(['_my_var_1A_'], '_my_var_1A_ = MSRP + 1; ')
+        self.assertTrue('_my_var_1A_' in usr[['Model']].to_table_params()['computedvars'])
+
+        # Intermediate columns referenced by action parameters are kept
+        diff = tbl['MSRP'] - tbl['Invoice']
+        sub = tbl.copy()
+        sub.append_computed_columns(diff.params['computedvars'],
+                                    diff.params['computedvarsprogram'])
+        out = sub[['Model']].fetch(sortby=[dict(name=diff.name, order='descending')],
+                                   to=1)['Fetch']
+
+        df = self.get_cars_df()
+        self.assertEqual(out['Model'][0],
+                         df.loc[(df['MSRP'] - df['Invoice']).idxmax(), 'Model'])
+
     def test_character_comparisons(self):
         df = self.get_cars_df()
         tbl = self.table
@@ -4176,6 +4252,32 @@ class TestCASTable(tm.TestCase):
 
         self.assertTablesEqual(df.dropna(how='all'), sorttbl.dropna(how='all'))
 
+    def test_lazy_datastep(self):
+        df = self.get_cars_df().sort_values(SORT_KEYS)
+        sorttbl = self.table.sort_values(SORT_KEYS)
+
+        swat.options.cas.table.lazy_datastep = True
+
+        dfout = df.fillna(value={'Cylinders': 50}).replace('BMW', 'AAAAA').dropna()
+        tblout = sorttbl.fillna(value={'Cylinders': 50}).replace('BMW', 'AAAAA').dropna()
+
+        # Nothing has been run yet
+        self.assertEqual(tblout.params['name'], sorttbl.params['name'])
+        self.assertTrue(tblout._datastep_pipeline is not None)
+
+        self.assertTablesEqual(dfout, tblout)
+
+        # The table now points to the output of a single data step
+        self.assertTrue(tblout._datastep_pipeline is None)
+        self.assertNotEqual(tblout.params['name'], sorttbl.params['name'])
+        self.assertTrue(tblout.compute() is tblout)
+
+        # Copies made before materialization share the output
+        tblout = sorttbl.fillna(value={'Cylinders': 50})
+        tblcopy = tblout.copy()
+        self.assertEqual(tblout.compute().params['name'],
+                         tblcopy.compute().params['name'])
+
     def test_replace(self):
         df = self.get_cars_df().sort_values(SORT_KEYS)
         sorttbl = self.table.sort_values(SORT_KEYS)
@@ -4726,6 +4828,47 @@ class TestCASTable(tm.TestCase):
                 tm.TestCase.skipTest(self, '%s' % msg)
             raise
 
+    def test_plot_aggregate(self):
+        tbl = self.table[['MSRP', 'Invoice']]
+        df = self.get_cars_df()[['MSRP', 'Invoice']]
+
+        edges, counts = tbl.plot._get_hist_data(bins=10)
+        self.assertEqual(list(counts.columns), ['MSRP', 'Invoice'])
+        for col in ['MSRP', 'Invoice']:
+            self.assertEqual(list(counts[col]),
+                             list(np.histogram(df[col], bins=edges)[0]))
+
+        stats = tbl.plot._get_box_data()
+        self.assertEqual([x['label'] for x in stats], ['MSRP', 'Invoice'])
+        for item in stats:
+            values = df[item['label']]
+            self.assertEqual(item['whishi'],
+                             values[values <= item['q3'] + 1.5 *
+                                    (item['q3'] - item['q1'])].max())
+            self.assertEqual(len(item['fliers']),
+                             ((values < item['whislo']) |
+                              (values > item['whishi'])).sum())
+
+        points, density = tbl.plot._get_kde_data()['MSRP']
+        self.assertEqual(len(points), 1000)
+        self.assertAlmostEqual(np.trapz(density, points), 1.0, places=2)
+
+        hexbins = self.table.plot._get_hexbin_data('MSRP', 'Horsepower')
+        self.assertEqual(hexbins['count'].sum(), len(df))
+
+        try:
+            swat.options.cas.table.aggregate_plots = True
+            tbl.plot.hist()
+            tbl.plot.box()
+            tbl.plot.kde()
+            tbl.plot.density()
+            self.table.plot.hexbin('MSRP', 'Horsepower')
+
+        except Exception as msg:
+            if isinstance(msg, ImportError) or type(msg).__name__ in ['TclError']:
+                tm.TestCase.skipTest(self, '%s' % msg)
+            raise
+
     def test_plot_line(self):
         tbl = self.table
         df = self.get_cars_df()
@@ -4833,6 +4976,20 @@ class TestCASTable(tm.TestCase):
         self.assertTablesEqual(df[['A', 'B', 'C', 'D', 'E']].abs(),
                                tbl[['A', 'B', 'C', 'D', 'E']].abs()) 
 
+    def test_lazy_abs_clip(self):
+        df, tbl = self._get_comp_data()
+        cols = ['A', 'B', 'C', 'D', 'E']
+
+        swat.options.cas.table.lazy_datastep = True
+
+        # The where clause and column selection apply before the code runs
+        dfout = df[df['B'] < 0][cols].abs().clip(lower=10)
+        tblout = tbl.query('B < 0')[cols].abs().clip(lower=10)
+
+        self.assertTrue(tblout._datastep_pipeline is not None)
+        self.assertEqual(len(tblout), len(dfout))
+        self.assertTablesEqual(dfout, tblout)
+
     def test_all(self):
         df, tbl = self._get_comp_data()
 
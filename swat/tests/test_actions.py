@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import swat
+import swat.utils.testing as tm
+from swat.benchmarks.server import StandInServer
+from swat.cas.actions import CASActionSet
+
+
+def _param(name, depth):
+    out = {'name': name, 'parmType': depth and 'value_list' or 'string',
+           'desc': 'The %s parameter' % name}
+    if depth:
+        out['parmList'] = [_param('%s_%d' % (name, i), depth - 1) for i in range(2)]
+    return out
+
+
+class Connection(object):
+    _sw_connection = object()
+
+
+class TestActions(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.conn = Connection()
+        self.asinfo = {'name': 'mySet', 'desc': 'My action set',
+                       'actions': [{'name': 'mySet.act%d' % i, 'desc': 'Action %d' % i,
+                                    'params': [_param('p%d' % j, 1) for j in range(3)],
+                                    'results': []} for i in range(5)]}
+
+    def tearDown(self):
+        swat.reset_option()
+
+    def test_lazy_classes(self):
+        ascls = CASActionSet.from_reflection(self.asinfo, self.conn)
+
+        self.assertEqual(sorted(ascls.actions), ['act%d' % i for i in range(5)])
+        self.assertEqual(ascls.actions._cache, {})
+
+        act = ascls().act2
+        self.assertEqual(list(ascls.actions._cache), ['act2'])
+        self.assertTrue(ascls().act2 is not act)
+        self.assertTrue(type(ascls().act2) is type(act))
+
+        # Instantiating does not generate the documentation
+        self.assertTrue(type(act).__dict__['__doc__']._doc is None)
+
+        act.set_params(p0=dict(p0_0='a'), p1='b')
+        self.assertEqual(act.params, dict(p0=dict(p0_0='a'), p1='b'))
+
+    def test_lazy_doc(self):
+        ascls = CASActionSet.from_reflection(self.asinfo, self.conn)
+
+        self.assertTrue('act4' in ascls.__doc__)
+
+        act = ascls().act1
+        doc = type(act).__doc__
+        self.assertTrue('Action 1' in doc)
+        self.assertTrue('p2_1' in doc)
+        self.assertTrue('p2_1' in act.set_params.__doc__)
+        self.assertTrue('p2_1' in act.__call__.__doc__)
+
+        # Parameter names are available once the doc is generated
+        self.assertEqual(len(type(act).all_params), 9)
+        self.assertTrue('p2.p2_1' in type(act).all_params)
+
+        # New instances pick up the generated doc
+        self.assertTrue('p2_1' in ascls().act1.params.__doc__)
+
+    def test_all_params(self):
+        ascls = CASActionSet.from_reflection(self.asinfo, self.conn)
+        act = ascls().act3
+
+        self.assertTrue('p1' in dir(act.params))
+        self.assertTrue(type(act).__dict__['__doc__']._doc is not None)
+
+    def test_connection(self):
+        with StandInServer(nrows=10, ncolumns=2) as server:
+            s = swat.CAS(server.url, username='user', password='password')
+
+            out = s.builtins.echo(a=1)
+            self.assertEqual(out['a'], 1)
+            self.assertTrue('builtins.echo' in s._action_classes)
+
+            echo = s.get_action_class('builtins.echo')
+            self.assertTrue(s.get_action_class('echo') is echo)
+            self.assertEqual(echo.__name__.lower(), 'builtins.echo')
+
+            s.close()
+
+
+if __name__ == '__main__':
+    tm.runtests()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import json
+import os
+import pandas as pd
+import subprocess
+import swat
+import sys
+import tempfile
+import swat.utils.testing as tm
+import unittest
+from swat.benchmarks import (run_benchmarks, run_startup_benchmarks, format_results,
+                             BENCHMARKS, STARTUP_BENCHMARKS)
+from swat.benchmarks.server import StandInServer
+
+
+class TestBenchmarks(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.server = StandInServer(nrows=50, ncolumns=4).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+
+    def tearDown(self):
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def test_fetch(self):
+        tbl = self.s.CASTable('DATA')
+        df = tbl.fetch(to=10).Fetch
+        self.assertEqual(df.shape, (10, 4))
+        self.assertEqual(list(df.columns), ['c0', 'c1', 'c2', 'c3'])
+        self.assertEqual(df['c2'].iloc[1], 6.0)
+        self.assertEqual(df['c3'].iloc[1], 'value 1.3')
+
+        self.assertEqual(len(tbl.fetch(to=100).Fetch), 50)
+        self.assertEqual(len(tbl), 50)
+
+    def test_summary(self):
+        out = self.s.simple.summary(table=self.s.CASTable('DATA')).Summary
+        self.assertEqual(list(out['Column']), ['c0', 'c2'])
+        self.assertEqual(list(out['N']), [50, 50])
+        self.assertEqual(list(out['Max']), [196.0, 198.0])
+
+    def test_upload(self):
+        tbl = self.s.upload_frame(pd.DataFrame({'a': range(20)}),
+                                  casout=dict(name='up'))
+        self.assertEqual(tbl.name, 'UP')
+        self.assertEqual(len(tbl), 20)
+        self.assertTrue(self.server.stats['bytes_received'] > 0)
+
+    def test_session(self):
+        self.assertTrue(self.s._session in self.server.sessions)
+
+        with self.assertRaises(swat.SWATError):
+            swat.CAS(self.server.url, username='user', password='password',
+                     session='no-such-session')
+
+    def test_record_replay(self):
+        fdesc, record = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fdesc)
+
+        try:
+            with swat.option_context('cas.rest.record_file', record):
+                conn = swat.CAS(self.server.url, username='user', password='password')
+                fetch = conn.CASTable('DATA').fetch(to=5).Fetch
+                echo = conn.builtins.echo(x=1, password='secret')
+                conn.close()
+
+            # Credentials are not written to the recorded parameters
+            with open(record) as infile:
+                params = [json.loads(x)['params'] for x in infile]
+            self.assertEqual(params[-1], dict(x=1, password='********'))
+
+            replay = swat.CAS(record, protocol='replay')
+            self.assertEqual(replay._session, conn._session)
+            self.assertTablesEqual(replay.CASTable('DATA').fetch(to=5).Fetch, fetch)
+            self.assertEqual(replay.builtins.echo(x=1, password='secret').x, echo.x)
+
+            # Actions that were not recorded return an error
+            out = replay.retrieve('table.recordcount', table='DATA',
+                                  _messagelevel='error')
+            self.assertEqual(out.severity, 2)
+            replay.close()
+
+        finally:
+            os.remove(record)
+
+    def test_client_performance(self):
+        tbl = self.s.CASTable('DATA')
+        self.assertTrue(tbl.fetch(to=5).client_performance is None)
+
+        swat.options.cas.client_performance = True
+        perf = tbl.fetch(to=5).client_performance
+        phases = perf.to_dict()
+        for phase in ['prepare', 'serialize', 'network', 'parse', 'convert',
+                      'ctb2tabular']:
+            self.assertTrue(phase in phases)
+        self.assertTrue(phases['network']['bytes'] > 0)
+        self.assertTrue(perf.elapsed_time >= phases['network']['time'])
+
+        swat.reset_option('cas.client_performance')
+        self.assertTrue(tbl.fetch(to=5).client_performance is None)
+
+    def test_profile(self):
+        fdesc, trace = tempfile.mkstemp(suffix='.json')
+        os.close(fdesc)
+
+        try:
+            with swat.profile(trace) as prof:
+                self.s.CASTable('DATA').fetch(to=5)
+                self.s.simple.summary(table='DATA')
+
+            self.assertEqual([x.action for x in prof.calls],
+                             ['table.fetch', 'simple.summary'])
+            self.assertTrue(prof.to_dict()['convert']['count'] >= 2)
+
+            with open(trace) as infile:
+                events = json.load(infile)['traceEvents']
+            names = set(x['name'] for x in events)
+            for name in ['table.fetch', 'simple.summary', 'serialize', 'network',
+                         'parse', 'convert', 'ctb2tabular']:
+                self.assertTrue(name in names)
+
+            # Nothing is collected outside of the context
+            self.assertTrue(self.s.CASTable('DATA').fetch(to=5)
+                            .client_performance is None)
+            self.assertEqual(len(prof.calls), 2)
+
+        finally:
+            os.remove(trace)
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(nrows=20, ncolumns=2, repeat=1)
+        self.assertEqual([x['name'] for x in results], BENCHMARKS)
+        for item in results:
+            self.assertTrue(item['min_ms'] <= item['median_ms'] <= item['max_ms'])
+        self.assertTrue(results[BENCHMARKS.index('fetch')]['rows_per_sec'] > 0)
+        self.assertTrue(results[BENCHMARKS.index('upload')]['mb_per_sec'] > 0)
+        self.assertTrue(format_results(results).startswith('benchmark'))
+
+        with self.assertRaises(ValueError):
+            run_benchmarks(benchmarks=['foo'])
+
+        results = run_benchmarks(benchmarks=['fetch'], nrows=20, ncolumns=2,
+                                 repeat=1, replay=True)
+        self.assertTrue(results[0]['mb_per_sec'] > 0)
+
+    def test_run_startup_benchmarks(self):
+        results = run_startup_benchmarks(repeat=1)
+        self.assertEqual([x['name'] for x in results], list(STARTUP_BENCHMARKS))
+        for item in results:
+            self.assertTrue(item['min_ms'] > 0)
+            self.assertTrue(item['modules'] > 0)
+        self.assertTrue(results[0]['modules'] < results[1]['modules'])
+
+        with self.assertRaises(ValueError):
+            run_startup_benchmarks(benchmarks=['foo'])
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'Requires module __getattr__')
+    def test_lazy_import(self):
+        code = ('import sys, swat; print("pandas" in sys.modules); '
+                'swat.CAS; print("pandas" in sys.modules)')
+        path = os.path.dirname(os.path.dirname(os.path.abspath(swat.__file__)))
+        out = subprocess.check_output([sys.executable, '-c', code],
+                                      env=dict(os.environ, PYTHONPATH=path))
+        self.assertEqual(out.decode('utf-8').split(), ['False', 'True'])
+
+    def test_star_import(self):
+        namespace = {}
+        exec('from swat import *', namespace)
+        self.assertTrue(namespace['CAS'] is swat.CAS)
+        self.assertTrue(namespace['CASTable'] is swat.CASTable)
+        self.assertTrue(namespace['get_option'] is swat.get_option)
+        self.assertTrue(namespace['SWATError'] is swat.SWATError)
+
+        namespace = {}
+        exec('from swat.cas import *', namespace)
+        self.assertTrue(namespace['CASResults'] is swat.cas.CASResults)
+        self.assertTrue(namespace['table'] is swat.cas.table)
+        self.assertFalse([x for x in namespace if x.startswith('_') and
+                          x != '__builtins__'])
+
+
+if __name__ == '__main__':
+   from swat.utils.testing import runtests
+   runtests()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import swat
+import swat.utils.testing as tm
+from swat.benchmarks.server import StandInServer
+from swat.cas.binder import ActionBinder
+from swat.cas.table import CASTable
+
+
+def _param(name, ptype='string', **kwargs):
+    return dict(name=name, parmType=ptype, **kwargs)
+
+
+FETCH = dict(name='table.fetch', params=[
+    _param('table', 'value_list', isTableDef=True,
+           parmList=[_param('name'), _param('caslib'), _param('where')]),
+    _param('fetchVars', 'value_list', aliases=['fetchvar']),
+    _param('from', 'int64'), _param('to', 'int64'),
+    _param('sortby', 'value_list'),
+])
+
+SUMMARY = dict(name='simple.summary', params=[
+    _param('table', 'value_list', isTableDef=True,
+           parmList=[_param('name'), _param('caslib')]),
+    _param('inputs', 'value_list'),
+    _param('output', 'value_list',
+           parmList=[_param('casOut', 'value_list', isOutTableDef=True,
+                            parmList=[_param('name'), _param('replace', 'boolean')])]),
+])
+
+TABLEINFO = dict(name='table.tableinfo', params=[
+    _param('name', isTableName=True), _param('caslib', isCasLib=True),
+])
+
+
+class TestBinder(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+
+    def tearDown(self):
+        swat.reset_option()
+
+    def test_bind(self):
+        tbl = CASTable('cars', caslib='casuser', where='msrp > 1')
+        tbl._columns = ['make', 'msrp']
+        tbl._sortby = [dict(name='msrp')]
+
+        binder = ActionBinder(FETCH)
+        out = binder.bind(dict(Table=tbl, to=5), action='table.fetch')
+        self.assertEqual(out, dict(Table=dict(name='cars', caslib='casuser',
+                                              where='msrp > 1'),
+                                   to=5, fetchvars=['make', 'msrp'],
+                                   sortby=[dict(name='msrp')], sastypes=False))
+
+        # Table names and aliases are matched in any case
+        out = binder.bind(dict(table='cars', FETCHVAR=['a']), action='table.fetch')
+        self.assertEqual(out, dict(table=dict(name='cars'), FETCHVAR=['a']))
+
+        out = ActionBinder(TABLEINFO).bind(dict(__table__=tbl), action='table.tableinfo')
+        self.assertEqual(out, dict(name='cars', caslib='casuser'))
+
+    def test_nested(self):
+        tbl = CASTable('cars')
+        tbl._columns = ['msrp']
+        outtbl = CASTable('out', replace=True)
+
+        kwargs = dict(__table__=tbl, output=dict(casOut=outtbl))
+        out = ActionBinder(SUMMARY).bind(kwargs, action='simple.summary')
+
+        self.assertEqual(out, dict(table=dict(name='cars'), inputs=['msrp'],
+                                   output=dict(casOut=dict(name='out', replace=True))))
+
+        # The arguments are not modified
+        self.assertTrue(kwargs['output']['casOut'] is outtbl)
+        self.assertEqual(sorted(kwargs), ['__table__', 'output'])
+
+    def test_signature(self):
+        server = StandInServer(nrows=10, ncolumns=2).start()
+        try:
+            conn = swat.CAS(server.url, username='user', password='password')
+            hooks = []
+            conn.add_results_hook('table.fetch', lambda conn, res: hooks.append(res))
+
+            out = conn.CASTable('DATA').head(3)
+            self.assertEqual(len(out), 3)
+            self.assertEqual(len(hooks), 1)
+
+            # The signature is filled in when it is used
+            signature = hooks[0].signature
+            self.assertEqual(signature['name'], 'table.fetch')
+            params = dict((x['name'], x) for x in signature['params'])
+            self.assertEqual(params['to']['value'], 3)
+            self.assertTrue(hooks[0].signature is signature)
+
+            # Parameters changed after the call are not in the signature
+            sortby = [dict(name='c0')]
+            out = conn.CASTable('DATA').fetch(to=2, sortby=sortby)
+            sortby[0]['name'] = 'c1'
+            params = dict((x['name'], x) for x in hooks[-1].signature['params'])
+            self.assertEqual(params['sortby']['value'], [dict(name='c0')])
+
+            # Binders are reused
+            binders = dict(conn._action_binders)
+            conn.CASTable('DATA').head(2)
+            self.assertTrue(conn._action_binders['table.fetch']
+                            is binders['table.fetch'])
+
+            conn.close()
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    tm.runtests()
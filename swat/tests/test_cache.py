@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import glob
+import os
+import shutil
+import stat
+import swat
+import tempfile
+import swat.utils.testing as tm
+import unittest
+from swat.benchmarks.server import StandInServer
+
+
+class TestResultCache(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        swat.options.cas.cache.enabled = True
+        self.server = StandInServer(nrows=20, ncolumns=2).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def _clear_memory(self):
+        ''' Remove the in-memory entries, leaving the files '''
+        cache = self.s._result_cache
+        cache._entries.clear()
+        cache._nbytes = 0
+
+    @unittest.skipIf(not hasattr(os, 'getuid'), 'Requires POSIX permissions')
+    def test_directory(self):
+        swat.options.cas.cache.directory = self.tmpdir
+        tbl = self.s.CASTable('DATA')
+
+        tbl.columninfo()
+        paths = glob.glob(os.path.join(self.tmpdir, '*', '*.pickle'))
+        self.assertEqual(len(paths), 1)
+
+        # Entries are written to a private subdirectory of the directory
+        subdir = os.path.dirname(paths[0])
+        self.assertEqual(stat.S_IMODE(os.stat(subdir).st_mode), 0o700)
+        self.assertEqual(stat.S_IMODE(os.stat(paths[0]).st_mode), 0o600)
+
+        self._clear_memory()
+        tbl.columninfo()
+        self.assertEqual(self.s.get_cache_stats()['disk_hits'], 1)
+
+        # Files that others can write to are not loaded
+        os.chmod(paths[0], 0o666)
+        self._clear_memory()
+        tbl.columninfo()
+        self.assertEqual(self.s.get_cache_stats()['disk_hits'], 1)
+
+        # Nothing is read from or written to a subdirectory others can write to
+        os.chmod(subdir, 0o777)
+        self._clear_memory()
+        tbl.columninfo()
+        tbl.columninfo(inputs=['c0'])
+        self.assertEqual(self.s.get_cache_stats()['disk_hits'], 1)
+        self.assertEqual(len(glob.glob(os.path.join(subdir, '*.pickle'))), 1)
+
+    def test_results_hooks(self):
+        hooks = []
+        self.s.add_results_hook('table.columninfo',
+                                lambda conn, res: hooks.append(res))
+
+        tbl = self.s.CASTable('DATA')
+        out = tbl.columninfo()
+        out2 = tbl.columninfo()
+
+        # Hooks also run on cached results
+        self.assertEqual(self.s.get_cache_stats()['hits'], 1)
+        self.assertEqual(len(hooks), 2)
+        self.assertTrue(hooks[0] is out)
+        self.assertTrue(hooks[1] is out2)
+
+
+if __name__ == '__main__':
+   from swat.utils.testing import runtests
+   runtests()
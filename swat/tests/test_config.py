@@ -245,9 +245,10 @@ class TestConfig(tm.TestCase):
 
     def test_suboptions(self):
         self.assertEqual(list(sorted(get_suboptions('cas').keys())), 
-                         ['dataset', 'exception_on_severity',
-                          'hostname', 'missing',
-                          'port', 'print_messages', 'protocol',
+                         ['cache', 'client_performance', 'dataset', 'display',
+                          'exception_on_severity', 'fanout_sessions',
+                          'hostname', 'metrics', 'missing',
+                          'port', 'print_messages', 'protocol', 'rest', 'table',
                           'trace_actions', 'trace_ui_actions'])
 
         with self.assertRaises(SWATOptionError):
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import swat
+import time
+import swat.cas.futures as futures
+import swat.utils.testing as tm
+import unittest
+from swat.benchmarks.server import StandInServer
+from swat.cas.response import CASResponse
+
+
+class _Results(list):
+    ''' Results without a severity '''
+    severity = None
+
+
+class _WatchedConnection(object):
+    '''
+    Binary connection whose responses arrive at scheduled times
+
+    Each call is passed the response times and the errors to raise,
+    and returns the index of the call for each response.
+
+    '''
+
+    def __init__(self, clock):
+        self._clock = clock
+        self._sw_connection = self
+        self.queue = []
+        self.closed = False
+        self.finished = []
+        self.recorded = []
+
+    def hasPendingResponses(self):
+        return bool(self.queue)
+
+    def _invoke_with_signature(self, action, idx=None, times=(1,), errors=()):
+        start = self._clock[0]
+        self.queue = [(start + t, errors[i] if i < len(errors) else idx)
+                      for i, t in enumerate(times)]
+        return dict(name=action, idx=idx)
+
+    def close(self):
+        self.closed = True
+
+    def _get_results(self, riter):
+        return _Results(x.idx for x, conn in riter)
+
+    def _record_action(self, action, start, params, error=False):
+        self.recorded.append((action, params['idx'], error))
+
+    def _finish_results(self, results, signature):
+        self.finished.append(signature['idx'])
+        return results
+
+
+def _watch(conns):
+    ''' Yield the scheduled responses in time order '''
+    while [x for x in conns if x.queue]:
+        conn = min([x for x in conns if x.queue], key=lambda x: x.queue[0][0])
+        when, item = conn.queue.pop(0)
+        conn._clock[0] = max(conn._clock[0], when)
+        if isinstance(item, Exception):
+            yield conn, None, item
+        else:
+            response = CASResponse.__new__(CASResponse)
+            response.idx = item
+            yield conn, response, None
+
+
+class TestFutures(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.server = StandInServer(nrows=20, ncolumns=2, latency=0.1).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+
+    def tearDown(self):
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def test_map(self):
+        params = [dict(table='DATA', to=i) for i in range(1, 9)]
+
+        out = self.s.map('table.fetch', params, sessions=4)
+        self.assertEqual([len(x.Fetch) for x in out], list(range(1, 9)))
+
+        # Only the main session remains
+        self.assertEqual(list(self.server.sessions), [self.s._session])
+
+        # Eight 0.1 second calls over four sessions, after the sessions
+        # have loaded the action reflection information
+        with swat.CASPool(self.s, min_size=4, max_size=4) as pool:
+            self.s.map('table.fetch', params, sessions=pool)
+            start = time.time()
+            out = self.s.map('table.fetch', params, sessions=pool)
+            self.assertTrue(time.time() - start < 0.6)
+            self.assertEqual([len(x.Fetch) for x in out], list(range(1, 9)))
+
+        out = sorted(self.s.map('table.fetch', params[:3], sessions=2, ordered=False))
+        self.assertEqual([x[0] for x in out], [0, 1, 2])
+        self.assertEqual([len(x[1].Fetch) for x in out], [1, 2, 3])
+
+    def test_map_errors(self):
+        conns = self.s.fork(3)[1:]
+        try:
+            with swat.option_context('cas.exception_on_severity', 2):
+                out = self.s.map('table.fetch',
+                                 [dict(table='DATA', to=2), dict(table='NOSUCH', to=2),
+                                  dict(table='DATA', to=3)],
+                                 sessions=conns)
+        finally:
+            for conn in conns:
+                conn.close()
+        self.assertEqual(len(out[0].Fetch), 2)
+        self.assertTrue(isinstance(out[1], swat.SWATCASActionError))
+        self.assertEqual(len(out[2].Fetch), 3)
+
+    def test_map_watcher(self):
+        clock = [0]
+        conns = [_WatchedConnection(clock), _WatchedConnection(clock)]
+        watch = futures._watch
+        futures._watch = _watch
+        try:
+            # The next call starts as soon as a connection is idle
+            params = [dict(idx=0, times=[5]), dict(idx=1), dict(idx=2), dict(idx=3)]
+            out = list(futures._map_watcher(conns, 'fetch', params))
+            self.assertEqual(out, [(1, [1]), (2, [2]), (3, [3]), (0, [0])])
+
+            # The results are post-processed as they are by retrieve
+            self.assertEqual(sorted(conns[0].finished + conns[1].finished),
+                             [0, 1, 2, 3])
+
+            # An action error is returned for its call only, and the rest
+            # of its responses are read before the connection is reused
+            error = swat.SWATCASActionError('failed', None, None)
+            params = [dict(idx=0, times=[1, 2, 3], errors=[error]),
+                      dict(idx=1, times=[1, 2]), dict(idx=2), dict(idx=3)]
+            with swat.option_context('cas.metrics.enabled', True):
+                out = dict(futures._map_watcher(conns, 'fetch', params))
+            self.assertTrue(out[0] is error)
+            self.assertEqual([out[1], out[2], out[3]], [[1, 1], [2], [3]])
+            self.assertEqual(sorted(conns[0].recorded + conns[1].recorded),
+                             [('fetch', 0, True), ('fetch', 1, False),
+                              ('fetch', 2, False), ('fetch', 3, False)])
+
+            # A connection that can't be read is discarded
+            discarded = []
+            params = [dict(idx=0, times=[1, 2], errors=[swat.SWATError('broken')]),
+                      dict(idx=1, times=[3]), dict(idx=2), dict(idx=3)]
+            out = dict(futures._map_watcher(conns, 'fetch', params,
+                                            discard=discarded.append))
+            self.assertEqual(str(out[0]), 'broken')
+            self.assertEqual([out[1], out[2], out[3]], [[1], [2], [3]])
+            self.assertTrue(discarded == [conns[0]])
+
+            # Unfinished calls are read when the iteration stops early
+            conns = [_WatchedConnection(clock), _WatchedConnection(clock)]
+            params = [dict(idx=0, times=[1]), dict(idx=1, times=[2, 3])]
+            for item in futures._map_watcher(conns, 'fetch', params * 2):
+                break
+            self.assertFalse(conns[1].queue)
+            self.assertFalse(conns[1].closed)
+        finally:
+            futures._watch = watch
+
+    def test_submit(self):
+        swat.options.cas.fanout_sessions = 3
+        futures = [self.s.submit('table.fetch', table='DATA', to=i) for i in range(1, 7)]
+        done = list(swat.as_completed(futures, timeout=10))
+        self.assertEqual(len(done), 6)
+        self.assertEqual([len(x.result().Fetch) for x in futures], list(range(1, 7)))
+        self.assertTrue(futures[0].done())
+        self.assertTrue(futures[0].exception() is None)
+
+        called = []
+        futures[0].add_done_callback(called.append)
+        self.assertEqual(called, [futures[0]])
+
+        self.assertEqual(len(self.server.sessions), 4)
+        self.s.close()
+        self.assertEqual(len(self.server.sessions), 0)
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+
+
+if __name__ == '__main__':
+   from swat.utils.testing import runtests
+   runtests()
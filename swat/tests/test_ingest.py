@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import os
+import shutil
+import pandas as pd
+import swat
+import tempfile
+import swat.utils.testing as tm
+from swat.benchmarks.server import StandInServer
+
+
+class TestIngest(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.server = StandInServer(nrows=10, ncolumns=2).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'data.csv')
+        pd.DataFrame({'a': range(250), 'b': ['x%d' % i for i in range(250)]}) \
+            .to_csv(self.path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def _tables(self):
+        return self.server.sessions[self.s._session]['tables']
+
+    def _count_uploads(self):
+        uploads = []
+        upload = self.server._upload
+
+        def counter(*args):
+            uploads.append(args[1])
+            return upload(*args)
+
+        self.server._upload = counter
+        return uploads
+
+    def test_read_csv_chunks(self):
+        swat.options.cas.dataset.read_chunksize = 100
+
+        uploads = self._count_uploads()
+        tbl = self.s.read_csv(self.path, casout=dict(name='ingest'))
+
+        self.assertEqual(tbl.params['name'].upper(), 'INGEST')
+        self.assertEqual(len(uploads), 3)
+
+        # The chunks after the first are appended and dropped
+        self.assertEqual(self._tables(), {'INGEST': 250})
+
+    def test_read_csv_no_chunks(self):
+        swat.options.cas.dataset.read_chunksize = 0
+
+        uploads = self._count_uploads()
+        self.s.read_csv(self.path, casout=dict(name='ingest'))
+
+        self.assertEqual(len(uploads), 1)
+        self.assertEqual(self._tables(), {'INGEST': 250})
+
+    def test_read_csv_chunksize(self):
+        uploads = self._count_uploads()
+        self.s.read_csv(self.path, casout=dict(name='ingest'), chunksize=50)
+
+        self.assertEqual(len(uploads), 5)
+        self.assertEqual(self._tables(), {'INGEST': 250})
+
+    def test_read_csv_one_chunk(self):
+        swat.options.cas.dataset.read_chunksize = 1000
+
+        uploads = self._count_uploads()
+        self.s.read_csv(self.path, casout=dict(name='ingest'))
+
+        # Column types are left to the server as they are without chunks
+        self.assertEqual(len(uploads), 1)
+        self.assertTrue('vars' not in uploads[0]['importoptions'])
+        self.assertEqual(self._tables(), {'INGEST': 250})
+
+    def test_read_csv_type_mismatch(self):
+        pd.DataFrame({'a': list(range(150)) + ['x'] * 100}) \
+            .to_csv(self.path, index=False)
+
+        with self.assertRaises(swat.SWATError):
+            self.s.read_csv(self.path, casout=dict(name='ingest'), chunksize=100)
+
+        # The partial table is dropped
+        self.assertEqual(self._tables(), {})
+
+    def test_importoptions(self):
+        dframe = pd.DataFrame({'a': [1, 2], 'b': [1.5, 2.5], 'c': ['x', 'y'],
+                               'd': pd.to_datetime(['2020-01-01', '2020-01-02']),
+                               'e': [True, False]})
+        opts = self.s._chunked_importoptions(dframe)
+        self.assertEqual(opts['filetype'], 'csv')
+        self.assertEqual(opts['vars'], [dict(name='a', type='double'),
+                                        dict(name='b', type='double'),
+                                        dict(name='c', type='varchar'),
+                                        dict(name='d'),
+                                        dict(name='e', type='varchar')])
+
+
+if __name__ == '__main__':
+    tm.runtests()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import copy
+import pickle
+import swat
+import swat.utils.testing as tm
+from swat.benchmarks.server import StandInServer
+from swat.utils.lazy import LazyDict, LazyList
+
+
+class TestLazy(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.converted = []
+
+    def tearDown(self):
+        swat.reset_option()
+
+    def _convert(self, value):
+        self.converted.append(value)
+        if isinstance(value, dict):
+            return LazyDict(value, self._convert)
+        if isinstance(value, list):
+            return LazyList(value, self._convert)
+        return value * 10
+
+    def test_dict(self):
+        data = LazyDict({'a': 1, 'b': {'c': 2}, 'd': [3, 4]}, self._convert)
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(sorted(data.keys()), ['a', 'b', 'd'])
+        self.assertEqual(self.converted, [])
+
+        self.assertEqual(data['a'], 10)
+        self.assertEqual(data.a, 10)
+        self.assertEqual(self.converted, [1])
+
+        self.assertTrue(isinstance(data.b, LazyDict))
+        self.assertEqual(data.b.c, 20)
+        self.assertEqual(self.converted, [1, {'c': 2}, 2])
+
+        with self.assertRaises(AttributeError):
+            data.missing
+
+        data.e = 5
+        self.assertEqual(data['e'], 5)
+        del data['e']
+        self.assertFalse('e' in data)
+
+        self.assertEqual(data.to_dict(), {'a': 10, 'b': {'c': 20}, 'd': [30, 40]})
+        self.assertEqual(data, {'a': 10, 'b': {'c': 20}, 'd': [30, 40]})
+
+        self.assertEqual(copy.deepcopy(data), data.to_dict())
+        self.assertEqual(pickle.loads(pickle.dumps(data)), data.to_dict())
+        self.assertTrue(isinstance(pickle.loads(pickle.dumps(data)), dict))
+
+    def test_list(self):
+        data = LazyList([1, [2, 3], {'a': 4}], self._convert)
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(self.converted, [])
+
+        self.assertEqual(data[-3], 10)
+        self.assertEqual(data[1][1], 30)
+        self.assertEqual(data[2].a, 40)
+        self.assertEqual(data[1:], [[20, 30], {'a': 40}])
+
+        with self.assertRaises(IndexError):
+            data[3]
+
+        data.append(5)
+        self.assertEqual(data[3], 5)
+
+        self.assertEqual(data.to_list(), [10, [20, 30], {'a': 40}, 5])
+        self.assertEqual(data, [10, [20, 30], {'a': 40}, 5])
+        self.assertEqual(pickle.loads(pickle.dumps(data)), data.to_list())
+
+    def test_rest_results(self):
+        swat.options.cas.rest.lazy_results = True
+
+        with StandInServer(nrows=10, ncolumns=2) as server:
+            s = swat.CAS(server.url, username='user', password='password')
+
+            out = s.builtins.echo(a=dict(b=[1, 2, dict(c='x')], d=1.5))
+            self.assertTrue(isinstance(out['a'], LazyDict))
+            self.assertTrue(isinstance(out.a.b, LazyList))
+            self.assertEqual(out.a.b[2].c, 'x')
+            self.assertEqual(out.a.to_dict(), {'b': [1, 2, {'c': 'x'}], 'd': 1.5})
+
+            # Lazy results can be passed back as parameters
+            out2 = s.builtins.echo(x=out.a)
+            self.assertEqual(out2.x, {'b': [1, 2, {'c': 'x'}], 'd': 1.5})
+
+            swat.options.cas.rest.lazy_results = False
+
+            out = s.builtins.echo(a=dict(b=[1, 2]))
+            self.assertEqual(type(out['a']), dict)
+            self.assertEqual(type(out['a']['b']), list)
+
+            s.close()
+
+
+if __name__ == '__main__':
+    tm.runtests()
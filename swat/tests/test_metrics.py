@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import json
+import os
+import pandas as pd
+import socket
+import swat
+import tempfile
+import swat.utils.testing as tm
+import unittest
+from six.moves.urllib.request import urlopen
+from swat.benchmarks.server import StandInServer
+from swat.cas.results import CASResults
+
+
+class TestMetrics(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        swat.get_metrics().reset()
+        self.server = StandInServer(nrows=50, ncolumns=4).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+
+    def tearDown(self):
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+        swat.get_metrics().reset()
+
+    def test_disabled(self):
+        self.s.CASTable('DATA').fetch(to=10)
+        self.assertEqual(swat.get_metrics().to_dict(), {})
+
+    def test_counters(self):
+        swat.options.cas.metrics.enabled = True
+        metrics = swat.get_metrics()
+
+        self.s.CASTable('DATA').fetch(to=10)
+        self.s.CASTable('DATA').fetch(to=5)
+        self.s.upload_frame(pd.DataFrame({'a': range(20)}), casout=dict(name='up'))
+        with self.assertRaises(AttributeError):
+            self.s.retrieve('table.nosuchaction', _messagelevel='error')
+
+        out = metrics.to_dict()
+        fetch = (('action', 'table.fetch'),)
+        self.assertEqual(out['swat_actions_total'][fetch], 2)
+        self.assertEqual(out['swat_action_seconds'][fetch]['count'], 2)
+        self.assertEqual(out['swat_rows_fetched_total'][()], 15)
+        self.assertEqual(out['swat_rows_uploaded_total'][()], 20)
+        self.assertEqual(
+            out['swat_action_errors_total'][(('action', 'table.nosuchaction'),)], 1)
+        self.assertTrue(out['swat_bytes_sent_total'][()] > 0)
+        self.assertTrue(out['swat_bytes_received_total'][()] > 0)
+
+        text = metrics.to_prometheus()
+        self.assertTrue('swat_actions_total{action="table.fetch"} 2\n' in text)
+        self.assertTrue('swat_action_seconds_bucket{action="table.fetch",le="+Inf"} 2\n'
+                        in text)
+        self.assertTrue('# TYPE swat_action_seconds histogram\n' in text)
+
+    def test_slow_actions(self):
+        fdesc, log = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fdesc)
+
+        try:
+            swat.options.cas.metrics.enabled = True
+            swat.options.cas.metrics.slow_action_threshold = 1e-9
+            swat.options.cas.metrics.slow_action_log = log
+
+            self.s.CASTable('DATA').fetch(to=10)
+
+            item = swat.get_metrics().slow_actions[-1]
+            self.assertEqual(item['action'], 'table.fetch')
+            self.assertEqual(item['params']['table']['name'], 'DATA')
+            self.assertEqual(item['params']['to'], 10)
+
+            # Credentials are masked and long values are truncated
+            self.s.builtins.echo(authinfo=dict(password='secret'), code='x' * 5000,
+                                 token='abc', other=['a'])
+            item = swat.get_metrics().slow_actions[-1]
+            self.assertEqual(item['params']['authinfo'], '********')
+            self.assertEqual(item['params']['token'], '********')
+            self.assertEqual(item['params']['other'], ['a'])
+            self.assertTrue(len(item['params']['code']) < 1100)
+
+            with open(log) as infile:
+                self.assertEqual(json.loads(infile.readline())['action'],
+                                 'table.fetch')
+                self.assertFalse('secret' in infile.read())
+
+        finally:
+            os.remove(log)
+
+    def test_no_severity(self):
+        # Results without a disposition have no severity
+        get_results = self.s._get_results
+        self.s._get_results = lambda *args, **kwargs: CASResults()
+        try:
+            self.assertEqual(self.s.retrieve('builtins.echo').severity, None)
+            swat.options.cas.metrics.enabled = True
+            self.s.retrieve('builtins.echo')
+        finally:
+            self.s._get_results = get_results
+
+        errors = swat.get_metrics().to_dict().get('swat_action_errors_total', {})
+        self.assertEqual(errors, {})
+
+    def test_exporters(self):
+        swat.options.cas.metrics.enabled = True
+        metrics = swat.get_metrics()
+
+        fdesc, path = tempfile.mkstemp(suffix='.prom')
+        os.close(fdesc)
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(5)
+
+        try:
+            swat.options.cas.metrics.statsd_host = '127.0.0.1'
+            swat.options.cas.metrics.statsd_port = sock.getsockname()[1]
+            self.s.retrieve('builtins.echo', _messagelevel='error')
+            swat.reset_option('cas.metrics.statsd_host')
+
+            packets = {}
+            while 'swat.swat_action_seconds.builtins_echo' not in packets:
+                name, value = sock.recv(1024).decode('utf-8').split(':')
+                packets[name] = value
+            self.assertEqual(packets['swat.swat_actions_total.builtins_echo'], '1|c')
+            self.assertTrue(packets['swat.swat_bytes_sent_total'].endswith('|c'))
+
+            metrics.write_prometheus(path)
+            with open(path) as infile:
+                self.assertEqual(infile.read(), metrics.to_prometheus())
+
+            server = metrics.start_http_server(0, addr='127.0.0.1')
+            try:
+                body = urlopen('http://127.0.0.1:%d/metrics' %
+                               server.server_port).read().decode('utf-8')
+                self.assertTrue('swat_actions_total{action="builtins.echo"} 1' in body)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        finally:
+            sock.close()
+            os.remove(path)
+
+
+if __name__ == '__main__':
+   from swat.utils.testing import runtests
+   runtests()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import swat
+import swat.cas.pool as cas_pool
+import threading
+import time
+import swat.utils.testing as tm
+import unittest
+from swat.benchmarks.server import StandInServer
+
+
+class TestPool(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.server = StandInServer(nrows=20, ncolumns=2).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+
+    def tearDown(self):
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def test_checkout(self):
+        with swat.CASPool(self.s, min_size=2, max_size=3) as pool:
+            self.assertEqual(pool.stats, dict(size=2, idle=2, in_use=0, waiting=0))
+
+            conn = pool.checkout()
+            self.assertTrue(conn is not self.s)
+            self.assertNotEqual(conn._session, self.s._session)
+            self.assertEqual(len(conn.CASTable('DATA').fetch(to=5).Fetch), 5)
+            pool.checkin(conn)
+
+            # The most recently used session is reused
+            with pool.session() as conn2:
+                self.assertTrue(conn2 is conn)
+                self.assertEqual(pool.stats['in_use'], 1)
+
+            with self.assertRaises(swat.SWATError):
+                pool.checkin(conn)
+
+        self.assertEqual(pool.stats['size'], 0)
+        self.assertEqual(list(self.server.sessions), [self.s._session])
+
+        with self.assertRaises(swat.SWATError):
+            pool.checkout()
+
+    def test_wait(self):
+        pool = swat.CASPool(self.s, min_size=0, max_size=1, timeout=0.05)
+        try:
+            conn = pool.checkout()
+            with self.assertRaises(swat.SWATError):
+                pool.checkout()
+            self.assertEqual(pool.stats['waiting'], 0)
+
+            order = []
+
+            def worker(i):
+                with pool.session(timeout=10) as c:
+                    order.append((i, c))
+
+            threads = []
+            for i in range(3):
+                threads.append(threading.Thread(target=worker, args=(i,)))
+                threads[-1].start()
+                while pool.stats['waiting'] < i + 1:
+                    time.sleep(0.001)
+
+            pool.checkin(conn)
+            for thread in threads:
+                thread.join()
+
+            # Waiters are served in order, all with the same session
+            self.assertEqual([x[0] for x in order], [0, 1, 2])
+            self.assertTrue(all(x[1] is conn for x in order))
+            self.assertEqual(pool.stats['size'], 1)
+
+        finally:
+            pool.close()
+
+    def test_close_timeout(self):
+        pool = swat.CASPool(self.s, min_size=0, max_size=1, timeout=10)
+        conn = pool.checkout()
+        closing = threading.Event()
+        done = threading.Event()
+
+        class Event(object):
+            ''' Time out as soon as the pool starts closing '''
+
+            def wait(self, timeout):
+                closing.wait(10)
+                return False
+
+            def set(self):
+                pass
+
+        class Waiter(object):
+            ''' Give the waiting thread a chance to run during close '''
+
+            def __init__(self):
+                self.event = Event()
+                self._session = None
+
+            @property
+            def session(self):
+                return self._session
+
+            @session.setter
+            def session(self, value):
+                if value is cas_pool._CLOSED:
+                    closing.set()
+                    done.wait(0.2)
+                self._session = value
+
+        closer = threading.Thread(target=pool.close)
+        waiter = cas_pool._Waiter
+        cas_pool._Waiter = Waiter
+        timer = threading.Timer(0.05, closer.start)
+        try:
+            timer.start()
+            with self.assertRaises(swat.SWATError) as cm:
+                pool.checkout()
+            self.assertTrue('closed' in str(cm.exception))
+        finally:
+            done.set()
+            cas_pool._Waiter = waiter
+            timer.join()
+            closer.join()
+            pool.checkin(conn)
+
+        self.assertEqual(pool.stats['size'], 0)
+
+    def test_discard(self):
+        pool = swat.CASPool(self.s, min_size=1, max_size=1, max_lifetime=3600,
+                            health_check=0)
+        try:
+            conn = pool.checkout()
+            session = conn._session
+            pool.checkin(conn, discard=True)
+            self.assertFalse(session in self.server.sessions)
+            self.assertEqual(pool.stats['size'], 0)
+
+            # Sessions that fail the health check are replaced
+            conn = pool.checkout()
+            pool.checkin(conn)
+            del self.server.sessions[conn._session]
+            conn2 = pool.checkout()
+            self.assertTrue(conn2 is not conn)
+            pool.checkin(conn2)
+
+            # Expired sessions are replaced
+            pool.max_lifetime = 0
+            conn3 = pool.checkout()
+            self.assertTrue(conn3 is not conn2)
+            pool.checkin(conn3)
+            self.assertEqual(pool.stats['size'], 0)
+
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+   from swat.utils.testing import runtests
+   runtests()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import swat
+import swat.cas.rest.connection as rest
+import swat.utils.testing as tm
+from swat.benchmarks.server import StandInServer
+
+
+class TestPrepared(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.server = StandInServer(nrows=50, ncolumns=3).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+        self.fetches = []
+
+        handler = self.server._action_table_fetch
+
+        def record(session, params):
+            self.fetches.append(params)
+            return handler(session, params)
+
+        self.server._action_table_fetch = record
+
+    def tearDown(self):
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def test_prepare(self):
+        tbl = self.s.CASTable('DATA', vars=['c0', 'c2'])
+        fetch = self.s.prepare('table.fetch', table=tbl, index=False)
+
+        self.assertEqual(fetch.params, dict(table=dict(name='DATA', vars=['c0', 'c2']),
+                                            index=False, sastypes=False))
+
+        out = fetch(**{'from': 3, 'to': 5})
+        self.assertEqual(list(out['Fetch']['c0']), [6.0, 9.0, 12.0])
+        self.assertEqual(self.fetches[-1],
+                         {'table': {'name': 'DATA', 'vars': ['c0', 'c2']},
+                          'index': False, 'sastypes': False, 'from': 3, 'to': 5})
+
+        # Call parameters replace static parameters
+        out = fetch(from_=1, to=2, index=True)
+        self.assertEqual(self.fetches[-1]['index'], True)
+        self.assertEqual(self.fetches[-1]['from'], 1)
+
+        fetch(to=2, INDEX=True)
+        self.assertEqual(sorted(self.fetches[-1]), ['INDEX', 'sastypes', 'table', 'to'])
+
+        self.assertEqual(out.signature['name'], 'table.fetch')
+        self.assertTrue(repr(fetch).startswith("CASPreparedAction('table.fetch'"))
+
+    def test_serialize_once(self):
+        normalized = []
+        normalize = rest._normalize_params
+
+        def record(params):
+            normalized.append(sorted(params))
+            return normalize(params)
+
+        rest._normalize_params = record
+        try:
+            fetch = self.s.prepare('table.fetch', table='DATA',
+                                   sortby=[dict(name='c%d' % (x % 3)) for x in range(500)])
+            for i in range(3):
+                fetch(**{'from': i + 1, 'to': i + 1})
+        finally:
+            rest._normalize_params = normalize
+
+        # The static parameters (and each of their sort keys) are only
+        # normalized once
+        self.assertEqual(normalized.count(['sortby', 'table']), 1)
+        self.assertEqual(normalized.count(['name']), 501)
+        self.assertEqual(normalized.count(['from', 'to']), 3)
+        self.assertEqual(len(self.fetches), 3)
+        self.assertEqual(len(self.fetches[2]['sortby']), 500)
+        self.assertEqual(self.fetches[2]['from'], 3)
+
+    def test_cache(self):
+        swat.options.cas.cache.enabled = True
+        swat.options.cas.cache.actions = ['table.fetch']
+
+        fetch = self.s.prepare('table.fetch', table='DATA')
+        fetch(to=2)
+        fetch(to=2)
+        fetch(to=3)
+        self.assertEqual(len(self.fetches), 2)
+
+        # Static parameters are part of the key
+        self.s.prepare('table.fetch', table='DATA', index=False)(to=2)
+        self.assertEqual(len(self.fetches), 3)
+
+
+if __name__ == '__main__':
+    tm.runtests()
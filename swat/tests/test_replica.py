@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import numpy as np
+import pandas as pd
+import swat
+import swat.utils.testing as tm
+from swat.benchmarks.server import StandInServer
+from swat.cas import replica
+
+
+class TestReplica(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.server = StandInServer(nrows=50, ncolumns=4).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+        self.fetches = []
+
+        handler = self.server._action_table_fetch
+
+        def record(session, params):
+            self.fetches.append(params)
+            return handler(session, params)
+
+        self.server._action_table_fetch = record
+
+    def tearDown(self):
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def test_cache_local(self):
+        tbl = self.s.CASTable('DATA')
+        expected = pd.DataFrame(tbl.to_frame())
+
+        self.assertTrue(tbl.cache_local() is tbl)
+        del self.fetches[:]
+
+        self.assertTablesEqual(pd.DataFrame(tbl.head()), expected.head())
+        self.assertEqual(len(tbl), 50)
+
+        out = tbl.query('c0 > 100 and c1 ^= "value 30.1"').to_frame()
+        self.assertEqual(list(out['c0']), [104.0, 108.0, 112.0, 116.0, 124.0] +
+                         [float(x) for x in range(128, 200, 4)])
+        self.assertEqual(out.index[0], 0)
+        self.assertEqual(len(tbl.query('c0 < 20')), 5)
+
+        # Computed columns, using a new reference to the same table
+        tbl2 = self.s.CASTable('DATA')
+        tbl2['x'] = tbl2['c0'] * 2 + tbl2['c2'] / 2
+        out = tbl2.head(3)
+        self.assertEqual(list(out['x']), [1.0, 11.0, 21.0])
+        self.assertEqual(out.colinfo['x'].dtype, 'double')
+
+        self.assertEqual(list(tbl['c0'].nlargest(2)), [196.0, 192.0])
+        self.assertEqual(tbl['c1'].value_counts().sum(), 50)
+        self.assertEqual(len(tbl['c1'].unique()), 50)
+
+        self.assertEqual(self.fetches, [])
+        self.assertTrue(self.s.get_cache_stats()['replicas']['hits'] > 0)
+
+        # Functions are not supported locally
+        self.assertEqual(len(tbl.query('upcase(c1) = "VALUE 1.1"').head()), 5)
+        self.assertEqual(len(self.fetches), 1)
+
+        # Lengths that can change the values are applied by the server
+        tbl3 = self.s.CASTable('DATA', computedvars=['c'],
+                               computedvarsprogram="length c varchar(2); c = 'abc';")
+        tbl3.head()
+        self.assertEqual(len(self.fetches), 2)
+
+        tbl.uncache_local()
+        tbl.head()
+        self.assertEqual(len(self.fetches), 3)
+
+    def test_expressions(self):
+        frame = pd.DataFrame({'a': [1.0, np.nan, 3.0, 0.0],
+                              'b': ['x  ', None, 'y', 'x']})
+        columns = dict(a=frame['a'], b=frame['b'])
+
+        def evaluate(code):
+            return list(replica.evaluate(replica.compile_expression(code), columns))
+
+        # Missing values are less than any number
+        self.assertEqual(evaluate('a < 1'), [0.0, 1.0, 0.0, 1.0])
+        self.assertEqual(evaluate('A ge .'), [1.0, 1.0, 1.0, 1.0])
+        self.assertEqual(evaluate('not a'), [0.0, 1.0, 0.0, 1.0])
+
+        # Division by zero and arithmetic on missing values are missing
+        self.assertTrue(np.isnan(evaluate('a / a')[3]))
+        self.assertTrue(np.isnan(evaluate('-a + 1')[1]))
+
+        # Trailing blanks are ignored in comparisons
+        self.assertEqual(evaluate("b = 'x'"), [1.0, 0.0, 0.0, 1.0])
+        self.assertEqual(evaluate("b eq ''"), [0.0, 1.0, 0.0, 0.0])
+        self.assertEqual(evaluate("b not in ('x', 'y') or a in (3, -1)"),
+                         [0.0, 1.0, 1.0, 0.0])
+        self.assertEqual(evaluate('"b"n = "y" & 2 * a + 1 > 6'), [0.0, 0.0, 1.0, 0.0])
+
+        # Only length statements that keep the values are compiled
+        program = replica.compile_program('length c varchar(*); LENGTH d 8; c = b; d = a')
+        self.assertEqual([x[0] for x in program], ['c', 'd'])
+        for code in ["length c varchar(2); c = 'abc'", "length c $ 2; c = 'abc'",
+                     'length d 4; d = a', 'length; d = a']:
+            with self.assertRaises(replica._NotLocal):
+                replica.compile_program(code)
+
+        for code in ['abs(a) > 1', 'a ** 2', "b || 'x'", 'a > b', '1 < a < 3',
+                     "'01jan2020'd", 'a <> 1']:
+            with self.assertRaises(replica._NotLocal):
+                evaluate(code)
+
+    def test_invalidation(self):
+        tbl = self.s.CASTable('DATA').cache_local()
+        del self.fetches[:]
+
+        # Actions that update server state cause the table to be checked
+        self.s.table.droptable(name='OTHER')
+        tbl.head()
+        self.assertEqual(self.fetches, [])
+
+        self.server.nrows = 40
+        self.s.table.droptable(name='OTHER')
+        tbl.head()
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(self.s.get_cache_stats()['replicas']['entries'], 0)
+
+        # The table is checked after the interval
+        tbl.cache_local()
+        self.server.nrows = 50
+        swat.options.cas.table.replica_check_interval = 0
+        del self.fetches[:]
+        tbl.head()
+        self.assertEqual(len(self.fetches), 1)
+
+    def test_automatic(self):
+        tbl = self.s.CASTable('DATA')
+
+        swat.options.cas.table.replica_max_rows = 10
+        for i in range(5):
+            tbl.head()
+        self.assertEqual(len(self.fetches), 5)
+        self.assertEqual(self.s.get_cache_stats()['replicas']['entries'], 0)
+
+        # The table is copied once fetches have cost more than the copy
+        swat.options.cas.table.replica_max_rows = 100
+        for i in range(5):
+            tbl.head()
+        self.assertEqual(self.s.get_cache_stats()['replicas']['entries'], 1)
+        self.assertTrue(len(self.fetches) < 10)
+
+        nfetches = len(self.fetches)
+        tbl.head()
+        self.assertEqual(len(self.fetches), nfetches)
+
+        self.s.clear_cache()
+        self.assertEqual(self.s.get_cache_stats()['replicas']['entries'], 0)
+
+
+if __name__ == '__main__':
+    tm.runtests()
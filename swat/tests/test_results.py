@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import re
+import pandas as pd
+import six
+import sys
+import swat
+import swat.utils.testing as tm
+from swat.cas.results import CASResults
+from swat.dataframe import SASDataFrame, SASColumnSpec
+from swat.notebook import paging
+
+
+def _table(nrows, group=None):
+    attrs = {}
+    if group is not None:
+        attrs = {'ByVar1': 'g', 'ByVar1Value': group,
+                 'ByVar1ValueFormatted': '%s' % group, 'ByGroup': 'g=%s' % group}
+    colinfo = {'a': SASColumnSpec('a', dtype='double', format='BEST12.'),
+               'b': SASColumnSpec('b', dtype='varchar')}
+    return SASDataFrame(pd.DataFrame({'a': [float(x) for x in range(nrows)],
+                                      'b': ['x%d' % x for x in range(nrows)]},
+                                     columns=['a', 'b']),
+                        title='Table', attrs=attrs, colinfo=colinfo)
+
+
+def _bygroups(ngroups, nrows=3):
+    out = CASResults()
+    out['ByGroupInfo'] = _table(ngroups)
+    for i in range(ngroups):
+        out['ByGroup%d.Summary' % (i + 1)] = _table(nrows, group=i)
+        out['ByGroup%d.Stats' % (i + 1)] = _table(nrows, group=i)
+    return out
+
+
+class TestResults(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+
+    def tearDown(self):
+        swat.reset_option()
+
+    def test_get_group(self):
+        out = CASResults()
+        groups = [('Asia', 'ASIA', 4.0, '4 cyl'), ('ASIA', 'Other', 4.0, '4 cyl'),
+                  ('Asia', 'ASIA', 6.0, '6 cyl')]
+        for i, (raw1, fmt1, raw2, fmt2) in enumerate(groups):
+            table = _table(2)
+            table.attrs = {'ByVar1': 'Origin', 'ByVar1Value': raw1,
+                           'ByVar1ValueFormatted': fmt1,
+                           'ByVar2': 'Cylinders', 'ByVar2Value': raw2,
+                           'ByVar2ValueFormatted': fmt2}
+            out['ByGroup%d.Table%d' % (i + 1, i + 1)] = table
+
+        self.assertEqual(list(out.get_group(('Asia', 4))), ['Table1'])
+        self.assertTrue(out.get_group(('Asia', 4))['Table1'] is out['ByGroup1.Table1'])
+        self.assertEqual(list(out.get_group(Origin='Asia', Cylinders='6 cyl')),
+                         ['Table3'])
+
+        # Each By variable matches either its raw or its formatted value,
+        # so raw matches don't hide the formatted matches of other groups
+        self.assertEqual(list(out.get_group(('ASIA', 4))), ['Table1', 'Table2'])
+        self.assertEqual(list(out.get_group(('ASIA', '4 cyl'))), ['Table1', 'Table2'])
+        self.assertEqual(list(out.get_group(Cylinders=6, Origin='ASIA')), ['Table3'])
+
+        with self.assertRaises(KeyError):
+            out.get_group(('Europe', 4))
+
+    def test_render_bygroups(self):
+        swat.options.cas.display.max_bygroups = 5
+
+        out = _bygroups(50)
+        html = out._render_html_()
+
+        self.assertEqual(html.count('<h3 class="byline">'), 5)
+        self.assertEqual(html.count('<table class="sas-dataframe">'), 10)
+        self.assertTrue('45 By groups and 90 items not displayed' in html)
+        self.assertTrue('<td>g=49</td><td>ByGroup50.Summary, ByGroup50.Stats</td>'
+                        '<td>6</td>' in html)
+
+        # No kernel to fetch pages from
+        self.assertFalse('<button>' in html)
+
+        swat.options.cas.display.max_bygroups = 0
+        html = out._render_html_()
+        self.assertEqual(html.count('<h3 class="byline">'), 50)
+        self.assertFalse('cas-results-more' in html)
+
+    def test_render_pages(self):
+        swat.options.cas.display.max_bygroups = 5
+
+        out = _bygroups(12)
+        html = out._render_html_()
+        token = re.search(r'id="swat-results-(\d+)"', html).group(1)
+
+        page = paging.render_page(token)
+        self.assertEqual(page['next'], 5)
+        self.assertEqual(page['html'].count('<h3 class="byline">'), 5)
+        self.assertTrue('g=5' in page['html'])
+
+        page = paging.render_page(token, start=5)
+        self.assertEqual(page['next'], None)
+        self.assertEqual(page['html'].count('<h3 class="byline">'), 2)
+
+        del out
+        page = paging.render_page(token)
+        self.assertEqual(page['next'], None)
+        self.assertTrue('no longer available' in page['html'])
+
+    def test_render_budget(self):
+        swat.options.cas.display.max_bygroups = 0
+        swat.options.cas.display.max_html_rows = 10
+
+        out = CASResults()
+        out['First'] = _table(4)
+        out['Second'] = _table(20)
+        out['Third'] = _table(4)
+
+        html = out._render_html_()
+
+        # Formats are only applied to the visible rows
+        self.assertEqual(len(re.findall(r'<td class="varchar">', html)), 10)
+        self.assertTrue('&#8230; 14 more rows' in html)
+        self.assertTrue('1 items not displayed' in html)
+        self.assertTrue('<td>Third</td>' in html)
+
+        swat.options.cas.display.max_html_rows = 0
+        swat.options.cas.display.max_html_bytes = 100
+
+        html = out._render_html_()
+        self.assertEqual(html.count('<table class="sas-dataframe">'), 1)
+        self.assertTrue('2 items not displayed' in html)
+
+    def test_repr_html(self):
+        swat.options.cas.display.max_bygroups = 3
+
+        html = _bygroups(10)._repr_html_()
+
+        self.assertEqual(html.count('<div class="cas-results-key">'), 7)
+        self.assertTrue('7 By groups and 14 items not displayed' in html)
+
+    def test_z_show(self):
+        swat.options.cas.display.max_bygroups = 2
+
+        stdout = sys.stdout
+        sys.stdout = six.StringIO()
+        try:
+            _bygroups(6)._z_show_()
+            text = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+        self.assertEqual(text.count('%table '), 6)
+        self.assertTrue('4 By groups and 8 items not displayed' in text)
+        self.assertTrue('g=5\tByGroup6.Summary, ByGroup6.Stats\t6' in text)
+
+
+if __name__ == '__main__':
+    tm.runtests()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import pandas as pd
+import swat
+import threading
+import warnings
+import swat.utils.testing as tm
+import unittest
+from swat.benchmarks.server import StandInServer
+
+
+class TestSampling(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        warnings.simplefilter('ignore', FutureWarning)
+        self.server = StandInServer(nrows=100, ncolumns=2).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+        self.tables = self.server.sessions[self.s._session]['tables']
+
+    def tearDown(self):
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def test_uncached(self):
+        tbl = self.s.CASTable('DATA')
+        self.assertEqual(len(tbl.to_frame(sample_pct=0.1)), 10)
+        self.assertEqual(self.tables, {})
+        self.assertEqual(self.s.get_cache_stats()['samples']['entries'], 0)
+
+    def test_cached(self):
+        swat.options.cas.table.cache_samples = True
+        tbl = self.s.CASTable('DATA')
+
+        self.assertEqual(len(tbl.to_frame(sample_pct=0.1, sample_seed=1)), 10)
+        self.assertEqual(len(self.tables), 1)
+
+        # The same sample is reused
+        self.server.reset_stats()
+        self.assertEqual(len(tbl.to_frame(sample_pct=0.1, sample_seed=1)), 10)
+        self.assertEqual(self.server.stats['actions'], 1)
+        self.assertEqual(len(self.tables), 1)
+
+        # Different parameters create a new sample
+        self.assertEqual(len(tbl.to_frame(sample_pct=0.2, sample_seed=1)), 20)
+        self.assertEqual(len(tbl.to_frame(sample_pct=0.1, sample_seed=2)), 10)
+        self.assertEqual(len(self.tables), 3)
+
+        stats = self.s.get_cache_stats()['samples']
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 3, 3))
+
+        # Least recently used samples are dropped
+        swat.options.cas.table.max_cached_samples = 2
+        tbl.to_frame(sample_pct=0.3, sample_seed=1)
+        self.assertEqual(len(self.tables), 2)
+
+        # Updating server state drops the samples
+        self.s.upload_frame(pd.DataFrame({'a': range(5)}), casout=dict(name='up'))
+        self.assertEqual(list(self.tables), ['UP'])
+
+        tbl.to_frame(sample_pct=0.1, sample_seed=1)
+        self.assertEqual(len(self.tables), 2)
+        self.s.clear_cache()
+        self.assertEqual(list(self.tables), ['UP'])
+
+        tbl.to_frame(sample_pct=0.1, sample_seed=1)
+        self.assertEqual(len(self.tables), 2)
+        self.s.close()
+        self.assertEqual(list(self.tables), ['UP'])
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+
+    def test_unseeded(self):
+        swat.options.cas.table.cache_samples = True
+        samples = []
+        handler = self.server._action_sampling_srs
+
+        def record(session, params):
+            samples.append(params)
+            return handler(session, params)
+
+        self.server._action_sampling_srs = record
+
+        # Samples without a seed are different each time, so they are not reused
+        tbl = self.s.CASTable('DATA')
+        tbl.to_frame(sample_pct=0.1)
+        tbl.to_frame(sample_pct=0.1)
+        self.assertEqual(len(samples), 2)
+        self.assertEqual(self.tables, {})
+        self.assertEqual(self.s.get_cache_stats()['samples']['entries'], 0)
+
+    def test_pending_datastep(self):
+        swat.options.cas.table.cache_samples = True
+        swat.options.cas.table.lazy_datastep = True
+        cache = self.s._sample_cache
+
+        tbl = self.s.CASTable('DATA')
+        filled = tbl._apply_datastep('c0 = 0;')
+        self.assertTrue(filled._datastep_pipeline is not None)
+        self.assertEqual(filled.to_params(), tbl.to_params())
+
+        # The sample of a table with pending code is not cached with
+        # the sample of the original table
+        self.assertTrue(cache.get_key(tbl, 0.1, sample_seed=1) is not None)
+        self.assertTrue(cache.get_key(filled, 0.1, sample_seed=1) is None)
+
+    def test_busy_threads(self):
+        busy = self.s._sample_cache.busy
+        seen = []
+
+        def check():
+            seen.append(bool(busy))
+            with busy:
+                seen.append(bool(busy))
+
+        # The flag set in one thread is not seen or cleared by another
+        with busy:
+            thread = threading.Thread(target=check)
+            thread.start()
+            thread.join()
+            self.assertTrue(busy)
+            with busy:
+                self.assertTrue(busy)
+            self.assertTrue(busy)
+        self.assertFalse(busy)
+        self.assertEqual(seen, [False, True])
+
+
+if __name__ == '__main__':
+   from swat.utils.testing import runtests
+   runtests()
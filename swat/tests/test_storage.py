@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import json
+import os
+import shutil
+import sqlite3
+import numpy as np
+import pandas as pd
+import swat
+import tempfile
+import swat.utils.testing as tm
+import unittest
+from swat.benchmarks.server import StandInServer
+from swat.cas.storage import iter_chunks
+
+
+class TestStorage(tm.TestCase):
+
+    def setUp(self):
+        swat.reset_option()
+        swat.options.cas.print_messages = False
+        self.server = StandInServer(nrows=95, ncolumns=4).start()
+        self.s = swat.CAS(self.server.url, username='user', password='password')
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        self.s.close()
+        self.server.stop()
+        swat.reset_option()
+
+    def test_npy_memmap(self):
+        tbl = self.s.CASTable('DATA')
+        path = os.path.join(self.tmpdir, 'data')
+
+        data = tbl.to_disk(path, format='npy-memmap', chunksize=20)
+
+        self.assertTrue(isinstance(data, swat.CASDiskTable))
+        self.assertEqual(data.nrows, 95)
+        self.assertEqual(data.columns, ['c0', 'c1', 'c2', 'c3'])
+        self.assertTrue(isinstance(data['c0'], np.memmap))
+
+        expected = tbl.to_frame()
+        self.assertTablesEqual(data.to_frame(), pd.DataFrame(expected))
+        self.assertEqual(data['c3'][94], expected['c3'].iloc[94])
+
+        chunks = list(data.iter_frames())
+        self.assertEqual(sum(len(x) for x in chunks), 95)
+
+        # Reopen from the path
+        data = swat.CASDiskTable(path)
+        self.assertEqual(data.format, 'npy-memmap')
+        self.assertEqual(list(data.to_frame(columns=['c2']).columns), ['c2'])
+
+        with self.assertRaises(KeyError):
+            data['foo']
+
+    def test_npy_memmap_types(self):
+        # Add a date column (days since 1960) with a missing value
+        self.server._columns.append(('d', 'date'))
+        for i, row in enumerate(self.server._rows):
+            row.append(i == 3 and -2147483648 or 21915 + i)
+
+        tbl = self.s.CASTable('DATA')
+        path = os.path.join(self.tmpdir, 'data')
+        data = tbl.to_disk(path, format='npy-memmap', chunksize=20)
+
+        self.assertEqual(data['d'].dtype, np.dtype('M8[ns]'))
+        self.assertEqual(data['d'][0], np.datetime64('2020-01-01'))
+        self.assertEqual(data['d'][94], np.datetime64('2020-04-04'))
+        self.assertTrue(np.isnat(data['d'][3]))
+        self.assertEqual(data['c1'].dtype, np.dtype('U32'))
+        self.assertEqual(data['c1'][6], 'value 6.1')
+        self.assertTrue(pd.isnull(data.to_frame()['d'][3]))
+
+    def test_arrow(self):
+        tbl = self.s.CASTable('DATA')
+        for fmt in ['parquet', 'arrow-ipc']:
+            path = os.path.join(self.tmpdir, 'data.' + fmt)
+            try:
+                data = tbl.to_disk(path, format=fmt, chunksize=30)
+            except swat.SWATError as msg:
+                tm.TestCase.skipTest(self, '%s' % msg)
+            self.assertEqual(data.format, fmt)
+            self.assertEqual(data.nrows, 95)
+            self.assertEqual(len(list(data.iter_frames())), 4)
+            self.assertTablesEqual(data.to_frame(), pd.DataFrame(tbl.to_frame()))
+
+    def test_errors(self):
+        tbl = self.s.CASTable('DATA')
+        with self.assertRaises(ValueError):
+            tbl.to_disk(os.path.join(self.tmpdir, 'data'), format='csv')
+
+        # Partial output is removed
+        path = os.path.join(self.tmpdir, 'missing')
+        with self.assertRaises(swat.SWATError):
+            self.s.CASTable('MISSING').to_disk(path, format='npy-memmap')
+        self.assertFalse(os.path.exists(path))
+
+    def test_iter_chunks(self):
+        tbl = self.s.CASTable('DATA')
+        chunks = list(iter_chunks(tbl, chunksize=40))
+        self.assertEqual([len(x) for x in chunks], [40, 40, 15])
+        self.assertEqual(chunks[1].index[0], 40)
+
+        chunks = list(iter_chunks(tbl, chunksize=40, start=11, stop=60,
+                                  prefetch=False))
+        self.assertEqual([len(x) for x in chunks], [40, 10])
+
+        # Errors in the background fetch are raised by the iterator
+        with self.assertRaises(swat.SWATError):
+            list(iter_chunks(self.s.CASTable('MISSING'), chunksize=10))
+
+        # Stopping early ends the background fetch
+        for chunk in iter_chunks(tbl, chunksize=10):
+            break
+
+    def _record(self, action):
+        calls = []
+        handler = getattr(self.server, '_action_table_' + action)
+
+        def record(session, params):
+            calls.append(params)
+            return handler(session, params)
+
+        setattr(self.server, '_action_table_' + action, record)
+        return calls
+
+    def test_sorted_iteration(self):
+        fetches = self._record('fetch')
+        partitions = self._record('partition')
+
+        tbl = self.s.CASTable('DATA').sort_values(['c1', 'c0'])
+
+        # The table is sorted once and the chunks are fetched in order
+        chunks = list(iter_chunks(tbl, chunksize=40))
+        self.assertEqual([len(x) for x in chunks], [40, 40, 15])
+        self.assertEqual(len(partitions), 1)
+        self.assertEqual(partitions[0]['table']['orderby'],
+                         [dict(name='c1'), dict(name='c0')])
+        self.assertEqual(len(fetches), 4)
+        self.assertFalse([x for x in fetches if 'sortby' in x])
+
+        # The ordered copy is dropped
+        self.assertEqual(self.server.sessions[self.s._session]['tables'], {})
+
+        del fetches[:], partitions[:]
+        rows = list(tbl.itertuples(chunksize=30))
+        self.assertEqual(len(rows), 95)
+        self.assertEqual(len(partitions), 1)
+        self.assertFalse([x for x in fetches if 'sortby' in x])
+        self.assertEqual(self.server.sessions[self.s._session]['tables'], {})
+
+        # A single chunk is fetched with sortby
+        del fetches[:], partitions[:]
+        list(iter_chunks(tbl, chunksize=40, stop=30))
+        self.assertEqual(len(partitions), 0)
+        self.assertTrue(fetches[0]['sortby'])
+
+        # Descending keys can't be used in a table orderby
+        del fetches[:], partitions[:]
+        tbl = self.s.CASTable('DATA').sort_values('c1', ascending=False)
+        list(iter_chunks(tbl, chunksize=40))
+        self.assertEqual(len(partitions), 0)
+        self.assertTrue(fetches[0]['sortby'])
+
+    def test_export(self):
+        tbl = self.s.CASTable('DATA')
+        expected = pd.DataFrame(tbl.to_frame())
+
+        path = os.path.join(self.tmpdir, 'data.csv')
+        tbl.to_csv(path, chunksize=20)
+        self.assertTablesEqual(pd.read_csv(path, index_col=0), expected)
+
+        tbl.to_csv(path, chunksize=20, index=False, **{'from': 11, 'to': 50})
+        self.assertEqual(len(pd.read_csv(path)), 40)
+
+        path = os.path.join(self.tmpdir, 'data.json')
+        tbl.to_json(path, orient='records', lines=True, chunksize=30)
+        with open(path) as infile:
+            records = [json.loads(x) for x in infile]
+        self.assertEqual(len(records), 95)
+        self.assertEqual(records[94]['c3'], expected['c3'].iloc[94])
+
+        con = sqlite3.connect(':memory:')
+        tbl.to_sql('data', con, index=False, chunksize=25)
+        self.assertEqual(con.execute('select count(*) from data').fetchone()[0], 95)
+        con.close()
+
+        # Without chunksize, only the first max_rows_fetched rows are written
+        swat.options.cas.dataset.max_rows_fetched = 10
+        path = os.path.join(self.tmpdir, 'head.csv')
+        tbl.to_csv(path)
+        self.assertEqual(len(pd.read_csv(path)), 10)
+
+        try:
+            path = os.path.join(self.tmpdir, 'data.h5')
+            tbl.to_hdf(path, 'data', chunksize=20)
+            self.assertTablesEqual(pd.read_hdf(path, 'data'), expected)
+        except ImportError as msg:
+            tm.TestCase.skipTest(self, '%s' % msg)
+
+
+if __name__ == '__main__':
+   from swat.utils.testing import runtests
+   runtests()
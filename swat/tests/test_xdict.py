@@ -255,6 +255,69 @@ class TestXDict(tm.TestCase):
         self.assertTrue(w['c'] is not z['c'])
 #       self.assertTrue(w['c.three'] is not z['c.three'])
 
+    def test_share(self):
+        w = xadict(out1)
+        w['l'] = [1, 2, 3]
+
+        x = w._share()
+
+        self.assertEqual(w, x)
+        self.assertTrue(w is not x)
+
+        # Nested containers are shared until they are accessed
+        self.assertTrue(dict.__getitem__(w, 'c') is dict.__getitem__(x, 'c'))
+        self.assertTrue(dict.__getitem__(w, 'l') is dict.__getitem__(x, 'l'))
+
+        x['c.four.nest.double'] = 40
+        x.l.append(4)
+        x.a.one = 10
+        del x['b.two']
+
+        self.assertEqual(w, dict(out1, l=[1, 2, 3]))
+        self.assertEqual(x['c.four.nest.double'], 40)
+        self.assertEqual(x['c.three.nest'], 3)
+        self.assertEqual(x['l'], [1, 2, 3, 4])
+        self.assertEqual(x['a'], {'one': 10})
+        self.assertEqual(x['b'], {})
+
+        # Modifying the original does not affect the copy
+        y = w._share()
+        w['c']['three']['nest'] = 30
+        w.get('l').pop()
+        w.setdefault('a', {})['one'] = 100
+
+        self.assertEqual(y, dict(out1, l=[1, 2, 3]))
+        self.assertEqual(w['c.three.nest'], 30)
+        self.assertEqual(w['l'], [1, 2])
+        self.assertEqual(w['a.one'], 100)
+
+    def test_share_reads(self):
+        item = object()
+        w = xadict(out1)
+        w['l'] = [item, [1, 2]]
+
+        # Values from every read path are private to the dictionary
+        for read in [lambda x: dict(x), lambda x: dict(**x), lambda x: x.copy(),
+                     lambda x: dict(x.items()), lambda x: dict(zip(x, x.values()))]:
+            x = w._share()
+            values = read(x)
+            values['c']['three']['nest'] = 30
+            values['a']['one'] = 10
+            values['l'][1].append(3)
+            self.assertEqual(w, dict(out1, l=[item, [1, 2]]))
+            self.assertEqual(x['c.three.nest'], 30)
+            self.assertEqual(x['l'][1], [1, 2, 3])
+
+        # Only containers are copied, and nested dictionaries are
+        # shared again until they are used themselves
+        x = w._share()
+        self.assertTrue(x['l'][0] is item)
+        c = x['c']
+        self.assertTrue(dict.__getitem__(c, 'three') is
+                        dict.__getitem__(dict.__getitem__(w, 'c'), 'three'))
+        c['three']['nest'] = 300
+        self.assertEqual(w['c.three.nest'], 3)
+
     def test_attrs(self):
         x = xadict(out1)
 
@@ -144,6 +144,12 @@ try:
 except ImportError:
     OrderedDict = dict
 
+# Abstract base classes moved to collections.abc in Python 3
+try:
+    from collections.abc import Mapping, MutableMapping, MutableSequence
+except ImportError:
+    from collections import Mapping, MutableMapping, MutableSequence
+
 # Convert any string to native string type
 if PY3:
     a2n = a2u
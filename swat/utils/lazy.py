@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright SAS Institute
+#
+#  Licensed under the Apache License, Version 2.0 (the License);
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+'''
+Dictionaries and lists that convert their values on first access
+
+'''
+
+from __future__ import print_function, division, absolute_import, unicode_literals
+
+import copy
+from .compat import Mapping, MutableMapping, MutableSequence
+
+
+def to_python(value):
+    '''
+    Convert lazy containers to standard dictionaries and lists
+
+    Parameters
+    ----------
+    value : any
+        The value to convert
+
+    Returns
+    -------
+    any
+        `value` with all :class:`LazyDict` and :class:`LazyList` objects
+        replaced by dicts and lists
+
+    '''
+    if isinstance(value, LazyDict):
+        return value.to_dict()
+    if isinstance(value, LazyList):
+        return value.to_list()
+    return value
+
+
+class LazyDict(MutableMapping):
+    '''
+    Dictionary that converts values the first time they are accessed
+
+    Values are stored in their original form and passed through
+    `convert` the first time they are retrieved.  The converted value
+    is cached, so the conversion is only done once for each key.
+    Keys can also be accessed as attributes.
+
+    Parameters
+    ----------
+    data : dict
+        The unconverted values.  This dictionary is owned (and may be
+        modified) by the :class:`LazyDict`.
+    convert : callable
+        Function that converts one value
+
+    Returns
+    -------
+    :class:`LazyDict` object
+
+    '''
+
+    def __init__(self, data, convert):
+        super(LazyDict, self).__setattr__('_data', data)
+        super(LazyDict, self).__setattr__('_convert', convert)
+        super(LazyDict, self).__setattr__('_cache', {})
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        value = self._cache[key] = self._convert(self._data[key])
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._cache[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._cache.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __getattr__(self, key):
+        if key.startswith('_') and key.endswith('_'):
+            raise AttributeError(key)
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+    def __delattr__(self, key):
+        try:
+            del self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __dir__(self):
+        return [x for x in self._data if hasattr(x, 'isidentifier') and x.isidentifier()]
+
+    def __eq__(self, other):
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(to_python(other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        out = self.__eq__(other)
+        if out is NotImplemented:
+            return out
+        return not out
+
+    __hash__ = None
+
+    def __copy__(self):
+        out = type(self)(dict(self._data), self._convert)
+        out._cache.update(self._cache)
+        return out
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.to_dict(), memo)
+
+    def __reduce__(self):
+        return (dict, (self.to_dict(),))
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        '''
+        Convert all values and return a standard dictionary
+
+        Returns
+        -------
+        dict
+
+        '''
+        return dict((key, to_python(self[key])) for key in self._data)
+
+
+class LazyList(MutableSequence):
+    '''
+    List that converts items the first time they are accessed
+
+    Parameters
+    ----------
+    data : list
+        The unconverted items.  This list is owned (and may be
+        modified) by the :class:`LazyList`.
+    convert : callable
+        Function that converts one item
+
+    Returns
+    -------
+    :class:`LazyList` object
+
+    '''
+
+    # Marks an item that has not been converted yet
+    _missing = object()
+
+    def __init__(self, data, convert):
+        self._data = data
+        self._convert = convert
+        self._cache = [self._missing] * len(data)
+
+    def _get(self, idx):
+        ''' Return the converted item at a non-negative index '''
+        value = self._cache[idx]
+        if value is self._missing:
+            value = self._cache[idx] = self._convert(self._data[idx])
+        return value
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._get(i) for i in range(*idx.indices(len(self._data)))]
+        if idx < 0:
+            idx += len(self._data)
+        if idx < 0 or idx >= len(self._data):
+            raise IndexError('list index out of range')
+        return self._get(idx)
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            value = list(value)
+        self._data[idx] = value
+        self._cache[idx] = value
+
+    def __delitem__(self, idx):
+        del self._data[idx]
+        del self._cache[idx]
+
+    def __len__(self):
+        return len(self._data)
+
+    def insert(self, idx, value):
+        ''' Insert `value` before `idx` '''
+        self._data.insert(idx, value)
+        self._cache.insert(idx, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, LazyList)):
+            return self.to_list() == [to_python(x) for x in other]
+        return NotImplemented
+
+    def __ne__(self, other):
+        out = self.__eq__(other)
+        if out is NotImplemented:
+            return out
+        return not out
+
+    __hash__ = None
+
+    def __copy__(self):
+        out = type(self)(list(self._data), self._convert)
+        out._cache[:] = self._cache
+        return out
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.to_list(), memo)
+
+    def __reduce__(self):
+        return (list, (self.to_list(),))
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def to_list(self):
+        '''
+        Convert all items and return a standard list
+
+        Returns
+        -------
+        list
+
+        '''
+        return [to_python(self._get(i)) for i in range(len(self._data))]
@@ -53,6 +53,38 @@ def _is_compound_key(key, types=six.string_types + (six.text_type, six.binary_ty
     return isinstance(key, types) and '.' in key
 
 
+def _copy_shared(value):
+    '''
+    Copy a container value that is shared between xdicts
+
+    Nested xdicts are shared again rather than copied, so they are only
+    copied when they are accessed themselves.  Other containers are
+    copied one level at a time; values that are not containers are
+    never copied.
+
+    Parameters
+    ----------
+    value : any
+        The value to copy
+
+    Returns
+    -------
+    any
+
+    '''
+    if isinstance(value, xdict):
+        return value._share()
+    if isinstance(value, list):
+        if any(isinstance(x, (dict, list, set)) for x in value):
+            return type(value)([_copy_shared(x) for x in value])
+        return type(value)(value)
+    if isinstance(value, dict):
+        return type(value)((k, _copy_shared(v)) for k, v in six.iteritems(value))
+    if isinstance(value, set):
+        return type(value)(value)
+    return value
+
+
 class xdict(dict):
     '''
     Nested dictionary that allows setting of nested keys using '.' delimited strings
@@ -78,6 +110,9 @@ class xdict(dict):
 
     '''
 
+    # Keys whose container values are shared with another xdict
+    _shared_keys = frozenset()
+
     def __init__(self, *args, **kwargs):
         super(xdict, self).__init__()
         self.update(*args, **kwargs)
@@ -108,12 +143,93 @@ class xdict(dict):
 
     def __deepcopy__(self, memo):
         out = type(self)()
-        for key, value in six.iteritems(self):
+        for key, value in dict.items(self):
             if isinstance(value, (dict, list, tuple, set)):
                 value = copy.deepcopy(value)
             out[key] = value
         return out
 
+    def _share(self):
+        '''
+        Return a copy-on-write copy of the xdict
+
+        Only the top level of the xdict is copied.  Nested containers
+        are shared between `self` and the copy until they are accessed
+        through either object, at which point only that path is copied.
+        This makes copies of large parameter trees inexpensive when
+        most of the tree is never modified.
+
+        Returns
+        -------
+        xdict object
+
+        '''
+        out = type(self)()
+        dict.update(out, dict.items(self))
+        out.__dict__.update(self.__dict__)
+        shared = set(key for key, value in dict.items(self)
+                     if isinstance(value, (dict, list, set)))
+        super(xdict, out).__setattr__('_shared_keys', shared)
+        if shared:
+            super(xdict, self).__setattr__('_shared_keys',
+                                           set(self._shared_keys) | shared)
+        return out
+
+    def _unshare(self, key):
+        ''' Replace a shared container value with a private copy '''
+        value = _copy_shared(super(xdict, self).__getitem__(key))
+        super(xdict, self).__setitem__(key, value)
+        self._shared_keys.discard(key)
+        return value
+
+    def _unshare_all(self):
+        ''' Replace all shared container values with private copies '''
+        for key in list(self._shared_keys):
+            if super(xdict, self).__contains__(key):
+                self._unshare(key)
+
+    def __iter__(self):
+        # Defining __iter__ makes dict(x) and **x use keys() and
+        # __getitem__ rather than reading the shared values directly
+        return super(xdict, self).__iter__()
+
+    def items(self):
+        ''' Return the key/value pairs '''
+        self._unshare_all()
+        return super(xdict, self).items()
+
+    def values(self):
+        ''' Return the values '''
+        self._unshare_all()
+        return super(xdict, self).values()
+
+    def copy(self):
+        ''' Return a shallow copy as a dict '''
+        self._unshare_all()
+        return super(xdict, self).copy()
+
+    if six.PY2:
+
+        def iteritems(self):
+            ''' Return an iterator of the key/value pairs '''
+            self._unshare_all()
+            return super(xdict, self).iteritems()
+
+        def itervalues(self):
+            ''' Return an iterator of the values '''
+            self._unshare_all()
+            return super(xdict, self).itervalues()
+
+        def viewitems(self):
+            ''' Return a view of the key/value pairs '''
+            self._unshare_all()
+            return super(xdict, self).viewitems()
+
+        def viewvalues(self):
+            ''' Return a view of the values '''
+            self._unshare_all()
+            return super(xdict, self).viewvalues()
+
     @classmethod
     def from_json(cls, jsonstr):
         '''
@@ -140,6 +256,8 @@ class xdict(dict):
             value = type(self)(value)
         if _is_compound_key(key):
             return self._xset(key, value)
+        if key in self._shared_keys:
+            self._shared_keys.discard(key)
         return super(xdict, self).__setitem__(key, value)
 
     def _xset(self, key, value):
@@ -182,6 +300,8 @@ class xdict(dict):
                     default = None
                 self[key] = default
                 return default
+        if key in self._shared_keys and super(xdict, self).__contains__(key):
+            return self._unshare(key)
         return super(xdict, self).setdefault(key, *default)
 
     def __contains__(self, key):
@@ -196,6 +316,8 @@ class xdict(dict):
         ''' Get value stored at `key` '''
         if _is_compound_key(key):
             return self._xget(key)
+        if key in self._shared_keys:
+            return self._unshare(key)
         return super(xdict, self).__getitem__(key)
 
     def _xget(self, key, *default):
@@ -228,12 +350,16 @@ class xdict(dict):
         ''' Return keyed value, or `default` if missing '''
         if _is_compound_key(key):
             return self._xget(key, *default)
+        if key in self._shared_keys and super(xdict, self).__contains__(key):
+            return self._unshare(key)
         return super(xdict, self).get(key, *default)
 
     def __delitem__(self, key):
         ''' Deleted keyed item '''
         if _is_compound_key(key):
             return self._xdel(key)
+        if key in self._shared_keys:
+            self._shared_keys.discard(key)
         super(xdict, self).__delitem__(key)
 
     def _xdel(self, key):